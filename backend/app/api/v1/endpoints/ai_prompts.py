@@ -169,7 +169,11 @@ async def get_available_providers(
             
             # For OpenAI, also check legacy tenant.openai_api_key
             if provider.slug == "openai":
-                if current_tenant.openai_api_key:
+                # Cached principals carry no API keys; check the column directly
+                tenant_key_result = await db.execute(
+                    select(Tenant.openai_api_key).where(Tenant.id == current_tenant.id)
+                )
+                if tenant_key_result.scalar():
                     has_tenant_key = True
                 system_tenant_stmt = select(Tenant).where(
                     or_(Tenant.name == "System", Tenant.plan == "system")
@@ -203,6 +207,7 @@ async def get_available_providers(
 async def get_available_models(
     provider_id: str,
     current_user: User = Depends(get_current_user),
+    current_tenant: Tenant = Depends(get_current_tenant),
     db: AsyncSession = Depends(get_async_db)
 ):
     """Get list of available models for a provider"""
@@ -231,7 +236,7 @@ async def get_available_models(
             from app.core.ai_providers import create_provider
             from app.core.api_keys import get_provider_api_key
             
-            api_key = get_provider_api_key(db, current_user.tenant, provider.slug)
+            api_key = get_provider_api_key(db, current_tenant, provider.slug)
             if api_key:
                 provider_instance = create_provider(provider.slug, api_key, provider.base_url)
                 if provider_instance:
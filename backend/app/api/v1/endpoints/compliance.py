@@ -262,31 +262,30 @@ def get_sar_export(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail="Only super admins can export data for contacts"
             )
-        export = gdpr_service.generate_sar_export_for_person(
-            tenant_id=current_user.tenant_id,
-            contact_id=contact_id
-        )
+        target_user_id = None
     else:
         # Users can only export their own data unless they are super admins
         target_user_id = user_id if user_id and current_user.role.value == "super_admin" else current_user.id
-        export = gdpr_service.generate_sar_export_for_person(
-            tenant_id=current_user.tenant_id,
-            user_id=target_user_id
-        )
     
-    # If generate_document is True, create PDF and store in MinIO
+    # If generate_document is True, stream the export to MinIO and create the PDF.
+    # The response then carries a summary (first records + record_counts) and
+    # document_info.export_download_url points at the full JSON export.
     if generate_document:
-        document_info = gdpr_service.generate_and_store_sar_document(
-            sar_data=export,
+        export = gdpr_service.generate_and_store_sar_export(
             tenant_id=current_user.tenant_id,
             contact_id=contact_id,
-            user_id=user_id if user_id else (current_user.id if not contact_id else None)
+            user_id=target_user_id
         )
-        # Add document info to export
-        export["document_info"] = document_info
+        document_info = export["document_info"]
         export["download_url"] = document_info["download_url"]
         export["document_path"] = document_info["document_path"]
         export["sar_id"] = document_info["sar_id"]
+    else:
+        export = gdpr_service.generate_sar_export_for_person(
+            tenant_id=current_user.tenant_id,
+            contact_id=contact_id,
+            user_id=target_user_id
+        )
     
     return export
 
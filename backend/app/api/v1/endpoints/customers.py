@@ -17,8 +17,10 @@ from app.core.database import get_async_db
 from app.core.dependencies import get_current_user, get_current_tenant, check_permission
 from app.core.api_keys import get_api_keys
 from app.models.crm import Customer, CustomerStatus, BusinessSector, BusinessSize
+from app.models.customer_metrics import CustomerMetrics
 from app.models.tenant import User, Tenant
 from app.services.ai_analysis_service import AIAnalysisService
+from app.services.customer_metrics_service import CUSTOMER_METRIC_SORT_COLUMNS
 from app.services.storage_service import get_storage_service
 from fastapi.responses import Response, StreamingResponse
 
@@ -77,6 +79,8 @@ class CustomerResponse(BaseModel):
     conversion_probability: int | None = None
     next_scheduled_contact: datetime | None = None  # Next Point of Action (NPA)
     sla_breach_status: str | None = None  # 'none', 'warning', 'critical' - SLA breach status for customer's tickets
+    lifetime_value: float | None = None  # From the customer_metrics rollup (accepted quotes)
+    monthly_recurring_revenue: float | None = None  # From the customer_metrics rollup (active support contracts)
     
     class Config:
         from_attributes = True
@@ -221,6 +225,9 @@ async def list_customers(
     search: Optional[str] = None,
     is_competitor: Optional[bool] = None,
     exclude_leads: bool = True,  # By default, exclude leads from customers list
+    sort_by: Optional[str] = Query(None, regex="^(lifetime_value|mrr)$"),
+    min_lifetime_value: Optional[float] = Query(None, ge=0),
+    min_mrr: Optional[float] = Query(None, ge=0),
     current_user: User = Depends(get_current_user),
     db: AsyncSession = Depends(get_async_db)
 ):
@@ -230,6 +237,9 @@ async def list_customers(
     By default, excludes customers with status=LEAD (these are shown in the separate Leads view).
     Set exclude_leads=False to include leads in the customers list.
     
+    sort_by (lifetime_value / mrr, highest first) and the min_* filters use the
+    customer_metrics rollup, so no quotes or contracts are aggregated per request.
+    
     PERFORMANCE: Uses AsyncSession to prevent blocking the event loop.
     Database queries are executed asynchronously, allowing concurrent request handling.
     """
@@ -259,6 +269,17 @@ async def list_customers(
     if is_competitor is not None:
         stmt = stmt.where(Customer.is_competitor == is_competitor)
     
+    # Value sorting / filtering from the rollup (customers without a row count as zero)
+    if sort_by or min_lifetime_value is not None or min_mrr is not None:
+        stmt = stmt.outerjoin(CustomerMetrics, CustomerMetrics.customer_id == Customer.id)
+        if min_lifetime_value is not None:
+            stmt = stmt.where(func.coalesce(CustomerMetrics.lifetime_value, 0) >= min_lifetime_value)
+        if min_mrr is not None:
+            stmt = stmt.where(func.coalesce(CustomerMetrics.monthly_recurring_revenue, 0) >= min_mrr)
+        if sort_by:
+            sort_column = CUSTOMER_METRIC_SORT_COLUMNS[sort_by]
+            stmt = stmt.order_by(sort_column.desc().nulls_last(), Customer.id)
+    
     stmt = stmt.offset(skip).limit(limit)
     result = await db.execute(stmt)
     customers = result.scalars().all()
@@ -267,11 +288,21 @@ async def list_customers(
     customer_ids = [str(c.id) for c in customers]
     next_contacts = {}
     sla_breach_statuses = {}
+    customer_values = {}
     
     if customer_ids:
+        metrics_result = await db.execute(
+            select(
+                CustomerMetrics.customer_id,
+                CustomerMetrics.lifetime_value,
+                CustomerMetrics.monthly_recurring_revenue
+            ).where(CustomerMetrics.customer_id.in_(customer_ids))
+        )
+        for row in metrics_result:
+            customer_values[str(row.customer_id)] = row
+        
         from app.models.sales import SalesActivity
         from datetime import datetime, timezone
-        from sqlalchemy import func
         npa_stmt = select(
             SalesActivity.customer_id,
             func.min(SalesActivity.follow_up_date).label('next_contact')
@@ -330,6 +361,9 @@ async def list_customers(
         customer_dict = CustomerResponse.model_validate(customer).model_dump()
         customer_dict['next_scheduled_contact'] = next_contacts.get(str(customer.id))
         customer_dict['sla_breach_status'] = sla_breach_statuses.get(str(customer.id), 'none')
+        values = customer_values.get(str(customer.id))
+        customer_dict['lifetime_value'] = float(values.lifetime_value) if values else 0.0
+        customer_dict['monthly_recurring_revenue'] = float(values.monthly_recurring_revenue) if values else 0.0
         response.append(CustomerResponse(**customer_dict))
     
     return response
@@ -1224,6 +1258,7 @@ async def get_customer_timeline(
     customer_id: str,
     limit: int = Query(50, ge=1, le=200),
     activity_types: Optional[List[str]] = Query(None),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
     current_user: User = Depends(get_current_user),
     current_tenant: Tenant = Depends(get_current_tenant),
     db: AsyncSession = Depends(get_async_db)
@@ -1231,11 +1266,13 @@ async def get_customer_timeline(
     """
     Get unified activity timeline for customer
     
+    Newest first, one page per request; pass next_cursor back as cursor for
+    the next page (null on the last page).
+    
     PERFORMANCE: Uses AsyncSession to prevent blocking the event loop.
     """
     try:
-        from app.services.activity_timeline_service import ActivityTimelineService
-        from app.core.database import SessionLocal
+        from app.services.activity_timeline_service import ActivityTimelineService, InvalidCursorError
         
         # Verify customer exists
         stmt = select(Customer).where(
@@ -1250,23 +1287,23 @@ async def get_customer_timeline(
         if not customer:
             raise HTTPException(status_code=404, detail="Customer not found")
         
-        # Use sync session for timeline service
-        sync_db = SessionLocal()
+        timeline_service = ActivityTimelineService(db, current_user.tenant_id)
         try:
-            timeline_service = ActivityTimelineService(sync_db, current_user.tenant_id)
-            timeline = await timeline_service.get_customer_timeline(
+            page = await timeline_service.get_customer_timeline(
                 customer_id,
                 limit=limit,
-                activity_types=activity_types
+                activity_types=activity_types,
+                cursor=cursor
             )
-        finally:
-            sync_db.close()
+        except InvalidCursorError as e:
+            raise HTTPException(status_code=400, detail=str(e))
         
         return {
             "customer_id": customer_id,
             "customer_name": customer.company_name,
-            "timeline": timeline,
-            "count": len(timeline)
+            "timeline": page["entries"],
+            "count": len(page["entries"]),
+            "next_cursor": page["next_cursor"]
         }
     
     except HTTPException:
@@ -1296,7 +1333,6 @@ async def get_daily_summary(
     """
     try:
         from app.services.activity_timeline_service import ActivityTimelineService
-        from app.core.database import SessionLocal
         from datetime import datetime as dt
         
         # Verify customer exists
@@ -1320,16 +1356,11 @@ async def get_daily_summary(
             except ValueError:
                 raise HTTPException(status_code=400, detail="Invalid date format. Use ISO format.")
         
-        # Use sync session for timeline service
-        sync_db = SessionLocal()
-        try:
-            timeline_service = ActivityTimelineService(sync_db, current_user.tenant_id)
-            summary = await timeline_service.generate_daily_summary(
-                customer_id,
-                date=summary_date
-            )
-        finally:
-            sync_db.close()
+        timeline_service = ActivityTimelineService(db, current_user.tenant_id)
+        summary = await timeline_service.generate_daily_summary(
+            customer_id,
+            date=summary_date
+        )
         
         return summary
     
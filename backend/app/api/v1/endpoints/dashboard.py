@@ -4,11 +4,10 @@ Dashboard endpoints for CRM analytics and AI-powered insights
 """
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func, and_, or_, extract
+from sqlalchemy import select, func, and_, extract
 from typing import List, Dict, Any
 from pydantic import BaseModel
 from datetime import datetime, timedelta
-import calendar
 import asyncio
 
 from app.core.database import get_db, get_async_db
@@ -16,11 +15,10 @@ from app.core.dependencies import get_current_user, get_current_tenant
 from app.models.tenant import User, Tenant
 from app.models.crm import Customer, CustomerStatus, Contact
 from app.models.leads import Lead, LeadStatus
-from app.models.quotes import Quote, QuoteStatus
-from app.models.opportunities import Opportunity, OpportunityStage
-from app.models.helpdesk import Ticket, TicketStatus
-from app.models.sla_compliance import SLAComplianceRecord, SLABreachAlert
+from app.models.quotes import QuoteStatus
+from app.models.helpdesk import TicketStatus
 from app.services.ai_analysis_service import AIAnalysisService
+from app.services.dashboard_kpi_service import DashboardKPIService
 from app.core.api_keys import get_api_keys
 
 router = APIRouter()
@@ -112,198 +110,40 @@ async def get_dashboard(
     """
     Get comprehensive dashboard data
     
-    PERFORMANCE: Uses AsyncSession to prevent blocking the event loop.
-    All database queries are executed asynchronously, allowing Uvicorn
-    to serve other clients concurrently.
+    PERFORMANCE: Served from the tenant's cached KPI snapshot (see DashboardKPIService),
+    which is refreshed in the background after writes. On a cache miss the snapshot is
+    computed with one aggregate query per table instead of one per status/stage/month.
     """
     
     try:
         tenant_id = current_tenant.id
         
-        # Get discovery/leads count from Lead table (discoveries)
-        discovery_result = await db.execute(
-            select(func.count(Lead.id)).where(
-                and_(
-                    Lead.tenant_id == tenant_id,
-                    Lead.is_deleted == False
-                )
-            )
-        )
-        discovery_count = discovery_result.scalar() or 0
-        
-        print(f"🔍 Dashboard Debug - Tenant ID: {tenant_id}")
-        print(f"🔍 Dashboard Debug - Discovery Count: {discovery_count}")
-        
-        # Get customer counts by status
-        # Note: "total_leads" in frontend refers to discoveries from Lead table, not Customer.LEAD status
-        # Execute queries sequentially and fetch results immediately to avoid asyncpg connection conflicts
-        leads_result = await db.execute(select(func.count(Customer.id)).where(
-            and_(
-                Customer.tenant_id == tenant_id,
-                Customer.status == CustomerStatus.LEAD,
-                Customer.is_deleted == False
-            )
-        ))
-        leads_count = leads_result.scalar() or 0
-        
-        prospects_result = await db.execute(select(func.count(Customer.id)).where(
-            and_(
-                Customer.tenant_id == tenant_id,
-                Customer.status == CustomerStatus.PROSPECT,
-                Customer.is_deleted == False
-            )
-        ))
-        prospects_count = prospects_result.scalar() or 0
-        
-        opportunities_result = await db.execute(select(func.count(Customer.id)).where(
-            and_(
-                Customer.tenant_id == tenant_id,
-                Customer.status == CustomerStatus.OPPORTUNITY,
-                Customer.is_deleted == False
-            )
-        ))
-        opportunities_count = opportunities_result.scalar() or 0
-        
-        customers_result = await db.execute(select(func.count(Customer.id)).where(
-            and_(
-                Customer.tenant_id == tenant_id,
-                Customer.status == CustomerStatus.CUSTOMER,
-                Customer.is_deleted == False
-            )
-        ))
-        customers_count = customers_result.scalar() or 0
-        
-        cold_leads_result = await db.execute(select(func.count(Customer.id)).where(
-            and_(
-                Customer.tenant_id == tenant_id,
-                Customer.status == CustomerStatus.COLD_LEAD,
-                Customer.is_deleted == False
-            )
-        ))
-        cold_leads_count = cold_leads_result.scalar() or 0
-        
-        inactive_result = await db.execute(select(func.count(Customer.id)).where(
-            and_(
-                Customer.tenant_id == tenant_id,
-                Customer.is_deleted == False,
-                or_(
-                    Customer.status == CustomerStatus.INACTIVE,
-                    Customer.status == CustomerStatus.LOST
-                )
-            )
-        ))
-        inactive_count = inactive_result.scalar() or 0
-        
-        quotes_result = await db.execute(select(func.count(Quote.id)).where(
-            and_(
-                Quote.tenant_id == tenant_id,
-                Quote.is_deleted == False
-            )
-        ))
-        total_quotes = quotes_result.scalar() or 0
-        
-        # Get opportunity metrics (execute sequentially to avoid asyncpg conflicts)
-        # Use string values for enum comparison to avoid SQLAlchemy enum serialization issues
-        # Fetch scalar immediately after each query to avoid connection conflicts
-        active_opp_result = await db.execute(select(func.count(Opportunity.id)).where(
-            and_(
-                Opportunity.tenant_id == tenant_id,
-                Opportunity.is_deleted == False,
-                ~Opportunity.stage.in_(["closed_won", "closed_lost"])
-            )
-        ))
-        active_opportunities = active_opp_result.scalar() or 0
-        
-        qualified_result = await db.execute(select(func.count(Opportunity.id)).where(
-            and_(
-                Opportunity.tenant_id == tenant_id,
-                Opportunity.stage == "qualified",
-                Opportunity.is_deleted == False
-            )
-        ))
-        opportunities_qualified = qualified_result.scalar() or 0
-        
-        proposal_result = await db.execute(select(func.count(Opportunity.id)).where(
-            and_(
-                Opportunity.tenant_id == tenant_id,
-                Opportunity.stage == "proposal_sent",
-                Opportunity.is_deleted == False
-            )
-        ))
-        opportunities_proposal_sent = proposal_result.scalar() or 0
-        
-        closed_won_result = await db.execute(select(func.count(Opportunity.id)).where(
-            and_(
-                Opportunity.tenant_id == tenant_id,
-                Opportunity.stage == "closed_won",
-                Opportunity.is_deleted == False
-            )
-        ))
-        opportunities_closed_won = closed_won_result.scalar() or 0
-        
-        opp_value_result = await db.execute(select(func.sum(Opportunity.estimated_value)).where(
-            and_(
-                Opportunity.tenant_id == tenant_id,
-                Opportunity.is_deleted == False,
-                Opportunity.estimated_value.isnot(None)
-            )
-        ))
-        opp_value = opp_value_result.scalar()
-        opportunities_total_value = float(opp_value) if opp_value else 0.0
-        
-        # Get lifecycle distribution (using existing statuses - INACTIVE for dormant, LOST for closed lost)
+        # Cached KPI snapshot (aggregates are computed in a single pass per table)
+        snapshot = await DashboardKPIService(db, tenant_id).get_snapshot()
+        status_counts = snapshot["customer_status_counts"]
+        
+        # Note: "total_leads" in frontend refers to customers with LEAD status;
+        # discoveries from the Lead table are reported as total_discovery
+        discovery_count = snapshot["total_discovery"]
+        leads_count = status_counts["LEAD"]
+        prospects_count = status_counts["PROSPECT"]
+        opportunities_count = status_counts["OPPORTUNITY"]
+        customers_count = status_counts["CUSTOMER"]
+        cold_leads_count = status_counts["COLD_LEAD"]
+        inactive_count = status_counts["INACTIVE"] + status_counts["LOST"]
+        
+        # Lifecycle distribution (using existing statuses - INACTIVE for dormant, LOST for closed lost)
         lifecycle_distribution = {
             "LEAD": leads_count,
             "PROSPECT": prospects_count,
             "CUSTOMER": customers_count,
             "INACTIVE": inactive_count,  # Maps to DORMANT in lifecycle service
-            "LOST": 0  # Will be calculated separately if needed
+            "LOST": status_counts["LOST"]
         }
         
-        # Get LOST status count
-        lost_result = await db.execute(select(func.count(Customer.id)).where(
-            and_(
-                Customer.tenant_id == tenant_id,
-                Customer.status == CustomerStatus.LOST,
-                Customer.is_deleted == False
-            )
-        ))
-        lifecycle_distribution["LOST"] = lost_result.scalar() or 0
-        
-        # Execute remaining quote queries sequentially
-        # Use uppercase string literals to match database enum values
-        # Fetch scalar immediately after each query to avoid connection conflicts
-        quotes_pending_result = await db.execute(select(func.count(Quote.id)).where(
-            and_(
-                Quote.tenant_id == tenant_id,
-                Quote.is_deleted == False,
-                or_(
-                    Quote.status == "DRAFT",
-                    Quote.status == "SENT"
-                )
-            )
-        ))
-        quotes_pending = quotes_pending_result.scalar() or 0
-        
-        quotes_accepted_result = await db.execute(select(func.count(Quote.id)).where(
-            and_(
-                Quote.tenant_id == tenant_id,
-                Quote.status == "ACCEPTED",
-                Quote.is_deleted == False
-            )
-        ))
-        quotes_accepted = quotes_accepted_result.scalar() or 0
-        
-        revenue_result = await db.execute(select(func.sum(Quote.total_amount)).where(
-            and_(
-                Quote.tenant_id == tenant_id,
-                Quote.status == "ACCEPTED",
-                Quote.is_deleted == False
-            )
-        ))
-        revenue_value = revenue_result.scalar()
-        total_revenue = float(revenue_value) if revenue_value else 0.0
-        
+        quotes_pending = snapshot["quotes_pending"]
+        quotes_accepted = snapshot["quotes_accepted"]
+        total_revenue = snapshot["total_revenue"]
         avg_deal_value = (total_revenue / quotes_accepted) if quotes_accepted > 0 else 0.0
         
         # Conversion rate (leads to customers)
@@ -339,147 +179,44 @@ async def get_dashboard(
             )
         ]
         
-        # Opportunity pipeline stages (execute sequentially)
-        pipeline_stage_queries = []
-        stage_labels = ["Qualified", "Scoping", "Proposal Sent", "Negotiation", "Verbal Yes", "Closed Won"]
-        stages = [
-            OpportunityStage.QUALIFIED,
-            OpportunityStage.SCOPING,
-            OpportunityStage.PROPOSAL_SENT,
-            OpportunityStage.NEGOTIATION,
-            OpportunityStage.VERBAL_YES,
-            OpportunityStage.CLOSED_WON
+        # Opportunity pipeline stages
+        total_pipeline_value = sum(stage["total_value"] for stage in snapshot["pipeline_stages"])
+        pipeline_stages = [
+            PipelineStageItem(
+                stage=stage["stage"],
+                count=stage["count"],
+                total_value=stage["total_value"],
+                percentage=(stage["total_value"] / total_pipeline_value * 100) if total_pipeline_value > 0 else 0.0
+            )
+            for stage in snapshot["pipeline_stages"]
         ]
         
-        pipeline_stages = []
-        total_pipeline_value = 0.0
-        
-        # Execute queries sequentially and fetch results immediately
-        for idx, stage in enumerate(stages):
-            result = await db.execute(select(func.count(Opportunity.id), func.sum(Opportunity.estimated_value)).where(
-                and_(
-                    Opportunity.tenant_id == tenant_id,
-                    Opportunity.stage == stage.value,  # Use .value to get the string representation
-                    Opportunity.is_deleted == False
-                )
-            ))
-            # Fetch result immediately to avoid connection conflicts
-            row = result.first()
-            count = row[0] if row else 0
-            value = float(row[1]) if row and row[1] else 0.0
-            total_pipeline_value += value
-            
-            pipeline_stages.append(PipelineStageItem(
-                stage=stage_labels[idx],
-                count=count,
-                total_value=value,
-                percentage=0.0  # Will calculate after we have total
-            ))
-        
-        # Calculate percentages
-        for stage in pipeline_stages:
-            stage.percentage = (stage.total_value / total_pipeline_value * 100) if total_pipeline_value > 0 else 0.0
-        
-        # Recent activity (last 10 items)
-        recent_customers_result = await db.execute(
-            select(Customer).where(
-                and_(
-                    Customer.tenant_id == tenant_id,
-                    Customer.is_deleted == False
-                )
-            ).order_by(Customer.created_at.desc()).limit(5)
-        )
-        recent_customers = recent_customers_result.scalars().all()
-        
-        recent_activity = []
-        for customer in recent_customers:
-            recent_activity.append(RecentActivity(
-                id=str(customer.id),
+        # Recent activity
+        recent_activity = [
+            RecentActivity(
+                id=customer["id"],
                 type="customer",
-                title=f"New {customer.status.value}",
-                description=customer.company_name,
-                timestamp=customer.created_at.isoformat(),
+                title=f"New {customer['status']}",
+                description=customer["company_name"],
+                timestamp=customer["created_at"],
                 icon="user-plus"
-            ))
+            )
+            for customer in snapshot["recent_customers"]
+        ]
         
         # Monthly trends (last 6 months)
-        # Execute all monthly queries in parallel for better performance
-        monthly_trends = []
-        now = datetime.utcnow()
-        month_queries = []
-        month_starts = []
-        
-        for i in range(5, -1, -1):
-            month_date = now - timedelta(days=30 * i)
-            month_start = month_date.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
-            month_end = (month_start + timedelta(days=32)).replace(day=1) - timedelta(seconds=1)
-            month_starts.append(month_start)
-            
-            # Execute queries sequentially for each month and fetch results immediately
-            new_leads_result = await db.execute(select(func.count(Lead.id)).where(
-                and_(
-                    Lead.tenant_id == tenant_id,
-                    Lead.created_at >= month_start,
-                    Lead.created_at <= month_end,
-                    Lead.is_deleted == False
-                )
-            ))
-            new_leads = new_leads_result.scalar() or 0
-            
-            converted_result = await db.execute(select(func.count(Customer.id)).where(
-                and_(
-                    Customer.tenant_id == tenant_id,
-                    Customer.status == CustomerStatus.CUSTOMER,
-                    Customer.is_deleted == False,
-                    Customer.created_at >= month_start,
-                    Customer.created_at <= month_end
-                )
-            ))
-            converted = converted_result.scalar() or 0
-            
-            month_revenue_result = await db.execute(select(func.sum(Quote.total_amount)).where(
-                and_(
-                    Quote.tenant_id == tenant_id,
-                    Quote.status == "ACCEPTED",
-                    Quote.is_deleted == False,
-                    Quote.created_at >= month_start,
-                    Quote.created_at <= month_end
-                )
-            ))
-            month_revenue = float(month_revenue_result.scalar() or 0)
-            
-            month_queries.append((new_leads, converted, month_revenue))
-        
-        # Process results (already fetched as values)
-        for idx, (new_leads, converted, month_revenue) in enumerate(month_queries):
-            monthly_trends.append(MonthlyTrend(
-                month=calendar.month_abbr[month_starts[idx].month],
-                new_leads=new_leads,
-                converted=converted,
-                revenue=month_revenue
-            ))
+        monthly_trends = [MonthlyTrend(**trend) for trend in snapshot["monthly_trends"]]
         
         # AI-powered insights
         ai_insights = []
         
         # Insight 1: High-value leads
-        high_score_leads_result = await db.execute(
-            select(Customer).where(
-                and_(
-                    Customer.tenant_id == tenant_id,
-                    Customer.status.in_([CustomerStatus.LEAD, CustomerStatus.PROSPECT, CustomerStatus.OPPORTUNITY]),
-                    Customer.lead_score >= 70,
-                    Customer.is_deleted == False
-                )
-            ).limit(5)
-        )
-        high_score_leads = high_score_leads_result.scalars().all()
-        
+        high_score_leads = snapshot["high_score_leads"]
         if high_score_leads:
             ai_insights.append(AIInsight(
                 type="opportunity",
-                title=f"{len(high_score_leads)} High-Value Leads Require Attention",
-                description=f"You have {len(high_score_leads)} leads with scores above 70. These are prime conversion opportunities.",
+                title=f"{high_score_leads} High-Value Leads Require Attention",
+                description=f"You have {high_score_leads} leads with scores above 70. These are prime conversion opportunities.",
                 priority="high",
                 action="view_leads"
             ))
@@ -522,85 +259,7 @@ async def get_dashboard(
                 action="view_quotes"
             ))
         
-        # Top leads by score
-        top_leads_result = await db.execute(
-            select(Customer).where(
-                and_(
-                    Customer.tenant_id == tenant_id,
-                    Customer.is_deleted == False,
-                    Customer.status.in_([CustomerStatus.LEAD, CustomerStatus.PROSPECT, CustomerStatus.OPPORTUNITY])
-                )
-            ).order_by(Customer.lead_score.desc()).limit(10)
-        )
-        top_leads_query = top_leads_result.scalars().all()
-        
-        top_leads = [
-            {
-                "id": str(lead.id),
-                "company_name": lead.company_name,
-                "status": lead.status.value,
-                "lead_score": lead.lead_score or 0,
-                "created_at": lead.created_at.isoformat() if lead.created_at else None
-            }
-            for lead in top_leads_query
-        ]
-        
-        # SLA Metrics
-        # Get total tickets with SLA policies - fetch scalar immediately
-        # Use string literals for status comparison since database uses VARCHAR, not enum
-        from sqlalchemy import cast, String
-        total_tickets_result = await db.execute(
-            select(func.count(Ticket.id)).where(
-                and_(
-                    Ticket.tenant_id == tenant_id,
-                    Ticket.sla_policy_id.isnot(None),
-                    cast(Ticket.status, String).notin_(['closed', 'resolved'])
-                )
-            )
-        )
-        sla_total_tickets = total_tickets_result.scalar() or 0
-        
-        # Get active breach alerts (unacknowledged) - fetch scalar immediately
-        active_breaches_result = await db.execute(
-            select(func.count(SLABreachAlert.id)).where(
-                and_(
-                    SLABreachAlert.tenant_id == tenant_id,
-                    SLABreachAlert.acknowledged == False
-                )
-            )
-        )
-        sla_active_breaches = active_breaches_result.scalar() or 0
-        
-        # Get tickets at risk (80%+ of SLA time used) - fetch scalar immediately
-        # This is a simplified calculation - in production, you'd calculate based on actual SLA targets
-        tickets_at_risk_result = await db.execute(
-            select(func.count(Ticket.id)).where(
-                and_(
-                    Ticket.tenant_id == tenant_id,
-                    Ticket.sla_policy_id.isnot(None),
-                    cast(Ticket.status, String).notin_(['closed', 'resolved'])
-                )
-            )
-        )
-        sla_tickets_at_risk = tickets_at_risk_result.scalar() or 0  # Simplified - would need actual calculation
-        
-        # Calculate compliance rate from compliance records
-        compliance_records_result = await db.execute(
-            select(SLAComplianceRecord).where(
-                and_(
-                    SLAComplianceRecord.tenant_id == tenant_id,
-                    SLAComplianceRecord.created_at >= datetime.now() - timedelta(days=30)
-                )
-            )
-        )
-        compliance_records = compliance_records_result.scalars().all()
-        
-        sla_compliance_rate = 0.0
-        if compliance_records:
-            compliant_count = sum(1 for r in compliance_records if r.compliant)
-            sla_compliance_rate = round((compliant_count / len(compliance_records)) * 100, 1)
-        
-        print(f"🔍 Dashboard Debug - Returning stats: total_leads={discovery_count}, total_discovery={discovery_count}")
+        top_leads = snapshot["top_leads"]
         
         return DashboardResponse(
             stats=DashboardStats(
@@ -611,22 +270,22 @@ async def get_dashboard(
                 total_customers=customers_count,
                 total_cold_leads=cold_leads_count,
                 total_inactive=inactive_count,
-                total_quotes=total_quotes,
+                total_quotes=snapshot["total_quotes"],
                 quotes_pending=quotes_pending,
                 quotes_accepted=quotes_accepted,
                 total_revenue=total_revenue,
                 avg_deal_value=avg_deal_value,
                 conversion_rate=round(conversion_rate, 1),
-                active_opportunities=active_opportunities,
-                opportunities_qualified=opportunities_qualified,
-                opportunities_proposal_sent=opportunities_proposal_sent,
-                opportunities_closed_won=opportunities_closed_won,
-                opportunities_total_value=opportunities_total_value,
+                active_opportunities=snapshot["active_opportunities"],
+                opportunities_qualified=snapshot["opportunities_qualified"],
+                opportunities_proposal_sent=snapshot["opportunities_proposal_sent"],
+                opportunities_closed_won=snapshot["opportunities_closed_won"],
+                opportunities_total_value=snapshot["opportunities_total_value"],
                 lifecycle_distribution=lifecycle_distribution,
-                sla_compliance_rate=sla_compliance_rate,
-                sla_active_breaches=sla_active_breaches,
-                sla_tickets_at_risk=sla_tickets_at_risk,
-                sla_total_tickets=sla_total_tickets
+                sla_compliance_rate=snapshot["sla_compliance_rate"],
+                sla_active_breaches=snapshot["sla_active_breaches"],
+                sla_tickets_at_risk=snapshot["sla_tickets_at_risk"],
+                sla_total_tickets=snapshot["sla_total_tickets"]
             ),
             conversion_funnel=conversion_funnel,
             pipeline_stages=pipeline_stages,
@@ -435,7 +435,7 @@ async def list_tickets(
             
             # Apply pagination
             tickets = query.offset(offset).limit(limit).all()
-            
+        
         finally:
             sync_db.close()
         
@@ -588,7 +588,7 @@ async def get_agent_dashboard(
                 TicketTimeEntry.user_id == current_user.id,
                 TicketTimeEntry.created_at >= this_week_start
             ).scalar() or 0.0
-            
+        
         finally:
             sync_db.close()
         
@@ -692,6 +692,91 @@ async def detect_cross_customer_patterns(
         )
 
 
+@router.get("/tickets/{ticket_id}/similar")
+async def get_similar_tickets(
+    ticket_id: str,
+    limit: int = Query(5, ge=1, le=20),
+    same_customer: bool = Query(False),
+    current_user: User = Depends(get_current_user),
+    current_tenant: Tenant = Depends(get_current_tenant),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Find historical tickets similar to a ticket (embedding similarity, no AI call)
+    
+    PERFORMANCE: Tickets are read on the AsyncSession; the semantic index sync
+    and encoding run in a worker thread so they never block the event loop.
+    """
+    try:
+        from fastapi.concurrency import run_in_threadpool
+        from app.services.semantic_index_service import SemanticIndexService
+        
+        result = await db.execute(
+            select(Ticket.id, Ticket.subject, Ticket.description, Ticket.customer_id).where(
+                Ticket.id == ticket_id,
+                Ticket.tenant_id == current_tenant.id
+            )
+        )
+        ticket = result.first()
+        if not ticket:
+            raise HTTPException(status_code=404, detail="Ticket not found")
+        
+        # Over-fetch when filtering by customer after retrieval
+        fetch = limit * 5 if same_customer else limit
+        
+        def _search():
+            # The index is synced from the database with a sync session (worker thread only)
+            sync_db = SessionLocal()
+            try:
+                return SemanticIndexService(sync_db, current_tenant.id).similar_ticket_ids(
+                    ticket.id, ticket.subject, ticket.description, limit=fetch
+                )
+            finally:
+                sync_db.close()
+        
+        hits = await run_in_threadpool(_search)
+        similar = []
+        if hits:
+            result = await db.execute(
+                select(Ticket).where(
+                    Ticket.tenant_id == current_tenant.id,
+                    Ticket.id.in_([hit_id for hit_id, _ in hits])
+                )
+            )
+            by_id = {similar_ticket.id: similar_ticket for similar_ticket in result.scalars().all()}
+            missing = [hit_id for hit_id, _ in hits if hit_id not in by_id]
+            if missing:
+                # Deleted since they were indexed
+                SemanticIndexService.forget_tenant_tickets(current_tenant.id, missing)
+            for hit_id, score in hits:
+                similar_ticket = by_id.get(hit_id)
+                if similar_ticket is None or (same_customer and similar_ticket.customer_id != ticket.customer_id):
+                    continue
+                similar.append({
+                    "id": similar_ticket.id,
+                    "ticket_number": similar_ticket.ticket_number,
+                    "subject": similar_ticket.subject,
+                    "status": similar_ticket.status.value if similar_ticket.status else None,
+                    "customer_id": similar_ticket.customer_id,
+                    "created_at": similar_ticket.created_at.isoformat() if similar_ticket.created_at else None,
+                    "similarity_score": round(score, 3)
+                })
+                if len(similar) == limit:
+                    break
+        
+        return {"ticket_id": ticket_id, "similar_tickets": similar}
+    except HTTPException:
+        raise
+    except Exception as e:
+        import logging
+        logger = logging.getLogger(__name__)
+        logger.error(f"Error finding similar tickets: {e}", exc_info=True)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error finding similar tickets: {str(e)}"
+        )
+
+
 @router.get("/tickets/{ticket_id}")
 async def get_ticket(
     ticket_id: str,
@@ -2227,71 +2312,76 @@ async def export_helpdesk_analytics(
     start_date: date = Query(..., description="Start date"),
     end_date: date = Query(..., description="End date"),
     format: str = Query("csv", regex="^(csv|pdf|excel)$", description="Export format"),
-    report_type: str = Query("overview", regex="^(overview|agents|customers|resolution)$", description="Report type"),
+    report_type: str = Query("overview", regex="^(overview|agents|customers|resolution|tickets)$", description="Report type"),
+    background: bool = Query(False, description="Generate in the background and return a task id (CSV/Excel)"),
     current_user: User = Depends(get_current_user),
     current_tenant: Tenant = Depends(get_current_tenant),
     db: AsyncSession = Depends(get_async_db)
 ):
-    """Export helpdesk analytics report"""
+    """
+    Export helpdesk analytics report
+    
+    CSV and Excel are streamed from a server-side cursor rather than built in
+    memory. Ticket exports above EXPORT_BACKGROUND_ROW_THRESHOLD rows (or any
+    CSV/Excel export with background=true) are generated to storage by a
+    Celery task; poll /analytics/export/status/{task_id} for the download link.
+    The per-ticket report is not available as PDF.
+    """
     try:
-        from app.services.report_export_service import ReportExportService
-        from fastapi.responses import Response
+        import asyncio
+        from app.core.caching import set_cache
+        from app.core.config import settings
+        from app.services.helpdesk_export_service import QUERY_REPORT_TYPES, export_query, ticket_count_query
+        from app.services.report_export_service import (
+            CSV_MEDIA_TYPE, EXCEL_MEDIA_TYPE, PDF_MEDIA_TYPE, ReportExportService, stream_query_rows
+        )
+        from fastapi.responses import StreamingResponse
+        from datetime import timezone as tz
         
         export_service = ReportExportService()
-        
-        # Load data based on report type
-        data = []
         summary = {
             "Period": f"{start_date} to {end_date}",
             "Report Type": report_type
         }
-        
-        # Import the data fetching functions (they're in the same file)
-        # We'll duplicate the logic here to avoid circular imports
-        from sqlalchemy import func, case, extract
-        from app.models.helpdesk import Ticket
-        from app.models.tenant import User
-        from app.models.crm import Customer
-        from datetime import timezone as tz
+        filename = f"helpdesk_analytics_{start_date}_{end_date}"
         
         start_dt = datetime.combine(start_date, datetime.min.time()).replace(tzinfo=tz.utc)
         end_dt = datetime.combine(end_date, datetime.max.time()).replace(tzinfo=tz.utc)
-        
-        if report_type == "overview":
-            # Get volume trends - use cast to String to avoid enum type issues
-            from sqlalchemy import String, cast
-            date_expr = func.date(Ticket.created_at).label('period')
-            volume_stmt = select(
-                date_expr,
-                func.count(Ticket.id).label('total_tickets'),
-                func.count(case((cast(Ticket.status, String) == "OPEN", 1))).label('open'),
-                func.count(case((cast(Ticket.status, String) == "IN_PROGRESS", 1))).label('in_progress'),
-                func.count(case((cast(Ticket.status, String) == "RESOLVED", 1))).label('resolved'),
-                func.count(case((cast(Ticket.status, String) == "CLOSED", 1))).label('closed')
-            ).where(
-                and_(
-                    Ticket.tenant_id == current_tenant.id,
-                    Ticket.created_at >= start_dt,
-                    Ticket.created_at <= end_dt
+        streamable = report_type in QUERY_REPORT_TYPES
+        
+        if background and (format == "pdf" or not streamable):
+            raise HTTPException(status_code=400, detail="Background export is available for CSV and Excel query reports")
+        if format == "pdf" and report_type == "tickets":
+            # One row per ticket is unbounded and PDF tables are built in memory
+            raise HTTPException(status_code=400, detail="The tickets report is available as CSV or Excel")
+        
+        if streamable and format != "pdf":
+            queue = background
+            if not queue and report_type == "tickets":
+                ticket_count = (await db.execute(ticket_count_query(current_tenant.id, start_dt, end_dt))).scalar() or 0
+                queue = ticket_count > settings.EXPORT_BACKGROUND_ROW_THRESHOLD
+            if queue:
+                from app.tasks.report_export_tasks import export_helpdesk_report_task
+                task = export_helpdesk_report_task.delay(
+                    current_tenant.id, report_type, start_date.isoformat(), end_date.isoformat(), format
                 )
-            ).group_by(func.date(Ticket.created_at)).order_by(func.date(Ticket.created_at))
-            
-            volume_result = await db.execute(volume_stmt)
-            for row in volume_result.all():
-                data.append({
-                    "Period": row.period.isoformat() if hasattr(row.period, 'isoformat') else str(row.period),
-                    "Total Tickets": row.total_tickets or 0,
-                    "Open": row.open or 0,
-                    "In Progress": row.in_progress or 0,
-                    "Resolved": row.resolved or 0,
-                    "Closed": row.closed or 0
-                })
+                # Status lookups are only answered for the tenant that queued the export
+                await set_cache(export_task_owner_key(task.id), current_tenant.id, ttl=settings.EXPORT_DOWNLOAD_URL_TTL)
+                return {
+                    "status": "queued",
+                    "task_id": task.id,
+                    "message": "Export is being generated. Check /helpdesk/analytics/export/status/{task_id} for the download link."
+                }
         
-        elif report_type == "agents":
-            # Get agent performance from SLA endpoint logic
+        if streamable:
+            stmt, mapper = export_query(report_type, current_tenant.id, start_dt, end_dt)
+            data = None
+        else:
+            # Agent performance comes from the SLA endpoint logic
             from app.api.v1.endpoints.sla import get_sla_performance_by_agent
             agent_perf_response = await get_sla_performance_by_agent(start_date, end_date, current_user, current_tenant, db)
             
+            data = []
             for agent in agent_perf_response.get('performance_by_agent', []):
                 data.append({
                     "Agent": agent['agent_name'],
@@ -2303,89 +2393,24 @@ async def export_helpdesk_analytics(
                     "Res Compliance": f"{agent['resolution']['compliance_rate']}%"
                 })
         
-        elif report_type == "customers":
-            # Get customer performance
-            customer_stmt = select(
-                Ticket.customer_id,
-                Customer.company_name.label('customer_name'),
-                func.count(Ticket.id).label('total_tickets'),
-                func.avg(extract('epoch', Ticket.resolved_at - Ticket.created_at) / 3600).label('avg_resolution_hours'),
-                func.avg(extract('epoch', Ticket.first_response_at - Ticket.created_at) / 3600).label('avg_first_response_hours'),
-                func.sum(func.cast(Ticket.sla_first_response_breached, int)).label('fr_breaches'),
-                func.sum(func.cast(Ticket.sla_resolution_breached, int)).label('res_breaches')
-            ).join(
-                Customer, Ticket.customer_id == Customer.id, isouter=True
-            ).where(
-                and_(
-                    Ticket.tenant_id == current_tenant.id,
-                    Ticket.created_at >= start_dt,
-                    Ticket.created_at <= end_dt,
-                    Ticket.customer_id.isnot(None)
-                )
-            ).group_by(
-                Ticket.customer_id,
-                Customer.company_name
-            ).order_by(
-                func.count(Ticket.id).desc()
-            ).limit(100)
-            
-            customer_result = await db.execute(customer_stmt)
-            for row in customer_result.all():
-                total = row.total_tickets or 0
-                fr_breaches = row.fr_breaches or 0
-                res_breaches = row.res_breaches or 0
-                
-                data.append({
-                    "Customer": row.customer_name or 'Unknown',
-                    "Total Tickets": total,
-                    "Avg Resolution (hrs)": round(row.avg_resolution_hours or 0, 2),
-                    "Avg First Response (hrs)": round(row.avg_first_response_hours or 0, 2),
-                    "FR Breaches": fr_breaches,
-                    "FR Compliance": f"{round(((total - fr_breaches) / total * 100) if total > 0 else 100, 2)}%",
-                    "Res Breaches": res_breaches,
-                    "Res Compliance": f"{round(((total - res_breaches) / total * 100) if total > 0 else 100, 2)}%"
-                })
-        
-        elif report_type == "resolution":
-            # Get resolution analytics
-            group_expr = Ticket.priority
-            resolution_stmt = select(
-                group_expr.label('group_value'),
-                func.count(Ticket.id).label('total_tickets'),
-                func.avg(extract('epoch', Ticket.resolved_at - Ticket.created_at) / 3600).label('avg_resolution_hours'),
-                func.avg(extract('epoch', Ticket.first_response_at - Ticket.created_at) / 3600).label('avg_first_response_hours'),
-                func.min(extract('epoch', Ticket.resolved_at - Ticket.created_at) / 3600).label('min_resolution_hours'),
-                func.max(extract('epoch', Ticket.resolved_at - Ticket.created_at) / 3600).label('max_resolution_hours')
-            ).where(
-                and_(
-                    Ticket.tenant_id == current_tenant.id,
-                    Ticket.created_at >= start_dt,
-                    Ticket.created_at <= end_dt,
-                    Ticket.resolved_at.isnot(None)
-                )
-            ).group_by(group_expr)
-            
-            resolution_result = await db.execute(resolution_stmt)
-            for row in resolution_result.all():
-                data.append({
-                    "Priority": row.group_value.value if hasattr(row.group_value, 'value') else str(row.group_value),
-                    "Total Tickets": row.total_tickets or 0,
-                    "Avg Resolution (hrs)": round(row.avg_resolution_hours or 0, 2),
-                    "Avg First Response (hrs)": round(row.avg_first_response_hours or 0, 2),
-                    "Min Resolution (hrs)": round(row.min_resolution_hours or 0, 2),
-                    "Max Resolution (hrs)": round(row.max_resolution_hours or 0, 2)
-                })
-        
         # Generate export
         if format == "csv":
-            output = export_service.export_to_csv(data, "helpdesk_analytics")
-            return Response(
-                content=output.read(),
-                media_type="text/csv",
-                headers={"Content-Disposition": f'attachment; filename="helpdesk_analytics_{start_date}_{end_date}.csv"'}
+            # The request's session is closed before the body is sent, so
+            # stream_query_rows opens its own
+            chunks = export_service.iter_csv(data) if data is not None else export_service.aiter_csv(
+                stream_query_rows(stmt, mapper, current_tenant.id)
+            )
+            return StreamingResponse(
+                chunks,
+                media_type=CSV_MEDIA_TYPE,
+                headers={"Content-Disposition": f'attachment; filename="{filename}.csv"'}
             )
         elif format == "pdf":
-            output = export_service.export_to_pdf(
+            if data is None:
+                result = await db.execute(stmt)
+                data = [mapper(row) for row in result.all()]
+            output = await asyncio.to_thread(
+                export_service.export_to_pdf,
                 f"Helpdesk Analytics Report - {report_type.title()}",
                 data,
                 summary,
@@ -2393,16 +2418,22 @@ async def export_helpdesk_analytics(
             )
             return Response(
                 content=output.read(),
-                media_type="application/pdf",
-                headers={"Content-Disposition": f'attachment; filename="helpdesk_analytics_{start_date}_{end_date}.pdf"'}
+                media_type=PDF_MEDIA_TYPE,
+                headers={"Content-Disposition": f'attachment; filename="{filename}.pdf"'}
             )
         else:  # excel
-            output = export_service.export_to_excel(data, summary, "helpdesk_analytics")
-            return Response(
-                content=output.read(),
-                media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-                headers={"Content-Disposition": f'attachment; filename="helpdesk_analytics_{start_date}_{end_date}.xlsx"'}
+            # Workbook cells are built and saved in worker threads, off the event loop
+            if data is not None:
+                output = await asyncio.to_thread(export_service.write_excel_file, data, summary)
+            else:
+                output = await export_service.awrite_excel_file(stream_query_rows(stmt, mapper, current_tenant.id), summary)
+            return StreamingResponse(
+                export_service.file_chunks(output),
+                media_type=EXCEL_MEDIA_TYPE,
+                headers={"Content-Disposition": f'attachment; filename="{filename}.xlsx"'}
             )
+    except HTTPException:
+        raise
     except Exception as e:
         import logging
         logger = logging.getLogger(__name__)
@@ -2410,6 +2441,51 @@ async def export_helpdesk_analytics(
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.get("/analytics/export/status/{task_id}")
+async def get_helpdesk_export_status(
+    task_id: str,
+    current_user: User = Depends(get_current_user),
+    current_tenant: Tenant = Depends(get_current_tenant)
+):
+    """Get the status (and download link) of a background analytics export"""
+    from celery.result import AsyncResult
+    from app.core.caching import get_cache
+    from app.core.celery_app import celery_app
+    
+    # Unknown and other tenants' task ids look the same (no state or error text leaks)
+    if await get_cache(export_task_owner_key(task_id)) != current_tenant.id:
+        raise HTTPException(status_code=404, detail="Export not found")
+    
+    task_result = AsyncResult(task_id, app=celery_app)
+    
+    if task_result.ready():
+        if task_result.successful():
+            result = task_result.result or {}
+            if result.get('tenant_id') != current_tenant.id:
+                raise HTTPException(status_code=404, detail="Export not found")
+            return {
+                "status": "completed",
+                "result": result
+            }
+        else:
+            import logging
+            logging.getLogger(__name__).warning(f"Helpdesk export {task_id} failed: {task_result.result}")
+            return {
+                "status": "failed",
+                "error": "Export generation failed"
+            }
+    else:
+        return {
+            "status": "processing",
+            "task_id": task_id
+        }
+
+
+def export_task_owner_key(task_id: str) -> str:
+    """Cache key recording which tenant queued a background export"""
+    return f"helpdesk_export_task:{task_id}"
+
+
 @router.post("/tickets/{ticket_id}/knowledge-base/generate-answer")
 async def generate_answer_from_kb(
     ticket_id: str,
@@ -2992,7 +3068,9 @@ async def agent_chat_with_ticket(
     """Agent chatbot - allows agents to ask questions about tickets with attachments and log files (uses Celery)"""
     from app.core.database import SessionLocal
     from app.models.helpdesk import Ticket, TicketAgentChat
+    from app.services.log_triage_service import compact_log_text
     from app.tasks.ticket_agent_chat_tasks import agent_chat_task
+    import asyncio
     import uuid
     
     sync_db = SessionLocal()
@@ -3011,6 +3089,14 @@ async def agent_chat_with_ticket(
         if not messages_list or messages_list[-1].get("role") != "user":
             raise HTTPException(status_code=400, detail="Last message must be from user")
         
+        # Digest long logs here so the stored message and the task payload stay small
+        log_files = None
+        if request.log_files:
+            log_files = [
+                await asyncio.to_thread(compact_log_text, content, f"Log File {idx}")
+                for idx, content in enumerate(request.log_files, 1)
+            ]
+        
         # Save user message to database
         user_message = TicketAgentChat(
             id=str(uuid.uuid4()),
@@ -3020,7 +3106,7 @@ async def agent_chat_with_ticket(
             role="user",
             content=messages_list[-1]["content"],
             attachments=request.attachments,
-            log_files=request.log_files,
+            log_files=log_files,
             ai_status="pending"
         )
         sync_db.add(user_message)
@@ -3035,7 +3121,7 @@ async def agent_chat_with_ticket(
             user_message_id=user_message.id,
             messages=messages_list,
             attachments=request.attachments,
-            log_files=request.log_files
+            log_files=log_files
         )
         
         return {
@@ -3061,6 +3147,52 @@ async def agent_chat_with_ticket(
         sync_db.close()
 
 
+@router.post("/tickets/{ticket_id}/agent-chat/log-triage")
+async def triage_agent_chat_log(
+    ticket_id: str,
+    file: UploadFile = File(...),
+    current_user: User = Depends(get_current_user),
+    current_tenant: Tenant = Depends(get_current_tenant),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Digest an uploaded log file for the agent chat
+    
+    The file is read in chunks, so logs of any size use bounded memory. The
+    returned digest (levels, repeated line templates, error and stack trace
+    excerpts) can be sent in log_files of the next agent chat message.
+    """
+    from app.services.log_triage_service import atriage_chunks
+    
+    ticket_result = await db.execute(
+        select(Ticket.id).where(Ticket.id == ticket_id, Ticket.tenant_id == current_tenant.id)
+    )
+    if ticket_result.scalar_one_or_none() is None:
+        raise HTTPException(status_code=404, detail="Ticket not found")
+    
+    async def chunks():
+        while True:
+            chunk = await file.read(1024 * 1024)
+            if not chunk:
+                break
+            yield chunk
+    
+    try:
+        triage = await atriage_chunks(chunks(), name=file.filename)
+        return {
+            "filename": file.filename,
+            "digest": triage.digest(),
+            "summary": triage.summary()
+        }
+    except Exception as e:
+        import logging
+        logger = logging.getLogger(__name__)
+        logger.error(f"Error triaging log file for ticket {ticket_id}: {e}", exc_info=True)
+        raise HTTPException(status_code=500, detail=str(e))
+    finally:
+        await file.close()
+
+
 @router.get("/tickets/{ticket_id}/agent-chat")
 async def get_agent_chat_history(
     ticket_id: str,
@@ -4035,40 +4167,25 @@ async def bulk_assign_tickets(
     current_tenant: Tenant = Depends(get_current_tenant),
     db: AsyncSession = Depends(get_async_db)
 ):
-    """Bulk assign tickets to a user"""
-    from app.core.database import SessionLocal
-    from app.models.helpdesk import Ticket
-    from datetime import datetime, timezone
+    """
+    Bulk assign tickets to a user
+    
+    PERFORMANCE: Set-based UPDATE on the async session (see TicketBulkService).
+    """
+    from app.services.ticket_bulk_service import TicketBulkService, TicketsNotFoundError
     
-    sync_db = SessionLocal()
     try:
-        # Verify all tickets belong to tenant
-        tickets = sync_db.query(Ticket).filter(
-            Ticket.id.in_(ticket_ids),
-            Ticket.tenant_id == current_tenant.id
-        ).all()
-        
-        if len(tickets) != len(ticket_ids):
-            raise HTTPException(status_code=404, detail="Some tickets not found")
-        
-        # Update all tickets
-        updated_count = 0
-        for ticket in tickets:
-            ticket.assigned_to_id = user_id
-            ticket.assigned_at = datetime.now(timezone.utc)
-            updated_count += 1
-        
-        sync_db.commit()
+        updated_ids = await TicketBulkService(db, current_tenant.id).assign(ticket_ids, user_id)
+        updated_count = len(updated_ids)
         
         return {
             "success": True,
             "updated_count": updated_count,
             "message": f"Successfully assigned {updated_count} ticket(s)"
         }
-    except HTTPException:
-        raise
+    except TicketsNotFoundError:
+        raise HTTPException(status_code=404, detail="Some tickets not found")
     except Exception as e:
-        sync_db.rollback()
         import logging
         logger = logging.getLogger(__name__)
         logger.error(f"Error bulk assigning tickets: {e}", exc_info=True)
@@ -4076,8 +4193,6 @@ async def bulk_assign_tickets(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error assigning tickets: {str(e)}"
         )
-    finally:
-        sync_db.close()
 
 
 @router.post("/tickets/bulk-update")
@@ -4087,73 +4202,59 @@ async def bulk_update_tickets(
     current_tenant: Tenant = Depends(get_current_tenant),
     db: AsyncSession = Depends(get_async_db)
 ):
-    """Bulk update tickets (status, priority, tags)"""
-    from app.core.database import SessionLocal
-    from app.models.helpdesk import Ticket, TicketStatus, TicketPriority
+    """
+    Bulk update tickets (status, priority, tags)
+    
+    PERFORMANCE: One UPDATE ... RETURNING per chunk of ids; tag add/remove
+    run as JSONB operators in the same statement.
+    """
+    from app.models.helpdesk import TicketStatus, TicketPriority
+    from app.services.ticket_bulk_service import TicketBulkService, TicketsNotFoundError, tags_expression
     
-    sync_db = SessionLocal()
     try:
-        # Verify all tickets belong to tenant
-        tickets = sync_db.query(Ticket).filter(
-            Ticket.id.in_(request.ticket_ids),
-            Ticket.tenant_id == current_tenant.id
-        ).all()
+        values = {}
+        changes = {}
         
-        if len(tickets) != len(request.ticket_ids):
-            raise HTTPException(status_code=404, detail="Some tickets not found")
+        # Update status
+        if request.action == "update_status" and request.status:
+            try:
+                values["status"] = TicketStatus[request.status.upper()]
+                changes["status"] = values["status"].value
+            except (KeyError, AttributeError):
+                pass
         
-        updated_count = 0
-        for ticket in tickets:
-            updated = False
-            
-            # Update status
-            if request.action == "update_status" and request.status:
-                try:
-                    ticket.status = TicketStatus[request.status.upper()]
-                    updated = True
-                except (KeyError, AttributeError):
-                    pass
-            
-            # Update priority
-            if request.action == "update_priority" and request.priority:
-                try:
-                    ticket.priority = TicketPriority[request.priority.upper()]
-                    updated = True
-                except (KeyError, AttributeError):
-                    pass
-            
-            # Update tags
-            if request.action == "update_tags":
-                if request.tags is not None:
-                    # Replace all tags
-                    ticket.tags = request.tags
-                    updated = True
-                elif request.add_tags:
-                    # Add tags (merge)
-                    existing_tags = ticket.tags or []
-                    merged_tags = list(set(existing_tags + request.add_tags))
-                    ticket.tags = merged_tags
-                    updated = True
-                elif request.remove_tags:
-                    # Remove tags
-                    existing_tags = ticket.tags or []
-                    ticket.tags = [tag for tag in existing_tags if tag not in request.remove_tags]
-                    updated = True
-            
-            if updated:
-                updated_count += 1
+        # Update priority
+        if request.action == "update_priority" and request.priority:
+            try:
+                values["priority"] = TicketPriority[request.priority.upper()]
+                changes["priority"] = values["priority"].value
+            except (KeyError, AttributeError):
+                pass
+        
+        # Update tags (replace, else add/merge, else remove)
+        if request.action == "update_tags":
+            tags = tags_expression(request.tags, request.add_tags, request.remove_tags)
+            if tags is not None:
+                values["tags"] = tags
+                changes["tags"] = {
+                    "replace": request.tags,
+                    "add": request.add_tags,
+                    "remove": request.remove_tags
+                }
         
-        sync_db.commit()
+        updated_count = 0
+        if values:
+            updated_ids = await TicketBulkService(db, current_tenant.id).bulk_update(request.ticket_ids, values, changes)
+            updated_count = len(updated_ids)
         
         return {
             "success": True,
             "updated_count": updated_count,
             "message": f"Successfully updated {updated_count} ticket(s)"
         }
-    except HTTPException:
-        raise
+    except TicketsNotFoundError:
+        raise HTTPException(status_code=404, detail="Some tickets not found")
     except Exception as e:
-        sync_db.rollback()
         import logging
         logger = logging.getLogger(__name__)
         logger.error(f"Error bulk updating tickets: {e}", exc_info=True)
@@ -4161,8 +4262,6 @@ async def bulk_update_tickets(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error updating tickets: {str(e)}"
         )
-    finally:
-        sync_db.close()
 
 
 @router.post("/tickets/bulk-close")
@@ -4173,52 +4272,37 @@ async def bulk_close_tickets(
     current_tenant: Tenant = Depends(get_current_tenant),
     db: AsyncSession = Depends(get_async_db)
 ):
-    """Bulk close or resolve tickets"""
-    from app.core.database import SessionLocal
-    from app.models.helpdesk import Ticket, TicketStatus
-    from datetime import datetime, timezone
+    """
+    Bulk close or resolve tickets
+    
+    PERFORMANCE: Set-based UPDATE on the async session (see TicketBulkService).
+    """
+    from fastapi import status as http_status
+    from app.models.helpdesk import TicketStatus
+    from app.services.ticket_bulk_service import TicketBulkService, TicketsNotFoundError
     
-    sync_db = SessionLocal()
     try:
-        # Verify all tickets belong to tenant
-        tickets = sync_db.query(Ticket).filter(
-            Ticket.id.in_(ticket_ids),
-            Ticket.tenant_id == current_tenant.id
-        ).all()
-        
-        if len(tickets) != len(ticket_ids):
-            raise HTTPException(status_code=404, detail="Some tickets not found")
-        
         # Determine status
         target_status = TicketStatus.CLOSED if status.lower() == "closed" else TicketStatus.RESOLVED
         
-        updated_count = 0
-        for ticket in tickets:
-            ticket.status = target_status
-            ticket.closed_at = datetime.now(timezone.utc)
-            ticket.closed_by_id = current_user.id
-            updated_count += 1
-        
-        sync_db.commit()
+        updated_ids = await TicketBulkService(db, current_tenant.id).close(ticket_ids, target_status)
+        updated_count = len(updated_ids)
         
         return {
             "success": True,
             "updated_count": updated_count,
             "message": f"Successfully {status} {updated_count} ticket(s)"
         }
-    except HTTPException:
-        raise
+    except TicketsNotFoundError:
+        raise HTTPException(status_code=404, detail="Some tickets not found")
     except Exception as e:
-        sync_db.rollback()
         import logging
         logger = logging.getLogger(__name__)
         logger.error(f"Error bulk closing tickets: {e}", exc_info=True)
         raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            status_code=http_status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error closing tickets: {str(e)}"
         )
-    finally:
-        sync_db.close()
 
 
 # ============================================================================
@@ -4526,7 +4610,7 @@ async def execute_ticket_macro(
                         ticket.npa_original_text = npa_text
                         ticket.npa_state = npa_state
                         executed_actions.append("NPA updated")
-                
+            
             except Exception as e:
                 errors.append(f"Error executing {action_type}: {str(e)}")
         
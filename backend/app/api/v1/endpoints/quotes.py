@@ -1378,6 +1378,7 @@ async def create_quote_version(
 async def generate_quote_document(
     quote_id: str,
     format: str = Query("docx", regex="^(docx|pdf)$"),
+    delivery: str = Query("stream", regex="^(stream|url)$"),
     current_user: User = Depends(get_current_user),
     current_tenant: Tenant = Depends(get_current_tenant),
     db: AsyncSession = Depends(get_async_db)
@@ -1385,58 +1386,54 @@ async def generate_quote_document(
     """
     Generate Word or PDF document for a quote
     
-    PERFORMANCE: Uses AsyncSession to prevent blocking the event loop.
+    delivery=stream (default) returns the file; delivery=url returns a
+    presigned download URL for the cached render.
+    
+    PERFORMANCE: Rendering runs in a process pool and the output is cached in
+    object storage per quote revision, so repeat downloads are not re-rendered
+    and the event loop is never blocked by document generation.
     """
     try:
-        from fastapi.responses import StreamingResponse
-        from app.services.document_generator_service import DocumentGeneratorService
+        from fastapi.responses import Response, StreamingResponse
+        from app.core.config import settings
+        from app.services.quote_document_render_service import QuoteDocumentRenderService
         
-        stmt = select(Quote).where(
+        stmt = select(Quote.id, Quote.quote_number, Quote.updated_at).where(
             Quote.id == quote_id,
             Quote.tenant_id == current_user.tenant_id
         )
         result = await db.execute(stmt)
-        quote = result.scalar_one_or_none()
+        quote = result.one_or_none()
         
         if not quote:
             raise HTTPException(status_code=404, detail="Quote not found")
         
-        # DocumentGeneratorService currently expects sync session - use sync wrapper
-        from app.core.database import SessionLocal
-        sync_db = SessionLocal()
-        try:
-            generator = DocumentGeneratorService(sync_db, current_user.tenant_id)
-            
-            if format == "pdf":
-                document = generator.generate_pdf_document(quote)
-                if not document:
-                    raise HTTPException(
-                        status_code=500,
-                        detail="Failed to generate PDF document"
-                    )
-                return StreamingResponse(
-                    document,
-                    media_type="application/pdf",
-                    headers={
-                        "Content-Disposition": f'attachment; filename="quote_{quote.quote_number}.pdf"'
-                    }
-                )
-            else:  # docx
-                document = generator.generate_word_document(quote)
-                if not document:
-                    raise HTTPException(
-                        status_code=500,
-                        detail="Failed to generate Word document"
-                    )
-                return StreamingResponse(
-                    document,
-                    media_type="application/vnd.openxmlformats-officedocument.wordprocessingml.document",
-                    headers={
-                        "Content-Disposition": f'attachment; filename="quote_{quote.quote_number}.docx"'
-                    }
-                )
-        finally:
-            sync_db.close()
+        render_service = QuoteDocumentRenderService(current_user.tenant_id)
+        document = await render_service.get_document(quote.id, quote.quote_number, quote.updated_at, format)
+        if not document:
+            raise HTTPException(
+                status_code=500,
+                detail=f"Failed to generate {'PDF' if format == 'pdf' else 'Word'} document"
+            )
+        
+        if delivery == "url":
+            if not document.object_name:
+                raise HTTPException(status_code=503, detail="Document storage unavailable")
+            return {
+                "url": render_service.get_download_url(document.object_name),
+                "filename": document.filename,
+                "expires_in": settings.QUOTE_DOCUMENT_URL_EXPIRY,
+                "cached": document.cached
+            }
+        
+        headers = {"Content-Disposition": f'attachment; filename="{document.filename}"'}
+        if document.content is not None:
+            return Response(content=document.content, media_type=document.media_type, headers=headers)
+        return StreamingResponse(
+            render_service.storage.stream_file(document.object_name),
+            media_type=document.media_type,
+            headers=headers
+        )
     
     except HTTPException:
         raise
@@ -183,3 +183,39 @@ async def get_customer_lifetime_value(
             detail=f"Error calculating customer lifetime value: {str(e)}"
         )
 
+
+
+@router.get("/customers/top-value")
+async def get_top_customers_by_value(
+    sort_by: str = Query("lifetime_value", regex="^(lifetime_value|mrr)$"),
+    limit: int = Query(20, ge=1, le=200),
+    min_lifetime_value: Optional[float] = Query(None, ge=0),
+    min_mrr: Optional[float] = Query(None, ge=0),
+    current_user: User = Depends(get_current_user),
+    current_tenant: Tenant = Depends(get_current_tenant),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Rank customers by lifetime value or MRR
+    
+    PERFORMANCE: Reads the incrementally maintained customer_metrics rollup
+    (one indexed query) instead of aggregating quotes and contracts per customer.
+    Note: Wraps sync service calls in executor.
+    """
+    try:
+        def _get_ranking():
+            sync_db = SessionLocal()
+            try:
+                service = ReportingService(sync_db, current_user.tenant_id)
+                return service.get_top_customers_by_value(sort_by, limit, min_lifetime_value, min_mrr)
+            finally:
+                sync_db.close()
+        
+        loop = asyncio.get_event_loop()
+        customers = await loop.run_in_executor(None, _get_ranking)
+        return {'sort_by': sort_by, 'customers': customers}
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error ranking customers by value: {str(e)}"
+        )
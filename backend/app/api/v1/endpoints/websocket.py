@@ -4,13 +4,14 @@ WebSocket endpoint for real-time updates
 Provides tenant-isolated WebSocket connections for instant updates
 """
 
-from fastapi import APIRouter, WebSocket, WebSocketDisconnect, Query, HTTPException, status, Cookie
+from fastapi import APIRouter, Depends, WebSocket, WebSocketDisconnect, Query, HTTPException, status, Cookie
 from jose import jwt
 import json
 from typing import Optional
 from app.core.config import settings
 from app.core.websocket import get_websocket_manager
 from app.core.database import SessionLocal
+from app.core.dependencies import get_current_super_admin
 from app.models.tenant import User
 
 router = APIRouter()
@@ -127,8 +128,8 @@ async def websocket_endpoint(
         manager = get_websocket_manager()
         await manager.connect(websocket, tenant_id, user_id)
         
-        # Send welcome message
-        await websocket.send_json({
+        # Send welcome message (queued so all writes go through the connection's writer task)
+        manager.send_to_connection(websocket, tenant_id, user_id, {
             "type": "connection.established",
             "tenant_id": tenant_id,
             "user_id": user_id,
@@ -145,7 +146,7 @@ async def websocket_endpoint(
                     
                     # Handle ping messages
                     if data == "ping":
-                        await websocket.send_text("pong")
+                        manager.send_to_connection(websocket, tenant_id, user_id, "pong")
                 except WebSocketDisconnect:
                     # Normal disconnect
                     break
@@ -190,3 +191,11 @@ async def websocket_endpoint(
             manager.disconnect(websocket, tenant_id, user_id)
 
 
+@router.get("/ws/stats")
+async def get_websocket_stats(current_user: User = Depends(get_current_super_admin)):
+    """
+    WebSocket fan-out metrics for this API process
+    
+    Connections, outbound queue depth and sent/dropped/coalesced message counts.
+    """
+    return get_websocket_manager().get_stats()
@@ -5,13 +5,166 @@ Provides unified interface for multiple AI providers (OpenAI, Google, Anthropic,
 """
 
 from abc import ABC, abstractmethod
-from typing import Dict, List, Optional, Any, Union
+from contextlib import asynccontextmanager
+from typing import Dict, List, Optional, Any, Union, Callable, Tuple
+import hashlib
 import httpx
+import inspect
 import json
 import asyncio
+import threading
+import weakref
 from openai import OpenAI
 from datetime import datetime
 
+from app.core.config import settings
+
+
+def build_pooled_http_client(timeout: float = 300.0) -> httpx.AsyncClient:
+    """Build an httpx.AsyncClient sized for a shared provider connection pool"""
+    return httpx.AsyncClient(
+        timeout=timeout,
+        limits=httpx.Limits(
+            max_connections=settings.AI_PROVIDER_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.AI_PROVIDER_MAX_KEEPALIVE
+        )
+    )
+
+
+class PooledClient:
+    """A native async SDK client plus the semaphore that caps its in-flight calls"""
+
+    def __init__(self, client: Any, http_client: Optional[httpx.AsyncClient] = None):
+        self.client = client
+        self.http_client = http_client
+        self.semaphore = asyncio.Semaphore(settings.AI_PROVIDER_MAX_CONCURRENCY)
+        self.in_flight = 0
+        self.total_calls = 0
+
+    @asynccontextmanager
+    async def slot(self):
+        """Hold one concurrency slot for the duration of a provider call"""
+        async with self.semaphore:
+            self.in_flight += 1
+            self.total_calls += 1
+            try:
+                yield self.client
+            finally:
+                self.in_flight -= 1
+
+    async def aclose(self):
+        """Close the SDK client and its underlying connection pool"""
+        for target in (self.client, self.http_client):
+            if target is None:
+                continue
+            close = getattr(target, "aclose", None) or getattr(target, "close", None)
+            if close is None:
+                continue
+            try:
+                result = close()
+                if inspect.isawaitable(result):
+                    await result
+            except Exception as e:
+                print(f"[AsyncClientPool] Error closing client: {e}")
+
+
+class AsyncClientPool:
+    """
+    Process-wide pool of native async AI provider clients
+
+    PERFORMANCE: One client (and one HTTP connection pool) is shared per
+    (provider, base_url, api_key) instead of pushing every sync SDK call onto
+    the default thread-pool executor, which is also used by StorageService/MinIO.
+
+    httpx connection pools are bound to the event loop that created them, so
+    the pool is partitioned per loop: the API process has a single loop, and
+    Celery workers get one per thread via AsyncBridge.
+    """
+
+    _pools: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[Tuple[str, str, str], PooledClient]]" = weakref.WeakKeyDictionary()
+    _lock = threading.Lock()
+
+    @staticmethod
+    def make_key(provider_slug: str, base_url: Optional[str], api_key: Optional[str]) -> Tuple[str, str, str]:
+        """Build a pool key (the API key is fingerprinted, never stored raw)"""
+        fingerprint = hashlib.sha256((api_key or "").encode("utf-8")).hexdigest()[:16]
+        return (provider_slug, base_url or "", fingerprint)
+
+    @classmethod
+    def get(
+        cls,
+        key: Tuple[str, str, str],
+        factory: Callable[[], Optional[PooledClient]]
+    ) -> Optional[PooledClient]:
+        """Get the pooled client for key on the running loop, creating it on first use"""
+        loop = asyncio.get_running_loop()
+        with cls._lock:
+            pool = cls._pools.get(loop)
+            if pool is None:
+                pool = {}
+                cls._pools[loop] = pool
+            entry = pool.get(key)
+            if entry is None:
+                entry = factory()
+                if entry is not None:
+                    pool[key] = entry
+        return entry
+
+    @classmethod
+    async def close_all(cls):
+        """Close every pooled client owned by the running loop"""
+        loop = asyncio.get_running_loop()
+        with cls._lock:
+            pool = cls._pools.pop(loop, None) or {}
+        for entry in pool.values():
+            await entry.aclose()
+
+    @classmethod
+    def get_stats(cls) -> Dict[str, Any]:
+        """Pool statistics for the running loop (keyed by provider/base_url)"""
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return {"clients": 0, "pools": []}
+        pool = cls._pools.get(loop) or {}
+        return {
+            "clients": len(pool),
+            "max_concurrency": settings.AI_PROVIDER_MAX_CONCURRENCY,
+            "pools": [
+                {
+                    "provider": key[0],
+                    "base_url": key[1] or None,
+                    "in_flight": entry.in_flight,
+                    "total_calls": entry.total_calls
+                }
+                for key, entry in pool.items()
+            ]
+        }
+
+
+def create_pooled_openai_client(sync_client: Optional[OpenAI], label: str) -> Optional[PooledClient]:
+    """
+    Build a pooled AsyncOpenAI client mirroring an initialized sync OpenAI client
+
+    Shared by OpenAI and every OpenAI-compatible provider (DeepSeek, Grok, ...)
+    so the async client always targets the same base_url/key as the sync one.
+    """
+    if sync_client is None:
+        return None
+    try:
+        from openai import AsyncOpenAI
+        http_client = build_pooled_http_client(timeout=300.0)
+        client = AsyncOpenAI(
+            api_key=sync_client.api_key,
+            base_url=sync_client.base_url,
+            timeout=300.0,
+            http_client=http_client
+        )
+        return PooledClient(client, http_client)
+    except Exception as e:
+        print(f"[{label}] Error initializing async client: {e}")
+        return None
+
 
 class AIProviderResponse:
     """Standardized response format from AI providers"""
@@ -32,18 +185,66 @@ class AIProviderResponse:
 
 class AIProvider(ABC):
     """Base class for AI provider implementations"""
-    
-    def __init__(self, api_key: str, base_url: Optional[str] = None, **kwargs):
+
+    provider_slug: str = "base"
+
+    def __init__(
+        self,
+        api_key: str,
+        base_url: Optional[str] = None,
+        use_async_client: Optional[bool] = None,
+        **kwargs
+    ):
         self.api_key = api_key
         self.base_url = base_url
         self.client = None
+        self.use_async_client = (
+            settings.AI_PROVIDER_ASYNC_CLIENTS if use_async_client is None else use_async_client
+        )
         self._initialize_client()
-    
+
     @abstractmethod
     def _initialize_client(self):
         """Initialize the provider's client"""
         pass
-    
+
+    def _create_async_client(self) -> Optional[PooledClient]:
+        """
+        Build the native async client for the shared pool
+
+        Providers without an async mode return None and fall back to running
+        the sync SDK in the executor.
+        """
+        return None
+
+    def _get_pooled_client(self) -> Optional[PooledClient]:
+        """Get the process-wide pooled async client for this provider/base_url/key"""
+        if not self.use_async_client:
+            return None
+        key = AsyncClientPool.make_key(self.provider_slug, self.base_url, self.api_key)
+        return AsyncClientPool.get(key, self._create_async_client)
+
+    async def _call(
+        self,
+        async_call: Callable[[Any], Any],
+        sync_call: Optional[Callable[[Any], Any]] = None
+    ) -> Any:
+        """
+        Run a provider call on the pooled async client
+
+        Falls back to the sync client in the default executor when async mode
+        is disabled or unavailable. sync_call defaults to async_call for SDKs
+        whose sync and async clients share method names.
+        """
+        pooled = self._get_pooled_client()
+        if pooled is not None:
+            async with pooled.slot() as client:
+                return await async_call(client)
+
+        sync_call = sync_call or async_call
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, lambda: sync_call(self.client))
+
     @abstractmethod
     async def generate_completion(
         self,
@@ -69,6 +270,8 @@ class AIProvider(ABC):
 
 class OpenAIProvider(AIProvider):
     """OpenAI provider implementation (supports both chat.completions and responses.create)"""
+
+    provider_slug = "openai"
     
     def _initialize_client(self):
         """Initialize OpenAI client"""
@@ -81,6 +284,10 @@ class OpenAIProvider(AIProvider):
         except Exception as e:
             print(f"[OpenAI Provider] Error initializing client: {e}")
             self.client = None
+
+    def _create_async_client(self) -> Optional[PooledClient]:
+        """Build the pooled AsyncOpenAI client"""
+        return create_pooled_openai_client(self.client, "OpenAI Provider")
     
     async def generate_completion(
         self,
@@ -106,13 +313,11 @@ class OpenAIProvider(AIProvider):
                 # Add timeout (5 minutes = 300 seconds)
                 timeout_seconds = kwargs.get("timeout", 300)
                 
-                # Wrap synchronous call in executor to avoid blocking event loop
-                loop = asyncio.get_event_loop()
+                # Native async call on the pooled client (executor fallback if disabled)
                 try:
                     response = await asyncio.wait_for(
-                        loop.run_in_executor(
-                            None,
-                            lambda: self.client.responses.create(
+                        self._call(
+                            lambda client: client.responses.create(
                                 model=model,
                                 input=input_string,
                                 tools=tools or [],
@@ -328,11 +533,9 @@ class OpenAIProvider(AIProvider):
                 logger.info(f"[OpenAI] Starting API call to OpenAI - Model: {model}, Provider: OpenAI")
                 logger.info(f"[OpenAI] Request details - Messages: {len(create_kwargs.get('messages', []))} messages, Max tokens: {create_kwargs.get('max_tokens', 'default')}")
                 
-                # Wrap synchronous call in executor to avoid blocking event loop
-                loop = asyncio.get_event_loop()
-                response = await loop.run_in_executor(
-                    None,
-                    lambda: self.client.chat.completions.create(**create_kwargs)
+                # Native async call on the pooled client (executor fallback if disabled)
+                response = await self._call(
+                    lambda client: client.chat.completions.create(**create_kwargs)
                 )
                 
                 # Log OpenAI API call success
@@ -370,10 +573,12 @@ class OpenAIProvider(AIProvider):
                 return {"success": False, "error": "Client not initialized"}
             
             # Simple test call
-            response = self.client.chat.completions.create(
-                model="gpt-4o-mini",
-                messages=[{"role": "user", "content": "Test"}],
-                max_completion_tokens=10
+            response = await self._call(
+                lambda client: client.chat.completions.create(
+                    model="gpt-4o-mini",
+                    messages=[{"role": "user", "content": "Test"}],
+                    max_completion_tokens=10
+                )
             )
             
             return {
@@ -397,6 +602,8 @@ class OpenAIProvider(AIProvider):
 
 class GoogleProvider(AIProvider):
     """Google Gemini provider implementation"""
+
+    provider_slug = "google"
     
     def _initialize_client(self):
         """Initialize Google client"""
@@ -494,6 +701,8 @@ class GoogleProvider(AIProvider):
 
 class AnthropicProvider(AIProvider):
     """Anthropic Claude provider implementation"""
+
+    provider_slug = "anthropic"
     
     def _initialize_client(self):
         """Initialize Anthropic client"""
@@ -506,6 +715,17 @@ class AnthropicProvider(AIProvider):
         except Exception as e:
             print(f"[Anthropic Provider] Error initializing client: {e}")
             self.client = None
+
+    def _create_async_client(self) -> Optional[PooledClient]:
+        """Build a pooled AsyncAnthropic client (the SDK owns its connection pool)"""
+        try:
+            from anthropic import AsyncAnthropic
+            return PooledClient(AsyncAnthropic(api_key=self.api_key, timeout=300.0))
+        except ImportError:
+            return None
+        except Exception as e:
+            print(f"[Anthropic Provider] Error initializing async client: {e}")
+            return None
     
     async def generate_completion(
         self,
@@ -522,14 +742,9 @@ class AnthropicProvider(AIProvider):
             raise Exception("Anthropic client not initialized")
         
         try:
-            from anthropic import Anthropic
-            import asyncio
-            
-            # Anthropic SDK is synchronous, so we run it in executor
-            loop = asyncio.get_event_loop()
-            response = await loop.run_in_executor(
-                None,
-                lambda: self.client.messages.create(
+            # AsyncAnthropic on the pooled client (sync SDK in executor as fallback)
+            response = await self._call(
+                lambda client: client.messages.create(
                     model=model,
                     max_tokens=max_tokens,
                     temperature=temperature,
@@ -564,11 +779,8 @@ class AnthropicProvider(AIProvider):
             if not self.client:
                 return {"success": False, "error": "Client not initialized"}
             
-            import asyncio
-            loop = asyncio.get_event_loop()
-            response = await loop.run_in_executor(
-                None,
-                lambda: self.client.messages.create(
+            response = await self._call(
+                lambda client: client.messages.create(
                     model="claude-3-haiku-20240307",
                     max_tokens=10,
                     messages=[{"role": "user", "content": "Test"}]
@@ -596,11 +808,17 @@ class AnthropicProvider(AIProvider):
 
 class OllamaProvider(AIProvider):
     """Ollama provider implementation (on-premise)"""
+
+    provider_slug = "ollama"
     
     def _initialize_client(self):
         """Initialize Ollama client"""
         self.base_url = self.base_url or "http://localhost:11434"
         self.client = None  # Ollama uses HTTP directly
+
+    def _create_async_client(self) -> Optional[PooledClient]:
+        """Ollama is plain HTTP, so the pooled client is an httpx.AsyncClient"""
+        return PooledClient(build_pooled_http_client(timeout=300.0))
     
     async def generate_completion(
         self,
@@ -617,36 +835,39 @@ class OllamaProvider(AIProvider):
             # Ollama uses OpenAI-compatible API
             base_url = f"{self.base_url}/v1"
             
-            async with httpx.AsyncClient(timeout=300.0) as client:
-                # Combine system and user prompts for Ollama
-                full_prompt = f"{system_prompt}\n\n{user_prompt}"
-                
-                response = await client.post(
-                    f"{base_url}/chat/completions",
-                    json={
-                        "model": model,
-                        "messages": [
-                            {"role": "user", "content": full_prompt}
-                        ],
-                        "temperature": temperature,
-                        "max_tokens": max_tokens,
-                        **kwargs
-                    }
-                )
-                
-                if response.status_code != 200:
-                    raise Exception(f"Ollama API error: {response.status_code} - {response.text}")
-                
-                result = response.json()
-                content = result['choices'][0]['message']['content']
-                usage = result.get('usage', {})
-                
-                return AIProviderResponse(
-                    content=content,
-                    model=model,
-                    usage=usage,
-                    raw_response=result
-                )
+            # Combine system and user prompts for Ollama
+            full_prompt = f"{system_prompt}\n\n{user_prompt}"
+            payload = {
+                "model": model,
+                "messages": [
+                    {"role": "user", "content": full_prompt}
+                ],
+                "temperature": temperature,
+                "max_tokens": max_tokens,
+                **kwargs
+            }
+            
+            pooled = self._get_pooled_client()
+            if pooled is not None:
+                async with pooled.slot() as client:
+                    response = await client.post(f"{base_url}/chat/completions", json=payload)
+            else:
+                async with httpx.AsyncClient(timeout=300.0) as client:
+                    response = await client.post(f"{base_url}/chat/completions", json=payload)
+            
+            if response.status_code != 200:
+                raise Exception(f"Ollama API error: {response.status_code} - {response.text}")
+            
+            result = response.json()
+            content = result['choices'][0]['message']['content']
+            usage = result.get('usage', {})
+            
+            return AIProviderResponse(
+                content=content,
+                model=model,
+                usage=usage,
+                raw_response=result
+            )
         
         except Exception as e:
             print(f"[Ollama Provider] Error generating completion: {e}")
@@ -688,6 +909,8 @@ class OllamaProvider(AIProvider):
 
 class OpenAICompatibleProvider(AIProvider):
     """OpenAI-compatible provider for self-hosted models"""
+
+    provider_slug = "openai_compatible"
     
     def _initialize_client(self):
         """Initialize OpenAI-compatible client"""
@@ -700,6 +923,10 @@ class OpenAICompatibleProvider(AIProvider):
         except Exception as e:
             print(f"[OpenAI Compatible Provider] Error initializing client: {e}")
             self.client = None
+
+    def _create_async_client(self) -> Optional[PooledClient]:
+        """Build the pooled AsyncOpenAI client (OpenAI-compatible API)"""
+        return create_pooled_openai_client(self.client, "OpenAI Compatible Provider")
     
     async def generate_completion(
         self,
@@ -727,14 +954,16 @@ class OpenAICompatibleProvider(AIProvider):
                 # Remove max_tokens if present to avoid confusion
                 completion_kwargs.pop("max_tokens", None)
             
-            response = self.client.chat.completions.create(
-                model=model,
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_prompt}
-                ],
-                temperature=temperature,
-                **completion_kwargs
+            response = await self._call(
+                lambda client: client.chat.completions.create(
+                    model=model,
+                    messages=[
+                        {"role": "system", "content": system_prompt},
+                        {"role": "user", "content": user_prompt}
+                    ],
+                    temperature=temperature,
+                    **completion_kwargs
+                )
             )
             
             content = response.choices[0].message.content
@@ -762,7 +991,7 @@ class OpenAICompatibleProvider(AIProvider):
                 return {"success": False, "error": "Client not initialized"}
             
             # Try to list models
-            response = self.client.models.list()
+            response = await self._call(lambda client: client.models.list())
             
             return {
                 "success": True,
@@ -787,6 +1016,8 @@ class CohereProvider(AIProvider):
     - Uses Cohere SDK with chat() method
     - Also supports OpenAI-compatible API via compatibility endpoint
     """
+
+    provider_slug = "cohere"
     
     def _initialize_client(self):
         """Initialize Cohere client"""
@@ -799,6 +1030,21 @@ class CohereProvider(AIProvider):
         except Exception as e:
             print(f"[Cohere Provider] Error initializing client: {e}")
             self.client = None
+
+    def _create_async_client(self) -> Optional[PooledClient]:
+        """Build a pooled cohere.AsyncClient on a shared httpx pool"""
+        try:
+            import cohere
+            http_client = build_pooled_http_client(timeout=300.0)
+            return PooledClient(
+                cohere.AsyncClient(api_key=self.api_key, httpx_client=http_client),
+                http_client
+            )
+        except ImportError:
+            return None
+        except Exception as e:
+            print(f"[Cohere Provider] Error initializing async client: {e}")
+            return None
     
     async def generate_completion(
         self,
@@ -821,18 +1067,13 @@ class CohereProvider(AIProvider):
             raise Exception("Cohere client not initialized")
         
         try:
-            import asyncio
-            import cohere
-            
             # Cohere chat API supports system prompts via 'preamble' parameter
             # Combine system and user prompts, or use preamble for system
             # According to Cohere docs, preamble is for system-level instructions
             
-            # Cohere SDK is synchronous, so we run it in executor
-            loop = asyncio.get_event_loop()
-            response = await loop.run_in_executor(
-                None,
-                lambda: self.client.chat(
+            # cohere.AsyncClient on the pooled client (sync SDK in executor as fallback)
+            response = await self._call(
+                lambda client: client.chat(
                     model=model,
                     message=user_prompt,
                     preamble=system_prompt if system_prompt else None,
@@ -869,11 +1110,8 @@ class CohereProvider(AIProvider):
             if not self.client:
                 return {"success": False, "error": "Client not initialized"}
             
-            import asyncio
-            loop = asyncio.get_event_loop()
-            response = await loop.run_in_executor(
-                None,
-                lambda: self.client.chat(
+            response = await self._call(
+                lambda client: client.chat(
                     model="command",
                     message="Test",
                     max_tokens=10
@@ -902,8 +1140,10 @@ class MistralProvider(AIProvider):
     According to Mistral API docs (https://docs.mistral.ai/api):
     - Uses mistral.chat.complete() method
     - Supports messages array with role and content
-    - SDK is synchronous, wrapped in executor for async compatibility
+    - Uses chat.complete_async on a pooled client (sync SDK in executor as fallback)
     """
+
+    provider_slug = "mistral"
     
     def _initialize_client(self):
         """Initialize Mistral client"""
@@ -917,6 +1157,21 @@ class MistralProvider(AIProvider):
         except Exception as e:
             print(f"[Mistral Provider] Error initializing client: {e}")
             self.client = None
+
+    def _create_async_client(self) -> Optional[PooledClient]:
+        """Build a pooled Mistral client whose *_async methods use a shared httpx pool"""
+        try:
+            from mistralai import Mistral
+            http_client = build_pooled_http_client(timeout=300.0)
+            return PooledClient(
+                Mistral(api_key=self.api_key, async_client=http_client),
+                http_client
+            )
+        except ImportError:
+            return None
+        except Exception as e:
+            print(f"[Mistral Provider] Error initializing async client: {e}")
+            return None
     
     async def generate_completion(
         self,
@@ -940,20 +1195,22 @@ class MistralProvider(AIProvider):
             raise Exception("Mistral client not initialized")
         
         try:
-            from mistralai import Mistral
-            import asyncio
-            
             # Build messages array - Mistral supports system messages
             messages = []
             if system_prompt:
                 messages.append({"role": "system", "content": system_prompt})
             messages.append({"role": "user", "content": user_prompt})
             
-            # Mistral SDK is synchronous, so we run it in executor
-            loop = asyncio.get_event_loop()
-            response = await loop.run_in_executor(
-                None,
-                lambda: self.client.chat.complete(
+            # chat.complete_async on the pooled client (sync SDK in executor as fallback)
+            response = await self._call(
+                lambda client: client.chat.complete_async(
+                    model=model,
+                    messages=messages,
+                    temperature=temperature,
+                    max_tokens=max_tokens,
+                    **kwargs
+                ),
+                lambda client: client.chat.complete(
                     model=model,
                     messages=messages,
                     temperature=temperature,
@@ -987,12 +1244,14 @@ class MistralProvider(AIProvider):
             if not self.client:
                 return {"success": False, "error": "Client not initialized"}
             
-            import asyncio
-            loop = asyncio.get_event_loop()
             # Use a common model name for testing
-            response = await loop.run_in_executor(
-                None,
-                lambda: self.client.chat.complete(
+            response = await self._call(
+                lambda client: client.chat.complete_async(
+                    model="mistral-small-latest",
+                    messages=[{"role": "user", "content": "Test"}],
+                    max_tokens=10
+                ),
+                lambda client: client.chat.complete(
                     model="mistral-small-latest",
                     messages=[{"role": "user", "content": "Test"}],
                     max_tokens=10
@@ -1029,6 +1288,8 @@ class MistralProvider(AIProvider):
 
 class DeepSeekProvider(AIProvider):
     """DeepSeek provider implementation (uses OpenAI-compatible API)"""
+
+    provider_slug = "deepseek"
     
     def _initialize_client(self):
         """Initialize DeepSeek client (OpenAI-compatible)
@@ -1056,6 +1317,10 @@ class DeepSeekProvider(AIProvider):
         except Exception as e:
             print(f"[DeepSeek Provider] Error initializing client: {e}")
             self.client = None
+
+    def _create_async_client(self) -> Optional[PooledClient]:
+        """Build the pooled AsyncOpenAI client (OpenAI-compatible API)"""
+        return create_pooled_openai_client(self.client, "DeepSeek Provider")
     
     async def generate_completion(
         self,
@@ -1083,14 +1348,16 @@ class DeepSeekProvider(AIProvider):
                 # Remove max_tokens if present to avoid confusion
                 completion_kwargs.pop("max_tokens", None)
             
-            response = self.client.chat.completions.create(
-                model=model,
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_prompt}
-                ],
-                temperature=temperature,
-                **completion_kwargs
+            response = await self._call(
+                lambda client: client.chat.completions.create(
+                    model=model,
+                    messages=[
+                        {"role": "system", "content": system_prompt},
+                        {"role": "user", "content": user_prompt}
+                    ],
+                    temperature=temperature,
+                    **completion_kwargs
+                )
             )
             
             content = response.choices[0].message.content
@@ -1117,10 +1384,12 @@ class DeepSeekProvider(AIProvider):
             if not self.client:
                 return {"success": False, "error": "Client not initialized"}
             
-            response = self.client.chat.completions.create(
-                model="deepseek-chat",
-                messages=[{"role": "user", "content": "Test"}],
-                max_completion_tokens=10
+            response = await self._call(
+                lambda client: client.chat.completions.create(
+                    model="deepseek-chat",
+                    messages=[{"role": "user", "content": "Test"}],
+                    max_completion_tokens=10
+                )
             )
             
             return {
@@ -1141,6 +1410,8 @@ class DeepSeekProvider(AIProvider):
 
 class GrokProvider(AIProvider):
     """Grok (xAI) provider implementation (uses OpenAI-compatible API)"""
+
+    provider_slug = "grok"
     
     def _initialize_client(self):
         """Initialize Grok client (OpenAI-compatible)"""
@@ -1153,6 +1424,10 @@ class GrokProvider(AIProvider):
         except Exception as e:
             print(f"[Grok Provider] Error initializing client: {e}")
             self.client = None
+
+    def _create_async_client(self) -> Optional[PooledClient]:
+        """Build the pooled AsyncOpenAI client (OpenAI-compatible API)"""
+        return create_pooled_openai_client(self.client, "Grok Provider")
     
     async def generate_completion(
         self,
@@ -1180,14 +1455,16 @@ class GrokProvider(AIProvider):
                 # Remove max_tokens if present to avoid confusion
                 completion_kwargs.pop("max_tokens", None)
             
-            response = self.client.chat.completions.create(
-                model=model,
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_prompt}
-                ],
-                temperature=temperature,
-                **completion_kwargs
+            response = await self._call(
+                lambda client: client.chat.completions.create(
+                    model=model,
+                    messages=[
+                        {"role": "system", "content": system_prompt},
+                        {"role": "user", "content": user_prompt}
+                    ],
+                    temperature=temperature,
+                    **completion_kwargs
+                )
             )
             
             content = response.choices[0].message.content
@@ -1214,10 +1491,12 @@ class GrokProvider(AIProvider):
             if not self.client:
                 return {"success": False, "error": "Client not initialized"}
             
-            response = self.client.chat.completions.create(
-                model="grok-beta",
-                messages=[{"role": "user", "content": "Test"}],
-                max_completion_tokens=10
+            response = await self._call(
+                lambda client: client.chat.completions.create(
+                    model="grok-beta",
+                    messages=[{"role": "user", "content": "Test"}],
+                    max_completion_tokens=10
+                )
             )
             
             return {
@@ -1243,6 +1522,8 @@ class MicrosoftCopilotProvider(AIProvider):
     Uses Microsoft Graph API for authentication and Microsoft Copilot Studio/Copilot Pro APIs.
     Important for customers who want Microsoft Graph integration and data control.
     """
+
+    provider_slug = "microsoft_copilot"
     
     def _initialize_client(self):
         """Initialize Microsoft Copilot client"""
@@ -1258,6 +1539,10 @@ class MicrosoftCopilotProvider(AIProvider):
         except Exception as e:
             print(f"[Microsoft Copilot Provider] Error initializing client: {e}")
             self.client = None
+
+    def _create_async_client(self) -> Optional[PooledClient]:
+        """Build the pooled AsyncOpenAI client (OpenAI-compatible API)"""
+        return create_pooled_openai_client(self.client, "Microsoft Copilot Provider")
     
     async def generate_completion(
         self,
@@ -1286,15 +1571,17 @@ class MicrosoftCopilotProvider(AIProvider):
             # Note: Actual implementation may require OAuth2 token refresh
             # This is a placeholder implementation - actual API may differ
             
-            response = self.client.chat.completions.create(
-                model=model,
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_prompt}
-                ],
-                temperature=temperature,
-                max_tokens=max_tokens,
-                **kwargs
+            response = await self._call(
+                lambda client: client.chat.completions.create(
+                    model=model,
+                    messages=[
+                        {"role": "system", "content": system_prompt},
+                        {"role": "user", "content": user_prompt}
+                    ],
+                    temperature=temperature,
+                    max_tokens=max_tokens,
+                    **kwargs
+                )
             )
             
             content = response.choices[0].message.content
@@ -1322,10 +1609,12 @@ class MicrosoftCopilotProvider(AIProvider):
                 return {"success": False, "error": "Client not initialized"}
             
             # Test with a simple request
-            response = self.client.chat.completions.create(
-                model="copilot-pro",
-                messages=[{"role": "user", "content": "Test"}],
-                max_tokens=10
+            response = await self._call(
+                lambda client: client.chat.completions.create(
+                    model="copilot-pro",
+                    messages=[{"role": "user", "content": "Test"}],
+                    max_tokens=10
+                )
             )
             
             return {
@@ -326,11 +326,15 @@ def get_provider_api_key(
             AIProvider.is_active == True
         ).first()
         
+        # current_tenant may be a cached principal without API keys; read the legacy field here
+        def tenant_openai_key():
+            return db.query(Tenant.openai_api_key).filter(Tenant.id == tenant_id).scalar()
+        
         if not provider:
             # Fallback to legacy fields for OpenAI (when provider not in ProviderAPIKey table)
             if provider_slug == "openai":
                 # Check tenant-specific first, then system tenant
-                return current_tenant.openai_api_key or (
+                return tenant_openai_key() or (
                     system_tenant.openai_api_key if system_tenant else None
                 )
             return None
@@ -367,8 +371,8 @@ def get_provider_api_key(
         # This ensures system tenant is the fallback as expected
         if provider_slug == "openai":
             # Check tenant-specific legacy field
-            if current_tenant.openai_api_key:
-                key = current_tenant.openai_api_key
+            key = tenant_openai_key()
+            if key:
                 if is_encrypted(key):
                     key = decrypt_api_key(key)
                 return key
@@ -97,3 +97,24 @@ def run_async_safe(coro: Coroutine) -> Any:
     """
     return AsyncBridge.run_async(coro)
 
+
+
+def run_blocking_off_loop(func: Callable[..., Any], *args) -> None:
+    """
+    Call a blocking function without stalling a running event loop
+    
+    ORM event hooks (after_commit etc.) run inline for both sync and async
+    sessions. On a thread with a running loop the call is handed to the
+    loop's default executor (fire-and-forget, func must handle its own
+    errors); elsewhere it runs immediately.
+    
+    Args:
+        func: Blocking callable (sync Redis, Celery send_task, ...)
+        *args: Positional arguments for func
+    """
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        func(*args)
+        return
+    loop.run_in_executor(None, func, *args)
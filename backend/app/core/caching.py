@@ -4,15 +4,29 @@ Strategic caching utility using Redis
 
 PERFORMANCE: Implements caching for frequently accessed data to reduce database load
 and improve response times. Uses Redis for distributed caching across multiple workers.
+
+Two tiers:
+- L1: bounded in-process LRU with short TTL (no network round trip, no json.loads)
+- L2: Redis, shared by every API and Celery worker
+
+Invalidations are broadcast over Redis pub/sub so delete_cache() and
+invalidate_cache_pattern() evict L1 entries in every process.
 """
 
 import json
 import logging
-from typing import Optional, Any, Callable
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict, defaultdict
+from fnmatch import fnmatchcase
+from typing import Optional, Any, Callable, Dict, Tuple
 from datetime import timedelta
 from functools import wraps
 import hashlib
 
+from app.core.async_bridge import run_blocking_off_loop
 from app.core.redis import get_redis
 from app.core.config import settings
 
@@ -24,6 +38,168 @@ CACHE_PREFIX_AI_ANALYSIS = "ai_analysis:"
 CACHE_PREFIX_CUSTOMER = "customer:"
 CACHE_PREFIX_USER = "user:"
 
+# Pub/sub channel used to broadcast L1 invalidations between processes
+CACHE_INVALIDATION_CHANNEL = "cache:invalidate"
+
+# Identifies this process so it can ignore its own invalidation broadcasts
+_PROCESS_ID = f"{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+
+class LocalCache:
+    """
+    Bounded in-process LRU cache with per-entry TTL
+    
+    Values are stored and returned as given. get_cache/set_cache store the
+    JSON text so every read decodes a private copy (callers may mutate what
+    they get back). Thread-safe (Celery workers run async code on per-thread
+    event loops).
+    """
+    
+    def __init__(self, max_entries: int = 2048, default_ttl: int = 60):
+        self.max_entries = max_entries
+        self.default_ttl = default_ttl
+        self._entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.evictions = 0
+    
+    def get(self, key: str) -> Optional[Any]:
+        """Get a value, or None if missing or expired"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+    
+    def set(self, key: str, value: Any, ttl: Optional[int] = None):
+        """Store a value; the L1 TTL never exceeds default_ttl"""
+        ttl = min(ttl or self.default_ttl, self.default_ttl)
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+    
+    def delete(self, key: str):
+        """Evict a single key"""
+        with self._lock:
+            self._entries.pop(key, None)
+    
+    def delete_pattern(self, pattern: str) -> int:
+        """Evict keys matching a Redis-style glob pattern"""
+        with self._lock:
+            keys = [k for k in self._entries if fnmatchcase(k, pattern)]
+            for key in keys:
+                del self._entries[key]
+            return len(keys)
+    
+    def clear(self):
+        """Evict everything"""
+        with self._lock:
+            self._entries.clear()
+    
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+_local_cache = LocalCache(
+    max_entries=settings.CACHE_L1_MAX_ENTRIES,
+    default_ttl=settings.CACHE_L1_TTL
+)
+
+# Per-prefix counters: {prefix: {"l1_hits": n, "l2_hits": n, "misses": n}}
+_prefix_stats: Dict[str, Dict[str, int]] = defaultdict(lambda: {"l1_hits": 0, "l2_hits": 0, "misses": 0})
+
+
+def _key_prefix(key: str) -> str:
+    """Stats bucket for a key (e.g. "tenant:abc:config" -> "tenant:")"""
+    head, sep, _ = key.partition(":")
+    return f"{head}{sep}" if sep else head
+
+
+def _record(key: str, outcome: str):
+    _prefix_stats[_key_prefix(key)][outcome] += 1
+
+
+async def _publish_invalidation(message: Dict[str, str]):
+    """Broadcast an L1 invalidation to every other API/Celery process"""
+    try:
+        redis_client = await get_redis()
+        await redis_client.publish(
+            CACHE_INVALIDATION_CHANNEL,
+            json.dumps({**message, "origin": _PROCESS_ID})
+        )
+    except Exception as e:
+        logger.warning(f"Cache invalidation publish failed: {e}")
+
+
+def _handle_invalidation_message(raw: Any):
+    """Apply an invalidation broadcast from another process to the local L1"""
+    try:
+        data = raw.get("data") if isinstance(raw, dict) else raw
+        if isinstance(data, bytes):
+            data = data.decode("utf-8")
+        message = json.loads(data)
+        if message.get("origin") == _PROCESS_ID:
+            return
+        if "key" in message:
+            _local_cache.delete(message["key"])
+        elif "pattern" in message:
+            _local_cache.delete_pattern(message["pattern"])
+    except Exception as e:
+        logger.warning(f"Invalid cache invalidation message: {e}")
+
+
+_listener_thread = None
+_listener_pubsub = None
+_listener_pid = None
+
+
+def start_cache_invalidation_listener():
+    """
+    Subscribe this process to L1 invalidation broadcasts
+    
+    Runs the sync Redis pub/sub client in a daemon thread so it works in both
+    the API (running loop) and Celery workers (no long-lived loop).
+    Safe to call more than once; restarts after a fork (threads don't survive it).
+    """
+    global _listener_thread, _listener_pubsub, _listener_pid
+    if not settings.CACHE_L1_ENABLED:
+        return
+    if _listener_thread is not None and _listener_pid == os.getpid():
+        return
+    _listener_pid = os.getpid()
+    try:
+        import redis as redis_sync
+        client = redis_sync.Redis.from_url(settings.REDIS_URL)
+        _listener_pubsub = client.pubsub(ignore_subscribe_messages=True)
+        _listener_pubsub.subscribe(**{CACHE_INVALIDATION_CHANNEL: _handle_invalidation_message})
+        _listener_thread = _listener_pubsub.run_in_thread(sleep_time=1.0, daemon=True)
+        logger.info("Cache invalidation listener started")
+    except Exception as e:
+        # Without the listener, L1 entries still expire after CACHE_L1_TTL
+        logger.warning(f"Cache invalidation listener unavailable: {e}")
+        _listener_thread = None
+        _listener_pubsub = None
+
+
+def stop_cache_invalidation_listener():
+    """Stop the invalidation listener thread"""
+    global _listener_thread, _listener_pubsub
+    if _listener_thread is not None:
+        try:
+            _listener_thread.stop()
+            _listener_pubsub.close()
+        except Exception as e:
+            logger.warning(f"Error stopping cache invalidation listener: {e}")
+    _listener_thread = None
+    _listener_pubsub = None
+
 
 def _make_cache_key(prefix: str, *args, **kwargs) -> str:
     """
@@ -56,7 +232,7 @@ def _make_cache_key(prefix: str, *args, **kwargs) -> str:
 
 async def get_cache(key: str) -> Optional[Any]:
     """
-    Get value from cache
+    Get value from cache (L1 first, then Redis)
     
     Args:
         key: Cache key
@@ -64,14 +240,31 @@ async def get_cache(key: str) -> Optional[Any]:
     Returns:
         Cached value or None if not found
     """
+    if settings.CACHE_L1_ENABLED:
+        serialized = _local_cache.get(key)
+        if serialized is not None:
+            _record(key, "l1_hits")
+            return json.loads(serialized)
+    
     try:
         redis_client = await get_redis()
-        value = await redis_client.get(key)
+        if settings.CACHE_L1_ENABLED:
+            # Same round trip reads the remaining TTL so L1 never outlives the Redis entry
+            async with redis_client.pipeline(transaction=False) as pipe:
+                value, remaining_ttl = await pipe.get(key).ttl(key).execute()
+        else:
+            value = await redis_client.get(key)
         if value:
+            if settings.CACHE_L1_ENABLED:
+                # -1: no expiry in Redis (L1 keeps it for CACHE_L1_TTL)
+                _local_cache.set(key, value, None if remaining_ttl == -1 else max(remaining_ttl, 1))
+            _record(key, "l2_hits")
             return json.loads(value)
+        _record(key, "misses")
         return None
     except Exception as e:
         logger.warning(f"Cache get failed for key {key}: {e}")
+        _record(key, "misses")
         return None
 
 
@@ -91,6 +284,10 @@ async def set_cache(key: str, value: Any, ttl: int = 3600) -> bool:
         redis_client = await get_redis()
         serialized = json.dumps(value)
         await redis_client.setex(key, ttl, serialized)
+        if settings.CACHE_L1_ENABLED:
+            _local_cache.set(key, serialized, ttl)
+            # Other processes may hold the previous value in L1
+            await _publish_invalidation({"key": key})
         return True
     except Exception as e:
         logger.warning(f"Cache set failed for key {key}: {e}")
@@ -99,7 +296,7 @@ async def set_cache(key: str, value: Any, ttl: int = 3600) -> bool:
 
 async def delete_cache(key: str) -> bool:
     """
-    Delete value from cache
+    Delete value from cache (Redis and L1 in every process)
     
     Args:
         key: Cache key
@@ -107,9 +304,12 @@ async def delete_cache(key: str) -> bool:
     Returns:
         True if successful, False otherwise
     """
+    _local_cache.delete(key)
     try:
         redis_client = await get_redis()
         await redis_client.delete(key)
+        if settings.CACHE_L1_ENABLED:
+            await _publish_invalidation({"key": key})
         return True
     except Exception as e:
         logger.warning(f"Cache delete failed for key {key}: {e}")
@@ -118,7 +318,7 @@ async def delete_cache(key: str) -> bool:
 
 async def invalidate_cache_pattern(pattern: str) -> int:
     """
-    Invalidate all cache keys matching a pattern
+    Invalidate all cache keys matching a pattern (Redis and L1 in every process)
     
     Args:
         pattern: Redis key pattern (e.g., "customer:*")
@@ -126,6 +326,7 @@ async def invalidate_cache_pattern(pattern: str) -> int:
     Returns:
         Number of keys deleted
     """
+    _local_cache.delete_pattern(pattern)
     try:
         redis_client = await get_redis()
         keys = []
@@ -134,12 +335,84 @@ async def invalidate_cache_pattern(pattern: str) -> int:
         
         if keys:
             await redis_client.delete(*keys)
+        if settings.CACHE_L1_ENABLED:
+            await _publish_invalidation({"pattern": pattern})
         return len(keys)
     except Exception as e:
         logger.warning(f"Cache invalidation failed for pattern {pattern}: {e}")
         return 0
 
 
+_sync_redis_client = None
+_sync_redis_pid = None
+
+
+def get_sync_redis():
+    """Lazily created sync Redis client (recreated after a fork)"""
+    global _sync_redis_client, _sync_redis_pid
+    if _sync_redis_client is None or _sync_redis_pid != os.getpid():
+        import redis as redis_sync
+        _sync_redis_client = redis_sync.Redis.from_url(settings.REDIS_URL, decode_responses=True)
+        _sync_redis_pid = os.getpid()
+    return _sync_redis_client
+
+
+def delete_cache_sync(*keys: str) -> bool:
+    """
+    Delete keys from cache from sync code (ORM event hooks, sync endpoints)
+    
+    Same effect as delete_cache(): evicts L1 here, deletes from Redis and
+    broadcasts the invalidation to every other process.
+    
+    Args:
+        *keys: Cache keys
+        
+    Returns:
+        True if successful, False otherwise
+    """
+    for key in keys:
+        _local_cache.delete(key)
+    if not keys:
+        return True
+    try:
+        redis_client = get_sync_redis()
+        redis_client.delete(*keys)
+        if settings.CACHE_L1_ENABLED:
+            for key in keys:
+                redis_client.publish(
+                    CACHE_INVALIDATION_CHANNEL,
+                    json.dumps({"key": key, "origin": _PROCESS_ID})
+                )
+        return True
+    except Exception as e:
+        logger.warning(f"Cache delete failed for keys {keys}: {e}")
+        return False
+
+
+def delete_cache_nowait(*keys: str):
+    """
+    delete_cache_sync() for code that may run on the event loop (ORM commit hooks)
+    
+    L1 is evicted immediately. The Redis delete and broadcast run in a worker
+    thread when called from the loop, and L1 is evicted again afterwards so a
+    read racing the delete cannot keep the old value.
+    
+    Args:
+        *keys: Cache keys
+    """
+    if not keys:
+        return
+    for key in keys:
+        _local_cache.delete(key)
+    run_blocking_off_loop(_delete_cache_then_local, keys)
+
+
+def _delete_cache_then_local(keys: Tuple[str, ...]):
+    delete_cache_sync(*keys)
+    for key in keys:
+        _local_cache.delete(key)
+
+
 def cached(ttl: int = 3600, key_prefix: str = ""):
     """
     Decorator to cache function results
@@ -296,9 +569,30 @@ async def get_cache_stats() -> dict:
     """
     Get cache statistics (hit rate, etc.)
     
+    Redis keyspace totals are global; L1 and per-prefix figures are for
+    this process only.
+    
     Returns:
         Dictionary with cache statistics
     """
+    prefixes = {}
+    for prefix, counts in list(_prefix_stats.items()):
+        total = counts["l1_hits"] + counts["l2_hits"] + counts["misses"]
+        prefixes[prefix] = {
+            **counts,
+            "total_requests": total,
+            "hit_rate": round((counts["l1_hits"] + counts["l2_hits"]) / total * 100, 2) if total else 0,
+            "l1_hit_rate": round(counts["l1_hits"] / total * 100, 2) if total else 0
+        }
+    l1_stats = {
+        "enabled": settings.CACHE_L1_ENABLED,
+        "size": len(_local_cache),
+        "max_entries": _local_cache.max_entries,
+        "ttl": _local_cache.default_ttl,
+        "evictions": _local_cache.evictions,
+        "invalidation_listener": _listener_thread is not None
+    }
+    
     try:
         redis_client = await get_redis()
         info = await redis_client.info("stats")
@@ -313,7 +607,9 @@ async def get_cache_stats() -> dict:
             "hits": hits,
             "misses": misses,
             "hit_rate": round(hit_rate, 2),
-            "total_requests": total
+            "total_requests": total,
+            "l1": l1_stats,
+            "prefixes": prefixes
         }
     except Exception as e:
         logger.warning(f"Failed to get cache stats: {e}")
@@ -321,6 +617,8 @@ async def get_cache_stats() -> dict:
             "hits": 0,
             "misses": 0,
             "hit_rate": 0,
-            "total_requests": 0
+            "total_requests": 0,
+            "l1": l1_stats,
+            "prefixes": prefixes
         }
 
@@ -32,7 +32,10 @@ celery_app = Celery(
         "app.tasks.ticket_ai_tasks",  # Ticket AI analysis tasks
         "app.tasks.npa_answers_tasks",  # NPA answers AI cleanup tasks
         "app.tasks.helpdesk_ai_tasks",  # Helpdesk AI operations (KB suggestions, answer generation, etc.)
-        "app.tasks.ticket_agent_chat_tasks"  # Ticket agent chatbot tasks
+        "app.tasks.ticket_agent_chat_tasks",  # Ticket agent chatbot tasks
+        "app.tasks.dashboard_tasks",  # Dashboard KPI snapshot refresh
+        "app.tasks.report_export_tasks",  # Large report exports to MinIO
+        "app.tasks.customer_metrics_tasks"  # customer_metrics rollup refresh
     ]  # Import task modules
 )
 
@@ -52,6 +55,10 @@ celery_app.conf.update(
     task_reject_on_worker_lost=True,  # Retry if worker dies
     result_expires=3600,  # Keep results for 1 hour
     beat_schedule={
+        'run-due-planning-campaigns': {
+            'task': 'planning.run_due_campaigns',
+            'schedule': float(settings.PLANNING_SCHEDULE_CHECK_INTERVAL),  # Hourly by default
+        },
         'monitor-campaign-health': {
             'task': 'app.tasks.campaign_monitor_tasks.monitor_campaign_health',
             'schedule': 300.0,  # Every 5 minutes
@@ -79,7 +86,7 @@ celery_app.conf.update(
         },
         'check-sla-violations': {
             'task': 'check_sla_violations',
-            'schedule': 3600.0,  # Every hour
+            'schedule': float(settings.SLA_VIOLATION_CHECK_INTERVAL),  # Hourly by default
         },
         'generate-daily-sla-report': {
             'task': 'generate_sla_compliance_report',
@@ -98,7 +105,11 @@ celery_app.conf.update(
         },
         'auto-escalate-sla-violations': {
             'task': 'auto_escalate_sla_violations',
-            'schedule': 900.0,  # Every 15 minutes
+            'schedule': float(settings.SLA_ESCALATION_INTERVAL),  # Every 15 minutes by default
+        },
+        'rebuild-customer-metrics': {
+            'task': 'rebuild_customer_metrics',
+            'schedule': float(settings.CUSTOMER_METRICS_REBUILD_INTERVAL),  # Daily by default
         },
         'process-email-tickets': {
             'task': 'app.tasks.email_ticket_tasks.process_email_tickets',
@@ -119,6 +130,19 @@ celery_app.conf.task_routes = {
 from app.tasks.campaign_signals import setup_campaign_monitoring
 setup_campaign_monitoring(celery_app)
 
+
+# Each worker process subscribes to L1 cache invalidations (see app.core.caching)
+from celery.signals import worker_process_init
+
+
+@worker_process_init.connect
+def start_worker_cache_listener(**kwargs):
+    from app.core.caching import start_cache_invalidation_listener
+    start_cache_invalidation_listener()
+    # ORM hooks that invalidate caches and refresh rollups on commit
+    from app.core.database import register_session_hooks
+    register_session_hooks()
+
 if __name__ == "__main__":
     celery_app.start()
 
@@ -74,13 +74,60 @@ class Settings(BaseSettings):
     MINIO_SECURE: bool = Field(default=False, env="MINIO_SECURE")  # False for development
     MINIO_REGION: Optional[str] = Field(default=None, env="MINIO_REGION")
     
+    # Quote document rendering
+    QUOTE_DOCUMENT_RENDER_WORKERS: int = Field(default=2, env="QUOTE_DOCUMENT_RENDER_WORKERS")  # Render processes per API process
+    QUOTE_DOCUMENT_URL_EXPIRY: int = Field(default=900, env="QUOTE_DOCUMENT_URL_EXPIRY")  # seconds, presigned download URL lifetime
+    
+    # GDPR Subject Access Request exports
+    SAR_EXPORT_BATCH_SIZE: int = Field(default=500, env="SAR_EXPORT_BATCH_SIZE")  # Rows fetched per server-side cursor batch
+    SAR_EXPORT_PART_SIZE: int = Field(default=5 * 1024 * 1024, env="SAR_EXPORT_PART_SIZE")  # Multipart upload part size (min 5 MiB)
+    
+    # Report exports
+    EXPORT_STREAM_BATCH_SIZE: int = Field(default=1000, env="EXPORT_STREAM_BATCH_SIZE")  # Rows fetched per server-side cursor batch
+    EXPORT_BACKGROUND_ROW_THRESHOLD: int = Field(default=50000, env="EXPORT_BACKGROUND_ROW_THRESHOLD")  # Larger ticket exports are generated to MinIO by Celery
+    EXPORT_DOWNLOAD_URL_TTL: int = Field(default=86400, env="EXPORT_DOWNLOAD_URL_TTL")  # seconds, presigned download URL lifetime
+    EXPORT_XLSX_WIDTH_SAMPLE_ROWS: int = Field(default=200, env="EXPORT_XLSX_WIDTH_SAMPLE_ROWS")  # Rows sampled to size Excel columns
+    
+    # Planning applications
+    PLANNING_INSERT_BATCH_SIZE: int = Field(default=500, env="PLANNING_INSERT_BATCH_SIZE")  # Rows per INSERT ... ON CONFLICT statement
+    PLANNING_PORTAL_MAX_CONNECTIONS_PER_HOST: int = Field(default=4, env="PLANNING_PORTAL_MAX_CONNECTIONS_PER_HOST")  # Concurrent requests per portal host
+    PLANNING_PORTAL_TIMEOUT: float = Field(default=30.0, env="PLANNING_PORTAL_TIMEOUT")  # Seconds per portal request
+    PLANNING_SCHEDULE_CHECK_INTERVAL: int = Field(default=3600, env="PLANNING_SCHEDULE_CHECK_INTERVAL")  # Seconds between scheduled campaign checks
+    PLANNING_WATERMARK_OVERLAP_DAYS: int = Field(default=7, env="PLANNING_WATERMARK_OVERLAP_DAYS")  # Days before the watermark re-fetched each run for late-published applications
+    
     # Pagination
     DEFAULT_PAGE_SIZE: int = Field(default=20, env="DEFAULT_PAGE_SIZE")
     MAX_PAGE_SIZE: int = Field(default=100, env="MAX_PAGE_SIZE")
     
+    # Caching (in-process L1 in front of Redis)
+    CACHE_L1_ENABLED: bool = Field(default=True, env="CACHE_L1_ENABLED")
+    CACHE_L1_MAX_ENTRIES: int = Field(default=2048, env="CACHE_L1_MAX_ENTRIES")
+    CACHE_L1_TTL: int = Field(default=60, env="CACHE_L1_TTL")  # seconds, caps staleness if an invalidation is missed
+    PRINCIPAL_CACHE_TTL: int = Field(default=300, env="PRINCIPAL_CACHE_TTL")  # seconds, cached user/tenant for auth dependencies
+    DASHBOARD_KPI_CACHE_TTL: int = Field(default=900, env="DASHBOARD_KPI_CACHE_TTL")  # seconds, upper bound on snapshot age
+    DASHBOARD_KPI_REFRESH_DELAY: int = Field(default=15, env="DASHBOARD_KPI_REFRESH_DELAY")  # seconds, debounce for write-triggered refreshes
+    CUSTOMER_METRICS_REFRESH_DELAY: int = Field(default=10, env="CUSTOMER_METRICS_REFRESH_DELAY")  # seconds, debounce for customer_metrics rollup refreshes
+    CUSTOMER_METRICS_BATCH_SIZE: int = Field(default=500, env="CUSTOMER_METRICS_BATCH_SIZE")  # customers recomputed per INSERT ... ON CONFLICT statement
+    CUSTOMER_METRICS_REBUILD_INTERVAL: int = Field(default=86400, env="CUSTOMER_METRICS_REBUILD_INTERVAL")  # seconds between full per-tenant rollup rebuilds
+    
+    # WebSocket fan-out
+    WEBSOCKET_SEND_QUEUE_SIZE: int = Field(default=256, env="WEBSOCKET_SEND_QUEUE_SIZE")  # Outbound messages buffered per connection
+    WEBSOCKET_SEND_TIMEOUT: float = Field(default=10.0, env="WEBSOCKET_SEND_TIMEOUT")  # seconds, slower clients are disconnected
+    
+    # Helpdesk
+    HELPDESK_BULK_CHUNK_SIZE: int = Field(default=1000, env="HELPDESK_BULK_CHUNK_SIZE")  # Ticket ids per bulk UPDATE statement
+    SLA_VIOLATION_CHECK_INTERVAL: int = Field(default=3600, env="SLA_VIOLATION_CHECK_INTERVAL")  # Seconds between SLA breach scans
+    SLA_ESCALATION_INTERVAL: int = Field(default=900, env="SLA_ESCALATION_INTERVAL")  # Seconds between SLA auto-escalation scans
+    SLA_SCAN_PARTITIONS: int = Field(default=1, env="SLA_SCAN_PARTITIONS")  # Tenant partitions scanned by parallel workers (1 = single scan)
+    
     # Rate Limiting
     RATE_LIMIT_REQUESTS: int = Field(default=100, env="RATE_LIMIT_REQUESTS")
     RATE_LIMIT_WINDOW: int = Field(default=60, env="RATE_LIMIT_WINDOW")  # seconds
+    RATE_LIMIT_LOCAL_BUCKET_ENABLED: bool = Field(default=True, env="RATE_LIMIT_LOCAL_BUCKET_ENABLED")  # Local token leases for the authenticated class
+    RATE_LIMIT_LOCAL_BATCH: int = Field(default=10, env="RATE_LIMIT_LOCAL_BATCH")  # Tokens reserved from Redis per sync
+    RATE_LIMIT_LOCAL_SYNC_INTERVAL: float = Field(default=5.0, env="RATE_LIMIT_LOCAL_SYNC_INTERVAL")  # seconds, max age of a local lease
+    SECURITY_EVENT_BUFFER_SIZE: int = Field(default=1000, env="SECURITY_EVENT_BUFFER_SIZE")  # Buffered security events before new ones are dropped
+    SECURITY_EVENT_FLUSH_INTERVAL: float = Field(default=2.0, env="SECURITY_EVENT_FLUSH_INTERVAL")  # seconds between batched writes
     
     # Background Tasks
     # Default to REDIS_URL if CELERY_BROKER_URL is not explicitly set
@@ -102,17 +149,57 @@ class Settings(BaseSettings):
     OPENAI_MAX_TOKENS: int = Field(default=50000, env="OPENAI_MAX_TOKENS")
     OPENAI_TIMEOUT: int = Field(default=300, env="OPENAI_TIMEOUT")
     
+    # AI Provider Clients (shared async connection pools)
+    AI_PROVIDER_ASYNC_CLIENTS: bool = Field(default=True, env="AI_PROVIDER_ASYNC_CLIENTS")  # False = legacy sync SDK in executor
+    AI_PROVIDER_MAX_CONCURRENCY: int = Field(default=64, env="AI_PROVIDER_MAX_CONCURRENCY")  # In-flight calls per pooled client
+    AI_PROVIDER_MAX_CONNECTIONS: int = Field(default=100, env="AI_PROVIDER_MAX_CONNECTIONS")
+    AI_PROVIDER_MAX_KEEPALIVE: int = Field(default=20, env="AI_PROVIDER_MAX_KEEPALIVE")
+    
+    # Ticket agent assistant chat
+    AGENT_CHAT_CONTEXT_CACHE_TTL: int = Field(default=3600, env="AGENT_CHAT_CONTEXT_CACHE_TTL")  # seconds, cached ticket context (evicted on ticket/comment writes)
+    AGENT_CHAT_CONTEXT_TOKEN_BUDGET: int = Field(default=8000, env="AGENT_CHAT_CONTEXT_TOKEN_BUDGET")  # Estimated tokens of ticket context per AI call
+    AGENT_CHAT_HISTORY_TOKEN_BUDGET: int = Field(default=4000, env="AGENT_CHAT_HISTORY_TOKEN_BUDGET")  # Estimated tokens of verbatim conversation per AI call
+    AGENT_CHAT_RECENT_MESSAGES: int = Field(default=8, env="AGENT_CHAT_RECENT_MESSAGES")  # Latest messages never folded into the summary
+    AGENT_CHAT_SUMMARY_MAX_TOKENS: int = Field(default=600, env="AGENT_CHAT_SUMMARY_MAX_TOKENS")  # Length limit of the rolling summary
+    
+    # Log triage (agent chat log uploads and attachments)
+    LOG_TRIAGE_DIGEST_MAX_CHARS: int = Field(default=6000, env="LOG_TRIAGE_DIGEST_MAX_CHARS")  # Length of the digest sent instead of a log
+    LOG_TRIAGE_INLINE_CHARS: int = Field(default=5000, env="LOG_TRIAGE_INLINE_CHARS")  # Shorter logs are sent as is
+    LOG_TRIAGE_MAX_TEMPLATES: int = Field(default=5000, env="LOG_TRIAGE_MAX_TEMPLATES")  # Distinct line templates tracked per log
+    LOG_TRIAGE_MAX_BYTES: int = Field(default=256 * 1024 * 1024, env="LOG_TRIAGE_MAX_BYTES")  # Read limit per log file
+    
+    # Semantic retrieval (local embeddings for KB articles and similar tickets)
+    EMBEDDING_ENCODER: str = Field(default="hashing", env="EMBEDDING_ENCODER")  # hashing | sentence-transformers
+    EMBEDDING_MODEL: str = Field(default="sentence-transformers/all-MiniLM-L6-v2", env="EMBEDDING_MODEL")
+    EMBEDDING_DIMENSION: int = Field(default=384, env="EMBEDDING_DIMENSION")  # hashing encoder only
+    SEMANTIC_INDEX_MAX_TENANTS: int = Field(default=64, env="SEMANTIC_INDEX_MAX_TENANTS")  # Per-process tenant indexes kept in memory
+    SEMANTIC_INDEX_MAX_TICKETS: int = Field(default=20000, env="SEMANTIC_INDEX_MAX_TICKETS")  # Most recent tickets indexed per tenant
+    SEMANTIC_INDEX_PRUNE_INTERVAL: int = Field(default=600, env="SEMANTIC_INDEX_PRUNE_INTERVAL")  # seconds between checks that indexed tickets still exist
+    SEMANTIC_INDEX_SYNC_LAG: int = Field(default=300, env="SEMANTIC_INDEX_SYNC_LAG")  # seconds before the watermark re-read each sync, for rows committed late by long transactions
+    SEMANTIC_ARTICLE_MIN_SCORE: float = Field(default=0.15, env="SEMANTIC_ARTICLE_MIN_SCORE")
+    SIMILAR_TICKET_THRESHOLD: float = Field(default=0.5, env="SIMILAR_TICKET_THRESHOLD")
+    
     # Companies House API
     COMPANIES_HOUSE_BASE_URL: str = Field(
         default="https://api.company-information.service.gov.uk",
         env="COMPANIES_HOUSE_BASE_URL"
     )
+    COMPANIES_HOUSE_RATE_LIMIT: int = Field(default=600, env="COMPANIES_HOUSE_RATE_LIMIT")  # Requests per window, shared by all workers
+    COMPANIES_HOUSE_RATE_WINDOW: int = Field(default=300, env="COMPANIES_HOUSE_RATE_WINDOW")  # Seconds
+    COMPANIES_HOUSE_RATE_BURST: int = Field(default=20, env="COMPANIES_HOUSE_RATE_BURST")  # Token bucket capacity
+    COMPANIES_HOUSE_CACHE_TTL_SEARCH: int = Field(default=86400, env="COMPANIES_HOUSE_CACHE_TTL_SEARCH")  # Seconds before revalidating
+    COMPANIES_HOUSE_CACHE_TTL_PROFILE: int = Field(default=86400, env="COMPANIES_HOUSE_CACHE_TTL_PROFILE")
+    COMPANIES_HOUSE_CACHE_TTL_OFFICERS: int = Field(default=86400, env="COMPANIES_HOUSE_CACHE_TTL_OFFICERS")
+    COMPANIES_HOUSE_CACHE_TTL_FILINGS: int = Field(default=6 * 3600, env="COMPANIES_HOUSE_CACHE_TTL_FILINGS")
+    COMPANIES_HOUSE_CACHE_RETENTION: int = Field(default=30 * 86400, env="COMPANIES_HOUSE_CACHE_RETENTION")  # Stale entries kept for ETag revalidation
     
     # Google Maps API
     GOOGLE_MAPS_BASE_URL: str = Field(
         default="https://maps.googleapis.com/maps/api",
         env="GOOGLE_MAPS_BASE_URL"
     )
+    GOOGLE_MAPS_GEOCODE_CACHE_TTL: int = Field(default=30 * 86400, env="GOOGLE_MAPS_GEOCODE_CACHE_TTL")  # Postcode geocodes, shared by all campaigns
+    LEAD_ENRICHMENT_CONCURRENCY: int = Field(default=8, env="LEAD_ENRICHMENT_CONCURRENCY")  # Leads verified at once per campaign
     
     # Multilingual
     DEFAULT_LANGUAGE: str = Field(default="en", env="DEFAULT_LANGUAGE")
@@ -309,6 +309,22 @@ async def seed_ai_prompts_on_init():
         print(f"⚠️  Error seeding AI prompts: {e}")
 
 
+def register_session_hooks():
+    """
+    Register the ORM Session event hooks that keep caches and rollups in step
+    with committed writes
+    
+    Called once per process at startup (API lifespan, Celery worker init) so
+    the hooks are active regardless of which routers or tasks were imported.
+    The modules register their listeners on import; importing here (not at
+    module level) avoids circular imports with the models.
+    """
+    import app.core.principal_cache  # noqa: F401  (cached users/tenants)
+    import app.services.ticket_context_cache  # noqa: F401  (agent chat ticket context)
+    import app.services.dashboard_kpi_service  # noqa: F401  (dashboard KPI snapshot refresh)
+    import app.services.customer_metrics_service  # noqa: F401  (customer_metrics rollup)
+
+
 def get_db():
     """
     Get database session.
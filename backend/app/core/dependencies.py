@@ -5,12 +5,11 @@ FastAPI dependencies for authentication and database access
 
 from fastapi import Depends, HTTPException, status, Request, Cookie
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from sqlalchemy.orm import Session
 from typing import Optional
 from jose import jwt
 
 from app.core.config import settings
-from app.core.database import get_db
+from app.core.principal_cache import get_user_principal, get_tenant_principal
 from app.models.tenant import User, Tenant
 
 # Security - HTTPBearer for Authorization header (backward compatibility)
@@ -20,14 +19,16 @@ security = HTTPBearer(auto_error=False)
 async def get_current_user(
     request: Request,
     credentials: Optional[HTTPAuthorizationCredentials] = Depends(security),
-    access_token_cookie: Optional[str] = Cookie(None, alias="access_token"),
-    db: Session = Depends(get_db)
+    access_token_cookie: Optional[str] = Cookie(None, alias="access_token")
 ) -> User:
     """
     Get current authenticated user from JWT token
     
     SECURITY: Supports both HttpOnly cookies (preferred) and Authorization header (backward compatibility).
     HttpOnly cookies prevent XSS attacks by making tokens inaccessible to JavaScript.
+    
+    PERFORMANCE: The user is served from the principal cache (see app.core.principal_cache)
+    and returned detached - load it through your own session before modifying it.
     """
     # Try to get token from cookie first (more secure)
     token = access_token_cookie
@@ -64,8 +65,8 @@ async def get_current_user(
             detail="Could not validate credentials"
         )
     
-    # Get user from database
-    user = db.query(User).filter(User.id == user_id).first()
+    # Get user from principal cache (async DB load on miss)
+    user = await get_user_principal(user_id)
     if user is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -83,8 +84,7 @@ async def get_current_user(
 
 async def get_current_tenant(
     request: Request,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: User = Depends(get_current_user)
 ) -> Tenant:
     """
     Get current tenant from authenticated user's JWT token.
@@ -95,6 +95,8 @@ async def get_current_tenant(
     3. Rejecting requests where header/subdomain doesn't match JWT tenant
     
     This prevents tenant impersonation attacks.
+    
+    PERFORMANCE: The tenant is served from the principal cache and returned detached.
     """
     # Get tenant from JWT token (source of truth)
     jwt_tenant_id = current_user.tenant_id
@@ -116,8 +118,8 @@ async def get_current_tenant(
             detail="Tenant mismatch: provided tenant does not match authenticated user's tenant"
         )
     
-    # Get tenant from database
-    tenant = db.query(Tenant).filter(Tenant.id == jwt_tenant_id).first()
+    # Get tenant from principal cache (async DB load on miss)
+    tenant = await get_tenant_principal(jwt_tenant_id)
     if not tenant:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
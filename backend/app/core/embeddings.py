@@ -0,0 +1,254 @@
+#!/usr/bin/env python3
+"""
+Local text embeddings and in-memory vector index
+
+PERFORMANCE: Similarity between tickets and knowledge base articles is scored
+locally with embeddings + cosine top-k instead of sending raw text to an LLM.
+
+Encoders are pluggable (EMBEDDING_ENCODER setting):
+- "hashing": CPU-only feature-hashing encoder, no model download (default)
+- "sentence-transformers": local transformer model if the optional
+  sentence-transformers package is installed (EMBEDDING_MODEL)
+Additional encoders can be added with register_encoder().
+"""
+
+import logging
+import re
+import threading
+import zlib
+from functools import lru_cache
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+_STOP_WORDS = frozenset({
+    "the", "a", "an", "and", "or", "but", "in", "on", "at", "to", "for", "of", "with",
+    "is", "are", "was", "were", "be", "been", "it", "its", "this", "that", "as", "by",
+    "from", "we", "i", "you", "they", "our", "your", "my", "me", "can", "not", "no",
+    "have", "has", "had", "do", "does", "did", "will", "would", "please", "hi", "hello",
+    "thanks", "thank", "regards"
+})
+
+
+class EmbeddingEncoder:
+    """Base class for text encoders; encode() returns L2-normalized float32 rows"""
+    
+    name = "base"
+    dimension = 0
+    
+    def encode(self, texts: Sequence[str]) -> np.ndarray:
+        raise NotImplementedError
+
+
+def _normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+@lru_cache(maxsize=65536)
+def _hash_feature(feature: str) -> int:
+    return zlib.crc32(feature.encode("utf-8"))
+
+
+def _stem(token: str) -> str:
+    """Very light suffix stripping so "printers"/"printing" share features with "printer" """
+    for suffix in ("ing", "ed", "es", "s"):
+        if len(token) > len(suffix) + 3 and token.endswith(suffix):
+            return token[:-len(suffix)]
+    return token
+
+
+class HashingEncoder(EmbeddingEncoder):
+    """
+    Signed feature-hashing encoder over word unigrams and bigrams
+    
+    Deterministic, dependency-free and fast enough to encode on the request
+    path; captures lexical overlap (not synonyms) with TF damping.
+    """
+    
+    name = "hashing"
+    
+    def __init__(self, dimension: int = 384):
+        self.dimension = dimension
+    
+    def _features(self, text: str) -> List[str]:
+        tokens = [_stem(t) for t in _TOKEN_RE.findall((text or "").lower()) if t not in _STOP_WORDS and len(t) > 1]
+        return tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+    
+    def encode(self, texts: Sequence[str]) -> np.ndarray:
+        matrix = np.zeros((len(texts), self.dimension), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for feature in self._features(text):
+                h = _hash_feature(feature)
+                matrix[row, h % self.dimension] += 1.0 if h & 0x80000000 else -1.0
+        # Sublinear term frequency so repeated words don't dominate
+        matrix = np.sign(matrix) * np.log1p(np.abs(matrix))
+        return _normalize_rows(matrix)
+
+
+class SentenceTransformerEncoder(EmbeddingEncoder):
+    """Local transformer encoder (requires the optional sentence-transformers package)"""
+    
+    name = "sentence-transformers"
+    
+    def __init__(self, model_name: str):
+        from sentence_transformers import SentenceTransformer
+        self._model = SentenceTransformer(model_name, device="cpu")
+        self.dimension = self._model.get_sentence_embedding_dimension()
+    
+    def encode(self, texts: Sequence[str]) -> np.ndarray:
+        vectors = self._model.encode(list(texts), batch_size=64, normalize_embeddings=True, show_progress_bar=False)
+        return np.asarray(vectors, dtype=np.float32)
+
+
+_encoder_factories: Dict[str, Callable[[], EmbeddingEncoder]] = {
+    "hashing": lambda: HashingEncoder(settings.EMBEDDING_DIMENSION),
+    "sentence-transformers": lambda: SentenceTransformerEncoder(settings.EMBEDDING_MODEL),
+}
+_encoder: Optional[EmbeddingEncoder] = None
+_encoder_lock = threading.Lock()
+
+
+def register_encoder(name: str, factory: Callable[[], EmbeddingEncoder]):
+    """Register an encoder factory selectable via EMBEDDING_ENCODER"""
+    _encoder_factories[name] = factory
+
+
+def get_encoder() -> EmbeddingEncoder:
+    """Process-wide encoder; falls back to the hashing encoder if the configured one can't load"""
+    global _encoder
+    if _encoder is None:
+        with _encoder_lock:
+            if _encoder is None:
+                name = settings.EMBEDDING_ENCODER
+                try:
+                    _encoder = _encoder_factories[name]()
+                except Exception as e:
+                    logger.warning(f"Embedding encoder '{name}' unavailable, using hashing encoder: {e}")
+                    _encoder = HashingEncoder(settings.EMBEDDING_DIMENSION)
+    return _encoder
+
+
+class VectorIndex:
+    """
+    In-memory cosine similarity index backed by a NumPy matrix
+    
+    Rows are L2-normalized, so cosine similarity is a single matrix product.
+    Supports incremental upsert/remove; thread-safe.
+    """
+    
+    def __init__(self, dimension: int, initial_capacity: int = 256):
+        self.dimension = dimension
+        self._matrix = np.zeros((initial_capacity, dimension), dtype=np.float32)
+        self._ids: List[str] = []
+        self._positions: Dict[str, int] = {}
+        self._lock = threading.RLock()
+    
+    def __len__(self) -> int:
+        return len(self._ids)
+    
+    def __contains__(self, item_id: str) -> bool:
+        return item_id in self._positions
+    
+    def ids(self) -> List[str]:
+        """Snapshot of the indexed ids"""
+        with self._lock:
+            return list(self._ids)
+    
+    def upsert(self, ids: Sequence[str], vectors: np.ndarray):
+        """Insert or replace vectors for the given ids"""
+        with self._lock:
+            for item_id, vector in zip(ids, vectors):
+                position = self._positions.get(item_id)
+                if position is None:
+                    position = len(self._ids)
+                    if position >= self._matrix.shape[0]:
+                        grown = np.zeros((max(1, self._matrix.shape[0]) * 2, self.dimension), dtype=np.float32)
+                        grown[:position] = self._matrix[:position]
+                        self._matrix = grown
+                    self._ids.append(item_id)
+                    self._positions[item_id] = position
+                self._matrix[position] = vector
+    
+    def remove(self, ids: Iterable[str]):
+        """Remove ids (swaps the last row into the freed slot)"""
+        with self._lock:
+            for item_id in ids:
+                position = self._positions.pop(item_id, None)
+                if position is None:
+                    continue
+                last = len(self._ids) - 1
+                if position != last:
+                    last_id = self._ids[last]
+                    self._matrix[position] = self._matrix[last]
+                    self._ids[position] = last_id
+                    self._positions[last_id] = position
+                self._ids.pop()
+    
+    def search(
+        self,
+        queries: np.ndarray,
+        k: int = 5,
+        min_score: float = 0.0,
+        exclude: Optional[set] = None
+    ) -> List[List[Tuple[str, float]]]:
+        """
+        Batched cosine top-k
+        
+        Args:
+            queries: (n, dimension) or (dimension,) normalized query vectors
+            k: Results per query
+            min_score: Drop results below this cosine similarity
+            exclude: Ids never returned
+        
+        Returns:
+            One list of (id, score) per query, best first
+        """
+        queries = np.atleast_2d(queries)
+        with self._lock:
+            size = len(self._ids)
+            if size == 0:
+                return [[] for _ in range(queries.shape[0])]
+            scores = queries @ self._matrix[:size].T
+            ids = list(self._ids)
+        
+        # Over-fetch to leave room for excluded ids
+        fetch = min(size, k + len(exclude or ()))
+        results = []
+        for row in scores:
+            if fetch < size:
+                candidates = np.argpartition(-row, fetch - 1)[:fetch]
+            else:
+                candidates = np.arange(size)
+            candidates = candidates[np.argsort(-row[candidates])]
+            hits = []
+            for position in candidates:
+                score = float(row[position])
+                if score < min_score:
+                    break
+                if exclude and ids[position] in exclude:
+                    continue
+                hits.append((ids[position], score))
+                if len(hits) >= k:
+                    break
+            results.append(hits)
+        return results
+
+
+def similar_pairs(vectors: np.ndarray, threshold: float) -> List[Tuple[int, int, float]]:
+    """All (i, j, score) with i < j and cosine similarity >= threshold, best first"""
+    if len(vectors) < 2:
+        return []
+    scores = vectors @ vectors.T
+    upper = np.triu(np.ones(scores.shape, dtype=bool), k=1)
+    rows, cols = np.where(upper & (scores >= threshold))
+    pairs = [(int(i), int(j), float(scores[i, j])) for i, j in zip(rows, cols)]
+    pairs.sort(key=lambda pair: pair[2], reverse=True)
+    return pairs
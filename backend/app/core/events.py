@@ -10,7 +10,7 @@ import json
 import logging
 import redis.asyncio as aioredis
 import asyncio
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional, Tuple
 from datetime import datetime
 from app.core.config import settings
 
@@ -87,6 +87,38 @@ class EventPublisher:
         except Exception as e:
             logger.error("EventPublisher: Failed to publish event", extra={'event_type': event_type, 'error': str(e)})
     
+    async def _publish_many(self, tenant_id: str, events: List[Tuple[str, Dict[str, Any]]]):
+        """
+        Publish several events to a tenant channel in one pipelined round trip
+        
+        Args:
+            tenant_id: Tenant ID for channel isolation
+            events: (event_type, data) pairs, published in order
+        """
+        if not events:
+            return
+        if not self.redis_client:
+            await self._connect()
+            if not self.redis_client:
+                logger.warning("EventPublisher: Cannot publish events, Redis not available")
+                return
+        
+        try:
+            channel = f"tenant:{tenant_id}:events"
+            timestamp = datetime.utcnow().isoformat() + "Z"
+            pipe = self.redis_client.pipeline(transaction=False)
+            for event_type, data in events:
+                pipe.publish(channel, json.dumps({
+                    "type": event_type,
+                    "tenant_id": tenant_id,
+                    "data": data,
+                    "timestamp": timestamp
+                }))
+            await pipe.execute()
+            logger.debug("Published events", extra={'count': len(events), 'channel': channel})
+        except Exception as e:
+            logger.error("EventPublisher: Failed to publish events", extra={'count': len(events), 'error': str(e)})
+    
     def _publish_sync(self, tenant_id: str, event_type: str, data: Dict[str, Any]):
         """
         Synchronous wrapper for publishing events (for use in Celery tasks)
@@ -383,6 +415,22 @@ class EventPublisher:
             "sla_policy_name": sla_policy_name
         })
     
+    async def publish_sla_breaches(self, tenant_id: str, alerts: List[Dict[str, Any]]):
+        """Publish one sla.breach event per alert in a single round trip"""
+        await self._publish_many(tenant_id, [
+            ("sla.breach", {
+                "alert_id": alert["alert_id"],
+                "ticket_id": alert["ticket_id"],
+                "ticket_number": alert["ticket_number"],
+                "breach_type": alert["breach_type"],
+                "breach_percent": alert["breach_percent"],
+                "alert_level": alert["alert_level"],
+                "sla_policy_id": alert["sla_policy_id"],
+                "sla_policy_name": alert.get("sla_policy_name")
+            })
+            for alert in alerts
+        ])
+    
     async def publish_sla_compliance_updated(self, tenant_id: str, ticket_id: str, compliance_data: Dict[str, Any]):
         """Publish sla.compliance_updated event"""
         await self._publish(tenant_id, "sla.compliance_updated", {
@@ -432,6 +480,14 @@ class EventPublisher:
             "new_priority": new_priority
         })
 
+    
+    async def publish_tickets_bulk_updated(self, tenant_id: str, ticket_ids: List[str], changes: Dict[str, Any]):
+        """Publish ticket.bulk_updated event (one event for a batch of tickets)"""
+        await self._publish(tenant_id, "ticket.bulk_updated", {
+            "ticket_ids": ticket_ids,
+            "count": len(ticket_ids),
+            "changes": changes
+        })
 
 # Global event publisher instance
 _event_publisher: Optional[EventPublisher] = None
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Multi-keyword matching with a single compiled regular expression
+
+PERFORMANCE: Keyword lists are merged into one prefix-trie shaped regex, so
+a text is scanned once for all keywords instead of once per keyword. Used
+for SAR name redaction and planning application classification.
+"""
+
+import re
+from typing import Dict, Iterable, List, Optional, Pattern, Set
+
+
+def build_trie_pattern(words: Iterable[str]) -> Optional[str]:
+    """
+    Regex source matching any of the words (longest match at each position)
+
+    Words are merged into a prefix trie, so the pattern branches on one
+    character at a time instead of trying every alternative in turn.
+    """
+    trie: Dict[str, dict] = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[""] = {}
+    if not trie:
+        return None
+    return _node_pattern(trie)
+
+
+def _node_pattern(node: Dict[str, dict]) -> Optional[str]:
+    if "" in node and len(node) == 1:
+        return None
+
+    branches = []
+    single_chars = []
+    optional = "" in node
+    for char in sorted(node):
+        if char == "":
+            continue
+        child = _node_pattern(node[char])
+        if child is None:
+            single_chars.append(re.escape(char))
+        else:
+            branches.append(re.escape(char) + child)
+
+    chars_only = not branches
+    if single_chars:
+        branches.append(single_chars[0] if len(single_chars) == 1 else f"[{''.join(single_chars)}]")
+
+    pattern = branches[0] if len(branches) == 1 else f"(?:{'|'.join(branches)})"
+    if optional:
+        # Greedy: the longer word wins, falling back to this one
+        pattern = f"{pattern}?" if chars_only else f"(?:{pattern})?"
+    return pattern
+
+
+class KeywordMatcher:
+    """
+    Finds which of a fixed set of keywords occur in a text (case-insensitive substrings)
+
+    Gives the same answer as testing `keyword in text` for every keyword,
+    overlapping and nested keywords included, in one regex pass.
+    """
+
+    def __init__(self, keywords: Iterable[str]):
+        self.keywords: Set[str] = {keyword.lower() for keyword in keywords if keyword}
+        # Keywords that are prefixes of each keyword (itself included): when the longest
+        # keyword starting at a position is found, all of these start there as well
+        self._prefixes: Dict[str, List[str]] = {
+            keyword: [keyword[:end] for end in range(1, len(keyword) + 1) if keyword[:end] in self.keywords]
+            for keyword in self.keywords
+        }
+        source = build_trie_pattern(sorted(self.keywords))
+        # Zero-width lookahead so a match is attempted at every position
+        self._regex: Optional[Pattern[str]] = re.compile(f"(?=({source}))", re.IGNORECASE) if source else None
+
+    def find(self, text: Optional[str]) -> Set[str]:
+        """Lowercased keywords present in text"""
+        if not text or self._regex is None:
+            return set()
+        found: Set[str] = set()
+        for longest in {match.group(1).lower() for match in self._regex.finditer(text)}:
+            found.update(self._prefixes[longest])
+        return found
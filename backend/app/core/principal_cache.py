@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+"""
+Cached principal resolution for authentication dependencies
+
+PERFORMANCE: get_current_user/get_current_tenant run on every authenticated
+request. Instead of two blocking sync queries per request, the user and tenant
+rows are cached through the two-tier cache (in-process L1 + Redis) keyed by
+JWT subject and tenant id, and cache misses are loaded on the async engine.
+
+Cached principals are rebuilt as detached (transient) User/Tenant instances,
+a fresh copy per request. Endpoints that need to modify the user or tenant
+must load it through their own session, which they already do.
+
+SECURITY: only the fields listed in USER_PRINCIPAL_FIELDS/TENANT_PRINCIPAL_FIELDS
+are cached. Password hashes and tenant API keys never reach Redis or L1; on
+a cached principal they are None, so read them from the database.
+
+Invalidation:
+- Any ORM flush that updates or deletes a User/Tenant evicts its entry once
+  the transaction commits (deactivation, role/permission changes, suspension).
+- invalidate_user_principal()/invalidate_tenant_principal() for bulk SQL
+  updates that bypass the ORM.
+- PRINCIPAL_CACHE_TTL bounds staleness if an invalidation is missed.
+"""
+
+import copy
+import enum
+import logging
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, Dict, Optional, Type
+
+from sqlalchemy import event, inspect as sa_inspect, select
+from sqlalchemy.orm import Session
+
+from app.core.caching import CACHE_PREFIX_TENANT, CACHE_PREFIX_USER, delete_cache_nowait, get_cache, set_cache
+from app.core.config import settings
+from app.models.tenant import Tenant, User
+
+logger = logging.getLogger(__name__)
+
+# Session.info key collecting principals touched by a flush, applied on commit
+_PENDING_INVALIDATIONS = "principal_cache_invalidations"
+
+# Columns cached for the auth dependencies and the endpoints reading current_user/current_tenant
+USER_PRINCIPAL_FIELDS = (
+    "id", "tenant_id", "email", "username", "first_name", "last_name",
+    "is_active", "is_verified", "role", "permissions",
+    "avatar_url", "phone", "timezone", "language", "preferences", "last_login_at",
+    "created_at", "updated_at",
+)
+
+TENANT_PRINCIPAL_FIELDS = (
+    "id", "name", "company_name", "slug", "domain", "status", "settings",
+    "logo_url", "logo_text", "use_text_logo", "primary_color", "secondary_color",
+    "company_address", "company_phone_numbers", "company_email_addresses", "company_contact_names",
+    "company_description", "company_websites", "products_services", "unique_selling_points",
+    "target_markets", "sales_methodology", "elevator_pitch", "partnership_opportunities",
+    "company_analysis", "company_analysis_date", "website_keywords",
+    "api_calls_this_month", "api_limit_monthly", "plan", "billing_email",
+    "created_at", "updated_at",
+)
+
+_PRINCIPAL_FIELDS = {User: USER_PRINCIPAL_FIELDS, Tenant: TENANT_PRINCIPAL_FIELDS}
+
+
+def user_principal_key(user_id: str) -> str:
+    return f"{CACHE_PREFIX_USER}{user_id}:principal"
+
+
+def tenant_principal_key(tenant_id: str) -> str:
+    return f"{CACHE_PREFIX_TENANT}{tenant_id}:principal"
+
+
+def _serialize(instance) -> Dict[str, Any]:
+    """Allow-listed column values of a User/Tenant as a JSON-safe dict"""
+    data = {}
+    for key in _PRINCIPAL_FIELDS[type(instance)]:
+        value = getattr(instance, key)
+        if isinstance(value, enum.Enum):
+            value = value.name
+        elif isinstance(value, (datetime, date)):
+            value = value.isoformat()
+        elif isinstance(value, Decimal):
+            value = str(value)
+        data[key] = value
+    return data
+
+
+def _deserialize(model: Type, data: Dict[str, Any]):
+    """Rebuild a transient ORM instance from _serialize() output"""
+    values = {}
+    for attr in sa_inspect(model).column_attrs:
+        if attr.key not in data or attr.key not in _PRINCIPAL_FIELDS[model]:
+            continue
+        value = data[attr.key]
+        if value is not None:
+            column_type = attr.columns[0].type
+            enum_class = getattr(column_type, "enum_class", None)
+            if enum_class is not None:
+                value = enum_class[value]
+            else:
+                try:
+                    python_type = column_type.python_type
+                except NotImplementedError:
+                    python_type = None
+                if python_type is datetime:
+                    value = datetime.fromisoformat(value)
+                elif python_type is date:
+                    value = date.fromisoformat(value)
+                elif python_type is Decimal:
+                    value = Decimal(value)
+                elif isinstance(value, (dict, list)):
+                    # L1 values are shared between requests; never hand them out
+                    value = copy.deepcopy(value)
+        values[attr.key] = value
+    return model(**values)
+
+
+async def _load_principal(model: Type, key: str, principal_id: str):
+    data = await get_cache(key)
+    if data is None:
+        from app.core.database import AsyncSessionLocal
+        async with AsyncSessionLocal() as session:
+            result = await session.execute(select(model).where(model.id == principal_id))
+            instance = result.scalar_one_or_none()
+            if instance is None:
+                return None
+            data = _serialize(instance)
+        await set_cache(key, data, ttl=settings.PRINCIPAL_CACHE_TTL)
+    return _deserialize(model, data)
+
+
+async def get_user_principal(user_id: str) -> Optional[User]:
+    """
+    Get a user by id, served from cache when possible
+    
+    Args:
+        user_id: User ID (JWT "sub")
+    
+    Returns:
+        Detached User instance or None if the user does not exist
+    """
+    return await _load_principal(User, user_principal_key(user_id), user_id)
+
+
+async def get_tenant_principal(tenant_id: str) -> Optional[Tenant]:
+    """
+    Get a tenant by id, served from cache when possible
+    
+    Args:
+        tenant_id: Tenant ID
+    
+    Returns:
+        Detached Tenant instance or None if the tenant does not exist
+    """
+    return await _load_principal(Tenant, tenant_principal_key(tenant_id), tenant_id)
+
+
+def invalidate_user_principal(*user_ids: str):
+    """Evict cached users in every process (use after bulk updates)"""
+    delete_cache_nowait(*(user_principal_key(user_id) for user_id in user_ids))
+
+
+def invalidate_tenant_principal(*tenant_ids: str):
+    """Evict cached tenants in every process (use after bulk updates)"""
+    delete_cache_nowait(*(tenant_principal_key(tenant_id) for tenant_id in tenant_ids))
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_principal_changes(session, flush_context):
+    """Remember which users/tenants were updated or deleted in this transaction"""
+    keys = None
+    for instance in list(session.dirty) + list(session.deleted):
+        if isinstance(instance, User):
+            key = user_principal_key(instance.id)
+        elif isinstance(instance, Tenant):
+            key = tenant_principal_key(instance.id)
+        else:
+            continue
+        if keys is None:
+            keys = session.info.setdefault(_PENDING_INVALIDATIONS, set())
+        keys.add(key)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_committed_principals(session):
+    # Also fires for AsyncSession commits on the event loop: Redis work runs off the loop
+    keys = session.info.pop(_PENDING_INVALIDATIONS, None)
+    if keys:
+        delete_cache_nowait(*keys)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_principal_changes(session):
+    session.info.pop(_PENDING_INVALIDATIONS, None)
@@ -4,11 +4,16 @@ Rate limiting middleware for FastAPI
 
 SECURITY: Implements per-endpoint rate limiting to prevent abuse and DDoS attacks.
 Uses Redis for distributed rate limiting across multiple backend instances.
+
+PERFORMANCE: Each check is a single atomic EVALSHA of a sliding-window
+counter script, and the high-volume authenticated class spends locally
+leased tokens so most requests don't touch Redis at all.
 """
 
+import math
 import time
 import logging
-from typing import Optional, Tuple
+from typing import Dict, List, Optional, Tuple
 from fastapi import Request, HTTPException, status
 from starlette.middleware.base import BaseHTTPMiddleware
 from starlette.responses import Response
@@ -18,6 +23,66 @@ from app.core.config import settings
 
 logger = logging.getLogger(__name__)
 
+# Sliding-window counter: the previous fixed window is weighted by how much of it
+# still overlaps the sliding window. Check and increment happen atomically.
+# KEYS: current window key, previous window key
+# ARGV: limit, window_ms, elapsed_ms (into current window), cost
+# Returns: {allowed (0/1), remaining, reset_ms}
+SLIDING_WINDOW_SCRIPT = """
+local limit = tonumber(ARGV[1])
+local window_ms = tonumber(ARGV[2])
+local elapsed_ms = tonumber(ARGV[3])
+local cost = tonumber(ARGV[4])
+
+local current = tonumber(redis.call('GET', KEYS[1]) or '0')
+local previous = tonumber(redis.call('GET', KEYS[2]) or '0')
+local weight = (window_ms - elapsed_ms) / window_ms
+local estimated = previous * weight + current
+
+if estimated + cost > limit then
+    local retry_ms = window_ms - elapsed_ms
+    if previous > 0 and current + cost <= limit then
+        retry_ms = math.min(retry_ms, math.ceil((estimated + cost - limit) * window_ms / previous))
+    end
+    return {0, math.max(0, math.floor(limit - estimated)), retry_ms}
+end
+
+current = redis.call('INCRBY', KEYS[1], cost)
+redis.call('PEXPIRE', KEYS[1], window_ms * 2)
+return {1, math.floor(limit - (previous * weight + current)), window_ms - elapsed_ms}
+"""
+
+
+class LocalTokenLeases:
+    """
+    Per-process token leases for a high-volume rate limit class
+    
+    Tokens are reserved from the shared Redis window in batches and spent
+    locally; Redis is consulted again when a lease is used up or older than
+    the sync interval. Worst-case overshoot is one unused batch per process.
+    """
+    
+    def __init__(self, max_clients: int = 10000):
+        self.max_clients = max_clients
+        # key -> [tokens_left, remaining_after_lease, reset_at, expires_at]
+        self._leases: Dict[str, List[float]] = {}
+    
+    def take(self, key: str, now: float) -> Optional[Tuple[int, float]]:
+        """Spend one local token; returns (remaining, reset_seconds) or None if Redis must be asked"""
+        lease = self._leases.get(key)
+        if lease is None or lease[0] <= 0 or now >= lease[3]:
+            return None
+        lease[0] -= 1
+        return int(lease[1] + lease[0]), max(lease[2] - now, 1)
+    
+    def store(self, key: str, tokens: int, remaining: int, reset_seconds: float, now: float, ttl: float):
+        """Record a lease of `tokens` reserved from Redis"""
+        if key not in self._leases and len(self._leases) >= self.max_clients:
+            self._leases = {k: v for k, v in self._leases.items() if v[3] > now}
+            if len(self._leases) >= self.max_clients:
+                self._leases.clear()
+        self._leases[key] = [tokens, remaining, now + reset_seconds, now + ttl]
+
 
 class RateLimitMiddleware(BaseHTTPMiddleware):
     """
@@ -60,6 +125,15 @@ class RateLimitMiddleware(BaseHTTPMiddleware):
         "/openapi.json",
     ]
     
+    # Classes served from local token leases (see LocalTokenLeases)
+    LOCAL_BUCKET_TYPES = {"authenticated"}
+    
+    def __init__(self, app):
+        super().__init__(app)
+        self._local_leases = LocalTokenLeases()
+        self._script = None
+        self._script_client = None
+    
     async def dispatch(self, request: Request, call_next):
         """
         Check rate limit before processing request
@@ -95,43 +169,27 @@ class RateLimitMiddleware(BaseHTTPMiddleware):
                 }
             )
             
-            # Log security event (async, don't block response)
+            # Log security event (buffered, written in the background)
             try:
-                from app.core.database import SessionLocal
-                from app.services.security_event_service import SecurityEventService
+                from app.services.security_event_service import get_security_event_buffer
                 from app.models.security_event import SecurityEventType, SecurityEventSeverity
                 
-                sync_db = SessionLocal()
-                try:
-                    security_service = SecurityEventService(sync_db)
-                    # Extract user_id from client_id if it's a user-based limit
-                    user_id = None
-                    tenant_id = None
-                    if client_id.startswith("user:"):
-                        user_id = client_id.replace("user:", "")
-                        # Get tenant_id from user if possible
-                        from app.models.tenant import User
-                        user = sync_db.query(User).filter(User.id == user_id).first()
-                        if user:
-                            tenant_id = user.tenant_id
-                    
-                    security_service.log_event(
-                        event_type=SecurityEventType.RATE_LIMIT_EXCEEDED,
-                        description=f"Rate limit exceeded for {client_id} on {request.url.path}",
-                        severity=SecurityEventSeverity.MEDIUM,
-                        tenant_id=tenant_id,
-                        user_id=user_id,
-                        ip_address=request.client.host if request.client else None,
-                        user_agent=request.headers.get("user-agent"),
-                        metadata={
-                            "path": request.url.path,
-                            "endpoint_type": endpoint_type,
-                            "limit": limit,
-                            "client_id": client_id
-                        }
-                    )
-                finally:
-                    sync_db.close()
+                # Tenant is resolved from the user when the buffer is flushed
+                user_id = client_id.replace("user:", "") if client_id.startswith("user:") else None
+                get_security_event_buffer().log_event(
+                    event_type=SecurityEventType.RATE_LIMIT_EXCEEDED,
+                    description=f"Rate limit exceeded for {client_id} on {request.url.path}",
+                    severity=SecurityEventSeverity.MEDIUM,
+                    user_id=user_id,
+                    ip_address=request.client.host if request.client else None,
+                    user_agent=request.headers.get("user-agent"),
+                    metadata={
+                        "path": request.url.path,
+                        "endpoint_type": endpoint_type,
+                        "limit": limit,
+                        "client_id": client_id
+                    }
+                )
             except Exception as e:
                 # Don't fail the request if logging fails
                 logger.error(f"Failed to log rate limit event: {e}")
@@ -217,14 +275,23 @@ class RateLimitMiddleware(BaseHTTPMiddleware):
         """
         Check if request is within rate limit
         
-        Uses Redis sliding window algorithm:
-        - Key format: "rate_limit:{endpoint_type}:{client_id}"
-        - Value: Current request count
-        - TTL: window_seconds
+        Uses an atomic Redis sliding-window counter (SLIDING_WINDOW_SCRIPT):
+        - Key format: "rate_limit:{endpoint_type}:{client_id}:{window_index}"
+        - One EVALSHA per check (no GET/INCR race)
+        - Classes in LOCAL_BUCKET_TYPES spend locally leased tokens first
         
         Returns:
             (allowed: bool, remaining: int, reset_time: float)
         """
+        key = f"rate_limit:{endpoint_type}:{client_id}"
+        use_local = settings.RATE_LIMIT_LOCAL_BUCKET_ENABLED and endpoint_type in self.LOCAL_BUCKET_TYPES
+        now = time.monotonic()
+        
+        if use_local:
+            leased = self._local_leases.take(key, now)
+            if leased is not None:
+                return True, leased[0], leased[1]
+        
         redis = await get_redis()
         if not redis:
             # If Redis is unavailable, allow request (fail open)
@@ -232,40 +299,39 @@ class RateLimitMiddleware(BaseHTTPMiddleware):
             return True, limit, window_seconds
         
         try:
-            # Create rate limit key
-            key = f"rate_limit:{endpoint_type}:{client_id}"
-            
-            # Get current count
-            current_count = await redis.get(key)
-            if current_count is None:
-                # First request in window
-                await redis.setex(key, window_seconds, "1")
-                return True, limit - 1, window_seconds
-            
-            current_count = int(current_count)
-            
-            if current_count >= limit:
-                # Rate limit exceeded
-                ttl = await redis.ttl(key)
-                return False, 0, max(ttl, 1)
-            
-            # Increment counter
-            new_count = await redis.incr(key)
-            
-            # Get remaining requests
-            remaining = max(0, limit - new_count)
-            
-            # Get reset time
-            ttl = await redis.ttl(key)
-            reset_time = max(ttl, 1)
+            batch = settings.RATE_LIMIT_LOCAL_BATCH
+            if use_local and batch > 1:
+                allowed, remaining, reset_time = await self._consume(redis, key, limit, window_seconds, batch)
+                if allowed:
+                    # One token is used by this request, the rest are spent locally
+                    self._local_leases.store(
+                        key, batch - 1, remaining, reset_time, now, settings.RATE_LIMIT_LOCAL_SYNC_INTERVAL
+                    )
+                    return True, remaining + batch - 1, reset_time
+                # Not enough room for a full batch: fall back to a single token
             
-            return True, remaining, reset_time
+            return await self._consume(redis, key, limit, window_seconds, 1)
             
         except Exception as e:
             # On error, allow request (fail open)
             logger.error(f"Rate limit check failed: {e}", exc_info=True)
             return True, limit, window_seconds
     
+    async def _consume(self, redis, key: str, limit: int, window_seconds: int, cost: int) -> Tuple[bool, int, float]:
+        """Run the sliding-window script once (EVALSHA, loading the script on first use)"""
+        if self._script is None or self._script_client is not redis:
+            self._script = redis.register_script(SLIDING_WINDOW_SCRIPT)
+            self._script_client = redis
+        
+        window_ms = window_seconds * 1000
+        now_ms = int(time.time() * 1000)
+        window_index = now_ms // window_ms
+        allowed, remaining, reset_ms = await self._script(
+            keys=[f"{key}:{window_index}", f"{key}:{window_index - 1}"],
+            args=[limit, window_ms, now_ms - window_index * window_ms, cost]
+        )
+        return bool(allowed), int(remaining), max(math.ceil(int(reset_ms) / 1000), 1)
+    
     async def _get_progressive_delay(self, client_id: str) -> float:
         """
         Get progressive delay for login attempts
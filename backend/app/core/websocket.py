@@ -2,18 +2,120 @@
 """
 WebSocket Manager for Real-Time Updates
 Manages WebSocket connections and broadcasts events from Redis Pub/Sub
+
+PERFORMANCE: Broadcasting never awaits a client. Each connection has a
+bounded outbound queue drained by its own writer task, so one slow socket
+cannot delay the rest of the tenant. Events are serialized once per
+broadcast, high-frequency progress events are coalesced to the latest
+value per entity, and clients that stall past WEBSOCKET_SEND_TIMEOUT are
+disconnected (they reconnect and refetch).
 """
 
 import json
 import asyncio
 import logging
+from collections import deque
 import redis.asyncio as redis
-from typing import Dict, Set, Optional
+from typing import Any, Deque, Dict, List, Optional, Union
 from fastapi import WebSocket, WebSocketDisconnect
 from app.core.config import settings
 
 logger = logging.getLogger(__name__)
 
+# High-frequency event types -> data fields identifying the entity whose
+# latest value supersedes any still-queued earlier value
+COALESCED_EVENT_TYPES: Dict[str, tuple] = {
+    "campaign.progress": ("campaign_id",),
+    "ai_analysis.progress": ("customer_id", "task_id"),
+}
+
+
+def _coalesce_key(event: dict) -> Optional[str]:
+    """Coalescing key for an event, or None if every occurrence must be delivered"""
+    fields = COALESCED_EVENT_TYPES.get(event.get("type"))
+    if fields is None:
+        return None
+    data = event.get("data") or {}
+    return ":".join([event["type"]] + [str(data.get(field, "")) for field in fields])
+
+
+class ClientConnection:
+    """
+    A client WebSocket with its bounded outbound queue and writer task
+    
+    Queue entries are [coalesce_key, text]; a coalescible entry still waiting
+    in the queue is updated in place rather than appended. When the queue is
+    full the oldest coalescible entry is dropped first, then the oldest entry.
+    """
+    
+    def __init__(self, websocket: WebSocket, tenant_id: str, user_id: str, max_queue: int):
+        self.websocket = websocket
+        self.tenant_id = tenant_id
+        self.user_id = user_id
+        self.max_queue = max_queue
+        self.sent = 0
+        self.dropped = 0
+        self.coalesced = 0
+        self.closed = False
+        self.writer: Optional[asyncio.Task] = None
+        self._queue: Deque[list] = deque()
+        self._pending: Dict[str, list] = {}
+        self._ready = asyncio.Event()
+    
+    @property
+    def queue_depth(self) -> int:
+        return len(self._queue)
+    
+    def enqueue(self, text: str, coalesce_key: Optional[str] = None):
+        """Queue a pre-serialized message without blocking"""
+        if coalesce_key is not None:
+            entry = self._pending.get(coalesce_key)
+            if entry is not None:
+                entry[1] = text
+                self.coalesced += 1
+                return
+        
+        if len(self._queue) >= self.max_queue:
+            self._drop_one()
+        
+        entry = [coalesce_key, text]
+        self._queue.append(entry)
+        if coalesce_key is not None:
+            self._pending[coalesce_key] = entry
+        self._ready.set()
+    
+    def _drop_one(self):
+        victim = next((entry for entry in self._queue if entry[0] is not None), self._queue[0])
+        self._queue.remove(victim)
+        if victim[0] is not None:
+            self._pending.pop(victim[0], None)
+        self.dropped += 1
+    
+    async def run(self, on_failure):
+        """Writer loop: send queued messages in order until closed or the socket fails"""
+        try:
+            while not self.closed:
+                if not self._queue:
+                    self._ready.clear()
+                    await self._ready.wait()
+                    continue
+                
+                coalesce_key, text = self._queue.popleft()
+                if coalesce_key is not None:
+                    self._pending.pop(coalesce_key, None)
+                await asyncio.wait_for(self.websocket.send_text(text), timeout=settings.WEBSOCKET_SEND_TIMEOUT)
+                self.sent += 1
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning("WebSocketManager: Error sending to connection", extra={
+                'tenant_id': self.tenant_id,
+                'user_id': self.user_id,
+                'queue_depth': self.queue_depth,
+                'error': repr(e)
+            })
+            await on_failure(self)
+
 
 class WebSocketManager:
     """
@@ -22,12 +124,16 @@ class WebSocketManager:
     """
     
     def __init__(self):
-        # tenant_id -> {user_id -> [websocket_connections]}
-        self.active_connections: Dict[str, Dict[str, Set[WebSocket]]] = {}
+        # tenant_id -> {user_id -> {websocket -> ClientConnection}}
+        self.active_connections: Dict[str, Dict[str, Dict[WebSocket, ClientConnection]]] = {}
         self.redis_subscriber: Optional[redis.Redis] = None
         self.redis_pubsub: Optional[redis.client.PubSub] = None
-        self.subscribed_tenants: Set[str] = set()
+        self.subscribed_tenants: set = set()
         self._running = False
+        # Counters carried over from closed connections (see get_stats)
+        self._closed_totals = {"sent": 0, "dropped": 0, "coalesced": 0}
+        self.broadcasts = 0
+        self.failed_connections = 0
     
     async def connect(self, websocket: WebSocket, tenant_id: str, user_id: str):
         """
@@ -45,10 +151,12 @@ class WebSocketManager:
         if tenant_id not in self.active_connections:
             self.active_connections[tenant_id] = {}
         if user_id not in self.active_connections[tenant_id]:
-            self.active_connections[tenant_id][user_id] = set()
+            self.active_connections[tenant_id][user_id] = {}
         
-        # Add connection
-        self.active_connections[tenant_id][user_id].add(websocket)
+        # Add connection with its own writer task
+        connection = ClientConnection(websocket, tenant_id, user_id, settings.WEBSOCKET_SEND_QUEUE_SIZE)
+        connection.writer = asyncio.create_task(connection.run(self._handle_failed_connection))
+        self.active_connections[tenant_id][user_id][websocket] = connection
         
         # Subscribe to tenant's Redis channel if not already subscribed
         if tenant_id not in self.subscribed_tenants:
@@ -71,7 +179,9 @@ class WebSocketManager:
         """
         if tenant_id in self.active_connections:
             if user_id in self.active_connections[tenant_id]:
-                self.active_connections[tenant_id][user_id].discard(websocket)
+                connection = self.active_connections[tenant_id][user_id].pop(websocket, None)
+                if connection is not None:
+                    self._retire(connection)
                 
                 # Clean up empty sets
                 if not self.active_connections[tenant_id][user_id]:
@@ -128,7 +238,12 @@ class WebSocketManager:
             self.redis_pubsub = None
     
     async def _listen_to_redis(self):
-        """Listen to Redis Pub/Sub messages and broadcast to WebSocket clients"""
+        """
+        Listen to Redis Pub/Sub messages and broadcast to WebSocket clients
+        
+        Handling a message only enqueues to per-connection queues, so this loop
+        never waits on a client socket.
+        """
         while self._running:
             try:
                 if not self.redis_pubsub:
@@ -153,7 +268,8 @@ class WebSocketManager:
         """Handle incoming Redis Pub/Sub message"""
         try:
             channel = message['channel']
-            data = json.loads(message['data'])
+            raw = message['data']
+            data = json.loads(raw)
             
             # Extract tenant_id from channel name (tenant:{tenant_id}:events)
             tenant_id = channel.replace('tenant:', '').replace(':events', '')
@@ -166,42 +282,100 @@ class WebSocketManager:
                 })
                 return
             
-            # Broadcast to all connections for this tenant
-            await self._broadcast_to_tenant(tenant_id, data)
+            # Broadcast to all connections for this tenant (the published JSON is forwarded as-is)
+            await self._broadcast_to_tenant(tenant_id, data, serialized=raw)
         except Exception as e:
             logger.error("WebSocketManager: Error handling Redis message", extra={'error': str(e)})
     
-    async def _broadcast_to_tenant(self, tenant_id: str, event: dict):
-        """Broadcast event to all WebSocket connections for a tenant"""
+    async def _broadcast_to_tenant(self, tenant_id: str, event: dict, serialized: Optional[str] = None):
+        """
+        Broadcast event to all WebSocket connections for a tenant
+        
+        The event is serialized once and queued on every connection; delivery
+        happens in each connection's writer task.
+        """
         if tenant_id not in self.active_connections:
             return
         
-        # Collect all connections for this tenant
-        connections_to_remove = []
+        text = serialized if serialized is not None else json.dumps(event)
+        coalesce_key = _coalesce_key(event)
+        self.broadcasts += 1
         
-        for user_id, connections in self.active_connections[tenant_id].items():
-            for connection in connections:
-                try:
-                    await connection.send_json(event)
-                except Exception as e:
-                    logger.warning("WebSocketManager: Error sending to connection", extra={'error': str(e)})
-                    connections_to_remove.append((tenant_id, user_id, connection))
+        for connections in self.active_connections[tenant_id].values():
+            for connection in connections.values():
+                connection.enqueue(text, coalesce_key)
+    
+    def send_to_connection(self, websocket: WebSocket, tenant_id: str, user_id: str, message: Union[dict, str]) -> bool:
+        """
+        Queue a message for a single connection (keeps all writes on its writer task)
         
-        # Remove dead connections
-        for tenant_id, user_id, connection in connections_to_remove:
-            self.disconnect(connection, tenant_id, user_id)
+        Returns:
+            False if the connection is not registered
+        """
+        connection = self.active_connections.get(tenant_id, {}).get(user_id, {}).get(websocket)
+        if connection is None:
+            return False
+        connection.enqueue(message if isinstance(message, str) else json.dumps(message))
+        return True
+    
+    async def _handle_failed_connection(self, connection: ClientConnection):
+        """Called by a writer task whose socket errored or stalled past the send timeout"""
+        self.failed_connections += 1
+        self.disconnect(connection.websocket, connection.tenant_id, connection.user_id)
+        try:
+            await connection.websocket.close()
+        except Exception:
+            pass
+    
+    def _retire(self, connection: ClientConnection):
+        """Stop a connection's writer and keep its counters for get_stats"""
+        # The flag also ends the loop if a cancel is swallowed by a send completing at the same time
+        connection.closed = True
+        connection._ready.set()
+        if connection.writer and connection.writer is not asyncio.current_task():
+            connection.writer.cancel()
+        self._closed_totals["sent"] += connection.sent
+        self._closed_totals["dropped"] += connection.dropped
+        self._closed_totals["coalesced"] += connection.coalesced
+    
+    def _iter_connections(self) -> List[ClientConnection]:
+        return [
+            connection
+            for tenant_connections in self.active_connections.values()
+            for user_connections in tenant_connections.values()
+            for connection in user_connections.values()
+        ]
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Fan-out metrics: connections, queue depth and sent/dropped/coalesced counts"""
+        connections = self._iter_connections()
+        depths = [connection.queue_depth for connection in connections]
+        return {
+            "connections": len(connections),
+            "tenants": len(self.active_connections),
+            "broadcasts": self.broadcasts,
+            "queue_capacity": settings.WEBSOCKET_SEND_QUEUE_SIZE,
+            "queue_depth_total": sum(depths),
+            "queue_depth_max": max(depths, default=0),
+            "messages_sent": self._closed_totals["sent"] + sum(c.sent for c in connections),
+            "messages_dropped": self._closed_totals["dropped"] + sum(c.dropped for c in connections),
+            "messages_coalesced": self._closed_totals["coalesced"] + sum(c.coalesced for c in connections),
+            "failed_connections": self.failed_connections
+        }
     
     def _count_connections(self) -> int:
         """Count total active connections"""
-        total = 0
-        for tenant_connections in self.active_connections.values():
-            for user_connections in tenant_connections.values():
-                total += len(user_connections)
-        return total
+        return len(self._iter_connections())
     
     async def close(self):
         """Close all connections and cleanup"""
         self._running = False
+        connections = self._iter_connections()
+        for connection in connections:
+            self._retire(connection)
+        await asyncio.gather(*(c.writer for c in connections if c.writer), return_exceptions=True)
+        self.active_connections.clear()
+        self.subscribed_tenants.clear()
         if self.redis_pubsub:
             await self.redis_pubsub.unsubscribe()
         if self.redis_subscriber:
@@ -43,6 +43,8 @@ from .user_2fa import User2FA
 from .security_event import SecurityEvent, SecurityEventType, SecurityEventSeverity
 from .gdpr import DataCollectionRecord, PrivacyPolicy, SubjectAccessRequest, DataCollectionPurpose, SARStatus
 from .iso import ISOControl, ISOAssessment, ISOAudit, ISOStandard, ComplianceStatus
+from .companies_house import CompaniesHouseDocument
+from .customer_metrics import CustomerMetrics
 
 __all__ = [
     "Base",
@@ -85,6 +87,8 @@ __all__ = [
     "ISOAssessment",
     "ISOAudit",
     "ISOStandard",
-    "ComplianceStatus"
+    "ComplianceStatus",
+    "CompaniesHouseDocument",
+    "CustomerMetrics"
 ]
 
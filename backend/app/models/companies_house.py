@@ -0,0 +1,25 @@
+#!/usr/bin/env python3
+"""
+Companies House cache models
+
+Filed documents are public and immutable, so they are cached once for all
+tenants (no tenant_id / RLS).
+"""
+
+from sqlalchemy import Column, String, Integer, Text
+
+from .base import Base, TimestampMixin
+
+
+class CompaniesHouseDocument(Base, TimestampMixin):
+    """Downloaded Companies House filing document (iXBRL accounts), keyed by filing transaction"""
+    __tablename__ = "companies_house_documents"
+    
+    transaction_id = Column(String(100), primary_key=True)
+    company_number = Column(String(20), nullable=False, index=True)
+    content_type = Column(String(100), nullable=True)
+    content = Column(Text, nullable=False)
+    size_bytes = Column(Integer, nullable=False, default=0)
+    
+    def __repr__(self):
+        return f"<CompaniesHouseDocument {self.company_number}/{self.transaction_id}>"
@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+"""
+Customer metrics rollup
+
+One row per customer with revenue, recurring revenue and ticket totals,
+maintained by app.services.customer_metrics_service whenever a quote,
+support contract or ticket of the customer changes. Lets customer lists and
+reports sort and filter by lifetime value / MRR without aggregating the
+source tables on every request.
+"""
+
+from sqlalchemy import Column, String, Integer, Numeric, DateTime, ForeignKey, Index
+from sqlalchemy.sql import func
+
+from .base import Base
+
+
+class CustomerMetrics(Base):
+    """Aggregated value metrics for a customer (derived data, safe to rebuild)"""
+    __tablename__ = "customer_metrics"
+    
+    customer_id = Column(String(36), ForeignKey("customers.id", ondelete="CASCADE"), primary_key=True)
+    tenant_id = Column(String(36), ForeignKey("tenants.id"), nullable=False, index=True)
+    
+    # Accepted quotes (lifetime value)
+    lifetime_value = Column(Numeric(14, 2), nullable=False, default=0)
+    accepted_quote_count = Column(Integer, nullable=False, default=0)
+    first_accepted_at = Column(DateTime(timezone=True), nullable=True)
+    last_accepted_at = Column(DateTime(timezone=True), nullable=True)
+    
+    # Active support contracts
+    monthly_recurring_revenue = Column(Numeric(14, 2), nullable=False, default=0)
+    active_contract_count = Column(Integer, nullable=False, default=0)
+    
+    # Helpdesk
+    ticket_count = Column(Integer, nullable=False, default=0)
+    
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    
+    __table_args__ = (
+        Index('idx_customer_metrics_tenant_ltv', 'tenant_id', 'lifetime_value'),
+        Index('idx_customer_metrics_tenant_mrr', 'tenant_id', 'monthly_recurring_revenue'),
+    )
+    
+    def __repr__(self):
+        return f"<CustomerMetrics {self.customer_id} ltv={self.lifetime_value} mrr={self.monthly_recurring_revenue}>"
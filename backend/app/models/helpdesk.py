@@ -314,6 +314,10 @@ class TicketAgentChat(Base, TimestampMixin):
     attachments = Column(JSON, nullable=True)  # [{filename, content, type}]
     log_files = Column(JSON, nullable=True)  # Array of log file contents
     
+    # Rolling summary of earlier turns (see TicketAgentAssistantService)
+    history_summary = Column(Text, nullable=True)  # Summary of the conversation before the recent turns
+    history_summary_count = Column(Integer, nullable=True)  # Number of conversation messages covered by history_summary
+    
     # NPA and solution tracking
     linked_to_npa_id = Column(String(36), ForeignKey("npa_history.id"), nullable=True)  # If saved to NPA
     is_solution = Column(Boolean, default=False, nullable=False)  # If marked as solution
@@ -3,13 +3,24 @@
 Knowledge Base models
 """
 
-from sqlalchemy import Column, String, Boolean, Text, JSON, ForeignKey, Integer, Index
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, String, Boolean, Text, JSON, ForeignKey, Integer, Index, Computed
+from sqlalchemy.dialects.postgresql import TSVECTOR
+from sqlalchemy.orm import relationship, deferred
 import enum
 import uuid
 from .base import Base, BaseModel, TimestampMixin
 
 
+# Text search configuration and weighted document (title > summary > content)
+# used by the knowledge base full-text index
+KB_SEARCH_CONFIG = "english"
+KB_SEARCH_DOCUMENT = (
+    "setweight(to_tsvector('english', coalesce(title, '')), 'A') || "
+    "setweight(to_tsvector('english', coalesce(summary, '')), 'B') || "
+    "setweight(to_tsvector('english', coalesce(content, '')), 'C')"
+)
+
+
 class ArticleStatus(enum.Enum):
     """Article status"""
     DRAFT = "draft"
@@ -42,6 +53,9 @@ class KnowledgeBaseArticle(BaseModel):
     helpful_count = Column(Integer, default=0, nullable=False)
     not_helpful_count = Column(Integer, default=0, nullable=False)
     
+    # Full-text search vector, generated by PostgreSQL on insert/update (never loaded by default)
+    search_vector = deferred(Column(TSVECTOR, Computed(KB_SEARCH_DOCUMENT, persisted=True)))
+    
     # Relationships
     tenant = relationship("Tenant", backref="knowledge_base_articles")
     linked_tickets = relationship("KnowledgeBaseTicketLink", back_populates="article", cascade="all, delete-orphan")
@@ -52,6 +66,7 @@ class KnowledgeBaseArticle(BaseModel):
     __table_args__ = (
         Index('idx_kb_article_tenant_published', 'tenant_id', 'is_published'),
         Index('idx_kb_article_category', 'category'),
+        Index('idx_kb_article_search_vector', 'search_vector', postgresql_using='gin'),
     )
 
 
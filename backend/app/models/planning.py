@@ -3,7 +3,7 @@
 Planning Application models for UK county-based planning data monitoring
 """
 
-from sqlalchemy import Column, String, Boolean, Text, JSON, ForeignKey, Integer, Enum, DateTime, Float
+from sqlalchemy import Column, String, Boolean, Text, JSON, ForeignKey, Integer, Enum, DateTime, Float, UniqueConstraint
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 import enum
@@ -44,6 +44,10 @@ class ApplicationType(enum.Enum):
 class PlanningApplication(BaseModel):
     """Planning application model - stores individual planning applications"""
     __tablename__ = "planning_applications"
+    __table_args__ = (
+        # Target of INSERT ... ON CONFLICT in PlanningApplicationService._store_applications
+        UniqueConstraint('tenant_id', 'reference', name='uq_planning_application_tenant_reference'),
+    )
     
     id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
     
@@ -135,6 +139,7 @@ class PlanningApplicationCampaign(BaseModel):
     schedule_frequency_days = Column(Integer, default=14, nullable=False)  # Run every N days
     last_run_at = Column(DateTime(timezone=True), nullable=True)
     next_run_at = Column(DateTime(timezone=True), nullable=True)
+    portal_watermarks = Column(JSON, nullable=True)  # {portal: {"date": ISO date, "references": [...]}} for incremental runs
     
     # AI Analysis settings
     enable_ai_analysis = Column(Boolean, default=True, nullable=False)
@@ -10,19 +10,55 @@ Merges activities from multiple sources into chronological timeline:
 - AI-generated notes
 """
 
+import base64
+import json
 import logging
-from typing import Dict, List, Optional, Any
+from typing import Dict, List, Optional, Any, Tuple
 from datetime import datetime, timezone
-from sqlalchemy.orm import Session
-from sqlalchemy import select, and_, or_, union_all, desc
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import DateTime, String, Text, cast, func, literal, null, select, tuple_, union_all
 
-from app.models.crm import Customer, Contact
-from app.models.sales import SalesActivity, ActivityType
-from app.models.helpdesk import Ticket, TicketComment
-from app.models.quotes import Quote
+from app.models.sales import SalesActivity, ActivityType, ActivityOutcome
+from app.models.helpdesk import Ticket, TicketComment, TicketPriority, TicketStatus
+from app.models.quotes import Quote, QuoteStatus
 
 logger = logging.getLogger(__name__)
 
+# Entry types that are not sales activity types
+TICKET_TYPE = "ticket"
+COMMENT_TYPE = "comment"
+QUOTE_TYPE = "quote"
+SALES_ACTIVITY_TYPES = {activity_type.value for activity_type in ActivityType}
+
+
+class InvalidCursorError(ValueError):
+    """Raised when a timeline cursor cannot be decoded"""
+
+
+def encode_cursor(timestamp: datetime, entry_id: str) -> str:
+    """Opaque cursor for the position after an entry"""
+    payload = json.dumps([timestamp.isoformat(), entry_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, str]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        timestamp, entry_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return datetime.fromisoformat(timestamp), str(entry_id)
+    except Exception as e:
+        raise InvalidCursorError("Invalid timeline cursor") from e
+
+
+def _enum_value(enum_class, name: Optional[str]) -> Optional[str]:
+    """Enum columns are stored by name; entries expose the value"""
+    if name is None:
+        return None
+    try:
+        return enum_class[name].value
+    except KeyError:
+        return name
+
 
 class ActivityTimelineService:
     """
@@ -33,131 +69,237 @@ class ActivityTimelineService:
     - Chronological ordering
     - Activity type filtering
     - AI-generated summaries
+    
+    PERFORMANCE: Sales activities, tickets, ticket comments and quotes are
+    read with one UNION ALL over projected columns, ordered by
+    (timestamp, id) and paged with a keyset cursor. Each branch applies the
+    cursor and the page limit itself, so a page costs one indexed query
+    however much history the customer has.
     """
     
-    def __init__(self, db: Session, tenant_id: str):
+    def __init__(self, db: AsyncSession, tenant_id: str):
         self.db = db
         self.tenant_id = tenant_id
     
-    async def get_customer_timeline(
+    def timeline_query(
         self,
         customer_id: str,
         limit: int = 50,
-        activity_types: Optional[List[str]] = None
-    ) -> List[Dict[str, Any]]:
+        activity_types: Optional[List[str]] = None,
+        before: Optional[Tuple[datetime, str]] = None,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None
+    ):
         """
-        Get unified timeline for customer
+        UNION ALL of the requested sources, newest first
         
         Args:
             customer_id: Customer ID
-            limit: Maximum number of activities to return
-            activity_types: Optional list of activity types to filter
-        
-        Returns:
-            List of timeline entries in chronological order (newest first)
+            limit: Rows to fetch
+            activity_types: Only these entry types (sales activity types, 'ticket', 'comment', 'quote')
+            before: (timestamp, id) keyset position; only older entries are returned
+            since: Only entries at or after this time
+            until: Only entries at or before this time
         """
-        timeline = []
+        wanted = set(activity_types) if activity_types else None
+        branches = []
+        
+        def branch(stmt, timestamp, entry_id):
+            if before:
+                stmt = stmt.where(tuple_(timestamp, entry_id) < tuple_(
+                    literal(before[0], DateTime(timezone=True)), literal(before[1], String)
+                ))
+            if since:
+                stmt = stmt.where(timestamp >= since)
+            if until:
+                stmt = stmt.where(timestamp <= until)
+            branches.append(stmt.order_by(timestamp.desc(), entry_id.desc()).limit(limit))
         
-        # Get sales activities
-        sales_activities = self.db.query(SalesActivity).filter(
-            and_(
+        sales_types = SALES_ACTIVITY_TYPES if wanted is None else SALES_ACTIVITY_TYPES & wanted
+        if sales_types:
+            stmt = select(
+                SalesActivity.id.label("id"),
+                literal("sales_activity", String).label("entry_type"),
+                SalesActivity.activity_date.label("timestamp"),
+                cast(SalesActivity.activity_type, String).label("kind"),
+                SalesActivity.subject.label("title"),
+                cast(SalesActivity.notes, Text).label("description"),
+                SalesActivity.user_id.label("user_id"),
+                SalesActivity.contact_id.label("contact_id"),
+                func.json_build_object(
+                    "duration_minutes", SalesActivity.duration_minutes,
+                    "outcome", cast(SalesActivity.outcome, String)
+                ).label("metadata")
+            ).where(
                 SalesActivity.customer_id == customer_id,
                 SalesActivity.tenant_id == self.tenant_id
             )
-        ).order_by(desc(SalesActivity.activity_date)).limit(limit).all()
-        
-        for activity in sales_activities:
-            if not activity_types or activity.activity_type.value in activity_types:
-                timeline.append({
-                    "id": activity.id,
-                    "type": "sales_activity",
-                    "activity_type": activity.activity_type.value,
-                    "timestamp": activity.activity_date.isoformat(),
-                    "title": activity.subject or f"{activity.activity_type.value.title()} Activity",
-                    "description": activity.notes,
-                    "user_id": activity.user_id,
-                    "contact_id": activity.contact_id,
-                    "metadata": {
-                        "duration_minutes": activity.duration_minutes,
-                        "outcome": activity.outcome.value if activity.outcome else None
-                    }
-                })
-        
-        # Get tickets
-        tickets = self.db.query(Ticket).filter(
-            and_(
+            if wanted is not None:
+                stmt = stmt.where(SalesActivity.activity_type.in_([ActivityType(t) for t in sales_types]))
+            branch(stmt, SalesActivity.activity_date, SalesActivity.id)
+        
+        if wanted is None or TICKET_TYPE in wanted:
+            branch(select(
+                Ticket.id.label("id"),
+                literal("ticket", String).label("entry_type"),
+                Ticket.created_at.label("timestamp"),
+                null().label("kind"),
+                Ticket.ticket_number.label("title"),
+                cast(Ticket.subject, Text).label("description"),
+                null().label("user_id"),
+                null().label("contact_id"),
+                func.json_build_object(
+                    "ticket_number", Ticket.ticket_number,
+                    "status", cast(Ticket.status, String),
+                    "priority", cast(Ticket.priority, String)
+                ).label("metadata")
+            ).where(
                 Ticket.customer_id == customer_id,
                 Ticket.tenant_id == self.tenant_id
-            )
-        ).order_by(desc(Ticket.created_at)).limit(limit).all()
-        
-        for ticket in tickets:
-            if not activity_types or "ticket" in activity_types:
-                timeline.append({
-                    "id": ticket.id,
-                    "type": "ticket",
-                    "activity_type": "ticket",
-                    "timestamp": ticket.created_at.isoformat(),
-                    "title": f"Ticket: {ticket.ticket_number}",
-                    "description": ticket.subject,
-                    "metadata": {
-                        "ticket_number": ticket.ticket_number,
-                        "status": ticket.status.value,
-                        "priority": ticket.priority.value
-                    }
-                })
-        
-        # Get ticket comments
-        ticket_ids = [t.id for t in tickets]
-        if ticket_ids:
-            comments = self.db.query(TicketComment).filter(
-                TicketComment.ticket_id.in_(ticket_ids)
-            ).order_by(desc(TicketComment.created_at)).limit(limit).all()
-            
-            for comment in comments:
-                if not activity_types or "comment" in activity_types:
-                    timeline.append({
-                        "id": comment.id,
-                        "type": "ticket_comment",
-                        "activity_type": "comment",
-                        "timestamp": comment.created_at.isoformat(),
-                        "title": "Ticket Comment",
-                        "description": comment.comment,
-                        "metadata": {
-                            "ticket_id": comment.ticket_id,
-                            "is_internal": comment.is_internal
-                        }
-                    })
-        
-        # Get quotes
-        quotes = self.db.query(Quote).filter(
-            and_(
+            ), Ticket.created_at, Ticket.id)
+        
+        if wanted is None or COMMENT_TYPE in wanted:
+            branch(select(
+                TicketComment.id.label("id"),
+                literal("ticket_comment", String).label("entry_type"),
+                TicketComment.created_at.label("timestamp"),
+                null().label("kind"),
+                null().label("title"),
+                cast(TicketComment.comment, Text).label("description"),
+                null().label("user_id"),
+                null().label("contact_id"),
+                func.json_build_object(
+                    "ticket_id", TicketComment.ticket_id,
+                    "is_internal", TicketComment.is_internal
+                ).label("metadata")
+            ).join(Ticket, Ticket.id == TicketComment.ticket_id).where(
+                Ticket.customer_id == customer_id,
+                Ticket.tenant_id == self.tenant_id
+            ), TicketComment.created_at, TicketComment.id)
+        
+        if wanted is None or QUOTE_TYPE in wanted:
+            branch(select(
+                Quote.id.label("id"),
+                literal("quote", String).label("entry_type"),
+                Quote.created_at.label("timestamp"),
+                null().label("kind"),
+                Quote.quote_number.label("title"),
+                cast(Quote.title, Text).label("description"),
+                null().label("user_id"),
+                null().label("contact_id"),
+                func.json_build_object(
+                    "quote_number", Quote.quote_number,
+                    "status", cast(Quote.status, String),
+                    "total_amount", cast(func.coalesce(Quote.total_amount, 0), String)
+                ).label("metadata")
+            ).where(
                 Quote.customer_id == customer_id,
                 Quote.tenant_id == self.tenant_id
-            )
-        ).order_by(desc(Quote.created_at)).limit(limit).all()
-        
-        for quote in quotes:
-            if not activity_types or "quote" in activity_types:
-                timeline.append({
-                    "id": quote.id,
-                    "type": "quote",
-                    "activity_type": "quote",
-                    "timestamp": quote.created_at.isoformat(),
-                    "title": f"Quote: {quote.quote_number}",
-                    "description": quote.title,
-                    "metadata": {
-                        "quote_number": quote.quote_number,
-                        "status": quote.status.value,
-                        "total_amount": str(quote.total_amount or 0)
-                    }
-                })
-        
-        # Sort by timestamp (newest first)
-        timeline.sort(key=lambda x: x["timestamp"], reverse=True)
-        
-        # Limit results
-        return timeline[:limit]
+            ), Quote.created_at, Quote.id)
+        
+        if not branches:
+            return None
+        timeline = union_all(*branches).subquery("timeline")
+        return (
+            select(timeline)
+            .order_by(timeline.c.timestamp.desc(), timeline.c.id.desc())
+            .limit(limit)
+        )
+    
+    async def get_customer_timeline(
+        self,
+        customer_id: str,
+        limit: int = 50,
+        activity_types: Optional[List[str]] = None,
+        cursor: Optional[str] = None,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None
+    ) -> Dict[str, Any]:
+        """
+        Get one page of the unified timeline for customer
+        
+        Args:
+            customer_id: Customer ID
+            limit: Maximum number of activities to return
+            activity_types: Optional list of activity types to filter
+            cursor: next_cursor from the previous page
+            since: Optional lower bound on timestamps
+            until: Optional upper bound on timestamps
+        
+        Returns:
+            Dict with entries (newest first) and next_cursor (None on the last page)
+        
+        Raises:
+            InvalidCursorError: If the cursor cannot be decoded
+        """
+        before = decode_cursor(cursor) if cursor else None
+        stmt = self.timeline_query(customer_id, limit + 1, activity_types, before=before, since=since, until=until)
+        if stmt is None:
+            return {"entries": [], "next_cursor": None}
+        
+        rows = (await self.db.execute(stmt)).all()
+        entries = [self._entry(row) for row in rows[:limit]]
+        next_cursor = None
+        if len(rows) > limit:
+            last = rows[limit - 1]
+            next_cursor = encode_cursor(last.timestamp, last.id)
+        return {"entries": entries, "next_cursor": next_cursor}
+    
+    @staticmethod
+    def _entry(row) -> Dict[str, Any]:
+        """Timeline entry in the shape the frontend expects"""
+        metadata = dict(row.metadata or {})
+        timestamp = row.timestamp.isoformat()
+        
+        if row.entry_type == "sales_activity":
+            activity_type = _enum_value(ActivityType, row.kind)
+            metadata["outcome"] = _enum_value(ActivityOutcome, metadata.get("outcome"))
+            return {
+                "id": row.id,
+                "type": "sales_activity",
+                "activity_type": activity_type,
+                "timestamp": timestamp,
+                "title": row.title or f"{activity_type.title()} Activity",
+                "description": row.description,
+                "user_id": row.user_id,
+                "contact_id": row.contact_id,
+                "metadata": metadata
+            }
+        
+        if row.entry_type == "ticket":
+            metadata["status"] = _enum_value(TicketStatus, metadata.get("status"))
+            metadata["priority"] = _enum_value(TicketPriority, metadata.get("priority"))
+            return {
+                "id": row.id,
+                "type": "ticket",
+                "activity_type": "ticket",
+                "timestamp": timestamp,
+                "title": f"Ticket: {row.title}",
+                "description": row.description,
+                "metadata": metadata
+            }
+        
+        if row.entry_type == "ticket_comment":
+            return {
+                "id": row.id,
+                "type": "ticket_comment",
+                "activity_type": "comment",
+                "timestamp": timestamp,
+                "title": "Ticket Comment",
+                "description": row.description,
+                "metadata": metadata
+            }
+        
+        metadata["status"] = _enum_value(QuoteStatus, metadata.get("status"))
+        return {
+            "id": row.id,
+            "type": "quote",
+            "activity_type": "quote",
+            "timestamp": timestamp,
+            "title": f"Quote: {row.title}",
+            "description": row.description,
+            "metadata": metadata
+        }
     
     async def generate_daily_summary(
         self,
@@ -181,16 +323,13 @@ class ActivityTimelineService:
         end_of_day = date.replace(hour=23, minute=59, second=59, microsecond=999999)
         
         # Get activities for the day
-        timeline = await self.get_customer_timeline(
+        page = await self.get_customer_timeline(
             customer_id,
-            limit=100
+            limit=100,
+            since=start_of_day,
+            until=end_of_day
         )
-        
-        # Filter to date
-        day_activities = [
-            a for a in timeline
-            if start_of_day.isoformat() <= a["timestamp"] <= end_of_day.isoformat()
-        ]
+        day_activities = page["entries"]
         
         # Generate summary
         summary = {
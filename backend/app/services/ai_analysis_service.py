@@ -425,15 +425,7 @@ class AIAnalysisService:
             # Use database prompt (required - no fallback)
             provider_response = await self.provider_service.generate(
                 prompt=prompt_obj,
-                variables={
-                    "company_name": company_name,
-                    "business_sector": business_sector,
-                    "company_size": company_size,
-                    "locations_text": locations_text,
-                    "postcode_text": postcode_text,
-                    "turnover": turnover,
-                    "employees": employees
-                },
+                rendered=rendered,
                 max_tokens=max_tokens
             )
             
@@ -719,10 +711,7 @@ class AIAnalysisService:
             # Use database prompt (required - no fallback)
             provider_response = await self.provider_service.generate(
                 prompt=prompt_obj,
-                variables={
-                    "tenant_context": tenant_context,
-                    "company_info": company_info
-                },
+                rendered=rendered,
                 max_tokens=max_tokens
             )
             
@@ -14,7 +14,9 @@ Manages all AI operations with:
 import asyncio
 import json
 import logging
-from typing import Dict, List, Optional, Any, Tuple
+import time
+import uuid
+from typing import Dict, List, Optional, Any, Tuple, Callable, Awaitable
 from datetime import datetime, timezone
 from sqlalchemy.orm import Session
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -28,6 +30,22 @@ import redis.asyncio as redis
 logger = logging.getLogger(__name__)
 
 
+# Compare-and-delete / compare-and-extend so a worker only touches its own lock
+_RELEASE_LOCK_SCRIPT = """
+if redis.call("get", KEYS[1]) == ARGV[1] then
+    return redis.call("del", KEYS[1])
+end
+return 0
+"""
+
+_EXTEND_LOCK_SCRIPT = """
+if redis.call("get", KEYS[1]) == ARGV[1] then
+    return redis.call("pexpire", KEYS[1], ARGV[2])
+end
+return 0
+"""
+
+
 class AIOrchestrationService:
     """
     Centralized service for all AI operations
@@ -37,10 +55,27 @@ class AIOrchestrationService:
     - Multi-provider routing (OpenAI, Anthropic, Google, Microsoft Copilot, etc.)
     - Automatic retry with exponential backoff
     - Response caching (tenant-scoped cache keys)
+    - Single-flight request coalescing (in-process and cross-worker via Redis lock)
     - Safety filters and content moderation
     - Comprehensive logging and observability
     """
     
+    # PERFORMANCE: Process-wide single-flight state shared by every service instance.
+    # In-flight futures are keyed by (event loop id, cache key) because futures are
+    # bound to the loop that created them (Celery threads each run their own loop).
+    _inflight: Dict[Tuple[int, str], asyncio.Future] = {}
+    _metrics: Dict[str, int] = {
+        "hits": 0,
+        "misses": 0,
+        "coalesced_local": 0,
+        "coalesced_remote": 0,
+        "errors": 0
+    }
+    # provider slug -> {"calls", "errors", "latency_ms", "prompt_tokens", "completion_tokens"}
+    _provider_metrics: Dict[str, Dict[str, float]] = {}
+    _lock_ttl_ms = 30000  # Leader lock TTL, extended by heartbeat while generating
+    _coalesce_timeout = 330.0  # Longest a follower waits for the leader (provider timeout + margin)
+    
     def __init__(self, db: Session, tenant_id: Optional[str] = None):
         self.db = db
         self.tenant_id = tenant_id
@@ -48,7 +83,7 @@ class AIOrchestrationService:
         self.prompt_service = AIPromptService(db, tenant_id=tenant_id)
         self._redis_client: Optional[redis.Redis] = None
         self._cache_ttl = 3600  # 1 hour default cache TTL
-        
+    
     async def _get_redis(self) -> Optional[redis.Redis]:
         """Get Redis client for caching"""
         try:
@@ -128,6 +163,7 @@ class AIOrchestrationService:
         if use_cache:
             cached_response = await self._get_cached_response(cache_key)
             if cached_response:
+                self._metrics["hits"] += 1
                 logger.info(f"AI response cache hit: {category} (tenant={self.tenant_id})")
                 return {
                     **cached_response,
@@ -142,21 +178,64 @@ class AIOrchestrationService:
             logger.error(error_msg)
             raise ValueError(error_msg)
         
-        # 4. Generate with retry logic
+        async def produce() -> Dict[str, Any]:
+            return await self._generate_with_retry(
+                prompt_obj=prompt_obj,
+                category=category,
+                variables=variables,
+                quote_type=quote_type,
+                provider_slug=provider_slug,
+                cache_key=cache_key if use_cache else None,
+                cache_ttl=cache_ttl or self._cache_ttl,
+                max_retries=max_retries,
+                retry_delay=retry_delay,
+                start_time=start_time,
+                **kwargs
+            )
+        
+        if not use_cache:
+            self._metrics["misses"] += 1
+            return await produce()
+        
+        # 4. Single-flight: identical concurrent calls share one provider completion
+        return await self._single_flight(cache_key, produce)
+    
+    async def _generate_with_retry(
+        self,
+        prompt_obj: AIPrompt,
+        category: str,
+        variables: Dict[str, Any],
+        quote_type: Optional[str],
+        provider_slug: str,
+        cache_key: Optional[str],
+        cache_ttl: int,
+        max_retries: int,
+        retry_delay: float,
+        start_time: datetime,
+        **kwargs
+    ) -> Dict[str, Any]:
+        """Call the provider with retry/backoff, apply safety filters and cache the result"""
         response = None
         last_error = None
         
+        # Render once; every attempt sends the same prompt
+        rendered = self.prompt_service.render_prompt(prompt_obj, variables)
+        
         for attempt in range(max_retries):
+            provider_response = None
+            call_started = time.monotonic()
             try:
-                # Render prompt
-                rendered = self.prompt_service.render_prompt(prompt_obj, variables)
-                
                 # Generate via provider service
                 provider_response = await self.provider_service.generate(
                     prompt=prompt_obj,
-                    variables=variables,
+                    rendered=rendered,
                     **kwargs
                 )
+                self._record_provider_call(
+                    provider_slug,
+                    (time.monotonic() - call_started) * 1000,
+                    provider_response.usage
+                )
                 
                 # 5. Apply safety filters
                 filtered_content = await self._apply_safety_filters(provider_response.content)
@@ -180,8 +259,8 @@ class AIOrchestrationService:
                 }
                 
                 # 6. Cache response
-                if use_cache:
-                    await self._cache_response(cache_key, response, cache_ttl or self._cache_ttl)
+                if cache_key:
+                    await self._cache_response(cache_key, response, cache_ttl)
                 
                 # 7. Log success
                 logger.info(
@@ -190,9 +269,11 @@ class AIOrchestrationService:
                 )
                 
                 break
-                
+            
             except Exception as e:
                 last_error = e
+                if provider_response is None:
+                    self._record_provider_call(provider_slug, (time.monotonic() - call_started) * 1000, error=True)
                 logger.warning(
                     f"AI generation attempt {attempt + 1}/{max_retries} failed: {e} "
                     f"(category={category}, provider={provider_slug}, tenant={self.tenant_id})"
@@ -215,6 +296,135 @@ class AIOrchestrationService:
         
         return response
     
+    async def _single_flight(
+        self,
+        cache_key: str,
+        produce: Callable[[], Awaitable[Dict[str, Any]]]
+    ) -> Dict[str, Any]:
+        """
+        Ensure only one completion runs per cache key
+        
+        In-process callers for the same key await the leader's future; the
+        leader then coordinates with other workers through a Redis lock. If
+        the leader is cancelled, a waiting caller retries and takes over.
+        """
+        loop = asyncio.get_running_loop()
+        flight_key = (id(loop), cache_key)
+        
+        existing = self._inflight.get(flight_key)
+        if existing is not None:
+            self._metrics["coalesced_local"] += 1
+            logger.info(f"AI request coalesced in-process: {cache_key}")
+            try:
+                response = await asyncio.shield(existing)
+            except asyncio.CancelledError:
+                task = asyncio.current_task()
+                if existing.cancelled() and not (task and task.cancelling()):
+                    # The leader was cancelled (e.g. its client disconnected), not this caller: take over
+                    logger.info(f"AI request leader cancelled, retrying: {cache_key}")
+                    return await self._single_flight(cache_key, produce)
+                raise
+            return {**response, "coalesced": True}
+        
+        future = loop.create_future()
+        # Avoid "exception was never retrieved" when no follower is waiting
+        future.add_done_callback(lambda f: f.cancelled() or f.exception())
+        self._inflight[flight_key] = future
+        try:
+            response = await self._distributed_single_flight(cache_key, produce)
+            future.set_result(response)
+            return response
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            self._metrics["errors"] += 1
+            future.set_exception(e)
+            raise
+        finally:
+            self._inflight.pop(flight_key, None)
+    
+    async def _distributed_single_flight(
+        self,
+        cache_key: str,
+        produce: Callable[[], Awaitable[Dict[str, Any]]]
+    ) -> Dict[str, Any]:
+        """
+        Cross-worker single-flight using a Redis lock on the cache key
+        
+        The lock holder generates and caches the response; other workers poll
+        the cache until it appears, or take over if the holder's lock lapses.
+        Falls back to a direct call if Redis is unavailable.
+        """
+        redis_client = await self._get_redis()
+        if not redis_client:
+            self._metrics["misses"] += 1
+            return await produce()
+        
+        lock_key = f"{cache_key}:lock"
+        token = uuid.uuid4().hex
+        deadline = time.monotonic() + self._coalesce_timeout
+        poll_delay = 0.05
+        
+        while True:
+            try:
+                acquired = await redis_client.set(lock_key, token, nx=True, px=self._lock_ttl_ms)
+            except Exception as e:
+                logger.warning(f"AI single-flight lock unavailable, generating directly: {e}")
+                self._metrics["misses"] += 1
+                return await produce()
+            
+            if acquired:
+                try:
+                    # Another worker may have finished between our cache miss and the lock
+                    cached_response = await self._get_cached_response(cache_key)
+                    if cached_response:
+                        self._metrics["coalesced_remote"] += 1
+                        return {**cached_response, "cached": True, "coalesced": True, "cache_key": cache_key}
+                    
+                    self._metrics["misses"] += 1
+                    heartbeat = asyncio.create_task(self._extend_lock(redis_client, lock_key, token))
+                    try:
+                        return await produce()
+                    finally:
+                        heartbeat.cancel()
+                finally:
+                    await self._release_lock(redis_client, lock_key, token)
+            
+            # Another worker is generating - wait for its result
+            cached_response = await self._get_cached_response(cache_key)
+            if cached_response:
+                self._metrics["coalesced_remote"] += 1
+                logger.info(f"AI request coalesced across workers: {cache_key}")
+                return {**cached_response, "cached": True, "coalesced": True, "cache_key": cache_key}
+            
+            if time.monotonic() >= deadline:
+                logger.warning(f"AI single-flight wait timed out, generating directly: {cache_key}")
+                self._metrics["misses"] += 1
+                return await produce()
+            
+            await asyncio.sleep(poll_delay)
+            poll_delay = min(poll_delay * 2, 1.0)
+    
+    async def _extend_lock(self, redis_client: redis.Redis, lock_key: str, token: str):
+        """Heartbeat that keeps the leader lock alive while the provider call runs"""
+        interval = self._lock_ttl_ms / 3000
+        try:
+            while True:
+                await asyncio.sleep(interval)
+                await redis_client.eval(_EXTEND_LOCK_SCRIPT, 1, lock_key, token, self._lock_ttl_ms)
+        except asyncio.CancelledError:
+            pass
+        except Exception as e:
+            logger.warning(f"Error extending AI single-flight lock: {e}")
+    
+    async def _release_lock(self, redis_client: redis.Redis, lock_key: str, token: str):
+        """Release the leader lock if we still own it"""
+        try:
+            await redis_client.eval(_RELEASE_LOCK_SCRIPT, 1, lock_key, token)
+        except Exception as e:
+            logger.warning(f"Error releasing AI single-flight lock: {e}")
+    
     async def _resolve_prompt(
         self,
         category: str,
@@ -417,24 +627,69 @@ class AIOrchestrationService:
         except Exception as e:
             logger.error(f"Error invalidating cache: {e}")
     
+    @classmethod
+    def _record_provider_call(
+        cls,
+        provider_slug: str,
+        latency_ms: float,
+        usage: Optional[Dict[str, Any]] = None,
+        error: bool = False
+    ):
+        """Add one provider call (attempt) to the process-wide per-provider counters"""
+        stats = cls._provider_metrics.get(provider_slug)
+        if stats is None:
+            stats = cls._provider_metrics.setdefault(provider_slug, {
+                "calls": 0, "errors": 0, "latency_ms": 0.0, "prompt_tokens": 0, "completion_tokens": 0
+            })
+        stats["calls"] += 1
+        stats["latency_ms"] += latency_ms
+        if error:
+            stats["errors"] += 1
+        if usage:
+            # OpenAI-style and Anthropic/Cohere-style usage keys
+            stats["prompt_tokens"] += usage.get("prompt_tokens") or usage.get("input_tokens") or 0
+            stats["completion_tokens"] += usage.get("completion_tokens") or usage.get("output_tokens") or 0
+    
     def get_metrics(self) -> Dict[str, Any]:
         """
         Get AI orchestration metrics
         
+        Cost is not computed (no per-model pricing is configured); token
+        counts per provider are reported so it can be derived downstream.
+        
         Returns:
-            Dict with metrics (cache hit rate, average latency, etc.)
+            Dict with cache/coalescing counters, hit rate and per-provider
+            calls, error rate, average latency and token usage
         """
-        # TODO: Implement metrics collection
-        # This would track:
-        # - Cache hit/miss rates
-        # - Average latency per provider
-        # - Error rates per provider
-        # - Token usage per tenant
-        # - Cost tracking
+        # Counters are process-wide (shared by all service instances in this worker)
+        metrics = dict(self._metrics)
+        coalesced = metrics["coalesced_local"] + metrics["coalesced_remote"]
+        total = metrics["hits"] + coalesced + metrics["misses"]
+        
+        providers = {}
+        for provider_slug, stats in list(self._provider_metrics.items()):
+            calls = stats["calls"]
+            providers[provider_slug] = {
+                "calls": calls,
+                "errors": stats["errors"],
+                "error_rate": round(stats["errors"] / calls, 4) if calls else 0.0,
+                "avg_latency_ms": round(stats["latency_ms"] / calls, 1) if calls else 0.0,
+                "prompt_tokens": stats["prompt_tokens"],
+                "completion_tokens": stats["completion_tokens"]
+            }
         
         return {
             "cache_enabled": self._redis_client is not None,
             "default_cache_ttl": self._cache_ttl,
-            "tenant_id": self.tenant_id
+            "tenant_id": self.tenant_id,
+            "hits": metrics["hits"],
+            "coalesced": coalesced,
+            "coalesced_local": metrics["coalesced_local"],
+            "coalesced_remote": metrics["coalesced_remote"],
+            "misses": metrics["misses"],
+            "errors": metrics["errors"],
+            "in_flight": len(self._inflight),
+            "hit_rate": round((metrics["hits"] + coalesced) / total, 4) if total else 0.0,
+            "providers": providers
         }
 
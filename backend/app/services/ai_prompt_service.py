@@ -4,9 +4,13 @@ AI Prompt Service for managing database-driven prompts
 """
 
 import json
+import re
 import uuid
 import asyncio
-from typing import Dict, List, Optional, Any
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, asdict
+from typing import Dict, List, Optional, Any, Tuple
 from sqlalchemy.orm import Session
 from sqlalchemy import and_, or_
 from datetime import datetime, timezone
@@ -15,6 +19,127 @@ from app.models.ai_prompt import AIPrompt, AIPromptVersion, PromptCategory
 from app.core.redis import get_redis
 import redis.asyncio as redis
 
+# {variable} placeholders; other braces (e.g. JSON examples in templates) are literal text
+PLACEHOLDER_PATTERN = re.compile(r"\{(\w+)\}")
+MAX_COMPILED_TEMPLATES = 512
+
+
+class CompiledTemplate:
+    """
+    Prompt template with its placeholders located once
+    
+    Rendering joins the literal segments with the variable values in a
+    single pass, instead of one str.replace over the whole template per
+    variable. Placeholders without a value are left as written.
+    """
+    
+    def __init__(self, source: str):
+        self.source = source
+        self._segments: List[str] = []  # literals, with placeholder names at odd positions
+        position = 0
+        for match in PLACEHOLDER_PATTERN.finditer(source):
+            self._segments.append(source[position:match.start()])
+            self._segments.append(match.group(1))
+            position = match.end()
+        self._segments.append(source[position:])
+        self.variable_names = frozenset(self._segments[1::2])
+    
+    def render(self, values: Dict[str, str]) -> str:
+        if len(self._segments) == 1:
+            return self.source
+        parts = self._segments[:]
+        for index in range(1, len(parts), 2):
+            name = parts[index]
+            parts[index] = values[name] if name in values else f"{{{name}}}"
+        return "".join(parts)
+
+
+# (prompt id, version, which template) -> CompiledTemplate, least recently used first
+_compiled_templates: "OrderedDict[Tuple[str, int, str], CompiledTemplate]" = OrderedDict()
+# Renders run in executor threads (and Celery threads), so every LRU access holds the lock
+_compiled_templates_lock = threading.Lock()
+
+
+def compile_template(source: Optional[str], cache_key: Optional[Tuple[str, int, str]] = None) -> CompiledTemplate:
+    """Compiled form of a template, cached under cache_key (prompt id + version) when given"""
+    source = source or ""
+    if cache_key is None:
+        return CompiledTemplate(source)
+    
+    with _compiled_templates_lock:
+        compiled = _compiled_templates.get(cache_key)
+        # Guard against a template edited in place without a version bump
+        if compiled is not None and (compiled.source is source or compiled.source == source):
+            _compiled_templates.move_to_end(cache_key)
+            return compiled
+    
+    # Compile outside the lock; a concurrent compile of the same key just stores an equal template
+    compiled = CompiledTemplate(source)
+    with _compiled_templates_lock:
+        _compiled_templates[cache_key] = compiled
+        _compiled_templates.move_to_end(cache_key)
+        while len(_compiled_templates) > MAX_COMPILED_TEMPLATES:
+            _compiled_templates.popitem(last=False)
+    return compiled
+
+
+def format_prompt_variable(value: Any) -> str:
+    """Text inserted for a template variable (lists and dicts as indented JSON)"""
+    if isinstance(value, (list, dict)):
+        return json.dumps(value, indent=2)
+    return str(value)
+
+
+@dataclass(frozen=True)
+class RenderedPrompt:
+    """
+    A prompt rendered once and passed down to the provider call
+    
+    Supports item access (rendered['user_prompt']) like the dict that
+    render_prompt used to return.
+    """
+    system_prompt: str
+    user_prompt: str
+    model: Optional[str] = None
+    temperature: Optional[float] = None
+    max_tokens: Optional[int] = None
+    
+    def __getitem__(self, key: str) -> Any:
+        try:
+            return getattr(self, key)
+        except AttributeError:
+            raise KeyError(key) from None
+    
+    def get(self, key: str, default: Any = None) -> Any:
+        return getattr(self, key, default)
+    
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+def render_prompt_templates(prompt: AIPrompt, variables: Optional[Dict[str, Any]] = None) -> RenderedPrompt:
+    """
+    Render a prompt's system and user templates
+    
+    Templates are compiled once per prompt id + version, and each variable
+    used by either template is formatted once.
+    """
+    prompt_key = (prompt.id, prompt.version) if prompt.id else None
+    system_template = compile_template(prompt.system_prompt, prompt_key and (*prompt_key, "system"))
+    user_template = compile_template(prompt.user_prompt_template, prompt_key and (*prompt_key, "user"))
+    
+    variables = variables or {}
+    used = (system_template.variable_names | user_template.variable_names) & variables.keys()
+    values = {name: format_prompt_variable(variables[name]) for name in used}
+    
+    return RenderedPrompt(
+        system_prompt=system_template.render(values),
+        user_prompt=user_template.render(values),
+        model=prompt.model,
+        temperature=prompt.temperature,
+        max_tokens=prompt.max_tokens
+    )
+
 
 class AIPromptService:
     """Service for managing AI prompts from database"""
@@ -206,34 +331,15 @@ class AIPromptService:
         self,
         prompt: AIPrompt,
         variables: Dict[str, Any]
-    ) -> Dict[str, str]:
+    ) -> RenderedPrompt:
         """
         Render prompt template with variables
         
         Returns:
-            Dict with 'system_prompt' and 'user_prompt' keys
+            RenderedPrompt with 'system_prompt', 'user_prompt', 'model',
+            'temperature' and 'max_tokens' (item access supported)
         """
-        system_prompt = prompt.system_prompt
-        user_prompt = prompt.user_prompt_template
-        
-        # Replace variables in templates
-        for key, value in variables.items():
-            placeholder = f"{{{key}}}"
-            if isinstance(value, (list, dict)):
-                value_str = json.dumps(value, indent=2)
-            else:
-                value_str = str(value)
-            
-            system_prompt = system_prompt.replace(placeholder, value_str)
-            user_prompt = user_prompt.replace(placeholder, value_str)
-        
-        return {
-            'system_prompt': system_prompt,
-            'user_prompt': user_prompt,
-            'model': prompt.model,
-            'temperature': prompt.temperature,
-            'max_tokens': prompt.max_tokens
-        }
+        return render_prompt_templates(prompt, variables)
     
     def create_prompt(
         self,
@@ -13,6 +13,7 @@ from app.core.ai_providers import (
 )
 from app.models.ai_provider import AIProvider as AIProviderModel, ProviderAPIKey
 from app.models.ai_prompt import AIPrompt
+from app.services.ai_prompt_service import RenderedPrompt, render_prompt_templates
 from app.models.tenant import Tenant
 
 
@@ -298,6 +299,7 @@ class AIProviderService:
         self,
         prompt: AIPrompt,
         variables: Optional[Dict[str, Any]] = None,
+        rendered: Optional[RenderedPrompt] = None,
         **kwargs
     ) -> AIProviderResponse:
         """
@@ -306,6 +308,7 @@ class AIProviderService:
         Args:
             prompt: AIPrompt object with provider configuration
             variables: Template variables for prompt rendering
+            rendered: Prompt already rendered by AIPromptService.render_prompt (variables are then ignored)
             **kwargs: Additional provider-specific settings
         
         Returns:
@@ -369,15 +372,11 @@ class AIProviderService:
             temperature = normalized["temperature"]
             max_tokens = normalized["max_tokens"]
             
-            # Render prompts if variables provided
-            system_prompt = prompt.system_prompt
-            user_prompt = prompt.user_prompt_template
-            
-            if variables:
-                # Simple variable substitution (can be enhanced with Jinja2)
-                for key, value in variables.items():
-                    user_prompt = user_prompt.replace(f"{{{key}}}", str(value))
-                    system_prompt = system_prompt.replace(f"{{{key}}}", str(value))
+            # Render prompts unless the caller already did
+            if rendered is None:
+                rendered = render_prompt_templates(prompt, variables)
+            system_prompt = rendered.system_prompt
+            user_prompt = rendered.user_prompt
             
             # Check if we need to use responses API (for OpenAI with web search)
             use_responses_api = kwargs.get("use_responses_api", False)
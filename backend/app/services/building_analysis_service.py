@@ -91,7 +91,7 @@ class BuildingAnalysisService:
             # Use AIProviderService
             provider_response = await self.provider_service.generate(
                 prompt=prompt_obj,
-                variables=analysis_context
+                rendered=rendered
             )
             
             response_text = provider_response.content
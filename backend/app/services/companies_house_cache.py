@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+"""
+Companies House response cache and request throttle
+
+PERFORMANCE: Companies House allows 600 requests per 5 minutes per API key,
+and AI analysis and lead campaigns look up the same companies repeatedly.
+
+- JSON payloads (search, profile, officers, filing history) are cached for
+  all tenants in the shared cache with a per-resource TTL. Expired entries
+  are kept and revalidated with If-None-Match, so an unchanged resource
+  costs a 304 instead of a full download.
+- Filed iXBRL documents never change and are stored once per filing
+  transaction in Postgres (companies_house_documents); the financial data
+  parsed from them is cached under the same transaction id.
+- Every request to the API first takes a token from a bucket in Redis that
+  all API and Celery workers share.
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import time
+from typing import Any, Dict, Optional, Tuple
+
+import httpx
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+
+from app.core.caching import get_cache, set_cache
+from app.core.config import settings
+from app.core.redis import get_redis
+
+logger = logging.getLogger(__name__)
+
+CACHE_PREFIX_COMPANIES_HOUSE = "companies_house:"
+THROTTLE_KEY = "companies_house:token_bucket"
+
+# Token bucket on the Redis clock. ARGV: capacity, refill tokens per millisecond.
+# Returns 0 when a token was taken, otherwise milliseconds until one is available.
+TOKEN_BUCKET_SCRIPT = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local time = redis.call('TIME')
+local now = tonumber(time[1]) * 1000 + math.floor(tonumber(time[2]) / 1000)
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or capacity
+local ts = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+local wait = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+else
+    wait = math.ceil((1 - tokens) / rate)
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', now)
+redis.call('PEXPIRE', KEYS[1], math.ceil(capacity / rate) + 1000)
+return wait
+"""
+
+
+def _resource_ttls() -> Dict[str, int]:
+    return {
+        "search": settings.COMPANIES_HOUSE_CACHE_TTL_SEARCH,
+        "profile": settings.COMPANIES_HOUSE_CACHE_TTL_PROFILE,
+        "officers": settings.COMPANIES_HOUSE_CACHE_TTL_OFFICERS,
+        "filing_history": settings.COMPANIES_HOUSE_CACHE_TTL_FILINGS,
+        "accounts": settings.COMPANIES_HOUSE_CACHE_TTL_FILINGS,
+    }
+
+
+class CompaniesHouseThrottle:
+    """
+    Token bucket shared by every worker through Redis
+    
+    The refill rate leaves room for a full bucket, so no window of
+    COMPANIES_HOUSE_RATE_WINDOW seconds exceeds COMPANIES_HOUSE_RATE_LIMIT
+    requests. Falls back to an in-process bucket if Redis is unavailable.
+    """
+    
+    def __init__(self):
+        self.capacity = max(1, settings.COMPANIES_HOUSE_RATE_BURST)
+        refill = max(1, settings.COMPANIES_HOUSE_RATE_LIMIT - self.capacity)
+        self.rate_per_ms = refill / (settings.COMPANIES_HOUSE_RATE_WINDOW * 1000)
+        self._script = None
+        self._script_client = None
+        self._local_tokens = float(self.capacity)
+        self._local_ts = time.monotonic() * 1000
+    
+    async def acquire(self):
+        """Wait until a request may be sent"""
+        while True:
+            wait_ms = await self._take()
+            if wait_ms <= 0:
+                return
+            await asyncio.sleep(wait_ms / 1000)
+    
+    async def _take(self) -> int:
+        try:
+            redis = await get_redis()
+            if redis is not None:
+                if self._script is None or self._script_client is not redis:
+                    self._script = redis.register_script(TOKEN_BUCKET_SCRIPT)
+                    self._script_client = redis
+                return int(await self._script(keys=[THROTTLE_KEY], args=[self.capacity, self.rate_per_ms]))
+        except Exception as e:
+            logger.warning(f"Companies House throttle using local bucket: {e}")
+        return self._take_local()
+    
+    def _take_local(self) -> int:
+        now = time.monotonic() * 1000
+        self._local_tokens = min(self.capacity, self._local_tokens + (now - self._local_ts) * self.rate_per_ms)
+        self._local_ts = now
+        if self._local_tokens >= 1:
+            self._local_tokens -= 1
+            return 0
+        return int((1 - self._local_tokens) / self.rate_per_ms) + 1
+
+
+class CompaniesHouseCache:
+    """Tenant-agnostic cache in front of the Companies House API"""
+    
+    def __init__(self, throttle: Optional[CompaniesHouseThrottle] = None):
+        self.throttle = throttle or CompaniesHouseThrottle()
+    
+    @staticmethod
+    def cache_key(resource: str, url: str, params: Optional[Dict[str, Any]] = None) -> str:
+        request = json.dumps([url, sorted((params or {}).items())], default=str)
+        return f"{CACHE_PREFIX_COMPANIES_HOUSE}{resource}:{hashlib.sha256(request.encode()).hexdigest()}"
+    
+    async def get(self, client: httpx.AsyncClient, url: str, **request_kwargs) -> httpx.Response:
+        """Throttled, uncached GET (document downloads)"""
+        await self.throttle.acquire()
+        return await client.get(url, **request_kwargs)
+    
+    async def fetch_json(
+        self,
+        client: httpx.AsyncClient,
+        url: str,
+        resource: str,
+        params: Optional[Dict[str, Any]] = None,
+        headers: Optional[Dict[str, str]] = None,
+        **request_kwargs
+    ) -> Any:
+        """
+        JSON body of a GET, served from cache while fresh
+        
+        Stale entries are revalidated with their ETag. Errors are raised as
+        httpx.HTTPStatusError, like response.raise_for_status().
+        """
+        key = self.cache_key(resource, url, params)
+        ttl = _resource_ttls().get(resource, settings.COMPANIES_HOUSE_CACHE_TTL_PROFILE)
+        entry = await get_cache(key)
+        now = time.time()
+        if entry and now - entry.get("fetched_at", 0) < ttl:
+            return entry["body"]
+        
+        headers = dict(headers or {})
+        if entry and entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        
+        response = await self.get(client, url, params=params, headers=headers, **request_kwargs)
+        if response.status_code == 304 and entry:
+            entry = {**entry, "fetched_at": now}
+        else:
+            response.raise_for_status()
+            entry = {"etag": response.headers.get("etag"), "body": response.json(), "fetched_at": now}
+        
+        await set_cache(key, entry, ttl=settings.COMPANIES_HOUSE_CACHE_RETENTION)
+        return entry["body"]
+    
+    async def get_document(self, transaction_id: str) -> Optional[Tuple[str, Optional[str]]]:
+        """(content, content_type) of a stored filing document"""
+        from app.core.database import AsyncSessionLocal
+        from app.models.companies_house import CompaniesHouseDocument
+        
+        try:
+            async with AsyncSessionLocal() as session:
+                row = (await session.execute(
+                    select(CompaniesHouseDocument.content, CompaniesHouseDocument.content_type)
+                    .where(CompaniesHouseDocument.transaction_id == transaction_id)
+                )).first()
+            return (row.content, row.content_type) if row else None
+        except Exception as e:
+            logger.warning(f"Companies House document cache read failed for {transaction_id}: {e}")
+            return None
+    
+    async def store_document(self, transaction_id: str, company_number: str, content: str, content_type: Optional[str]):
+        """Keep a downloaded filing document for every later lookup"""
+        from app.core.database import AsyncSessionLocal
+        from app.models.companies_house import CompaniesHouseDocument
+        
+        try:
+            async with AsyncSessionLocal() as session:
+                await session.execute(
+                    pg_insert(CompaniesHouseDocument).values(
+                        transaction_id=transaction_id,
+                        company_number=company_number,
+                        content_type=content_type,
+                        content=content,
+                        size_bytes=len(content.encode("utf-8"))
+                    ).on_conflict_do_nothing(index_elements=["transaction_id"])
+                )
+                await session.commit()
+        except Exception as e:
+            logger.warning(f"Companies House document cache write failed for {transaction_id}: {e}")
+    
+    @staticmethod
+    def _parsed_key(transaction_id: str, target_year: Optional[str]) -> str:
+        return f"{CACHE_PREFIX_COMPANIES_HOUSE}ixbrl:{transaction_id}:{target_year or 'any'}"
+    
+    async def get_parsed_accounts(self, transaction_id: str, target_year: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """Financial data already extracted from a filing, if any"""
+        return await get_cache(self._parsed_key(transaction_id, target_year))
+    
+    async def store_parsed_accounts(self, transaction_id: str, target_year: Optional[str], financial_data: Dict[str, Any]):
+        """Keep extracted financial data so a filing is parsed only once"""
+        await set_cache(self._parsed_key(transaction_id, target_year), financial_data, ttl=settings.COMPANIES_HOUSE_CACHE_RETENTION)
+
+
+_cache: Optional[CompaniesHouseCache] = None
+
+
+def get_companies_house_cache() -> CompaniesHouseCache:
+    """Process-wide cache (and throttle) instance"""
+    global _cache
+    if _cache is None:
+        _cache = CompaniesHouseCache()
+    return _cache
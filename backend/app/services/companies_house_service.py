@@ -12,6 +12,8 @@ from pathlib import Path
 
 from app.core.config import settings
 from app.services.storage_service import get_storage_service
+from app.services.companies_house_cache import get_companies_house_cache
+from app.services.ixbrl_parser import extract_financial_data, parse_ixbrl_facts
 
 
 class CompaniesHouseService:
@@ -20,7 +22,9 @@ class CompaniesHouseService:
     
     PERFORMANCE: Reuses httpx.AsyncClient with connection pooling to avoid
     creating new connections on every request. This significantly improves
-    performance and reduces connection overhead.
+    performance and reduces connection overhead. API responses and filed
+    documents are cached for all tenants, and requests share one throttle
+    (see companies_house_cache).
     """
     
     def __init__(self, api_key: Optional[str] = None):
@@ -32,6 +36,7 @@ class CompaniesHouseService:
         # Limits: max 10 connections, keep-alive for 30s
         self._client: Optional[httpx.AsyncClient] = None
         self._client_lock = asyncio.Lock()
+        self._cache = get_companies_house_cache()
     
     async def _get_client(self) -> httpx.AsyncClient:
         """Get or create reusable HTTP client"""
@@ -60,13 +65,13 @@ class CompaniesHouseService:
         try:
             headers = {'Authorization': self.api_key}
             client = await self._get_client()
-            response = await client.get(
+            data = await self._cache.fetch_json(
+                client,
                 f"{self.base_url}/search/companies",
-                headers=headers,
-                params={'q': company_name, 'items_per_page': 1}
+                "search",
+                params={'q': company_name, 'items_per_page': 1},
+                headers=headers
             )
-            response.raise_for_status()
-            data = response.json()
             
             if data.get('items'):
                 company = data['items'][0]
@@ -97,12 +102,12 @@ class CompaniesHouseService:
             client = await self._get_client()
             
             # Get basic company information
-            company_response = await client.get(
+            company_data = await self._cache.fetch_json(
+                client,
                 f"{self.base_url}/company/{company_number}",
+                "profile",
                 headers=headers
             )
-            company_response.raise_for_status()
-            company_data = company_response.json()
             
             # Get officers/directors, filing history, and financial data in parallel
             # This reduces total time from sequential to parallel execution
@@ -159,12 +164,12 @@ class CompaniesHouseService:
     async def _get_officers(self, company_number: str, client: httpx.AsyncClient, headers: dict) -> List[Dict[str, Any]]:
         """Get company officers/directors"""
         try:
-            response = await client.get(
+            officers_data = await self._cache.fetch_json(
+                client,
                 f"{self.base_url}/company/{company_number}/officers",
+                "officers",
                 headers=headers
             )
-            response.raise_for_status()
-            officers_data = response.json()
             return officers_data.get("items", [])
         except Exception as e:
             print(f"Error getting officers: {e}")
@@ -173,12 +178,12 @@ class CompaniesHouseService:
     async def _get_filing_history(self, company_number: str, client: httpx.AsyncClient, headers: dict) -> List[Dict[str, Any]]:
         """Get company filing history"""
         try:
-            response = await client.get(
+            filing_data = await self._cache.fetch_json(
+                client,
                 f"{self.base_url}/company/{company_number}/filing-history",
+                "filing_history",
                 headers=headers
             )
-            response.raise_for_status()
-            filing_data = response.json()
             return filing_data.get("items", [])[:10]  # Last 10 filings
         except Exception as e:
             print(f"Error getting filing history: {e}")
@@ -194,13 +199,13 @@ class CompaniesHouseService:
                 raise ValueError("tenant_id is required for tenant isolation")
             
             # Get filing history for accounts
-            response = await client.get(
+            filing_data = await self._cache.fetch_json(
+                client,
                 f"{self.base_url}/company/{company_number}/filing-history",
+                "filing_history",
                 params={'category': 'accounts', 'items_per_page': 5},
                 headers=headers
             )
-            response.raise_for_status()
-            filing_data = response.json()
             
             financial_history = []
             filings = filing_data.get("items", [])
@@ -223,117 +228,129 @@ class CompaniesHouseService:
                     
                     if document_metadata_url:
                         try:
-                            print(f"[IXBRL] Year {i+1}: Attempting to retrieve document: {document_metadata_url}")
-                            
-                            # Get document metadata
-                            # Companies House Document API uses Basic Auth (same as main API)
-                            # Use httpx.BasicAuth for proper authentication
-                            import httpx
-                            metadata_response = await client.get(
-                                document_metadata_url,
-                                auth=httpx.BasicAuth(self.api_key, '')
-                            )
-                            
-                            if metadata_response.status_code == 200:
-                                # Check content type - Document API might return JSON metadata or XHTML content directly
-                                content_type_header = metadata_response.headers.get('content-type', '').lower()
+                            cached_document = await self._cache.get_document(transaction_id) if transaction_id else None
+                            if cached_document:
+                                content, content_type = cached_document
+                                print(f"[IXBRL] Year {i+1}: Using cached document, size: {len(content)} chars")
+                            else:
+                                print(f"[IXBRL] Year {i+1}: Attempting to retrieve document: {document_metadata_url}")
                                 
-                                if 'json' in content_type_header:
-                                    # It's JSON metadata - parse it
-                                    try:
-                                        metadata = metadata_response.json()
-                                        resources = metadata.get('resources', [])
-                                        
-                                        # Find iXBRL content type
-                                        target_content_type = None
-                                        for resource in resources:
-                                            ct = resource.get('content_type', '')
-                                            if 'xhtml' in ct.lower() or 'ixbrl' in ct.lower():
-                                                target_content_type = ct
-                                                content_type = ct
-                                                break
-                                        
-                                        if target_content_type:
-                                            # Extract document ID from URL
-                                            document_id = document_metadata_url.split('/')[-1]
-                                            content_url = f"https://document-api.company-information.service.gov.uk/document/{document_id}/content"
+                                # Get document metadata
+                                # Companies House Document API uses Basic Auth (same as main API)
+                                # Use httpx.BasicAuth for proper authentication
+                                import httpx
+                                metadata_response = await self._cache.get(
+                                    client,
+                                    document_metadata_url,
+                                    auth=httpx.BasicAuth(self.api_key, '')
+                                )
+                                
+                                if metadata_response.status_code == 200:
+                                    # Check content type - Document API might return JSON metadata or XHTML content directly
+                                    content_type_header = metadata_response.headers.get('content-type', '').lower()
+                                    
+                                    if 'json' in content_type_header:
+                                        # It's JSON metadata - parse it
+                                        try:
+                                            metadata = metadata_response.json()
+                                            resources = metadata.get('resources', [])
                                             
-                                            # Download the iXBRL document
-                                            # Companies House Document API uses Basic Auth
-                                            import httpx
-                                            content_response = await client.get(
-                                                content_url,
-                                                auth=httpx.BasicAuth(self.api_key, ''),
-                                                headers={'Accept': target_content_type},
-                                                follow_redirects=True
-                                            )
+                                            # Find iXBRL content type
+                                            target_content_type = None
+                                            for resource in resources:
+                                                ct = resource.get('content_type', '')
+                                                if 'xhtml' in ct.lower() or 'ixbrl' in ct.lower():
+                                                    target_content_type = ct
+                                                    content_type = ct
+                                                    break
                                             
-                                            if content_response.status_code == 200:
-                                                content = content_response.text
-                                                print(f"[IXBRL] Year {i+1}: Downloaded via API, size: {len(content)} chars")
+                                            if target_content_type:
+                                                # Extract document ID from URL
+                                                document_id = document_metadata_url.split('/')[-1]
+                                                content_url = f"https://document-api.company-information.service.gov.uk/document/{document_id}/content"
+                                                
+                                                # Download the iXBRL document
+                                                # Companies House Document API uses Basic Auth
+                                                import httpx
+                                                content_response = await self._cache.get(
+                                                    client,
+                                                    content_url,
+                                                    auth=httpx.BasicAuth(self.api_key, ''),
+                                                    headers={'Accept': target_content_type},
+                                                    follow_redirects=True
+                                                )
+                                                
+                                                if content_response.status_code == 200:
+                                                    content = content_response.text
+                                                    print(f"[IXBRL] Year {i+1}: Downloaded via API, size: {len(content)} chars")
+                                                else:
+                                                    print(f"[IXBRL] Year {i+1}: API download failed: {content_response.status_code}")
                                             else:
-                                                print(f"[IXBRL] Year {i+1}: API download failed: {content_response.status_code}")
-                                        else:
-                                            print(f"[IXBRL] Year {i+1}: No suitable content type found in metadata")
-                                    except Exception as json_e:
-                                        print(f"[IXBRL] Year {i+1}: Error parsing metadata JSON: {json_e}")
-                                elif 'xhtml' in content_type_header or 'xml' in content_type_header or 'html' in content_type_header:
-                                    # It's already the document content (XHTML) - use it directly
-                                    content = metadata_response.text
-                                    content_type = content_type_header
-                                    print(f"[IXBRL] Year {i+1}: Document API returned content directly, size: {len(content)} chars")
+                                                print(f"[IXBRL] Year {i+1}: No suitable content type found in metadata")
+                                        except Exception as json_e:
+                                            print(f"[IXBRL] Year {i+1}: Error parsing metadata JSON: {json_e}")
+                                    elif 'xhtml' in content_type_header or 'xml' in content_type_header or 'html' in content_type_header:
+                                        # It's already the document content (XHTML) - use it directly
+                                        content = metadata_response.text
+                                        content_type = content_type_header
+                                        print(f"[IXBRL] Year {i+1}: Document API returned content directly, size: {len(content)} chars")
+                                    else:
+                                        # Try to parse as JSON anyway (fallback)
+                                        try:
+                                            metadata = metadata_response.json()
+                                            resources = metadata.get('resources', [])
+                                            print(f"[IXBRL] Year {i+1}: Parsed as JSON metadata, found {len(resources)} resources")
+                                            # Continue with resource processing...
+                                            target_content_type = None
+                                            for resource in resources:
+                                                ct = resource.get('content_type', '')
+                                                if 'xhtml' in ct.lower() or 'ixbrl' in ct.lower():
+                                                    target_content_type = ct
+                                                    content_type = ct
+                                                    break
+                                            
+                                            if target_content_type:
+                                                document_id = document_metadata_url.split('/')[-1]
+                                                content_url = f"https://document-api.company-information.service.gov.uk/document/{document_id}/content"
+                                                import httpx
+                                                content_response = await self._cache.get(
+                                                    client,
+                                                    content_url,
+                                                    auth=httpx.BasicAuth(self.api_key, ''),
+                                                    headers={'Accept': target_content_type},
+                                                    follow_redirects=True
+                                                )
+                                                
+                                                if content_response.status_code == 200:
+                                                    content = content_response.text
+                                                    print(f"[IXBRL] Year {i+1}: Downloaded via API, size: {len(content)} chars")
+                                        except Exception as parse_e:
+                                            print(f"[IXBRL] Year {i+1}: Could not parse response (not JSON or XHTML): {parse_e}")
+                                            print(f"[IXBRL] Year {i+1}: Content-Type: {content_type_header}, First 200 chars: {metadata_response.text[:200]}")
                                 else:
-                                    # Try to parse as JSON anyway (fallback)
+                                    print(f"[IXBRL] Year {i+1}: Metadata failed: {metadata_response.status_code}")
+                                
+                                # V1 FALLBACK: Try public web URL when Document API fails
+                                if not content and transaction_id:
                                     try:
-                                        metadata = metadata_response.json()
-                                        resources = metadata.get('resources', [])
-                                        print(f"[IXBRL] Year {i+1}: Parsed as JSON metadata, found {len(resources)} resources")
-                                        # Continue with resource processing...
-                                        target_content_type = None
-                                        for resource in resources:
-                                            ct = resource.get('content_type', '')
-                                            if 'xhtml' in ct.lower() or 'ixbrl' in ct.lower():
-                                                target_content_type = ct
-                                                content_type = ct
-                                                break
+                                        direct_ixbrl_url = f"https://find-and-update.company-information.service.gov.uk/company/{company_number}/filing-history/{transaction_id}/document?format=xhtml&download=1"
+                                        print(f"[IXBRL] Year {i+1}: Trying web URL fallback")
                                         
-                                        if target_content_type:
-                                            document_id = document_metadata_url.split('/')[-1]
-                                            content_url = f"https://document-api.company-information.service.gov.uk/document/{document_id}/content"
-                                            import httpx
-                                            content_response = await client.get(
-                                                content_url,
-                                                auth=httpx.BasicAuth(self.api_key, ''),
-                                                headers={'Accept': target_content_type},
-                                                follow_redirects=True
-                                            )
-                                            
-                                            if content_response.status_code == 200:
-                                                content = content_response.text
-                                                print(f"[IXBRL] Year {i+1}: Downloaded via API, size: {len(content)} chars")
-                                    except Exception as parse_e:
-                                        print(f"[IXBRL] Year {i+1}: Could not parse response (not JSON or XHTML): {parse_e}")
-                                        print(f"[IXBRL] Year {i+1}: Content-Type: {content_type_header}, First 200 chars: {metadata_response.text[:200]}")
-                            else:
-                                print(f"[IXBRL] Year {i+1}: Metadata failed: {metadata_response.status_code}")
-                            
-                            # V1 FALLBACK: Try public web URL when Document API fails
-                            if not content and transaction_id:
-                                try:
-                                    direct_ixbrl_url = f"https://find-and-update.company-information.service.gov.uk/company/{company_number}/filing-history/{transaction_id}/document?format=xhtml&download=1"
-                                    print(f"[IXBRL] Year {i+1}: Trying web URL fallback")
-                                    
-                                    # Use httpx without auth for public URL
-                                    direct_response = await client.get(direct_ixbrl_url, follow_redirects=True, timeout=30.0)
-                                    
-                                    if direct_response.status_code == 200:
-                                        content = direct_response.text
-                                        content_type = direct_response.headers.get('content-type', 'application/xhtml+xml')
-                                        print(f"[IXBRL] Year {i+1}: Downloaded via web URL, size: {len(content)} chars")
-                                    else:
-                                        print(f"[IXBRL] Year {i+1}: Web URL failed: {direct_response.status_code}")
-                                except Exception as web_e:
-                                    print(f"[IXBRL] Year {i+1}: Web URL exception: {web_e}")
+                                        # Use httpx without auth for public URL
+                                        direct_response = await self._cache.get(client, direct_ixbrl_url, follow_redirects=True, timeout=30.0)
+                                        
+                                        if direct_response.status_code == 200:
+                                            content = direct_response.text
+                                            content_type = direct_response.headers.get('content-type', 'application/xhtml+xml')
+                                            print(f"[IXBRL] Year {i+1}: Downloaded via web URL, size: {len(content)} chars")
+                                        else:
+                                            print(f"[IXBRL] Year {i+1}: Web URL failed: {direct_response.status_code}")
+                                    except Exception as web_e:
+                                        print(f"[IXBRL] Year {i+1}: Web URL exception: {web_e}")
+                                
+                                if content and transaction_id:
+                                    # Filed accounts never change: keep them for every tenant and later refresh
+                                    await self._cache.store_document(transaction_id, company_number, content, content_type)
                             
                             # Store document in MinIO if we have content
                             if content:
@@ -393,7 +410,7 @@ class CompaniesHouseService:
                                     except:
                                         pass
                                 
-                                parsed_data = await self._parse_ixbrl_document(content, target_year=target_year)
+                                parsed_data = await self._parse_ixbrl_document(content, target_year=target_year, transaction_id=transaction_id)
                                 
                                 if parsed_data:
                                     print(f"[IXBRL] Year {i+1}: Extracted {list(parsed_data.keys())} for year {target_year}")
@@ -425,15 +442,15 @@ class CompaniesHouseService:
         """Search for companies by name"""
         try:
             headers = {'Authorization': self.api_key}
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
-                response = await client.get(
-                    f"{self.base_url}/search/companies",
-                    params={"q": query, "items_per_page": items_per_page},
-                    headers=headers
-                )
-                response.raise_for_status()
-                return response.json()
-                
+            client = await self._get_client()
+            return await self._cache.fetch_json(
+                client,
+                f"{self.base_url}/search/companies",
+                "search",
+                params={"q": query, "items_per_page": items_per_page},
+                headers=headers
+            )
+            
         except httpx.HTTPStatusError as e:
             print(f"[CH ERROR] Search failed: {e.response.status_code} - {e.response.text}")
             return {"error": f"Companies House search error: {e.response.status_code} - {e.response.text}"}
@@ -444,257 +461,50 @@ class CompaniesHouseService:
     async def get_financial_data(self, company_number: str) -> Dict[str, Any]:
         """Get comprehensive financial data for analysis"""
         try:
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
-                # Get accounts overview
-                accounts_response = await client.get(
-                    f"{self.base_url}/company/{company_number}/accounts",
-                    auth=(self.api_key, '')
-                )
-                accounts_response.raise_for_status()
-                accounts_data = accounts_response.json()
-                
-                financial_summary = {
-                    "accounts_available": bool(accounts_data.get("items")),
-                    "last_accounts_date": accounts_data.get("last_accounts", {}).get("made_up_to"),
-                    "next_accounts_due": accounts_data.get("next_accounts", {}).get("due_on"),
-                    "overdue": accounts_data.get("next_accounts", {}).get("overdue", False)
-                }
-                
-                return financial_summary
-                
+            client = await self._get_client()
+            # Get accounts overview
+            accounts_data = await self._cache.fetch_json(
+                client,
+                f"{self.base_url}/company/{company_number}/accounts",
+                "accounts",
+                auth=(self.api_key, '')
+            )
+            
+            financial_summary = {
+                "accounts_available": bool(accounts_data.get("items")),
+                "last_accounts_date": accounts_data.get("last_accounts", {}).get("made_up_to"),
+                "next_accounts_due": accounts_data.get("next_accounts", {}).get("due_on"),
+                "overdue": accounts_data.get("next_accounts", {}).get("overdue", False)
+            }
+            
+            return financial_summary
+            
         except Exception as e:
             return {"error": str(e)}
     
-    async def _parse_ixbrl_document(self, content: str, target_year: str = None) -> Dict[str, Any]:
+    async def _parse_ixbrl_document(self, content: str, target_year: str = None, transaction_id: Optional[str] = None) -> Dict[str, Any]:
         """Parse iXBRL document to extract financial data
         
         Args:
             content: iXBRL document content
             target_year: Target year (YYYY) to extract data for (documents often contain multiple years)
+            transaction_id: Filing transaction id; filed documents never change, so results are cached under it
         """
         try:
-            import xml.etree.ElementTree as ET
+            if transaction_id:
+                cached = await self._cache.get_parsed_accounts(transaction_id, target_year)
+                if cached is not None:
+                    print(f"[IXBRL] Using parsed accounts for transaction {transaction_id}")
+                    return cached
             
-            financial_data = {}
-            
-            # Parse the XML content
-            root = ET.fromstring(content)
-            
-            # Define namespace mappings for iXBRL
-            ix_namespace = 'http://www.xbrl.org/2008/inlineXBRL'
-            if 'http://www.xbrl.org/2013/inlineXBRL' in content:
-                ix_namespace = 'http://www.xbrl.org/2013/inlineXBRL'
-            
-            # Detect taxonomy version from schemaRef in document
-            taxonomy_version = '2023-01-01'
-            if 'FRS-102/2024-01-01' in content or 'fr/2024-01-01' in content:
-                taxonomy_version = '2024-01-01'
-            elif 'FRS-102/2022-01-01' in content or 'fr/2022-01-01' in content:
-                taxonomy_version = '2022-01-01'
-            
-            namespaces = {
-                'ix': ix_namespace,
-                'xbrli': 'http://www.xbrl.org/2003/instance',
-                'core': f'http://xbrl.frc.org.uk/fr/{taxonomy_version}/core',
-                'e': f'http://xbrl.frc.org.uk/fr/{taxonomy_version}/core',
-                'bus': f'http://xbrl.frc.org.uk/cd/{taxonomy_version}/business',
-                'b': f'http://xbrl.frc.org.uk/FRS-102/{taxonomy_version}',
-                'd': f'http://xbrl.frc.org.uk/cd/{taxonomy_version}/business'
-            }
-            
-            print(f"[IXBRL] Using taxonomy version: {taxonomy_version}")
-            
-            # Extract context periods to match values to years
-            context_periods = {}
-            if target_year:
-                # Find all context elements and extract their period end dates
-                context_elements = root.findall('.//xbrli:context', namespaces)
-                for ctx in context_elements:
-                    ctx_id = ctx.get('id', '')
-                    period = ctx.find('xbrli:period', namespaces)
-                    if period is not None:
-                        end_date = period.find('xbrli:endDate', namespaces)
-                        if end_date is not None:
-                            end_date_text = end_date.text
-                            if end_date_text:
-                                try:
-                                    # Extract year from date (format: YYYY-MM-DD)
-                                    ctx_year = end_date_text.split('-')[0]
-                                    context_periods[ctx_id] = ctx_year
-                                    print(f"[IXBRL] Context {ctx_id} -> Year {ctx_year}")
-                                except:
-                                    pass
-                print(f"[IXBRL] Found {len(context_periods)} context periods, target year: {target_year}")
-            
-            # Extract financial data using XBRL tags
-            # Note: Different accounting standards (FRS-102, FRS-105, etc.) use different tag names
-            tag_variations = [
-                ('net_assets', ['e:NetAssetsLiabilities', 'core:NetAssetsLiabilities', 'e:NetAssets', 'core:NetAssets', 'e:Equity', 'core:Equity']),
-                ('cash_at_bank', ['e:CashBankOnHand', 'core:CashBankOnHand', 'e:CashAtBank', 'core:CashAtBank', 'e:CashBankInHand', 'core:CashBankInHand']),
-                ('total_equity', ['e:Equity', 'core:Equity', 'e:TotalEquity', 'core:TotalEquity', 'e:ShareholderFunds', 'core:ShareholderFunds']),
-                ('ppe', ['e:PropertyPlantEquipment', 'core:PropertyPlantEquipment', 'e:PPE', 'core:PPE', 'e:TangibleFixedAssets', 'core:TangibleFixedAssets']),
-                ('trade_debtors', ['e:TradeDebtorsTradeReceivables', 'core:TradeDebtorsTradeReceivables', 'e:TradeDebtors', 'core:TradeDebtors', 'e:Debtors', 'core:Debtors']),
-                # Turnover: Many variations across different accounting standards and years
-                ('turnover', [
-                    'e:TurnoverRevenue', 'core:TurnoverRevenue', 
-                    'e:Revenue', 'core:Revenue', 
-                    'e:Turnover', 'core:Turnover',
-                    'bus:TurnoverRevenue', 'd:TurnoverRevenue',
-                    'bus:Revenue', 'd:Revenue',
-                    'bus:Turnover', 'd:Turnover',
-                    # FRS-102 variations
-                    'b:TurnoverRevenue', 'b:Revenue', 'b:Turnover',
-                    # Older taxonomy variations
-                    'uk-gaap:TurnoverRevenue', 'uk-gaap:Revenue', 'uk-gaap:Turnover',
-                    # Micro-entity variations
-                    'micro:TurnoverRevenue', 'micro:Revenue', 'micro:Turnover',
-                    # Additional common variations
-                    'e:TotalRevenue', 'core:TotalRevenue',
-                    'bus:TotalRevenue', 'd:TotalRevenue',
-                    # Try without namespace prefix (some documents use different structures)
-                    'TurnoverRevenue', 'Revenue', 'Turnover', 'TotalRevenue',
-                ]),
-                ('profit_before_tax', ['e:ProfitLossOnOrdinaryActivitiesBeforeTax', 'core:ProfitLossOnOrdinaryActivitiesBeforeTax', 'e:ProfitBeforeTax', 'core:ProfitBeforeTax', 'e:ProfitLossBeforeTax', 'core:ProfitLossBeforeTax']),
-                ('operating_profit', ['e:OperatingProfitLoss', 'core:OperatingProfitLoss', 'e:OperatingProfit', 'core:OperatingProfit', 'e:ProfitLossFromOperations', 'core:ProfitLossFromOperations']),
-                ('gross_profit', ['e:GrossProfitLoss', 'core:GrossProfitLoss', 'e:GrossProfit', 'core:GrossProfit']),
-                ('cost_of_sales', ['e:CostSales', 'core:CostSales', 'e:CostOfSales', 'core:CostOfSales']),
-                ('admin_expenses', ['e:AdministrativeExpenses', 'core:AdministrativeExpenses', 'e:AdminExpenses', 'core:AdminExpenses'])
-            ]
-            
-            for field_name, tag_list in tag_variations:
-                for tag in tag_list:
-                    # Try with namespaces first
-                    elements = root.findall(f'.//ix:nonFraction[@name="{tag}"]', namespaces)
-                    if not elements:
-                        # Try without namespace prefix (some documents use different structures)
-                        elements = root.findall(f'.//*[@name="{tag}"]')
-                    if not elements:
-                        # Try with different namespace variations
-                        for ns_prefix in ['e', 'core', 'bus', 'd', 'b']:
-                            if tag.startswith(f'{ns_prefix}:'):
-                                tag_without_ns = tag.split(':', 1)[1]
-                                elements = root.findall(f'.//ix:nonFraction[@name="{tag_without_ns}"]', namespaces)
-                                if elements:
-                                    break
-                    # For turnover, also try case-insensitive search and partial matches
-                    # Do this BEFORE trying regex fallback - run it once per field, not per tag
-                    if not elements and field_name == 'turnover' and tag == tag_list[0]:  # Only run once, on first tag
-                        # Try case-insensitive search across ALL nonFraction elements
-                        for elem in root.findall('.//ix:nonFraction', namespaces):
-                            elem_name = elem.get('name', '').lower()
-                            if 'turnover' in elem_name or ('revenue' in elem_name and 'turnover' not in elem_name):
-                                elements.append(elem)
-                        if elements:
-                            print(f"[IXBRL] Found {len(elements)} turnover elements via case-insensitive search")
-                    
-                    if elements:
-                        # For turnover, collect all values and match to target year if provided
-                        # (turnover should be positive and match the target year context)
-                        all_values = []
-                        for elem in elements:
-                            try:
-                                value_text = elem.text.strip() if elem.text else ''
-                                # Remove currency symbols and commas
-                                value_text = value_text.replace('£', '').replace('$', '').replace(',', '').replace(' ', '').replace('(', '-').replace(')', '')
-                                if value_text and value_text != '-' and value_text != '':
-                                    value = float(value_text)
-                                    context_ref = elem.get('contextRef', 'unknown')
-                                    
-                                    # For turnover, only consider positive values >= 10000 (to avoid note numbers like "3")
-                                    if field_name == 'turnover':
-                                        if value >= 10000:  # Minimum reasonable turnover
-                                            # If we have a target year, check if this value matches it
-                                            if target_year and context_periods:
-                                                ctx_year = context_periods.get(context_ref, '')
-                                                if ctx_year == target_year:
-                                                    all_values.append((value, context_ref, ctx_year))
-                                                    print(f"[IXBRL] Matched turnover £{value:,.0f} to year {ctx_year} (contextRef: {context_ref})")
-                                                else:
-                                                    print(f"[IXBRL] Skipping turnover £{value:,.0f} - year {ctx_year} doesn't match target {target_year}")
-                                            else:
-                                                # No target year specified, collect all valid values
-                                                ctx_year = context_periods.get(context_ref, 'unknown')
-                                                all_values.append((value, context_ref, ctx_year))
-                                        else:
-                                            print(f"[IXBRL] Skipping turnover value {value} (too small, likely a note number)")
-                                    else:
-                                        # For other fields, collect all values (or match to target year if specified)
-                                        if target_year and context_periods:
-                                            ctx_year = context_periods.get(context_ref, '')
-                                            if ctx_year == target_year or not ctx_year:
-                                                all_values.append((value, context_ref, ctx_year))
-                                        else:
-                                            all_values.append((value, context_ref, context_periods.get(context_ref, 'unknown')))
-                            except Exception as e:
-                                if field_name == 'turnover':
-                                    print(f"[IXBRL] Failed to parse {tag}: {e}, text: {elem.text if elem.text else 'empty'}")
-                                continue
-                        
-                        if all_values:
-                            if field_name == 'turnover':
-                                # For turnover with target year, prefer values matching the target year
-                                if target_year:
-                                    matching_values = [v for v in all_values if v[2] == target_year]
-                                    if matching_values:
-                                        # Take the largest value for the target year
-                                        matching_values.sort(key=lambda x: x[0], reverse=True)
-                                        value, context_ref, ctx_year = matching_values[0]
-                                        financial_data[field_name] = value
-                                        print(f"[IXBRL] Extracted {field_name} = £{value:,.0f} for year {ctx_year} using tag: {tag}, contextRef: {context_ref}")
-                                    elif len(all_values) > 0:
-                                        # Fallback: no exact match, take largest value
-                                        all_values.sort(key=lambda x: x[0], reverse=True)
-                                        value, context_ref, ctx_year = all_values[0]
-                                        financial_data[field_name] = value
-                                        print(f"[IXBRL] Extracted {field_name} = £{value:,.0f} (year {ctx_year}, no exact match for {target_year}) using tag: {tag}")
-                                else:
-                                    # No target year, take the largest value
-                                    all_values.sort(key=lambda x: x[0], reverse=True)
-                                    value, context_ref, ctx_year = all_values[0]
-                                    financial_data[field_name] = value
-                                    print(f"[IXBRL] Extracted {field_name} = £{value:,.0f} using tag: {tag}, contextRef: {context_ref} (from {len(all_values)} matches, took max)")
-                            else:
-                                # For other fields, take the first valid value (or match to target year if specified)
-                                if target_year:
-                                    matching_values = [v for v in all_values if v[2] == target_year]
-                                    if matching_values:
-                                        value, context_ref, ctx_year = matching_values[0]
-                                    else:
-                                        value, context_ref, ctx_year = all_values[0]
-                                else:
-                                    value, context_ref, ctx_year = all_values[0]
-                                financial_data[field_name] = value
-                        if field_name in financial_data:
-                            break
-            
-            # Extract employee count
-            employee_tag_variations = [
-                'e:AverageNumberEmployeesDuringPeriod',
-                'core:AverageNumberEmployeesDuringPeriod',
-                'e:NumberOfEmployees',
-                'core:NumberOfEmployees',
-                'e:Employees',
-                'core:Employees',
-                'bus:AverageNumberEmployees',
-                'd:AverageNumberEmployees'
-            ]
-            
-            for tag in employee_tag_variations:
-                elements = root.findall(f'.//ix:nonFraction[@name="{tag}"]', namespaces)
-                if elements:
-                    for elem in elements[:1]:
-                        try:
-                            value = int(float(elem.text))
-                            financial_data['employees'] = value
-                            break
-                        except:
-                            continue
-                    if 'employees' in financial_data:
-                        break
+            # Single streaming pass; CPU-bound, so off the event loop
+            facts = await asyncio.to_thread(parse_ixbrl_facts, content)
+            financial_data = extract_financial_data(facts, target_year=target_year)
             
             # Fallback: regex patterns if XBRL tags don't work (especially for turnover)
             if 'turnover' not in financial_data:
-                regex_data = self._extract_financial_data_regex(content, target_year=target_year)
+                # Scans the whole document, so also off the event loop
+                regex_data = await asyncio.to_thread(self._extract_financial_data_regex, content, target_year)
                 if 'turnover' in regex_data and 'turnover' not in financial_data:
                     financial_data['turnover'] = regex_data['turnover']
                     print(f"[IXBRL] Extracted turnover via regex: £{regex_data['turnover']:,.0f}")
@@ -710,6 +520,9 @@ class CompaniesHouseService:
                 if 'turnover' not in extracted_fields:
                     print(f"[IXBRL] WARNING: Turnover not found in document")
             
+            if transaction_id:
+                await self._cache.store_parsed_accounts(transaction_id, target_year, financial_data)
+            
             return financial_data
             
         except Exception as e:
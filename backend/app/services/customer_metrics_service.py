@@ -0,0 +1,283 @@
+#!/usr/bin/env python3
+"""
+Customer metrics rollup service
+
+PERFORMANCE: lifetime value, MRR and ticket totals are computed in SQL with
+one grouped aggregate per source table (quotes, support_contracts, tickets)
+instead of loading every row as an ORM object. The same statement serves
+two purposes:
+- customer_metrics_select() for a live single-customer answer
+  (ReportingService.get_customer_lifetime_value)
+- refresh_customer_metrics() upserts it into the customer_metrics table,
+  which customer lists and reports sort and filter on
+
+Incremental maintenance:
+- Any ORM flush that writes a Quote, SupportContract or Ticket field the
+  rollup depends on marks the customer (old and new customer on a move)
+- On commit the customers are added to a per-tenant pending set in Redis
+  and one debounced Celery task recomputes just those customers
+- refresh_customer_metrics(db, tenant_id) with no ids rebuilds a tenant;
+  Celery beat rebuilds every active tenant each CUSTOMER_METRICS_REBUILD_INTERVAL
+  to repair rows missed by failed refreshes or bulk SQL writes
+"""
+
+import logging
+from itertools import chain
+from typing import Dict, Iterable, List, Optional, Sequence, Set
+
+from sqlalchemy import event, func, inspect, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+from app.core.async_bridge import run_blocking_off_loop
+from app.core.caching import get_sync_redis
+from app.core.config import settings
+from app.models.crm import Customer
+from app.models.customer_metrics import CustomerMetrics
+from app.models.helpdesk import Ticket
+from app.models.quotes import Quote, QuoteStatus
+from app.models.support_contract import ContractStatus, SupportContract
+
+logger = logging.getLogger(__name__)
+
+# Fields each source model contributes to the rollup; other updates are ignored
+_METRIC_SOURCE_FIELDS = {
+    Quote: ("customer_id", "status", "total_amount", "is_deleted", "created_at"),
+    SupportContract: ("customer_id", "status", "monthly_value"),
+    Ticket: ("customer_id",),
+}
+
+# sort_by values for rollup-backed customer lists and reports
+CUSTOMER_METRIC_SORT_COLUMNS = {
+    "lifetime_value": CustomerMetrics.lifetime_value,
+    "mrr": CustomerMetrics.monthly_recurring_revenue,
+}
+
+# Session.info key collecting {tenant_id: {customer_id}} touched by a flush, applied on commit
+_PENDING_REFRESH = "customer_metrics_refresh"
+
+_METRIC_COLUMNS = (
+    "customer_id",
+    "tenant_id",
+    "lifetime_value",
+    "accepted_quote_count",
+    "first_accepted_at",
+    "last_accepted_at",
+    "monthly_recurring_revenue",
+    "active_contract_count",
+    "ticket_count",
+    "updated_at",
+)
+
+
+def _pending_key(tenant_id: str) -> str:
+    return f"customer_metrics:pending:{tenant_id}"
+
+
+def customer_metrics_select(tenant_id: str, customer_ids: Optional[Sequence[str]] = None):
+    """
+    Metrics for a tenant's customers (or only customer_ids) as one statement
+    
+    Columns are named like CustomerMetrics columns (see _METRIC_COLUMNS).
+    Customers with no quotes, contracts or tickets get zero totals.
+    """
+    def scoped(stmt, customer_column):
+        if customer_ids is not None:
+            stmt = stmt.where(customer_column.in_(list(customer_ids)))
+        return stmt.group_by(customer_column).subquery()
+    
+    quotes = scoped(
+        select(
+            Quote.customer_id.label("customer_id"),
+            func.sum(Quote.total_amount).label("lifetime_value"),
+            func.count().label("accepted_quote_count"),
+            func.min(Quote.created_at).label("first_accepted_at"),
+            func.max(Quote.created_at).label("last_accepted_at")
+        ).where(
+            Quote.tenant_id == tenant_id,
+            Quote.status == QuoteStatus.ACCEPTED,
+            Quote.is_deleted == False
+        ),
+        Quote.customer_id
+    )
+    
+    contracts = scoped(
+        select(
+            SupportContract.customer_id.label("customer_id"),
+            func.sum(SupportContract.monthly_value).label("monthly_recurring_revenue"),
+            func.count().label("active_contract_count")
+        ).where(
+            SupportContract.tenant_id == tenant_id,
+            SupportContract.status == ContractStatus.ACTIVE
+        ),
+        SupportContract.customer_id
+    )
+    
+    tickets = scoped(
+        select(
+            Ticket.customer_id.label("customer_id"),
+            func.count().label("ticket_count")
+        ).where(
+            Ticket.tenant_id == tenant_id
+        ),
+        Ticket.customer_id
+    )
+    
+    stmt = select(
+        Customer.id.label("customer_id"),
+        Customer.tenant_id.label("tenant_id"),
+        func.coalesce(quotes.c.lifetime_value, 0).label("lifetime_value"),
+        func.coalesce(quotes.c.accepted_quote_count, 0).label("accepted_quote_count"),
+        quotes.c.first_accepted_at,
+        quotes.c.last_accepted_at,
+        func.coalesce(contracts.c.monthly_recurring_revenue, 0).label("monthly_recurring_revenue"),
+        func.coalesce(contracts.c.active_contract_count, 0).label("active_contract_count"),
+        func.coalesce(tickets.c.ticket_count, 0).label("ticket_count"),
+        func.now().label("updated_at")
+    ).select_from(Customer).outerjoin(
+        quotes, quotes.c.customer_id == Customer.id
+    ).outerjoin(
+        contracts, contracts.c.customer_id == Customer.id
+    ).outerjoin(
+        tickets, tickets.c.customer_id == Customer.id
+    ).where(Customer.tenant_id == tenant_id)
+    
+    if customer_ids is not None:
+        stmt = stmt.where(Customer.id.in_(list(customer_ids)))
+    return stmt
+
+
+def customer_metrics_upsert(tenant_id: str, customer_ids: Optional[Sequence[str]] = None):
+    """INSERT ... SELECT ... ON CONFLICT (customer_id) DO UPDATE for customer_metrics_select()"""
+    stmt = pg_insert(CustomerMetrics).from_select(
+        list(_METRIC_COLUMNS),
+        customer_metrics_select(tenant_id, customer_ids)
+    )
+    return stmt.on_conflict_do_update(
+        index_elements=[CustomerMetrics.customer_id],
+        set_={column: stmt.excluded[column] for column in _METRIC_COLUMNS if column != "customer_id"}
+    )
+
+
+def refresh_customer_metrics(db: Session, tenant_id: str, customer_ids: Optional[Iterable[str]] = None) -> int:
+    """
+    Recompute customer_metrics rows and commit
+    
+    Args:
+        db: Sync database session
+        tenant_id: Tenant ID
+        customer_ids: Customers to recompute (None rebuilds every customer of the tenant)
+    
+    Returns:
+        Number of rows written
+    """
+    if customer_ids is None:
+        result = db.execute(customer_metrics_upsert(tenant_id))
+        db.commit()
+        return result.rowcount
+    
+    customer_ids = sorted(set(customer_ids))
+    batch_size = settings.CUSTOMER_METRICS_BATCH_SIZE
+    written = 0
+    for start in range(0, len(customer_ids), batch_size):
+        result = db.execute(customer_metrics_upsert(tenant_id, customer_ids[start:start + batch_size]))
+        written += result.rowcount
+    db.commit()
+    return written
+
+
+def schedule_customer_metrics_refresh(tenant_id: str, customer_ids: Iterable[str]):
+    """
+    Queue a background rollup refresh for customers of a tenant
+    
+    Debounced per tenant: customers changed within CUSTOMER_METRICS_REFRESH_DELAY
+    seconds are collected in a Redis set and recomputed by a single task.
+    Safe to call from async code and ORM hooks: the Redis and Celery calls
+    run in the loop's executor when an event loop is running.
+    """
+    customer_ids = [customer_id for customer_id in customer_ids if customer_id]
+    if customer_ids:
+        run_blocking_off_loop(_enqueue_customer_metrics_refresh, tenant_id, customer_ids)
+
+
+def _enqueue_customer_metrics_refresh(tenant_id: str, customer_ids: List[str]):
+    """Blocking part of schedule_customer_metrics_refresh (sync Redis SADD/SET NX + Celery send_task)"""
+    try:
+        redis_client = get_sync_redis()
+        pending_key = _pending_key(tenant_id)
+        redis_client.sadd(pending_key, *customer_ids)
+        if redis_client.set(f"{pending_key}:scheduled", "1", nx=True, ex=settings.CUSTOMER_METRICS_REFRESH_DELAY):
+            from app.core.celery_app import celery_app
+            celery_app.send_task(
+                "refresh_customer_metrics",
+                args=[tenant_id],
+                countdown=settings.CUSTOMER_METRICS_REFRESH_DELAY
+            )
+    except Exception as e:
+        # Rows stay stale until the next change or the periodic tenant rebuild
+        logger.warning(f"Could not schedule customer metrics refresh for tenant {tenant_id}: {e}")
+
+
+def pop_pending_customer_ids(tenant_id: str) -> List[str]:
+    """Take every queued customer id for a tenant (ids queued afterwards schedule a new task)"""
+    redis_client = get_sync_redis()
+    pending_key = _pending_key(tenant_id)
+    redis_client.delete(f"{pending_key}:scheduled")
+    customer_ids = []
+    while True:
+        batch = redis_client.spop(pending_key, settings.CUSTOMER_METRICS_BATCH_SIZE)
+        if not batch:
+            return customer_ids
+        customer_ids.extend(batch)
+
+
+def restore_pending_customer_ids(tenant_id: str, customer_ids: Sequence[str]):
+    """Put popped customer ids back after a failed refresh (picked up by the next refresh of the tenant)"""
+    if not customer_ids:
+        return
+    try:
+        get_sync_redis().sadd(_pending_key(tenant_id), *customer_ids)
+    except Exception as e:
+        # The periodic tenant rebuild still recomputes them
+        logger.warning(f"Could not restore {len(customer_ids)} pending customer metrics for tenant {tenant_id}: {e}")
+
+
+def _changed_customer_ids(instance, fields, is_dirty: bool) -> Set[str]:
+    """Current customer of a source row plus the previous one if it moved"""
+    customer_ids = {instance.customer_id}
+    if is_dirty:
+        attrs = inspect(instance).attrs
+        if not any(attrs[field].history.has_changes() for field in fields):
+            return set()
+        customer_ids.update(attrs.customer_id.history.deleted)
+    customer_ids.discard(None)
+    return customer_ids
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_customer_metric_changes(session, flush_context):
+    """Remember which customers had rollup source rows written in this transaction"""
+    pending: Optional[Dict[str, Set[str]]] = None
+    dirty = session.dirty
+    for instance in chain(session.new, dirty, session.deleted):
+        fields = _METRIC_SOURCE_FIELDS.get(type(instance))
+        if fields is None or not instance.tenant_id:
+            continue
+        customer_ids = _changed_customer_ids(instance, fields, instance in dirty)
+        if customer_ids:
+            if pending is None:
+                pending = session.info.setdefault(_PENDING_REFRESH, {})
+            pending.setdefault(instance.tenant_id, set()).update(customer_ids)
+
+
+@event.listens_for(Session, "after_commit")
+def _refresh_committed_customer_metrics(session):
+    pending = session.info.pop(_PENDING_REFRESH, None)
+    if pending:
+        for tenant_id, customer_ids in pending.items():
+            schedule_customer_metrics_refresh(tenant_id, customer_ids)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_customer_metric_changes(session):
+    session.info.pop(_PENDING_REFRESH, None)
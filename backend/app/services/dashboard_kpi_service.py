@@ -0,0 +1,432 @@
+#!/usr/bin/env python3
+"""
+Dashboard KPI Service
+
+Builds the per-tenant KPI snapshot behind GET /api/v1/dashboard/.
+
+PERFORMANCE: Each table is read once with conditional aggregates
+(COUNT/SUM ... FILTER (WHERE ...)) instead of one round trip per status,
+stage and month. The snapshot is kept in the two-tier cache and refreshed
+in the background (Celery) shortly after any committed change to the
+underlying rows, so dashboard requests normally do no aggregate queries.
+"""
+
+import calendar
+import logging
+from datetime import datetime, timedelta
+from itertools import chain
+from typing import Any, Dict, List, Tuple
+
+from sqlalchemy import select, func, and_, or_, cast, String, event
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.core.async_bridge import run_blocking_off_loop
+from app.core.caching import CACHE_PREFIX_TENANT, get_cache, set_cache, get_sync_redis
+from app.core.config import settings
+from app.models.crm import Customer, CustomerStatus
+from app.models.leads import Lead
+from app.models.quotes import Quote
+from app.models.opportunities import Opportunity, OpportunityStage
+from app.models.helpdesk import Ticket
+from app.models.sla_compliance import SLAComplianceRecord, SLABreachAlert
+
+logger = logging.getLogger(__name__)
+
+# Opportunity pipeline stages shown on the dashboard, in order
+PIPELINE_STAGES = [
+    (OpportunityStage.QUALIFIED, "Qualified"),
+    (OpportunityStage.SCOPING, "Scoping"),
+    (OpportunityStage.PROPOSAL_SENT, "Proposal Sent"),
+    (OpportunityStage.NEGOTIATION, "Negotiation"),
+    (OpportunityStage.VERBAL_YES, "Verbal Yes"),
+    (OpportunityStage.CLOSED_WON, "Closed Won"),
+]
+
+# Changes to these models make the tenant's snapshot stale
+_KPI_SOURCE_MODELS = (Customer, Lead, Quote, Opportunity, Ticket, SLABreachAlert, SLAComplianceRecord)
+
+# Session.info key collecting tenants touched by a flush, applied on commit
+_PENDING_REFRESH = "dashboard_kpi_refresh_tenants"
+
+
+def dashboard_kpi_cache_key(tenant_id: str) -> str:
+    return f"{CACHE_PREFIX_TENANT}{tenant_id}:dashboard_kpis"
+
+
+def _month_windows(now: datetime) -> List[Tuple[str, datetime, datetime]]:
+    """(label, start, end) for the last 6 months, oldest first"""
+    windows = []
+    for i in range(5, -1, -1):
+        month_date = now - timedelta(days=30 * i)
+        month_start = month_date.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+        month_end = (month_start + timedelta(days=32)).replace(day=1) - timedelta(seconds=1)
+        windows.append((calendar.month_abbr[month_start.month], month_start, month_end))
+    return windows
+
+
+class DashboardKPIService:
+    """
+    Service for computing and caching the tenant dashboard KPI snapshot
+    
+    Features:
+    - Single-pass aggregate queries per table
+    - Cached snapshot (L1 + Redis) served to every dashboard request
+    - Debounced background refresh after writes
+    """
+    
+    def __init__(self, db: AsyncSession, tenant_id: str):
+        self.db = db
+        self.tenant_id = tenant_id
+    
+    async def get_snapshot(self) -> Dict[str, Any]:
+        """
+        Get the KPI snapshot, computing it only when nothing is cached
+        
+        Returns:
+            Snapshot dictionary (JSON-serializable)
+        """
+        snapshot = await get_cache(dashboard_kpi_cache_key(self.tenant_id))
+        if snapshot is None:
+            snapshot = await self.refresh_snapshot()
+        return snapshot
+    
+    async def refresh_snapshot(self) -> Dict[str, Any]:
+        """Recompute the snapshot and store it in the cache"""
+        snapshot = await self.compute_snapshot()
+        await set_cache(
+            dashboard_kpi_cache_key(self.tenant_id),
+            snapshot,
+            ttl=settings.DASHBOARD_KPI_CACHE_TTL
+        )
+        return snapshot
+    
+    async def compute_snapshot(self) -> Dict[str, Any]:
+        """
+        Compute all dashboard KPIs
+        
+        Queries run sequentially on the one session (asyncpg connections
+        don't allow concurrent statements).
+        
+        Returns:
+            Snapshot dictionary (JSON-serializable)
+        """
+        windows = _month_windows(datetime.utcnow())
+        
+        customers = await self._customer_metrics(windows)
+        leads = await self._lead_metrics(windows)
+        quotes = await self._quote_metrics(windows)
+        opportunities = await self._opportunity_metrics()
+        sla = await self._sla_metrics()
+        
+        monthly_trends = [
+            {
+                "month": label,
+                "new_leads": leads["monthly"][idx],
+                "converted": customers["monthly_converted"][idx],
+                "revenue": quotes["monthly_revenue"][idx]
+            }
+            for idx, (label, _, _) in enumerate(windows)
+        ]
+        
+        return {
+            "computed_at": datetime.utcnow().isoformat(),
+            "total_discovery": leads["total"],
+            "customer_status_counts": customers["status_counts"],
+            "high_score_leads": customers["high_score_leads"],
+            "total_quotes": quotes["total"],
+            "quotes_pending": quotes["pending"],
+            "quotes_accepted": quotes["accepted"],
+            "total_revenue": quotes["revenue"],
+            **opportunities,
+            **sla,
+            "monthly_trends": monthly_trends,
+            "recent_customers": await self._recent_customers(),
+            "top_leads": await self._top_leads()
+        }
+    
+    async def _customer_metrics(self, windows) -> Dict[str, Any]:
+        """Customer counts per status and monthly conversions in one statement"""
+        tracked_statuses = [
+            CustomerStatus.LEAD,
+            CustomerStatus.PROSPECT,
+            CustomerStatus.OPPORTUNITY,
+            CustomerStatus.CUSTOMER,
+            CustomerStatus.COLD_LEAD,
+            CustomerStatus.INACTIVE,
+            CustomerStatus.LOST,
+        ]
+        open_statuses = [CustomerStatus.LEAD, CustomerStatus.PROSPECT, CustomerStatus.OPPORTUNITY]
+        
+        columns = [func.count(Customer.id).filter(Customer.status == s) for s in tracked_statuses]
+        columns.append(func.count(Customer.id).filter(and_(
+            Customer.status.in_(open_statuses),
+            Customer.lead_score >= 70
+        )))
+        columns.extend(
+            func.count(Customer.id).filter(and_(
+                Customer.status == CustomerStatus.CUSTOMER,
+                Customer.created_at >= start,
+                Customer.created_at <= end
+            ))
+            for _, start, end in windows
+        )
+        
+        row = (await self.db.execute(
+            select(*columns).where(
+                and_(
+                    Customer.tenant_id == self.tenant_id,
+                    Customer.is_deleted == False
+                )
+            )
+        )).one()
+        
+        status_count = len(tracked_statuses)
+        return {
+            "status_counts": {s.name: row[idx] or 0 for idx, s in enumerate(tracked_statuses)},
+            "high_score_leads": row[status_count] or 0,
+            "monthly_converted": [value or 0 for value in row[status_count + 1:]]
+        }
+    
+    async def _lead_metrics(self, windows) -> Dict[str, Any]:
+        """Discovery total and new leads per month in one statement"""
+        columns = [func.count(Lead.id)]
+        columns.extend(
+            func.count(Lead.id).filter(and_(Lead.created_at >= start, Lead.created_at <= end))
+            for _, start, end in windows
+        )
+        
+        row = (await self.db.execute(
+            select(*columns).where(
+                and_(
+                    Lead.tenant_id == self.tenant_id,
+                    Lead.is_deleted == False
+                )
+            )
+        )).one()
+        
+        return {
+            "total": row[0] or 0,
+            "monthly": [value or 0 for value in row[1:]]
+        }
+    
+    async def _quote_metrics(self, windows) -> Dict[str, Any]:
+        """Quote totals, acceptance revenue and monthly revenue in one statement"""
+        # Uppercase string literals match the database enum values
+        accepted = Quote.status == "ACCEPTED"
+        columns = [
+            func.count(Quote.id),
+            func.count(Quote.id).filter(or_(Quote.status == "DRAFT", Quote.status == "SENT")),
+            func.count(Quote.id).filter(accepted),
+            func.sum(Quote.total_amount).filter(accepted),
+        ]
+        columns.extend(
+            func.sum(Quote.total_amount).filter(and_(
+                accepted,
+                Quote.created_at >= start,
+                Quote.created_at <= end
+            ))
+            for _, start, end in windows
+        )
+        
+        row = (await self.db.execute(
+            select(*columns).where(
+                and_(
+                    Quote.tenant_id == self.tenant_id,
+                    Quote.is_deleted == False
+                )
+            )
+        )).one()
+        
+        return {
+            "total": row[0] or 0,
+            "pending": row[1] or 0,
+            "accepted": row[2] or 0,
+            "revenue": float(row[3] or 0),
+            "monthly_revenue": [float(value or 0) for value in row[4:]]
+        }
+    
+    async def _opportunity_metrics(self) -> Dict[str, Any]:
+        """Opportunity counts and per-stage pipeline values in one statement"""
+        # String stage values avoid SQLAlchemy enum serialization issues
+        columns = [
+            func.count(Opportunity.id).filter(~Opportunity.stage.in_(["closed_won", "closed_lost"])),
+            func.count(Opportunity.id).filter(Opportunity.stage == "qualified"),
+            func.count(Opportunity.id).filter(Opportunity.stage == "proposal_sent"),
+            func.count(Opportunity.id).filter(Opportunity.stage == "closed_won"),
+            func.sum(Opportunity.estimated_value),
+        ]
+        for stage, _ in PIPELINE_STAGES:
+            columns.append(func.count(Opportunity.id).filter(Opportunity.stage == stage.value))
+            columns.append(func.sum(Opportunity.estimated_value).filter(Opportunity.stage == stage.value))
+        
+        row = (await self.db.execute(
+            select(*columns).where(
+                and_(
+                    Opportunity.tenant_id == self.tenant_id,
+                    Opportunity.is_deleted == False
+                )
+            )
+        )).one()
+        
+        pipeline_stages = []
+        for idx, (_, label) in enumerate(PIPELINE_STAGES):
+            pipeline_stages.append({
+                "stage": label,
+                "count": row[5 + idx * 2] or 0,
+                "total_value": float(row[6 + idx * 2] or 0)
+            })
+        
+        return {
+            "active_opportunities": row[0] or 0,
+            "opportunities_qualified": row[1] or 0,
+            "opportunities_proposal_sent": row[2] or 0,
+            "opportunities_closed_won": row[3] or 0,
+            "opportunities_total_value": float(row[4] or 0),
+            "pipeline_stages": pipeline_stages
+        }
+    
+    async def _sla_metrics(self) -> Dict[str, Any]:
+        """Open SLA tickets, unacknowledged breaches and 30-day compliance rate"""
+        # Ticket status is compared as text since the database uses VARCHAR, not enum
+        sla_total_tickets = (await self.db.execute(
+            select(func.count(Ticket.id)).where(
+                and_(
+                    Ticket.tenant_id == self.tenant_id,
+                    Ticket.sla_policy_id.isnot(None),
+                    cast(Ticket.status, String).notin_(['closed', 'resolved'])
+                )
+            )
+        )).scalar() or 0
+        
+        sla_active_breaches = (await self.db.execute(
+            select(func.count(SLABreachAlert.id)).where(
+                and_(
+                    SLABreachAlert.tenant_id == self.tenant_id,
+                    SLABreachAlert.acknowledged == False
+                )
+            )
+        )).scalar() or 0
+        
+        # A record is compliant when neither its response nor resolution target was breached
+        compliance_row = (await self.db.execute(
+            select(
+                func.count(SLAComplianceRecord.id),
+                func.count(SLAComplianceRecord.id).filter(and_(
+                    SLAComplianceRecord.first_response_breached == False,
+                    SLAComplianceRecord.resolution_breached == False
+                ))
+            ).where(
+                and_(
+                    SLAComplianceRecord.tenant_id == self.tenant_id,
+                    SLAComplianceRecord.created_at >= datetime.now() - timedelta(days=30)
+                )
+            )
+        )).one()
+        total_records, compliant_records = compliance_row[0] or 0, compliance_row[1] or 0
+        
+        return {
+            "sla_total_tickets": sla_total_tickets,
+            # Simplified - every open ticket with a policy counts as at risk
+            "sla_tickets_at_risk": sla_total_tickets,
+            "sla_active_breaches": sla_active_breaches,
+            "sla_compliance_rate": round(compliant_records / total_records * 100, 1) if total_records else 0.0
+        }
+    
+    async def _recent_customers(self) -> List[Dict[str, Any]]:
+        result = await self.db.execute(
+            select(Customer.id, Customer.status, Customer.company_name, Customer.created_at).where(
+                and_(
+                    Customer.tenant_id == self.tenant_id,
+                    Customer.is_deleted == False
+                )
+            ).order_by(Customer.created_at.desc()).limit(5)
+        )
+        return [
+            {
+                "id": str(row.id),
+                "status": row.status.value,
+                "company_name": row.company_name,
+                "created_at": row.created_at.isoformat()
+            }
+            for row in result.all()
+        ]
+    
+    async def _top_leads(self) -> List[Dict[str, Any]]:
+        result = await self.db.execute(
+            select(Customer.id, Customer.company_name, Customer.status, Customer.lead_score, Customer.created_at).where(
+                and_(
+                    Customer.tenant_id == self.tenant_id,
+                    Customer.is_deleted == False,
+                    Customer.status.in_([CustomerStatus.LEAD, CustomerStatus.PROSPECT, CustomerStatus.OPPORTUNITY])
+                )
+            ).order_by(Customer.lead_score.desc()).limit(10)
+        )
+        return [
+            {
+                "id": str(row.id),
+                "company_name": row.company_name,
+                "status": row.status.value,
+                "lead_score": row.lead_score or 0,
+                "created_at": row.created_at.isoformat() if row.created_at else None
+            }
+            for row in result.all()
+        ]
+
+
+def schedule_dashboard_kpi_refresh(*tenant_ids: str):
+    """
+    Queue a background snapshot refresh for each tenant
+    
+    Debounced per tenant: a burst of writes within DASHBOARD_KPI_REFRESH_DELAY
+    seconds queues a single refresh that runs after the burst.
+    
+    Safe to call from async code and ORM hooks: the Redis and Celery calls
+    run in the loop's executor when an event loop is running.
+    """
+    if tenant_ids:
+        run_blocking_off_loop(_enqueue_dashboard_kpi_refresh, tenant_ids)
+
+
+def _enqueue_dashboard_kpi_refresh(tenant_ids: Tuple[str, ...]):
+    """Blocking part of schedule_dashboard_kpi_refresh (sync Redis SET NX + Celery send_task)"""
+    try:
+        redis_client = get_sync_redis()
+        from app.core.celery_app import celery_app
+        for tenant_id in tenant_ids:
+            pending_key = f"{dashboard_kpi_cache_key(tenant_id)}:refresh_pending"
+            if redis_client.set(pending_key, "1", nx=True, ex=settings.DASHBOARD_KPI_REFRESH_DELAY):
+                celery_app.send_task(
+                    "refresh_dashboard_kpis",
+                    args=[tenant_id],
+                    countdown=settings.DASHBOARD_KPI_REFRESH_DELAY
+                )
+    except Exception as e:
+        # Snapshot still expires after DASHBOARD_KPI_CACHE_TTL
+        logger.warning(f"Could not schedule dashboard KPI refresh for {tenant_ids}: {e}")
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_kpi_changes(session, flush_context):
+    """Remember which tenants had KPI source rows written in this transaction"""
+    tenants = None
+    for instance in chain(session.new, session.dirty, session.deleted):
+        if not isinstance(instance, _KPI_SOURCE_MODELS):
+            continue
+        tenant_id = getattr(instance, "tenant_id", None)
+        if tenant_id:
+            if tenants is None:
+                tenants = session.info.setdefault(_PENDING_REFRESH, set())
+            tenants.add(tenant_id)
+
+
+@event.listens_for(Session, "after_commit")
+def _refresh_committed_kpis(session):
+    tenants = session.info.pop(_PENDING_REFRESH, None)
+    if tenants:
+        schedule_dashboard_kpi_refresh(*tenants)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_kpi_changes(session):
+    session.info.pop(_PENDING_REFRESH, None)
@@ -26,6 +26,9 @@ from app.models.tenant import Tenant
 class DocumentGeneratorService:
     """Service for generating quote documents (Word and PDF)"""
     
+    # Bump when the document layout changes so cached renders are regenerated
+    TEMPLATE_VERSION = "1"
+    
     def __init__(self, db: Session, tenant_id: str):
         self.db = db
         self.tenant_id = tenant_id
@@ -10,7 +10,7 @@ COMPLIANCE: Handles GDPR-related operations including:
 
 import json
 import logging
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, Iterator, Optional, Tuple
 from datetime import datetime, timezone, timedelta
 from sqlalchemy.orm import Session
 from sqlalchemy import select, and_
@@ -23,11 +23,53 @@ from app.models.sales import SalesActivity
 from app.models.leads import Lead
 from app.models.gdpr import DataCollectionRecord, PrivacyPolicy, SubjectAccessRequest, SARStatus
 from app.core.config import settings
+from app.services.name_redaction_service import NameRedactor, get_name_redactor
 from app.services.sar_document_generator import SARDocumentGenerator
 from app.services.storage_service import get_storage_service
 
 logger = logging.getLogger(__name__)
 
+# Per-record sections of a SAR report, in the order records are produced
+SAR_DATA_SECTIONS = ("communications", "contracts_and_accounts", "technical_data")
+# Records per section kept in memory for the PDF summary of a streamed export
+SAR_SUMMARY_SAMPLE_SIZE = 5
+
+
+def iter_sar_json(report: Dict[str, Any], records: Iterator[Tuple[str, Dict[str, Any]]]) -> Iterator[bytes]:
+    """
+    Serialize a SAR report as JSON, streaming records into its data sections
+    
+    Args:
+        report: SAR report; report["data"] keys name the sections (their contents are ignored)
+        records: (section, record) pairs in section order
+        
+    Yields:
+        UTF-8 encoded JSON fragments
+    """
+    yield b"{"
+    for index, (key, value) in enumerate(report.items()):
+        separator = ", " if index else ""
+        if key != "data":
+            yield f"{separator}{json.dumps(key)}: {json.dumps(value)}".encode("utf-8")
+            continue
+        
+        sections = list(value)
+        yield f'{separator}"data": {{'.encode("utf-8")
+        position = -1
+        first_record = True
+        for section, record in records:
+            while position < sections.index(section):
+                position += 1
+                first_record = True
+                yield f"{'], ' if position else ''}{json.dumps(sections[position])}: [".encode("utf-8")
+            yield f"{'' if first_record else ', '}{json.dumps(record)}".encode("utf-8")
+            first_record = False
+        while position < len(sections) - 1:
+            position += 1
+            yield f"{'], ' if position else ''}{json.dumps(sections[position])}: [".encode("utf-8")
+        yield b"]}" if sections else b"}"
+    yield b"}"
+
 
 class GDPRService:
     """Service for GDPR compliance operations"""
@@ -196,42 +238,19 @@ class GDPRService:
         
         return analysis
     
-    def _redact_other_people_names(self, text: str, subject_name: str, all_contact_names: List[str]) -> str:
+    def _redact_other_people_names(self, text: str, subject_name: str, redactor: NameRedactor) -> str:
         """
         Redact names of other people from text, keeping only the subject's name
         
         Args:
             text: Text to redact
             subject_name: Full name of the subject (e.g., "John Smith")
-            all_contact_names: List of all contact names in the system to redact
+            redactor: Compiled matcher for the tenant's contact and user names
             
         Returns:
             Text with other people's names redacted as [REDACTED]
         """
-        if not text:
-            return text
-        
-        # Create a set of names to redact (excluding the subject)
-        names_to_redact = set()
-        for name in all_contact_names:
-            if name.lower() != subject_name.lower():
-                # Add full name and individual parts
-                parts = name.split()
-                for part in parts:
-                    if len(part) > 2:  # Only redact names longer than 2 characters
-                        names_to_redact.add(part)
-                names_to_redact.add(name)
-        
-        # Redact names (case-insensitive)
-        redacted_text = text
-        for name in sorted(names_to_redact, key=len, reverse=True):  # Sort by length to redact longer names first
-            if len(name) > 2:
-                # Redact full name
-                import re
-                pattern = re.compile(re.escape(name), re.IGNORECASE)
-                redacted_text = pattern.sub("[REDACTED]", redacted_text)
-        
-        return redacted_text
+        return redactor.redact(text, subject_name)
     
     def generate_sar_export_for_person(
         self,
@@ -242,6 +261,9 @@ class GDPRService:
         """
         Generate GDPR-compliant SAR export for a specific person (contact or user)
         
+        Holds every record in memory; use generate_and_store_sar_export for
+        subjects with a long history.
+        
         Args:
             tenant_id: Tenant ID
             contact_id: Contact ID (for customer contacts)
@@ -250,19 +272,25 @@ class GDPRService:
         Returns:
             GDPR-compliant SAR report as dictionary
         """
-        from app.models.crm import Contact, Customer
-        from app.models.helpdesk import Ticket, TicketComment
-        from app.models.quotes import Quote
-        from app.models.sales import SalesActivity
-        
-        # Get all contact names for redaction (contacts are linked through customers)
-        all_customers = self.db.query(Customer).filter(Customer.tenant_id == tenant_id).all()
-        customer_ids = [c.id for c in all_customers]
-        all_contacts = self.db.query(Contact).filter(Contact.customer_id.in_(customer_ids)).all() if customer_ids else []
-        all_contact_names = [f"{c.first_name} {c.last_name}" for c in all_contacts]
-        all_users = self.db.query(User).filter(User.tenant_id == tenant_id).all()
-        all_user_names = [f"{u.first_name} {u.last_name}" for u in all_users if u.first_name and u.last_name]
-        all_people_names = all_contact_names + all_user_names
+        report, records = self._build_sar_report(tenant_id, contact_id, user_id)
+        for section, record in records:
+            report["data"][section].append(record)
+        return report
+    
+    def _build_sar_report(
+        self,
+        tenant_id: str,
+        contact_id: Optional[str] = None,
+        user_id: Optional[str] = None
+    ) -> Tuple[Dict[str, Any], Iterator[Tuple[str, Dict[str, Any]]]]:
+        """
+        Build the SAR report without its per-record data
+        
+        Returns:
+            (report with empty data sections, lazy (section, record) iterator)
+        """
+        # Matcher for all contact and user names (compiled once per tenant, cached)
+        redactor = get_name_redactor(self.db, tenant_id)
         
         # Identify the subject
         subject_name = None
@@ -334,152 +362,9 @@ class GDPRService:
             "company_address": company_name
         }
         
-        # 2. Communications (only AI-cleaned versions, redacted)
-        communications = []
-        
-        # Get tickets where this person is mentioned or is the contact
-        if contact_id and contact and customer:
-                tickets = self.db.query(Ticket).filter(
-                    and_(
-                        Ticket.tenant_id == tenant_id,
-                        Ticket.customer_id == customer.id
-                    )
-                ).all()
-                
-                for ticket in tickets:
-                    # Only include cleaned_description (AI-cleaned), not original or internal notes
-                    if ticket.cleaned_description:
-                        redacted_desc = self._redact_other_people_names(
-                            ticket.cleaned_description,
-                            subject_name,
-                            all_people_names
-                        )
-                        communications.append({
-                            "type": "Support Ticket",
-                            "ticket_number": ticket.ticket_number,
-                            "subject": ticket.subject,
-                            "description": redacted_desc,  # Only AI-cleaned version
-                            "status": ticket.status.value if ticket.status else None,
-                            "created_at": ticket.created_at.isoformat() if ticket.created_at else None
-                        })
-                    
-                    # Get ticket comments (only non-internal, AI-cleaned if available)
-                    comments = self.db.query(TicketComment).filter(
-                        and_(
-                            TicketComment.ticket_id == ticket.id,
-                            TicketComment.is_internal == False  # Exclude internal notes
-                        )
-                    ).all()
-                    
-                    for comment in comments:
-                        # Prefer AI-cleaned version if available, otherwise use content
-                        content = comment.content
-                        if hasattr(comment, 'cleaned_content') and comment.cleaned_content:
-                            content = comment.cleaned_content
-                        
-                        redacted_content = self._redact_other_people_names(
-                            content,
-                            subject_name,
-                            all_people_names
-                        )
-                        communications.append({
-                            "type": "Ticket Comment",
-                            "ticket_number": ticket.ticket_number,
-                            "content": redacted_content,
-                            "created_at": comment.created_at.isoformat() if comment.created_at else None
-                        })
-        
-        # Get sales activities (only AI-cleaned notes, redacted)
-        if contact_id:
-            activities = self.db.query(SalesActivity).filter(
-                and_(
-                    SalesActivity.tenant_id == tenant_id,
-                    SalesActivity.contact_id == contact_id
-                )
-            ).all()
-        elif user_id:
-            activities = self.db.query(SalesActivity).filter(
-                and_(
-                    SalesActivity.tenant_id == tenant_id,
-                    SalesActivity.user_id == user_id
-                )
-            ).all()
-        else:
-            activities = []
-        
-        for activity in activities:
-            # Only include notes_cleaned (AI-cleaned version), not original notes
-            if activity.notes_cleaned:
-                redacted_notes = self._redact_other_people_names(
-                    activity.notes_cleaned,
-                    subject_name,
-                    all_people_names
-                )
-                communications.append({
-                    "type": activity.activity_type.value.title() if activity.activity_type else "Activity",
-                    "subject": activity.subject,
-                    "notes": redacted_notes,  # Only AI-cleaned version
-                    "date": activity.activity_date.isoformat() if activity.activity_date else None,
-                    "duration_minutes": activity.duration_minutes
-                })
-        
-        report["data"]["communications"] = communications
-        
-        # 3. Contract and Account Data
-        contract_data = []
-        
-        if contact_id:
-            customer = self.db.query(Customer).filter(Customer.id == contact.customer_id).first()
-            if customer:
-                quotes = self.db.query(Quote).filter(
-                    and_(
-                        Quote.tenant_id == tenant_id,
-                        Quote.customer_id == customer.id
-                    )
-                ).all()
-                
-                for quote in quotes:
-                    contract_data.append({
-                        "type": "Quote",
-                        "quote_number": quote.quote_number,
-                        "status": quote.status.value if quote.status else None,
-                        "total_amount": float(quote.total_amount) if quote.total_amount else None,
-                        "created_at": quote.created_at.isoformat() if quote.created_at else None
-                    })
-        elif user_id:
-            quotes = self.db.query(Quote).filter(
-                and_(
-                    Quote.tenant_id == tenant_id,
-                    Quote.created_by == user_id
-                )
-            ).all()
-            
-            for quote in quotes:
-                contract_data.append({
-                    "type": "Quote",
-                    "quote_number": quote.quote_number,
-                    "status": quote.status.value if quote.status else None,
-                    "total_amount": float(quote.total_amount) if quote.total_amount else None,
-                    "created_at": quote.created_at.isoformat() if quote.created_at else None
-                })
-        
-        report["data"]["contracts_and_accounts"] = contract_data
-        
-        # 4. Technical or System Data
-        technical_data = []
-        
-        if user_id:
-            user = self.db.query(User).filter(User.id == user_id).first()
-            if user:
-                technical_data.append({
-                    "type": "User Account",
-                    "username": user.username,
-                    "is_active": user.is_active,
-                    "created_at": user.created_at.isoformat() if user.created_at else None,
-                    "last_login": user.updated_at.isoformat() if user.updated_at else None
-                })
-        
-        report["data"]["technical_data"] = technical_data
+        # 2-4. Communications, contract/account data and technical data are
+        # streamed from the database by _iter_sar_records
+        report["data"] = {section: [] for section in SAR_DATA_SECTIONS}
         
         # 5. Source of Personal Data
         report["source_of_data"] = [
@@ -543,14 +428,162 @@ class GDPRService:
         report["user_id"] = user_id if user_id else None
         report["tenant_id"] = tenant_id
         
-        return report
+        records = self._iter_sar_records(
+            tenant_id,
+            subject_name,
+            redactor,
+            customer_id=customer.id if customer else None,
+            contact_id=contact_id,
+            user_id=user_id
+        )
+        return report, records
+    
+    def _iter_sar_records(
+        self,
+        tenant_id: str,
+        subject_name: str,
+        redactor: NameRedactor,
+        customer_id: Optional[str] = None,
+        contact_id: Optional[str] = None,
+        user_id: Optional[str] = None
+    ) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        """
+        Yield (section, record) pairs in SAR_DATA_SECTIONS order
+        
+        Rows are read with server-side cursors (yield_per) in batches of
+        SAR_EXPORT_BATCH_SIZE, so memory does not grow with the subject's history.
+        """
+        batch_size = settings.SAR_EXPORT_BATCH_SIZE
+        
+        # 2. Communications (only AI-cleaned versions, redacted)
+        # Tickets of the contact's customer, each followed by its non-internal comments
+        if contact_id and customer_id:
+            tickets = self.db.execute(
+                select(
+                    Ticket.id,
+                    Ticket.ticket_number,
+                    Ticket.subject,
+                    Ticket.cleaned_description,
+                    Ticket.status,
+                    Ticket.created_at
+                ).where(
+                    Ticket.tenant_id == tenant_id,
+                    Ticket.customer_id == customer_id
+                ).order_by(Ticket.created_at, Ticket.id).execution_options(yield_per=batch_size)
+            )
+            for batch in tickets.partitions():
+                # One comment query per batch of tickets
+                comments: Dict[str, list] = {}
+                comment_rows = self.db.execute(
+                    select(TicketComment.ticket_id, TicketComment.comment, TicketComment.created_at).where(
+                        TicketComment.ticket_id.in_([ticket.id for ticket in batch]),
+                        TicketComment.is_internal == False  # Exclude internal notes
+                    ).order_by(TicketComment.created_at)
+                )
+                for comment in comment_rows:
+                    comments.setdefault(comment.ticket_id, []).append(comment)
+                
+                for ticket in batch:
+                    # Only include cleaned_description (AI-cleaned), not original or internal notes
+                    if ticket.cleaned_description:
+                        yield "communications", {
+                            "type": "Support Ticket",
+                            "ticket_number": ticket.ticket_number,
+                            "subject": ticket.subject,
+                            "description": self._redact_other_people_names(
+                                ticket.cleaned_description,
+                                subject_name,
+                                redactor
+                            ),  # Only AI-cleaned version
+                            "status": ticket.status.value if ticket.status else None,
+                            "created_at": ticket.created_at.isoformat() if ticket.created_at else None
+                        }
+                    
+                    for comment in comments.pop(ticket.id, ()):
+                        yield "communications", {
+                            "type": "Ticket Comment",
+                            "ticket_number": ticket.ticket_number,
+                            "content": self._redact_other_people_names(comment.comment, subject_name, redactor),
+                            "created_at": comment.created_at.isoformat() if comment.created_at else None
+                        }
+        
+        # Sales activities (only AI-cleaned notes, redacted)
+        if contact_id or user_id:
+            activities = self.db.execute(
+                select(
+                    SalesActivity.activity_type,
+                    SalesActivity.subject,
+                    SalesActivity.notes_cleaned,
+                    SalesActivity.activity_date,
+                    SalesActivity.duration_minutes
+                ).where(
+                    SalesActivity.tenant_id == tenant_id,
+                    SalesActivity.contact_id == contact_id if contact_id else SalesActivity.user_id == user_id,
+                    SalesActivity.notes_cleaned.isnot(None)
+                ).order_by(SalesActivity.activity_date).execution_options(yield_per=batch_size)
+            )
+            for activity in activities:
+                # Only include notes_cleaned (AI-cleaned version), not original notes
+                if activity.notes_cleaned:
+                    yield "communications", {
+                        "type": activity.activity_type.value.title() if activity.activity_type else "Activity",
+                        "subject": activity.subject,
+                        "notes": self._redact_other_people_names(
+                            activity.notes_cleaned,
+                            subject_name,
+                            redactor
+                        ),  # Only AI-cleaned version
+                        "date": activity.activity_date.isoformat() if activity.activity_date else None,
+                        "duration_minutes": activity.duration_minutes
+                    }
+        
+        # 3. Contract and Account Data
+        quote_filter = None
+        if contact_id and customer_id:
+            quote_filter = Quote.customer_id == customer_id
+        elif user_id:
+            quote_filter = Quote.created_by == user_id
+        
+        if quote_filter is not None:
+            quotes = self.db.execute(
+                select(
+                    Quote.quote_number,
+                    Quote.status,
+                    Quote.total_amount,
+                    Quote.created_at
+                ).where(
+                    Quote.tenant_id == tenant_id,
+                    quote_filter
+                ).order_by(Quote.created_at).execution_options(yield_per=batch_size)
+            )
+            for quote in quotes:
+                yield "contracts_and_accounts", {
+                    "type": "Quote",
+                    "quote_number": quote.quote_number,
+                    "status": quote.status.value if quote.status else None,
+                    "total_amount": float(quote.total_amount) if quote.total_amount else None,
+                    "created_at": quote.created_at.isoformat() if quote.created_at else None
+                }
+        
+        # 4. Technical or System Data
+        if user_id:
+            user = self.db.query(User).filter(User.id == user_id).first()
+            if user:
+                yield "technical_data", {
+                    "type": "User Account",
+                    "username": user.username,
+                    "is_active": user.is_active,
+                    "created_at": user.created_at.isoformat() if user.created_at else None,
+                    "last_login": user.updated_at.isoformat() if user.updated_at else None
+                }
     
     def generate_and_store_sar_document(
         self,
         sar_data: Dict[str, Any],
         tenant_id: str,
         contact_id: Optional[str] = None,
-        user_id: Optional[str] = None
+        user_id: Optional[str] = None,
+        sar_id: Optional[str] = None
     ) -> Dict[str, Any]:
         """
         Generate PDF document for SAR and store it in MinIO
@@ -560,6 +593,7 @@ class GDPRService:
             tenant_id: Tenant ID
             contact_id: Contact ID (if applicable)
             user_id: User ID (if applicable)
+            sar_id: SAR record ID (generated if not given)
             
         Returns:
             Dictionary with document_path, download_url, and sar_record_id
@@ -569,10 +603,9 @@ class GDPRService:
         # Generate PDF document
         doc_generator = SARDocumentGenerator()
         pdf_buffer = doc_generator.generate_pdf(sar_data)
-        pdf_bytes = pdf_buffer.read()
         
         # Create SAR record in database
-        sar_id = str(uuid.uuid4())
+        sar_id = sar_id or str(uuid.uuid4())
         sar_record = SubjectAccessRequest(
             id=sar_id,
             tenant_id=tenant_id,
@@ -596,26 +629,16 @@ class GDPRService:
         filename = f"{reference}.pdf"
         object_name = f"sar/{tenant_id}/{sar_id}/{filename}"
         
-        # Upload to MinIO (synchronous call, but storage service handles it)
-        import asyncio
-        try:
-            loop = asyncio.get_event_loop()
-        except RuntimeError:
-            loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(loop)
-        
-        uploaded_path = loop.run_until_complete(
-            storage_service.upload_file(
-                file_data=pdf_bytes,
-                object_name=object_name,
-                content_type='application/pdf',
-                metadata={
-                    'sar_id': sar_id,
-                    'tenant_id': tenant_id,
-                    'reference': reference,
-                    'generated_at': datetime.now(timezone.utc).isoformat()
-                }
-            )
+        storage_service.upload_stream(
+            iter(lambda: pdf_buffer.read(64 * 1024), b""),
+            object_name=object_name,
+            content_type='application/pdf',
+            metadata={
+                'sar_id': sar_id,
+                'tenant_id': tenant_id,
+                'reference': reference,
+                'generated_at': datetime.now(timezone.utc).isoformat()
+            }
         )
         
         # Update SAR record with document path
@@ -636,6 +659,73 @@ class GDPRService:
             "reference": reference
         }
     
+    def generate_and_store_sar_export(
+        self,
+        tenant_id: str,
+        contact_id: Optional[str] = None,
+        user_id: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Generate a SAR export and store it in MinIO with bounded memory
+        
+        The full report is serialized as JSON while records are read from the
+        database and written with a multipart upload; only the first
+        SAR_SUMMARY_SAMPLE_SIZE records of each section are kept for the PDF
+        summary and the response.
+        
+        Args:
+            tenant_id: Tenant ID
+            contact_id: Contact ID (for customer contacts)
+            user_id: User ID (for internal users)
+            
+        Returns:
+            SAR report summary with record_counts and document_info
+            (including export_download_url for the full JSON export)
+        """
+        import uuid
+        
+        report, records = self._build_sar_report(tenant_id, contact_id, user_id)
+        sar_id = str(uuid.uuid4())
+        reference = report.get('reference', f'SAR-{sar_id}')
+        export_path = f"sar/{tenant_id}/{sar_id}/{reference}.json"
+        counts = {section: 0 for section in report["data"]}
+        
+        def sampled_records():
+            for section, record in records:
+                counts[section] += 1
+                if counts[section] <= SAR_SUMMARY_SAMPLE_SIZE:
+                    report["data"][section].append(record)
+                yield section, record
+        
+        storage_service = get_storage_service()
+        storage_service.upload_stream(
+            iter_sar_json(report, sampled_records()),
+            object_name=export_path,
+            content_type='application/json',
+            metadata={
+                'sar_id': sar_id,
+                'tenant_id': tenant_id,
+                'reference': reference
+            },
+            part_size=settings.SAR_EXPORT_PART_SIZE
+        )
+        report["record_counts"] = counts
+        
+        document_info = self.generate_and_store_sar_document(
+            sar_data=report,
+            tenant_id=tenant_id,
+            contact_id=contact_id,
+            user_id=user_id,
+            sar_id=sar_id
+        )
+        document_info["export_path"] = export_path
+        document_info["export_download_url"] = storage_service.get_presigned_url(
+            object_name=export_path,
+            expires=timedelta(days=7)
+        )
+        report["document_info"] = document_info
+        return report
+    
     async def send_sar_email(
         self,
         recipient_email: str,
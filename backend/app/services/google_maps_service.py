@@ -11,9 +11,12 @@ from typing import Dict, List, Optional, Any
 from datetime import datetime
 
 from app.core.config import settings
+from app.core.caching import get_cache, set_cache
 
 logger = logging.getLogger(__name__)
 
+CACHE_PREFIX_POSTCODE_GEOCODE = "geocode:postcode:"
+
 
 class GoogleMapsService:
     """
@@ -324,7 +327,65 @@ class GoogleMapsService:
         except Exception as e:
             return {"coordinates": {"lat": lat, "lng": lng}, "error": str(e)}
     
-    async def search_nearby_places(self, lat: float, lng: float, radius: int = 1000, keyword: str = None) -> Dict[str, Any]:
+    async def geocode_postcode(self, postcode: str) -> Optional[Dict[str, float]]:
+        """
+        Coordinates ({'lat', 'lng'}) of a UK postcode
+        
+        Cached in the shared cache, so every campaign and worker geocodes
+        a postcode once per GOOGLE_MAPS_GEOCODE_CACHE_TTL.
+        """
+        normalized = "".join(postcode.split()).upper()
+        if not normalized:
+            return None
+        cache_key = f"{CACHE_PREFIX_POSTCODE_GEOCODE}{normalized}"
+        
+        location = await get_cache(cache_key)
+        if location:
+            return location
+        
+        geocoded = await self.geocode_address(f"{postcode}, UK")
+        location = (geocoded.get("geometry") or {}).get("location")
+        if not location:
+            logger.debug(f"Postcode {postcode} not geocoded: {geocoded.get('error')}")
+            return None
+        
+        await set_cache(cache_key, location, ttl=settings.GOOGLE_MAPS_GEOCODE_CACHE_TTL)
+        return location
+    
+    async def verify_business(self, company_name: str, postcode: str) -> Dict[str, Any]:
+        """
+        Find a business near its postcode and return its verified details
+        
+        Returns:
+            verified_address, verified_phone, verified_website, google_rating
+            and google_types, or an empty dict if no match was found
+        """
+        async with self._semaphore:
+            location = await self.geocode_postcode(postcode)
+            if not location:
+                return {}
+            
+            nearby = await self.search_nearby_places(
+                location["lat"], location["lng"], radius=5000, keyword=company_name, place_type="establishment"
+            )
+            places = nearby.get("places") or []
+            if not places:
+                return {}
+            
+            client = await self._get_client()
+            details = await self._get_place_details(places[0]["place_id"], client)
+        
+        if details.get("error"):
+            return {}
+        return {
+            'verified_address': details.get('formatted_address') or '',
+            'verified_phone': details.get('phone_number') or '',
+            'verified_website': details.get('website') or '',
+            'google_rating': details.get('rating') or 0,
+            'google_types': details.get('types', [])
+        }
+    
+    async def search_nearby_places(self, lat: float, lng: float, radius: int = 1000, keyword: str = None, place_type: str = None) -> Dict[str, Any]:
         """Search for places near a location"""
         try:
             client = await self._get_client()
@@ -336,6 +397,8 @@ class GoogleMapsService:
             
             if keyword:
                 params["keyword"] = keyword
+            if place_type:
+                params["type"] = place_type
             
             response = await client.get(
                 f"{self.base_url}/place/nearbysearch/json",
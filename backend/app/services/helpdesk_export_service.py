@@ -0,0 +1,206 @@
+"""
+Helpdesk analytics export queries
+
+Each report type is a single SELECT plus a function mapping its rows to the
+export columns. The same (statement, mapper) pair is streamed by the
+analytics export endpoint (stream_query_rows) and by the background export
+task (sync session with yield_per), so large reports never need to be
+loaded into memory.
+"""
+
+from datetime import datetime
+from typing import Any, Callable, Dict, Tuple
+
+from sqlalchemy import Integer, String, and_, case, cast, extract, func, select
+from sqlalchemy.orm import aliased
+
+from app.models.crm import Customer
+from app.models.helpdesk import Ticket
+from app.models.tenant import User
+
+# Report types backed by a streamable query ("agents" reuses the SLA endpoint)
+QUERY_REPORT_TYPES = ("overview", "customers", "resolution", "tickets")
+
+RowMapper = Callable[[Any], Dict[str, Any]]
+
+
+def _hours(value) -> float:
+    return round(float(value or 0), 2)
+
+
+def _enum_value(value) -> str:
+    return value.value if hasattr(value, 'value') else str(value)
+
+
+def _iso(value) -> str:
+    return value.isoformat() if value else ''
+
+
+def _compliance(total: int, breaches: int) -> str:
+    return f"{round(((total - breaches) / total * 100) if total > 0 else 100, 2)}%"
+
+
+def _period(tenant_id: str, start_dt: datetime, end_dt: datetime):
+    return and_(
+        Ticket.tenant_id == tenant_id,
+        Ticket.created_at >= start_dt,
+        Ticket.created_at <= end_dt
+    )
+
+
+def _overview(tenant_id: str, start_dt: datetime, end_dt: datetime) -> Tuple[Any, RowMapper]:
+    # Compare status as text to avoid enum type issues
+    date_expr = func.date(Ticket.created_at)
+    stmt = select(
+        date_expr.label('period'),
+        func.count(Ticket.id).label('total_tickets'),
+        func.count(case((cast(Ticket.status, String) == "OPEN", 1))).label('open'),
+        func.count(case((cast(Ticket.status, String) == "IN_PROGRESS", 1))).label('in_progress'),
+        func.count(case((cast(Ticket.status, String) == "RESOLVED", 1))).label('resolved'),
+        func.count(case((cast(Ticket.status, String) == "CLOSED", 1))).label('closed')
+    ).where(
+        _period(tenant_id, start_dt, end_dt)
+    ).group_by(date_expr).order_by(date_expr)
+    
+    def mapper(row) -> Dict[str, Any]:
+        return {
+            "Period": row.period.isoformat() if hasattr(row.period, 'isoformat') else str(row.period),
+            "Total Tickets": row.total_tickets or 0,
+            "Open": row.open or 0,
+            "In Progress": row.in_progress or 0,
+            "Resolved": row.resolved or 0,
+            "Closed": row.closed or 0
+        }
+    
+    return stmt, mapper
+
+
+def _customers(tenant_id: str, start_dt: datetime, end_dt: datetime) -> Tuple[Any, RowMapper]:
+    stmt = select(
+        Ticket.customer_id,
+        Customer.company_name.label('customer_name'),
+        func.count(Ticket.id).label('total_tickets'),
+        func.avg(extract('epoch', Ticket.resolved_at - Ticket.created_at) / 3600).label('avg_resolution_hours'),
+        func.avg(extract('epoch', Ticket.first_response_at - Ticket.created_at) / 3600).label('avg_first_response_hours'),
+        func.sum(cast(Ticket.sla_first_response_breached, Integer)).label('fr_breaches'),
+        func.sum(cast(Ticket.sla_resolution_breached, Integer)).label('res_breaches')
+    ).join(
+        Customer, Ticket.customer_id == Customer.id, isouter=True
+    ).where(
+        _period(tenant_id, start_dt, end_dt),
+        Ticket.customer_id.isnot(None)
+    ).group_by(
+        Ticket.customer_id,
+        Customer.company_name
+    ).order_by(
+        func.count(Ticket.id).desc()
+    ).limit(100)
+    
+    def mapper(row) -> Dict[str, Any]:
+        total = row.total_tickets or 0
+        fr_breaches = row.fr_breaches or 0
+        res_breaches = row.res_breaches or 0
+        return {
+            "Customer": row.customer_name or 'Unknown',
+            "Total Tickets": total,
+            "Avg Resolution (hrs)": _hours(row.avg_resolution_hours),
+            "Avg First Response (hrs)": _hours(row.avg_first_response_hours),
+            "FR Breaches": fr_breaches,
+            "FR Compliance": _compliance(total, fr_breaches),
+            "Res Breaches": res_breaches,
+            "Res Compliance": _compliance(total, res_breaches)
+        }
+    
+    return stmt, mapper
+
+
+def _resolution(tenant_id: str, start_dt: datetime, end_dt: datetime) -> Tuple[Any, RowMapper]:
+    resolution_hours = extract('epoch', Ticket.resolved_at - Ticket.created_at) / 3600
+    stmt = select(
+        Ticket.priority.label('group_value'),
+        func.count(Ticket.id).label('total_tickets'),
+        func.avg(resolution_hours).label('avg_resolution_hours'),
+        func.avg(extract('epoch', Ticket.first_response_at - Ticket.created_at) / 3600).label('avg_first_response_hours'),
+        func.min(resolution_hours).label('min_resolution_hours'),
+        func.max(resolution_hours).label('max_resolution_hours')
+    ).where(
+        _period(tenant_id, start_dt, end_dt),
+        Ticket.resolved_at.isnot(None)
+    ).group_by(Ticket.priority)
+    
+    def mapper(row) -> Dict[str, Any]:
+        return {
+            "Priority": _enum_value(row.group_value),
+            "Total Tickets": row.total_tickets or 0,
+            "Avg Resolution (hrs)": _hours(row.avg_resolution_hours),
+            "Avg First Response (hrs)": _hours(row.avg_first_response_hours),
+            "Min Resolution (hrs)": _hours(row.min_resolution_hours),
+            "Max Resolution (hrs)": _hours(row.max_resolution_hours)
+        }
+    
+    return stmt, mapper
+
+
+def _tickets(tenant_id: str, start_dt: datetime, end_dt: datetime) -> Tuple[Any, RowMapper]:
+    """One row per ticket; this is the report that can run to millions of rows"""
+    agent = aliased(User)
+    stmt = select(
+        Ticket.ticket_number,
+        Ticket.subject,
+        Ticket.ticket_type,
+        Ticket.status,
+        Ticket.priority,
+        Customer.company_name.label('customer_name'),
+        agent.first_name.label('agent_first_name'),
+        agent.last_name.label('agent_last_name'),
+        Ticket.created_at,
+        Ticket.first_response_at,
+        Ticket.resolved_at,
+        Ticket.sla_first_response_breached,
+        Ticket.sla_resolution_breached
+    ).join(
+        Customer, Ticket.customer_id == Customer.id, isouter=True
+    ).join(
+        agent, Ticket.assigned_to_id == agent.id, isouter=True
+    ).where(
+        _period(tenant_id, start_dt, end_dt)
+    ).order_by(Ticket.created_at, Ticket.id)
+    
+    def mapper(row) -> Dict[str, Any]:
+        agent_name = f"{row.agent_first_name or ''} {row.agent_last_name or ''}".strip()
+        return {
+            "Ticket": row.ticket_number,
+            "Subject": row.subject,
+            "Type": _enum_value(row.ticket_type),
+            "Status": _enum_value(row.status),
+            "Priority": _enum_value(row.priority),
+            "Customer": row.customer_name or '',
+            "Assigned To": agent_name,
+            "Created": _iso(row.created_at),
+            "First Response": _iso(row.first_response_at),
+            "Resolved": _iso(row.resolved_at),
+            "FR Breached": "Yes" if row.sla_first_response_breached else "No",
+            "Res Breached": "Yes" if row.sla_resolution_breached else "No"
+        }
+    
+    return stmt, mapper
+
+
+_BUILDERS = {
+    "overview": _overview,
+    "customers": _customers,
+    "resolution": _resolution,
+    "tickets": _tickets,
+}
+
+
+def export_query(report_type: str, tenant_id: str, start_dt: datetime, end_dt: datetime) -> Tuple[Any, RowMapper]:
+    """(SELECT statement, row mapper) for a helpdesk analytics report"""
+    if report_type not in _BUILDERS:
+        raise ValueError(f"No export query for report type: {report_type}")
+    return _BUILDERS[report_type](tenant_id, start_dt, end_dt)
+
+
+def ticket_count_query(tenant_id: str, start_dt: datetime, end_dt: datetime):
+    """Number of tickets in the period, used to decide whether to export in the background"""
+    return select(func.count(Ticket.id)).where(_period(tenant_id, start_dt, end_dt))
@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+"""
+Streaming iXBRL fact extraction for Companies House accounts
+
+PERFORMANCE: Accounts documents are read once with lxml.etree.iterparse.
+Context periods and tagged facts (ix:nonFraction etc.) are collected in
+that single pass and every element is cleared once it has been handled,
+so multi-megabyte group accounts are never held as a full tree. Financial
+fields are then picked from an index of facts by name instead of one tree
+walk per candidate tag.
+"""
+
+import io
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+from lxml import etree
+
+IX_NAMESPACES = {
+    'http://www.xbrl.org/2008/inlineXBRL',
+    'http://www.xbrl.org/2013/inlineXBRL',
+}
+XBRLI_NAMESPACE = 'http://www.xbrl.org/2003/instance'
+CONTEXT_TAG = f'{{{XBRLI_NAMESPACE}}}context'
+END_DATE_TAG = f'{{{XBRLI_NAMESPACE}}}endDate'
+
+# Note: Different accounting standards (FRS-102, FRS-105, etc.) use different tag names
+TAG_VARIATIONS = [
+    ('net_assets', ['e:NetAssetsLiabilities', 'core:NetAssetsLiabilities', 'e:NetAssets', 'core:NetAssets', 'e:Equity', 'core:Equity']),
+    ('cash_at_bank', ['e:CashBankOnHand', 'core:CashBankOnHand', 'e:CashAtBank', 'core:CashAtBank', 'e:CashBankInHand', 'core:CashBankInHand']),
+    ('total_equity', ['e:Equity', 'core:Equity', 'e:TotalEquity', 'core:TotalEquity', 'e:ShareholderFunds', 'core:ShareholderFunds']),
+    ('ppe', ['e:PropertyPlantEquipment', 'core:PropertyPlantEquipment', 'e:PPE', 'core:PPE', 'e:TangibleFixedAssets', 'core:TangibleFixedAssets']),
+    ('trade_debtors', ['e:TradeDebtorsTradeReceivables', 'core:TradeDebtorsTradeReceivables', 'e:TradeDebtors', 'core:TradeDebtors', 'e:Debtors', 'core:Debtors']),
+    # Turnover: Many variations across different accounting standards and years
+    ('turnover', [
+        'e:TurnoverRevenue', 'core:TurnoverRevenue',
+        'e:Revenue', 'core:Revenue',
+        'e:Turnover', 'core:Turnover',
+        'bus:TurnoverRevenue', 'd:TurnoverRevenue',
+        'bus:Revenue', 'd:Revenue',
+        'bus:Turnover', 'd:Turnover',
+        # FRS-102 variations
+        'b:TurnoverRevenue', 'b:Revenue', 'b:Turnover',
+        # Older taxonomy variations
+        'uk-gaap:TurnoverRevenue', 'uk-gaap:Revenue', 'uk-gaap:Turnover',
+        # Micro-entity variations
+        'micro:TurnoverRevenue', 'micro:Revenue', 'micro:Turnover',
+        # Additional common variations
+        'e:TotalRevenue', 'core:TotalRevenue',
+        'bus:TotalRevenue', 'd:TotalRevenue',
+        # Without namespace prefix (some documents use different structures)
+        'TurnoverRevenue', 'Revenue', 'Turnover', 'TotalRevenue',
+    ]),
+    ('profit_before_tax', ['e:ProfitLossOnOrdinaryActivitiesBeforeTax', 'core:ProfitLossOnOrdinaryActivitiesBeforeTax', 'e:ProfitBeforeTax', 'core:ProfitBeforeTax', 'e:ProfitLossBeforeTax', 'core:ProfitLossBeforeTax']),
+    ('operating_profit', ['e:OperatingProfitLoss', 'core:OperatingProfitLoss', 'e:OperatingProfit', 'core:OperatingProfit', 'e:ProfitLossFromOperations', 'core:ProfitLossFromOperations']),
+    ('gross_profit', ['e:GrossProfitLoss', 'core:GrossProfitLoss', 'e:GrossProfit', 'core:GrossProfit']),
+    ('cost_of_sales', ['e:CostSales', 'core:CostSales', 'e:CostOfSales', 'core:CostOfSales']),
+    ('admin_expenses', ['e:AdministrativeExpenses', 'core:AdministrativeExpenses', 'e:AdminExpenses', 'core:AdminExpenses'])
+]
+
+EMPLOYEE_TAG_VARIATIONS = [
+    'e:AverageNumberEmployeesDuringPeriod',
+    'core:AverageNumberEmployeesDuringPeriod',
+    'e:NumberOfEmployees',
+    'core:NumberOfEmployees',
+    'e:Employees',
+    'core:Employees',
+    'bus:AverageNumberEmployees',
+    'd:AverageNumberEmployees'
+]
+
+UNPREFIXED_FALLBACK_PREFIXES = ('e', 'core', 'bus', 'd', 'b')
+
+# (name, text, contextRef)
+Fact = Tuple[str, str, str]
+
+
+@dataclass
+class IXBRLFacts:
+    """Context period years and tagged facts of one accounts document"""
+    contexts: Dict[str, str] = field(default_factory=dict)  # context id -> period end year
+    numeric: List[Fact] = field(default_factory=list)  # ix:nonFraction
+    other: List[Fact] = field(default_factory=list)  # other named ix elements (ix:nonNumeric, ...)
+
+
+def parse_ixbrl_facts(content: Union[str, bytes]) -> IXBRLFacts:
+    """Collect contexts and named ix facts in one streaming pass"""
+    if isinstance(content, str):
+        content = content.encode('utf-8')
+    facts = IXBRLFacts()
+    # Open contexts and facts, whose children must survive until their end event
+    open_depth = 0
+    
+    events = etree.iterparse(
+        io.BytesIO(content), events=('start', 'end'), recover=True, huge_tree=True, remove_comments=True
+    )
+    for event, elem in events:
+        tag = elem.tag
+        if not isinstance(tag, str):
+            continue  # processing instructions
+        is_context = tag == CONTEXT_TAG
+        is_fact = not is_context and elem.get('name') is not None and tag[1:].split('}', 1)[0] in IX_NAMESPACES
+        if event == 'start':
+            if is_context or is_fact:
+                open_depth += 1
+            continue
+        
+        if is_context:
+            open_depth -= 1
+            end_date = elem.find(f'.//{END_DATE_TAG}')
+            if end_date is not None and end_date.text:
+                facts.contexts[elem.get('id', '')] = end_date.text.strip().split('-')[0]
+        elif is_fact:
+            open_depth -= 1
+            fact = (elem.get('name'), ''.join(elem.itertext()), elem.get('contextRef', 'unknown'))
+            if tag.endswith('}nonFraction'):
+                facts.numeric.append(fact)
+            else:
+                facts.other.append(fact)
+        if open_depth:
+            continue
+        
+        # Everything inside this element has been handled
+        elem.clear(keep_tail=True)
+        parent = elem.getparent()
+        if parent is not None:
+            while elem.getprevious() is not None:
+                del parent[0]
+    return facts
+
+
+def _parse_number(text: str) -> Optional[float]:
+    # Remove currency symbols and commas; (123) is negative
+    value_text = text.strip().replace('£', '').replace('$', '').replace(',', '').replace(' ', '').replace('(', '-').replace(')', '')
+    if not value_text or value_text == '-':
+        return None
+    return float(value_text)
+
+
+def extract_financial_data(facts: IXBRLFacts, target_year: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Pick financial fields from parsed facts
+    
+    Candidate tags are tried in order for each field; when a document has
+    several periods, values for target_year are preferred.
+    """
+    numeric_by_name: Dict[str, List[Fact]] = {}
+    for fact in facts.numeric:
+        numeric_by_name.setdefault(fact[0], []).append(fact)
+    any_by_name: Dict[str, List[Fact]] = {}
+    for fact in facts.numeric + facts.other:
+        any_by_name.setdefault(fact[0], []).append(fact)
+    context_periods = facts.contexts if target_year else {}
+    
+    financial_data: Dict[str, Any] = {}
+    for field_name, tag_list in TAG_VARIATIONS:
+        for tag in tag_list:
+            elements = list(numeric_by_name.get(tag) or any_by_name.get(tag) or [])
+            if not elements and ':' in tag:
+                prefix, tag_without_ns = tag.split(':', 1)
+                if prefix in UNPREFIXED_FALLBACK_PREFIXES:
+                    elements = list(numeric_by_name.get(tag_without_ns, []))
+            # For turnover, also try a case-insensitive match across all numeric facts (once per field)
+            if not elements and field_name == 'turnover' and tag == tag_list[0]:
+                for fact in facts.numeric:
+                    elem_name = fact[0].lower()
+                    if 'turnover' in elem_name or 'revenue' in elem_name:
+                        elements.append(fact)
+                if elements:
+                    print(f"[IXBRL] Found {len(elements)} turnover elements via case-insensitive search")
+            
+            if not elements:
+                continue
+            
+            all_values = []
+            for _, text, context_ref in elements:
+                try:
+                    value = _parse_number(text)
+                except ValueError:
+                    continue
+                if value is None:
+                    continue
+                if target_year and context_periods:
+                    ctx_year = context_periods.get(context_ref, '')
+                else:
+                    ctx_year = context_periods.get(context_ref, 'unknown')
+                
+                if field_name == 'turnover':
+                    # Only positive values >= 10000 (to avoid note numbers like "3") for the target year
+                    if value < 10000:
+                        continue
+                    if target_year and context_periods and ctx_year != target_year:
+                        continue
+                    all_values.append((value, context_ref, ctx_year))
+                elif not (target_year and context_periods) or ctx_year == target_year or not ctx_year:
+                    all_values.append((value, context_ref, ctx_year))
+            
+            if all_values:
+                matching_values = [v for v in all_values if v[2] == target_year] if target_year else []
+                if field_name == 'turnover':
+                    # Largest value, preferring the target year
+                    value, context_ref, ctx_year = max(matching_values or all_values, key=lambda v: v[0])
+                    print(f"[IXBRL] Extracted {field_name} = £{value:,.0f} for year {ctx_year} using tag: {tag}, contextRef: {context_ref}")
+                else:
+                    value = (matching_values or all_values)[0][0]
+                financial_data[field_name] = value
+            if field_name in financial_data:
+                break
+    
+    # Employee count
+    for tag in EMPLOYEE_TAG_VARIATIONS:
+        elements = numeric_by_name.get(tag)
+        if elements:
+            try:
+                financial_data['employees'] = int(float(elements[0][1]))
+            except (TypeError, ValueError):
+                pass
+            if 'employees' in financial_data:
+                break
+    
+    return financial_data
@@ -5,12 +5,12 @@ Manages knowledge base articles and ticket linking
 """
 
 import logging
-from typing import Dict, List, Optional, Any
+from typing import Dict, List, Optional, Any, Tuple
 from sqlalchemy.orm import Session
-from sqlalchemy import select, or_, func
+from sqlalchemy import select, func
 from datetime import datetime
 
-from app.models.knowledge_base import KnowledgeBaseArticle, KnowledgeBaseTicketLink
+from app.models.knowledge_base import KnowledgeBaseArticle, KnowledgeBaseTicketLink, KB_SEARCH_CONFIG
 from app.models.helpdesk import Ticket
 
 logger = logging.getLogger(__name__)
@@ -62,31 +62,53 @@ class KnowledgeBaseService:
         
         return article
     
+    def search_articles_ranked(
+        self,
+        query: str,
+        category: Optional[str] = None,
+        limit: int = 10
+    ) -> List[Tuple[KnowledgeBaseArticle, float]]:
+        """
+        Ranked full-text search over published articles
+        
+        PERFORMANCE: Uses the generated search_vector column and its GIN index
+        (see migrations/add_knowledge_base_search_index.sql) instead of ILIKE
+        scans. Title matches outrank summary matches, which outrank content.
+        
+        Args:
+            query: Web-search style query ("printer offline", "vpn or wifi", "-draft")
+            category: Optional category filter
+            limit: Maximum number of results
+        
+        Returns:
+            List of (article, rank) tuples, best first; rank is in [0, 1)
+        """
+        tsquery = func.websearch_to_tsquery(KB_SEARCH_CONFIG, query)
+        # Normalization 32 maps rank to rank / (rank + 1)
+        rank = func.ts_rank_cd(KnowledgeBaseArticle.search_vector, tsquery, 32)
+        
+        stmt = select(KnowledgeBaseArticle, rank.label("rank")).where(
+            KnowledgeBaseArticle.tenant_id == self.tenant_id,
+            KnowledgeBaseArticle.is_published == True,
+            KnowledgeBaseArticle.search_vector.op("@@")(tsquery)
+        )
+        
+        if category:
+            stmt = stmt.where(KnowledgeBaseArticle.category == category)
+        
+        stmt = stmt.order_by(rank.desc(), KnowledgeBaseArticle.view_count.desc()).limit(limit)
+        
+        return [(article, float(score or 0)) for article, score in self.db.execute(stmt).all()]
+    
     def search_articles(
         self,
         query: str,
         category: Optional[str] = None,
         limit: int = 10
     ) -> List[KnowledgeBaseArticle]:
-        """Search knowledge base articles"""
+        """Search knowledge base articles (best match first)"""
         try:
-            stmt = select(KnowledgeBaseArticle).where(
-                KnowledgeBaseArticle.tenant_id == self.tenant_id,
-                KnowledgeBaseArticle.is_published == True,
-                or_(
-                    KnowledgeBaseArticle.title.ilike(f"%{query}%"),
-                    KnowledgeBaseArticle.content.ilike(f"%{query}%"),
-                    KnowledgeBaseArticle.summary.ilike(f"%{query}%")
-                )
-            )
-            
-            if category:
-                stmt = stmt.where(KnowledgeBaseArticle.category == category)
-            
-            stmt = stmt.order_by(KnowledgeBaseArticle.view_count.desc()).limit(limit)
-            
-            articles = self.db.execute(stmt).scalars().all()
-            return articles
+            return [article for article, _ in self.search_articles_ranked(query, category, limit)]
         except Exception as e:
             logger.error(f"Error searching articles: {e}", exc_info=True)
             # Rollback any failed transaction
@@ -102,6 +124,9 @@ class KnowledgeBaseService:
         """
         Suggest knowledge base articles for a ticket
         
+        Runs a single ranked full-text query matching any of the ticket's
+        top keywords; relevance scores come from the database ranking.
+        
         Args:
             ticket: Ticket to find suggestions for
             limit: Maximum number of suggestions
@@ -110,37 +135,27 @@ class KnowledgeBaseService:
             List of suggested articles with relevance scores
         """
         # Extract keywords from ticket
-        keywords = self._extract_keywords(ticket.subject + " " + (ticket.description or ""))
+        keywords = self._extract_keywords(ticket.subject + " " + (ticket.description or ""))[:5]
+        if not keywords:
+            return []
+        
+        try:
+            ranked = self.search_articles_ranked(" or ".join(keywords), limit=limit)
+        except Exception as e:
+            logger.error(f"Error suggesting articles for ticket: {e}", exc_info=True)
+            self.db.rollback()
+            return []
         
-        # Search for articles
         suggestions = []
-        for keyword in keywords[:5]:  # Use top 5 keywords
-            articles = self.search_articles(keyword, limit=limit * 2)
-            for article in articles:
-                # Calculate relevance score
-                relevance = self._calculate_relevance(article, ticket, keyword)
-                
-                suggestions.append({
-                    "article": article,
-                    "relevance_score": relevance,
-                    "matched_keyword": keyword
-                })
+        for article, rank in ranked:
+            text = f"{article.title} {article.summary or ''} {article.content}".lower()
+            suggestions.append({
+                "article": article,
+                "relevance_score": min(100, round(rank * 100)),
+                "matched_keyword": next((k for k in keywords if k in text), keywords[0])
+            })
         
-        # Sort by relevance and remove duplicates
-        suggestions.sort(key=lambda x: x["relevance_score"], reverse=True)
-        
-        # Remove duplicates
-        seen_article_ids = set()
-        unique_suggestions = []
-        for suggestion in suggestions:
-            article_id = suggestion["article"].id
-            if article_id not in seen_article_ids:
-                seen_article_ids.add(article_id)
-                unique_suggestions.append(suggestion)
-                if len(unique_suggestions) >= limit:
-                    break
-        
-        return unique_suggestions
+        return suggestions
     
     def link_article_to_ticket(
         self,
@@ -188,36 +203,6 @@ class KnowledgeBaseService:
         
         return [word for word, count in sorted_keywords[:10]]
     
-    def _calculate_relevance(
-        self,
-        article: KnowledgeBaseArticle,
-        ticket: Ticket,
-        keyword: str
-    ) -> int:
-        """Calculate relevance score (0-100)"""
-        score = 0
-        
-        # Title match
-        if keyword.lower() in article.title.lower():
-            score += 40
-        
-        # Content match
-        if keyword.lower() in article.content.lower():
-            score += 30
-        
-        # Category match (if ticket type matches article category)
-        if ticket.ticket_type and article.category:
-            # Try to match ticket type to article category (flexible matching)
-            ticket_type_str = ticket.ticket_type.value if hasattr(ticket.ticket_type, 'value') else str(ticket.ticket_type)
-            if ticket_type_str.lower() in article.category.lower() or article.category.lower() in ticket_type_str.lower():
-                score += 20
-        
-        # View count (popularity)
-        if article.view_count > 10:
-            score += 10
-        
-        return min(100, score)
-    
     def mark_article_helpful(
         self,
         article_id: str,
@@ -254,145 +239,47 @@ class KnowledgeBaseService:
         limit: int = 5
     ) -> List[Dict[str, Any]]:
         """
-        AI-powered article suggestions using semantic matching
+        Semantic article suggestions for a ticket
         
-        Uses AI to understand ticket context and find relevant articles
+        PERFORMANCE: Articles are ranked by embedding cosine similarity against
+        an incrementally synced per-tenant index (SemanticIndexService), so no
+        article text is sent to the LLM and latency stays in milliseconds.
         
         Args:
             ticket: Ticket to find suggestions for
             limit: Maximum number of suggestions
         
         Returns:
-            List of suggested articles with AI relevance scores
+            List of suggested articles with semantic relevance scores
         """
-        from app.services.ai_orchestration_service import AIOrchestrationService
-        from app.models.ai_prompt import PromptCategory
+        from app.services.semantic_index_service import SemanticIndexService
         
         try:
-            # Get all published articles
-            try:
-                stmt = select(KnowledgeBaseArticle).where(
-                    KnowledgeBaseArticle.tenant_id == self.tenant_id,
-                    KnowledgeBaseArticle.is_published == True
-                )
-                all_articles = self.db.execute(stmt).scalars().all()
-            except Exception as db_error:
-                logger.error(f"Database error in suggest_articles_with_ai: {db_error}", exc_info=True)
-                self.db.rollback()
-                return []
-            
-            if not all_articles:
-                return []
-            
-            # Build context for AI
-            ticket_type_str = 'N/A'
-            if ticket.ticket_type:
-                if hasattr(ticket.ticket_type, 'value'):
-                    ticket_type_str = ticket.ticket_type.value
-                else:
-                    ticket_type_str = str(ticket.ticket_type)
-            
-            priority_str = 'N/A'
-            if ticket.priority:
-                if hasattr(ticket.priority, 'value'):
-                    priority_str = ticket.priority.value
-                else:
-                    priority_str = str(ticket.priority)
-            
-            ticket_context = f"""
-            Ticket Subject: {ticket.subject or ''}
-            Ticket Description: {ticket.description or ticket.original_description or ''}
-            Ticket Type: {ticket_type_str}
-            Ticket Priority: {priority_str}
-            """
-            
-            # Create article summaries for AI
-            article_summaries = []
-            for article in all_articles:
-                article_summaries.append({
-                    "id": article.id,
-                    "title": article.title,
-                    "summary": article.summary or article.content[:200],
-                    "category": article.category
-                })
-            
-            # Use AI to find most relevant articles
-            ai_service = AIOrchestrationService(self.db, self.tenant_id)
-            
-            prompt_text = f"""
-            Given the following ticket and knowledge base articles, identify the most relevant articles.
-            
-            Ticket Context:
-            {ticket_context}
-            
-            Available Articles:
-            {chr(10).join([f"- {a['title']}: {a['summary']}" for a in article_summaries[:20]])}
+            query_text = f"{ticket.subject or ''}. {ticket.description or ticket.original_description or ''}"
+            matches = SemanticIndexService(self.db, self.tenant_id).find_similar_articles(query_text, limit=limit)
             
-            Return a JSON array with article IDs and relevance scores (0-100), ordered by relevance.
-            Format: [{{"article_id": "id", "relevance_score": 85, "reason": "explanation"}}]
-            """
-            
-            # Use the new helpdesk_quick_response prompt
-            response = await ai_service.generate(
-                category=PromptCategory.HELPDESK_QUICK_RESPONSE.value,
-                variables={
-                    "ticket_subject": ticket.subject or '',
-                    "ticket_description": ticket.description or ticket.original_description or '',
-                    "ticket_type": ticket.ticket_type.value if hasattr(ticket.ticket_type, 'value') else str(ticket.ticket_type or 'N/A'),
-                    "ticket_priority": ticket.priority.value if hasattr(ticket.priority, 'value') else str(ticket.priority or 'N/A')
-                },
-                max_tokens=500
-            )
-            
-            # Parse AI response
-            ai_suggestions = self._parse_ai_suggestions(response, all_articles)
+            suggestions = [
+                {
+                    "article": article,
+                    "relevance_score": round(score * 100),
+                    "reason": "Semantic match",
+                    "matched_keyword": "semantic"
+                }
+                for article, score in matches
+            ]
             
-            # Fallback to keyword-based if AI fails
-            if not ai_suggestions:
+            # Fallback to keyword-based if nothing is similar enough
+            if not suggestions:
                 return await self.suggest_articles_for_ticket(ticket, limit)
             
-            # Return top suggestions
-            return ai_suggestions[:limit]
+            return suggestions
             
         except Exception as e:
-            logger.error(f"Error in AI-powered suggestions: {e}")
+            logger.error(f"Error in semantic article suggestions: {e}", exc_info=True)
+            self.db.rollback()
             # Fallback to keyword-based
             return await self.suggest_articles_for_ticket(ticket, limit)
     
-    def _parse_ai_suggestions(
-        self,
-        ai_response: str,
-        articles: List[KnowledgeBaseArticle]
-    ) -> List[Dict[str, Any]]:
-        """Parse AI response into article suggestions"""
-        import json
-        import re
-        
-        try:
-            # Try to extract JSON from response
-            json_match = re.search(r'\[.*\]', ai_response, re.DOTALL)
-            if json_match:
-                suggestions_data = json.loads(json_match.group())
-                
-                suggestions = []
-                article_map = {a.id: a for a in articles}
-                
-                for item in suggestions_data:
-                    article_id = item.get("article_id")
-                    if article_id in article_map:
-                        suggestions.append({
-                            "article": article_map[article_id],
-                            "relevance_score": item.get("relevance_score", 50),
-                            "reason": item.get("reason", "AI-matched"),
-                            "matched_keyword": "AI"
-                        })
-                
-                return sorted(suggestions, key=lambda x: x["relevance_score"], reverse=True)
-        except Exception as e:
-            logger.error(f"Error parsing AI suggestions: {e}")
-        
-        return []
-    
     async def auto_categorize_article(
         self,
         title: str,
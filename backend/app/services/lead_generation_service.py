@@ -5,7 +5,6 @@ Combines web search, Google Maps, Companies House, and AI analysis for comprehen
 
 import json
 import httpx
-import googlemaps
 import asyncio
 import re
 import traceback
@@ -16,6 +15,7 @@ from sqlalchemy.orm import Session
 from app.models import Tenant, Sector, Lead
 from app.services.ai_analysis_service import AIAnalysisService
 from app.services.companies_house_service import CompaniesHouseService
+from app.services.google_maps_service import GoogleMapsService
 from app.services.ai_prompt_service import AIPromptService
 from app.models.ai_prompt import PromptCategory
 from app.core.config import settings
@@ -28,11 +28,11 @@ class LeadGenerationService:
         self.tenant_id = tenant_id
         self.provider_service = AIProviderService(db, tenant_id=str(tenant_id))
         self.ai_service = AIAnalysisService(tenant_id=str(tenant_id), db=db)  # Keep for backward compatibility
-        self.companies_house_service = CompaniesHouseService(api_key=self._get_api_keys()['companies_house_api_key'])
         
-        # Initialize Google Maps client
+        # Async (httpx) clients for lead verification
         api_keys = self._get_api_keys()
-        self.gmaps = googlemaps.Client(key=api_keys['google_maps_api_key'])
+        self.companies_house_service = CompaniesHouseService(api_key=api_keys['companies_house_api_key'])
+        self.google_maps_service = GoogleMapsService(api_key=api_keys['google_maps_api_key'])
     
     def _get_api_keys(self) -> Dict[str, str]:
         """Get API keys from tenant or system-wide fallback using centralized resolution"""
@@ -258,28 +258,8 @@ class LeadGenerationService:
                 return []
             
             # Enhance each business with additional data and ensure sector is populated (same as dynamic search)
-            enhanced_businesses = []
             campaign_sector = campaign_data.get('sector_name', 'Unknown')
-            
-            for idx, business in enumerate(businesses, 1):
-                try:
-                    print(f"🔄 Processing business {idx}/{len(businesses)}: {business.get('company_name', 'Unknown')}")
-                    
-                    # Ensure sector is populated (fallback to campaign sector if missing)
-                    if not business.get('business_sector') or business.get('business_sector', '').strip() in ['', 'N/A', 'None', 'null']:
-                        business['business_sector'] = campaign_sector
-                    
-                    enhanced = await self._enhance_business_data(business, tenant_context)
-                    # Ensure sector is populated, fallback to campaign sector if needed
-                    if not enhanced.get('business_sector') or enhanced.get('business_sector', '').strip() in ['', 'N/A', 'None', 'null']:
-                        enhanced['business_sector'] = campaign_sector
-                    enhanced_businesses.append(enhanced)
-                except Exception as e:
-                    print(f"⚠️ Error enhancing business {idx}: {e}")
-                    # Ensure sector is set even if enhancement fails
-                    if not business.get('business_sector') or business.get('business_sector') == 'Unknown':
-                        business['business_sector'] = campaign_sector
-                    enhanced_businesses.append(business)  # Keep the original
+            enhanced_businesses = await self._enhance_businesses(businesses, tenant_context, campaign_sector)
             
             print(f"\n✅ Company list analysis complete: {len(enhanced_businesses)} companies analyzed")
             return enhanced_businesses
@@ -559,28 +539,8 @@ class LeadGenerationService:
                 return []
             
             # Enhance each business with additional data and ensure sector is populated
-            enhanced_businesses = []
             campaign_sector = campaign_data.get('sector_name', 'Unknown')
-            
-            for idx, business in enumerate(businesses, 1):
-                try:
-                    print(f"🔄 Processing business {idx}/{len(businesses)}: {business.get('company_name', 'Unknown')}")
-                    
-                    # Ensure sector is populated (fallback to campaign sector if missing)
-                    if not business.get('business_sector') or business.get('business_sector', '').strip() in ['', 'N/A', 'None', 'null']:
-                        business['business_sector'] = campaign_sector
-                    
-                    enhanced = await self._enhance_business_data(business, tenant_context)
-                    # Ensure sector is populated, fallback to campaign sector if needed
-                    if not enhanced.get('business_sector') or enhanced.get('business_sector', '').strip() in ['', 'N/A', 'None', 'null']:
-                        enhanced['business_sector'] = campaign_sector
-                    enhanced_businesses.append(enhanced)
-                except Exception as e:
-                    print(f"⚠️ Error enhancing business {idx}: {e}")
-                    # Ensure sector is set even if enhancement fails
-                    if not business.get('sector') or business.get('sector') == 'Unknown':
-                        business['sector'] = campaign_sector
-                    enhanced_businesses.append(business)  # Keep the original
+            enhanced_businesses = await self._enhance_businesses(businesses, tenant_context, campaign_sector)
             
             return enhanced_businesses
         
@@ -904,27 +864,57 @@ Return only valid JSON in this structure:
         }
         return size_descriptions.get(size_category, 'Any size')
     
+    async def _enhance_businesses(self, businesses: List[Dict], tenant_context: Dict, campaign_sector: str) -> List[Dict]:
+        """
+        Verify a batch of businesses concurrently, keeping their order
+        
+        At most LEAD_ENRICHMENT_CONCURRENCY businesses are verified at once;
+        the Google Maps and Companies House clients are closed afterwards.
+        """
+        semaphore = asyncio.Semaphore(settings.LEAD_ENRICHMENT_CONCURRENCY)
+        
+        def ensure_sector(business: Dict) -> Dict:
+            # Ensure sector is populated (fallback to campaign sector if missing)
+            if not business.get('business_sector') or str(business.get('business_sector')).strip() in ['', 'N/A', 'None', 'null']:
+                business['business_sector'] = campaign_sector
+            return business
+        
+        async def enhance(idx: int, business: Dict) -> Dict:
+            async with semaphore:
+                print(f"🔄 Processing business {idx}/{len(businesses)}: {business.get('company_name', 'Unknown')}")
+                try:
+                    return ensure_sector(await self._enhance_business_data(ensure_sector(business), tenant_context))
+                except Exception as e:
+                    print(f"⚠️ Error enhancing business {idx}: {e}")
+                    return ensure_sector(business)  # Keep the original
+        
+        try:
+            return list(await asyncio.gather(*(enhance(idx, business) for idx, business in enumerate(businesses, 1))))
+        finally:
+            await asyncio.gather(
+                self.google_maps_service.close(),
+                self.companies_house_service.close(),
+                return_exceptions=True
+            )
+    
     async def _enhance_business_data(self, business: Dict, tenant_context: Dict) -> Dict:
-        """Enhance business data with Google Maps and Companies House verification"""
+        """Enhance business data with Google Maps and Companies House verification (run concurrently)"""
         try:
             company_name = business.get('company_name', '')
             postcode = business.get('postcode', '')
             
-            # Google Maps verification
+            lookups = []
             if postcode and company_name:
-                try:
-                    gmaps_data = await self._get_google_maps_data(company_name, postcode)
-                    business.update(gmaps_data)
-                except Exception as e:
-                    print(f"⚠️ Google Maps verification failed for {company_name}: {e}")
-            
-            # Companies House verification
+                lookups.append(("Google Maps", self._get_google_maps_data(company_name, postcode)))
             if company_name:
-                try:
-                    ch_data = await self._get_companies_house_data(company_name)
-                    business.update(ch_data)
-                except Exception as e:
-                    print(f"⚠️ Companies House verification failed for {company_name}: {e}")
+                lookups.append(("Companies House", self._get_companies_house_data(company_name)))
+            
+            results = await asyncio.gather(*(lookup for _, lookup in lookups), return_exceptions=True)
+            for (source, _), result in zip(lookups, results):
+                if isinstance(result, Exception):
+                    print(f"⚠️ {source} verification failed for {company_name}: {result}")
+                else:
+                    business.update(result)
             
             return business
             
@@ -935,36 +925,7 @@ Return only valid JSON in this structure:
     async def _get_google_maps_data(self, company_name: str, postcode: str) -> Dict:
         """Get Google Maps data for business verification"""
         try:
-            # Search for the business
-            search_result = self.gmaps.places_nearby(
-                location=self.gmaps.geocode(f"{postcode}, UK")[0]['geometry']['location'],
-                radius=5000,
-                keyword=company_name,
-                type='establishment'
-            )
-            
-            if search_result.get('results'):
-                place = search_result['results'][0]
-                place_id = place['place_id']
-                
-                # Get detailed information
-                place_details = self.gmaps.place(
-                    place_id=place_id,
-                    fields=['name', 'formatted_address', 'formatted_phone_number', 'website', 'rating', 'type']
-                )
-                
-                details = place_details['result']
-                
-                return {
-                    'verified_address': details.get('formatted_address', ''),
-                    'verified_phone': details.get('formatted_phone_number', ''),
-                    'verified_website': details.get('website', ''),
-                    'google_rating': details.get('rating', 0),
-                    'google_types': details.get('types', [])
-                }
-            
-            return {}
-            
+            return await self.google_maps_service.verify_business(company_name, postcode)
         except Exception as e:
             print(f"⚠️ Google Maps API error: {e}")
             return {}
@@ -0,0 +1,404 @@
+#!/usr/bin/env python3
+"""
+Log triage for agent chat uploads
+
+PERFORMANCE: log files attached to the agent chat can be many megabytes,
+and their head is rarely where the problem is. LogTriage reads a log once,
+line by line, in bounded memory and keeps only:
+
+- line count, size, first/last timestamp and counts per level
+- repeated lines clustered into templates (numbers, ids, addresses and
+  quoted values masked) with counts, capped at LOG_TRIAGE_MAX_TEMPLATES
+- windows around errors and stack traces: the first occurrence of each
+  distinct error, the first few and the most recent few
+
+digest() turns that into a compact text block for the AI prompt. The same
+code runs in the API (uploads, before a chat message is queued) and in the
+Celery agent chat task (raw logs, stored attachments).
+"""
+
+import asyncio
+import codecs
+import re
+from collections import Counter, OrderedDict, deque
+from typing import AsyncIterable, Deque, Dict, Iterable, List, Optional, Union
+
+from app.core.config import settings
+
+LOG_DIGEST_HEADER = "=== LOG DIGEST ==="
+
+LOG_FILE_EXTENSIONS = ('.log', '.txt', '.out', '.err')
+
+TIMESTAMP_RE = re.compile(
+    r"\d{4}-\d{2}-\d{2}[T ]\d{2}:\d{2}:\d{2}(?:[.,]\d+)?(?:Z|[+-]\d{2}:?\d{2})?"  # ISO 8601
+    r"|\d{2}/[A-Z][a-z]{2}/\d{4}:\d{2}:\d{2}:\d{2}(?: [+-]\d{4})?"  # Apache/nginx
+    r"|[A-Z][a-z]{2} +\d{1,2} \d{2}:\d{2}:\d{2}"  # syslog
+)
+LEVEL_RE = re.compile(r"\b(TRACE|DEBUG|INFO|NOTICE|WARN(?:ING)?|ERROR|ERR|CRIT(?:ICAL)?|FATAL|SEVERE|ALERT|EMERG|PANIC)\b")
+LEVEL_TAG_RE = re.compile(
+    r"(?:level|severity|lvl)[\"']?\s*[=:]\s*[\"']?([a-z]+)"
+    r"|[\[<](trace|debug|info|notice|warn(?:ing)?|error|err|crit(?:ical)?|fatal|alert|emerg)[\]>]",
+    re.IGNORECASE
+)
+STACK_START_RE = re.compile(
+    r"Traceback \(most recent call last\)|^Exception in thread|^panic:|^[\w.$]*(?:Exception|Error)(?::|$)"
+)
+CONTINUATION_RE = re.compile(r"^\s+\S|^Caused by:|^\s*\.\.\. \d+ more")
+
+_MASKS = (
+    (re.compile(r"[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}"), "<UUID>"),
+    (re.compile(r"\b\d{1,3}(?:\.\d{1,3}){3}(?::\d+)?\b"), "<IP>"),
+    (re.compile(r"\b0x[0-9a-fA-F]+\b|\b[0-9a-fA-F]{12,}\b"), "<HEX>"),
+    (re.compile(r"\"[^\"]*\"|'[^']*'"), "<STR>"),
+    (re.compile(r"\d+(?:\.\d+)?"), "<NUM>"),
+    (re.compile(r"\s+"), " "),
+)
+
+_LEVEL_NAMES = {
+    "WARN": "WARNING", "ERR": "ERROR", "SEVERE": "ERROR", "CRIT": "CRITICAL",
+    "FATAL": "CRITICAL", "ALERT": "CRITICAL", "EMERG": "CRITICAL", "PANIC": "CRITICAL",
+}
+ERROR_LEVELS = {"ERROR", "CRITICAL"}
+
+MAX_LINE_CHARS = 500
+MAX_TEMPLATE_CHARS = 200
+MAX_WINDOW_LINES = 40
+FIRST_WINDOWS = 3
+LAST_WINDOWS = 5
+TOP_TEMPLATES = 15
+
+
+def _level(line: str) -> Optional[str]:
+    match = LEVEL_RE.search(line)
+    if match:
+        level = match.group(1)
+    else:
+        match = LEVEL_TAG_RE.search(line)
+        if not match:
+            return None
+        level = (match.group(1) or match.group(2)).upper()
+    level = _LEVEL_NAMES.get(level, level)
+    return level if level in ("TRACE", "DEBUG", "INFO", "NOTICE", "WARNING", "ERROR", "CRITICAL") else None
+
+
+def line_template(line: str) -> str:
+    """Line with timestamps and variable values masked, used to cluster repeats"""
+    template = TIMESTAMP_RE.sub("", line)
+    for pattern, replacement in _MASKS:
+        template = pattern.sub(replacement, template)
+    return template.strip()[:MAX_TEMPLATE_CHARS]
+
+
+def _format_size(size: int) -> str:
+    for unit in ("B", "KB", "MB"):
+        if size < 1024:
+            return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} GB"
+
+
+class _Window:
+    """Lines around one error or stack trace"""
+    
+    __slots__ = ("line_no", "signature", "lines", "remaining", "dropped")
+    
+    def __init__(self, line_no: int, signature: str, lines: List[str], remaining: int):
+        self.line_no = line_no
+        self.signature = signature
+        self.lines = lines
+        self.remaining = remaining
+        self.dropped = 0
+    
+    def add(self, line: str):
+        if len(self.lines) < MAX_WINDOW_LINES:
+            self.lines.append(line)
+        else:
+            self.dropped += 1
+
+
+class LogTriage:
+    """
+    Single-pass, bounded-memory log analysis
+    
+    Feed text or bytes in chunks of any size (lines may span chunks), then
+    call close() and digest().
+    """
+    
+    def __init__(
+        self,
+        name: Optional[str] = None,
+        max_templates: Optional[int] = None,
+        context_before: int = 3,
+        context_after: int = 6
+    ):
+        self.name = name
+        self.max_templates = max_templates or settings.LOG_TRIAGE_MAX_TEMPLATES
+        self.context_after = context_after
+        self.lines = 0
+        self.size = 0
+        self.truncated = False
+        self.first_timestamp: Optional[str] = None
+        self.last_timestamp: Optional[str] = None
+        self.level_counts: Counter = Counter()
+        self.templates: Dict[str, List] = {}  # template -> [count, level]
+        self.untracked_lines = 0
+        self.error_counts: Dict[str, int] = {}
+        self.error_occurrences = 0
+        self.untracked_errors = 0  # occurrences of signatures past max_templates
+        self.first_windows: List[_Window] = []
+        self.last_windows: "OrderedDict[str, _Window]" = OrderedDict()
+        self._first_keys = set()
+        self._in_trace = False
+        self._window_fresh = False
+        self._before: Deque[str] = deque(maxlen=context_before)
+        self._window: Optional[_Window] = None
+        self._pending = ""
+        self._decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        self._closed = False
+    
+    def feed(self, data: Union[str, bytes]):
+        """Add a chunk of the log"""
+        if isinstance(data, bytes):
+            self.size += len(data)
+            data = self._decoder.decode(data)
+        else:
+            self.size += len(data)
+        if not data:
+            return
+        lines = (self._pending + data).split("\n")
+        self._pending = lines.pop()
+        for line in lines:
+            self._add_line(line)
+    
+    def close(self) -> "LogTriage":
+        """Flush the last partial line and any open error window"""
+        if not self._closed:
+            tail = self._pending + self._decoder.decode(b"", final=True)
+            self._pending = ""
+            if tail:
+                self._add_line(tail)
+            self._close_window()
+            self._closed = True
+        return self
+    
+    def _add_line(self, line: str):
+        self.lines += 1
+        line = line.rstrip("\r")
+        if len(line) > MAX_LINE_CHARS:
+            line = line[:MAX_LINE_CHARS] + " ..."
+        
+        if not line.strip():
+            if self._window is not None:
+                self._window.remaining -= 1
+                if self._window.remaining < 0:
+                    self._close_window()
+            return
+        
+        timestamp = TIMESTAMP_RE.search(line)
+        if timestamp:
+            if self.first_timestamp is None:
+                self.first_timestamp = timestamp.group(0)
+            self.last_timestamp = timestamp.group(0)
+        
+        level = _level(line)
+        if level:
+            self.level_counts[level] += 1
+        
+        continuation = bool(CONTINUATION_RE.match(line))
+        template = None
+        if not continuation:
+            template = line_template(line)
+            entry = self.templates.get(template)
+            if entry is not None:
+                entry[0] += 1
+            elif len(self.templates) < self.max_templates:
+                self.templates[template] = [1, level]
+            else:
+                self.untracked_lines += 1
+        
+        stack_line = not continuation and bool(STACK_START_RE.search(line))
+        follows_error = self._in_trace or self._window_fresh
+        self._window_fresh = False
+        if stack_line and follows_error and self._window is not None and level not in ERROR_LEVELS:
+            # The exception line that ends a traceback (or follows an error line) identifies it
+            self._window.add(line)
+            self._window.signature = template
+        elif not continuation and (level in ERROR_LEVELS or stack_line):
+            self._close_window()
+            self._window = _Window(self.lines, template, list(self._before) + [line], self.context_after)
+            self._window_fresh = True
+        elif self._window is not None:
+            if continuation:
+                self._window.add(line)
+            elif self._window.remaining > 0:
+                self._window.add(line)
+                self._window.remaining -= 1
+            else:
+                self._close_window()
+        
+        self._in_trace = continuation
+        self._before.append(line)
+    
+    def _close_window(self):
+        """Count the error and keep its window if it is among the first or latest distinct ones"""
+        window, self._window = self._window, None
+        if window is None:
+            return
+        key = window.signature
+        self.error_occurrences += 1
+        count = self.error_counts.get(key)
+        if count is None and len(self.error_counts) >= self.max_templates:
+            # Not counted per signature, but still a candidate for the latest windows
+            self.untracked_errors += 1
+        else:
+            self.error_counts[key] = (count or 0) + 1
+        if key in self._first_keys:
+            return
+        if count is None and len(self.first_windows) < FIRST_WINDOWS:
+            self.first_windows.append(window)
+            self._first_keys.add(key)
+            return
+        # Most recent occurrence of each of the latest distinct errors
+        self.last_windows.pop(key, None)
+        self.last_windows[key] = window
+        if len(self.last_windows) > LAST_WINDOWS:
+            self.last_windows.popitem(last=False)
+    
+    @property
+    def distinct_errors(self) -> int:
+        return len(self.error_counts)
+    
+    def summary(self) -> Dict:
+        """Counts as a dict (for API responses)"""
+        return {
+            "name": self.name,
+            "lines": self.lines,
+            "size": self.size,
+            "truncated": self.truncated,
+            "first_timestamp": self.first_timestamp,
+            "last_timestamp": self.last_timestamp,
+            "levels": dict(self.level_counts),
+            "templates": len(self.templates),
+            "distinct_errors": self.distinct_errors,
+            "error_occurrences": self.error_occurrences,
+        }
+    
+    def digest(self, max_chars: Optional[int] = None) -> str:
+        """
+        Compact text for the AI prompt, at most max_chars long
+        
+        The overview always fits; error windows are added newest first
+        (the end of a log is usually where it failed), then the most
+        frequent line templates.
+        """
+        max_chars = max_chars or settings.LOG_TRIAGE_DIGEST_MAX_CHARS
+        self.close()
+        
+        overview = [LOG_DIGEST_HEADER]
+        span = f", {self.first_timestamp} to {self.last_timestamp}" if self.first_timestamp else ""
+        read = " (read limit reached)" if self.truncated else ""
+        overview.append(f"{self.name or 'Log'}: {self.lines:,} lines, {_format_size(self.size)}{read}{span}")
+        if self.level_counts:
+            overview.append("Levels: " + ", ".join(f"{level} {count:,}" for level, count in self.level_counts.most_common()))
+        if self.error_occurrences:
+            more = "+" if self.untracked_errors else ""
+            overview.append(
+                f"Distinct errors/stack traces: {self.distinct_errors:,}{more} "
+                f"({self.error_occurrences:,} occurrences)"
+            )
+        text = "\n".join(overview)
+        remaining = max_chars - len(text)
+        
+        windows = self.first_windows + list(self.last_windows.values())
+        blocks: Dict[int, str] = {}
+        for index in range(len(windows) - 1, -1, -1):
+            window = windows[index]
+            repeats = self.error_counts.get(window.signature, 1)
+            label = f"--- line {window.line_no:,}" + (f", seen {repeats:,} times" if repeats > 1 else "") + " ---"
+            body = "\n".join(window.lines)
+            if window.dropped:
+                body += f"\n... ({window.dropped} more lines)"
+            block = f"{label}\n{body}"
+            if len(block) + 1 > remaining:
+                if remaining < 200:
+                    break
+                block = block[:remaining - 20] + "\n... (clipped)"
+            blocks[index] = block
+            remaining -= len(block) + 1
+        
+        parts = [text]
+        if blocks:
+            if self.untracked_errors or len(self.first_windows) + len(self.last_windows) < self.distinct_errors:
+                parts.append("Errors (first and most recent distinct occurrences):")
+            else:
+                parts.append("Errors:")
+            remaining -= len(parts[-1]) + 1
+            parts.extend(blocks[index] for index in sorted(blocks))
+        
+        top = sorted(self.templates.items(), key=lambda item: item[1][0], reverse=True)[:TOP_TEMPLATES]
+        if top and remaining > 100:
+            parts.append("Most frequent lines:")
+            remaining -= len(parts[-1]) + 1
+            for template, (count, level) in top:
+                line = f"  x{count:,} {template}"
+                if len(line) + 1 > remaining:
+                    break
+                parts.append(line)
+                remaining -= len(line) + 1
+        
+        return "\n".join(parts)
+
+
+def triage_chunks(
+    chunks: Iterable[Union[str, bytes]],
+    name: Optional[str] = None,
+    max_bytes: Optional[int] = None
+) -> LogTriage:
+    """Triage a log from any iterable of chunks (e.g. StorageService.stream_file)"""
+    max_bytes = max_bytes or settings.LOG_TRIAGE_MAX_BYTES
+    triage = LogTriage(name)
+    for chunk in chunks:
+        triage.feed(chunk)
+        if triage.size >= max_bytes:
+            triage.truncated = True
+            break
+    return triage.close()
+
+
+async def atriage_chunks(
+    chunks: AsyncIterable[bytes],
+    name: Optional[str] = None,
+    max_bytes: Optional[int] = None
+) -> LogTriage:
+    """Triage a log from an async source (e.g. an upload); parsing runs in a worker thread"""
+    max_bytes = max_bytes or settings.LOG_TRIAGE_MAX_BYTES
+    triage = LogTriage(name)
+    async for chunk in chunks:
+        await asyncio.to_thread(triage.feed, chunk)
+        if triage.size >= max_bytes:
+            triage.truncated = True
+            break
+    return triage.close()
+
+
+def triage_text(text: str, name: Optional[str] = None) -> LogTriage:
+    triage = LogTriage(name)
+    triage.feed(text)
+    return triage.close()
+
+
+def is_log_digest(text: str) -> bool:
+    return text.startswith(LOG_DIGEST_HEADER)
+
+
+def compact_log_text(text: str, name: Optional[str] = None, inline_chars: Optional[int] = None) -> str:
+    """
+    Text to put in the prompt for a pasted log or attachment
+    
+    Short text is kept as is; longer text is replaced by its digest so the
+    whole file is considered, not just its head. Digests pass through.
+    """
+    inline_chars = inline_chars or settings.LOG_TRIAGE_INLINE_CHARS
+    if len(text) <= inline_chars or is_log_digest(text):
+        return text
+    return triage_text(text, name).digest()
@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+Name Redaction Service
+
+Redacts the names of people other than the data subject from SAR export text.
+
+PERFORMANCE: All contact and user names of a tenant (full names and name
+parts) are compiled once into a single trie-shaped regular expression, so
+each text field is redacted in one linear pass instead of one regex per
+name. The compiled matcher is cached per tenant and rebuilt when the
+tenant's contacts or users change (count / latest updated_at fingerprint).
+"""
+
+import logging
+import re
+import threading
+from collections import OrderedDict
+from typing import Dict, Iterable, Optional, Pattern, Tuple
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from app.core.keyword_matcher import build_trie_pattern
+from app.models.crm import Contact, Customer
+from app.models.tenant import User
+
+logger = logging.getLogger(__name__)
+
+REDACTED = "[REDACTED]"
+MIN_NAME_LENGTH = 3  # Names and name parts shorter than this are never redacted
+MAX_CACHED_TENANTS = 16
+
+# Owner value for a pattern contributed by more than one person
+_SHARED = ""
+
+
+class NameRedactor:
+    """
+    Compiled multi-name matcher for one tenant
+    
+    Matching is case-insensitive and by substring, as for the per-name
+    regexes it replaces. The subject's own full name (and any part of it
+    that no other person shares) is left in place.
+    """
+    
+    def __init__(self, names: Iterable[str]):
+        # lowercased pattern -> lowercased full name of its only owner (or _SHARED)
+        self._owners: Dict[str, str] = {}
+        for name in names:
+            owner = name.lower()
+            for pattern in {owner, *owner.split()}:
+                if len(pattern) < MIN_NAME_LENGTH:
+                    continue
+                existing = self._owners.get(pattern)
+                self._owners[pattern] = owner if existing in (None, owner) else _SHARED
+        
+        source = build_trie_pattern(sorted(self._owners))
+        self._regex: Optional[Pattern[str]] = re.compile(source, re.IGNORECASE) if source else None
+    
+    def __len__(self) -> int:
+        return len(self._owners)
+    
+    def _kept(self, subject_name: Optional[str]) -> frozenset:
+        if not subject_name:
+            return frozenset()
+        subject = subject_name.lower()
+        return frozenset(
+            pattern for pattern in {subject, *subject.split()}
+            if self._owners.get(pattern) == subject
+        )
+    
+    def redact(self, text: Optional[str], subject_name: Optional[str]) -> Optional[str]:
+        """
+        Replace other people's names in text with [REDACTED]
+        
+        Args:
+            text: Text to redact
+            subject_name: Full name of the subject (e.g., "John Smith")
+        """
+        if not text or self._regex is None:
+            return text
+        
+        kept = self._kept(subject_name)
+        
+        def replace(match):
+            found = match.group(0)
+            return found if found.lower() in kept else REDACTED
+        
+        return self._regex.sub(replace, text)
+
+
+_redactors: "OrderedDict[str, Tuple[tuple, NameRedactor]]" = OrderedDict()
+_redactors_lock = threading.Lock()
+
+
+def _tenant_people_fingerprint(db: Session, tenant_id: str) -> tuple:
+    """Changes whenever a contact or user of the tenant is added, removed or updated"""
+    in_tenant_contacts = Contact.customer_id.in_(select(Customer.id).where(Customer.tenant_id == tenant_id))
+    in_tenant_users = User.tenant_id == tenant_id
+    row = db.execute(select(
+        select(func.count(Contact.id)).where(in_tenant_contacts).scalar_subquery(),
+        select(func.max(Contact.updated_at)).where(in_tenant_contacts).scalar_subquery(),
+        select(func.count(User.id)).where(in_tenant_users).scalar_subquery(),
+        select(func.max(User.updated_at)).where(in_tenant_users).scalar_subquery()
+    )).one()
+    return tuple(row)
+
+
+def _load_tenant_people_names(db: Session, tenant_id: str) -> list:
+    contacts = db.execute(
+        select(Contact.first_name, Contact.last_name).where(
+            Contact.customer_id.in_(select(Customer.id).where(Customer.tenant_id == tenant_id))
+        )
+    ).all()
+    users = db.execute(
+        select(User.first_name, User.last_name).where(User.tenant_id == tenant_id)
+    ).all()
+    return (
+        [f"{first} {last}" for first, last in contacts]
+        + [f"{first} {last}" for first, last in users if first and last]
+    )
+
+
+def get_name_redactor(db: Session, tenant_id: str) -> NameRedactor:
+    """Cached redactor for a tenant's contacts and users (rebuilt when they change)"""
+    fingerprint = _tenant_people_fingerprint(db, tenant_id)
+    with _redactors_lock:
+        cached = _redactors.get(tenant_id)
+        if cached is not None and cached[0] == fingerprint:
+            _redactors.move_to_end(tenant_id)
+            return cached[1]
+    
+    redactor = NameRedactor(_load_tenant_people_names(db, tenant_id))
+    logger.info(f"Built name redactor for tenant {tenant_id} with {len(redactor)} patterns")
+    
+    with _redactors_lock:
+        _redactors[tenant_id] = (fingerprint, redactor)
+        _redactors.move_to_end(tenant_id)
+        while len(_redactors) > MAX_CACHED_TENANTS:
+            _redactors.popitem(last=False)
+    return redactor
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Planning application keyword classifier
+"""
+
+from typing import Dict, List, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.core.keyword_matcher import KeywordMatcher
+from app.models import PlanningApplicationKeyword
+
+
+class PlanningKeywordClassifier:
+    """
+    Compiled classifier for one tenant's planning keywords
+    
+    PERFORMANCE: Application-type keywords and the tenant's include/exclude
+    keywords are compiled into one KeywordMatcher, so each proposal is
+    scanned once and its relevance score is the sum of the weights of the
+    keywords found. Built once per campaign run instead of querying the
+    keywords for every application.
+    """
+    
+    # Checked in order; the first type with a matching keyword wins
+    APPLICATION_TYPE_KEYWORDS = (
+        ("residential", ("residential", "dwelling", "flat", "apartment", "house")),
+        ("industrial", ("industrial", "warehouse", "factory", "manufacturing")),
+        ("commercial", ("office", "retail", "commercial")),
+        ("change_of_use", ("change of use",)),
+    )
+    
+    def __init__(self, keywords: Dict[str, List[Dict]]):
+        # keyword -> net weight (include weights minus exclude weights)
+        self.weights: Dict[str, int] = {}
+        for keyword_type, sign in (("include", 1), ("exclude", -1)):
+            for keyword in keywords.get(keyword_type, []):
+                text = (keyword["keyword"] or "").lower()
+                if text:
+                    self.weights[text] = self.weights.get(text, 0) + sign * (10 if keyword.get("weight") is None else keyword["weight"])
+        
+        type_keywords = [kw for _, kws in self.APPLICATION_TYPE_KEYWORDS for kw in kws]
+        self.matcher = KeywordMatcher(list(self.weights) + type_keywords)
+    
+    @classmethod
+    def for_tenant(cls, db: Session, tenant_id: str) -> "PlanningKeywordClassifier":
+        """Load the tenant's active keywords (one query) and compile them"""
+        rows = db.query(
+            PlanningApplicationKeyword.keyword,
+            PlanningApplicationKeyword.keyword_type,
+            PlanningApplicationKeyword.weight
+        ).filter(
+            PlanningApplicationKeyword.tenant_id == tenant_id,
+            PlanningApplicationKeyword.is_active == True
+        ).all()
+        
+        keywords: Dict[str, List[Dict]] = {"include": [], "exclude": []}
+        for keyword, keyword_type, weight in rows:
+            if keyword_type in keywords:
+                keywords[keyword_type].append({"keyword": keyword, "weight": weight})
+        return cls(keywords)
+    
+    def classify(self, proposal: str) -> Tuple[str, int]:
+        """Application type and 0-100 relevance score for a proposal"""
+        if not proposal:
+            return "other", 0
+        
+        found = self.matcher.find(proposal)
+        base_type = next(
+            (app_type for app_type, kws in self.APPLICATION_TYPE_KEYWORDS if any(kw in found for kw in kws)),
+            "other"
+        )
+        score = sum(self.weights.get(keyword, 0) for keyword in found)
+        return base_type, max(0, min(100, score))
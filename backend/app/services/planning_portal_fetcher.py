@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+Planning Portal Fetcher
+
+Concurrent client for the OpenDataSoft planning portals.
+
+PERFORMANCE: Each portal host gets its own pooled httpx client and a
+concurrency cap (PLANNING_PORTAL_MAX_CONNECTIONS_PER_HOST), several portals
+are fetched at the same time, and the next page of a portal is requested
+while the current one is being processed. Portals that support it are
+filtered server-side from a watermark date, so incremental runs only
+download new records.
+"""
+
+import asyncio
+import logging
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import httpx
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+PAGE_SIZE = 100  # OpenDataSoft v1 rows per request
+
+
+class PlanningPortalFetcher:
+    """
+    Fetches planning application records from one or more portals
+
+    Use as an async context manager so pooled connections are closed:
+
+        async with PlanningPortalFetcher() as fetcher:
+            records = await fetcher.fetch_portal(portal_config, process, max_records=300)
+    """
+
+    def __init__(self, max_connections_per_host: Optional[int] = None, timeout: Optional[float] = None):
+        self.max_connections_per_host = max_connections_per_host or settings.PLANNING_PORTAL_MAX_CONNECTIONS_PER_HOST
+        self.timeout = timeout or settings.PLANNING_PORTAL_TIMEOUT
+        # host -> (pooled client, concurrency cap)
+        self._hosts: Dict[str, Tuple[httpx.AsyncClient, asyncio.Semaphore]] = {}
+
+    async def __aenter__(self) -> "PlanningPortalFetcher":
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    async def close(self):
+        clients = [client for client, _ in self._hosts.values()]
+        self._hosts.clear()
+        await asyncio.gather(*(client.aclose() for client in clients), return_exceptions=True)
+
+    def _host(self, url: str) -> Tuple[httpx.AsyncClient, asyncio.Semaphore]:
+        host = httpx.URL(url).host
+        if host not in self._hosts:
+            limit = self.max_connections_per_host
+            client = httpx.AsyncClient(
+                timeout=self.timeout,
+                follow_redirects=True,
+                limits=httpx.Limits(max_connections=limit, max_keepalive_connections=limit)
+            )
+            self._hosts[host] = (client, asyncio.Semaphore(limit))
+        return self._hosts[host]
+
+    async def _get_page(self, url: str, params: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """One page of results, or None if the endpoint does not exist (404)"""
+        client, limit = self._host(url)
+        async with limit:
+            response = await client.get(url, params=params)
+        if response.status_code == 404:
+            return None
+        response.raise_for_status()
+        return response.json()
+
+    async def _first_page(self, portal_config: Dict[str, Any], params: Dict[str, Any]) -> Tuple[Optional[str], Optional[Dict[str, Any]]]:
+        """First page from the primary URL, falling back to the portal's alternative URLs"""
+        for url in [portal_config["base_url"], *portal_config.get("alternative_urls", [])]:
+            try:
+                data = await self._get_page(url, params)
+            except Exception as e:
+                logger.warning(f"Planning portal {portal_config['name']} request to {url} failed: {e}")
+                continue
+            if data is None:
+                logger.warning(f"Planning portal {portal_config['name']} endpoint not found: {url}")
+                continue
+            if url != portal_config["base_url"]:
+                # Remember the working URL for later runs in this process
+                logger.info(f"Planning portal {portal_config['name']} switched to {url}")
+                portal_config["base_url"] = url
+            return url, data
+        return None, None
+
+    async def fetch_portal(
+        self,
+        portal_config: Dict[str, Any],
+        process: Callable[[Dict[str, Any]], Optional[Dict[str, Any]]],
+        max_records: int,
+        since: Optional[datetime] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Fetch and process records from one portal
+
+        Args:
+            portal_config: Entry of PlanningApplicationService.PLANNING_PORTALS
+            process: Turns a raw portal record into an application dict (or None to skip)
+            max_records: Stop after this many processed records
+            since: Only records on/after this date, if the portal has a filterable date_field
+
+        Returns:
+            Processed records
+        """
+        params: Dict[str, Any] = {"dataset": portal_config["dataset_id"], "rows": PAGE_SIZE, "start": 0}
+        date_field = portal_config.get("date_field")
+        if since is not None and date_field:
+            params["q"] = f"{date_field} >= {since.date().isoformat()}"
+
+        url, page = await self._first_page(portal_config, params)
+        if page is None:
+            logger.error(f"Could not get valid data from any endpoint for {portal_config['name']}")
+            return []
+        total = page.get("nhits")
+
+        records: List[Dict[str, Any]] = []
+        start = 0
+        while page is not None:
+            batch = page.get("records", [])
+            start += len(batch)
+            has_more = len(batch) == PAGE_SIZE and (total is None or start < total)
+
+            # Request the next page while this one is processed, unless this page may be enough
+            next_page = None
+            if has_more and len(records) + len(batch) < max_records:
+                next_page = asyncio.ensure_future(self._get_page(url, {**params, "start": start}))
+                await asyncio.sleep(0)  # let the request go out before processing starts
+
+            for record in batch:
+                processed = process(record)
+                if processed:
+                    records.append(processed)
+                    if len(records) >= max_records:
+                        break
+
+            if not has_more or len(records) >= max_records:
+                if next_page is not None:
+                    next_page.cancel()
+                    await asyncio.gather(next_page, return_exceptions=True)
+                break
+            try:
+                page = await (next_page or self._get_page(url, {**params, "start": start}))
+            except Exception as e:
+                logger.error(f"Planning portal {portal_config['name']} page at {start} failed: {e}")
+                break
+
+        logger.info(f"Fetched {len(records)} records from {portal_config['name']} ({start} downloaded)")
+        return records
+
+    async def fetch_portals(self, jobs: Sequence[Dict[str, Any]]) -> List[Any]:
+        """
+        Fetch several portals concurrently
+
+        Args:
+            jobs: fetch_portal keyword arguments, one dict per portal
+
+        Returns:
+            One result per job: a list of records, or the exception it raised
+        """
+        return await asyncio.gather(*(self.fetch_portal(**job) for job in jobs), return_exceptions=True)
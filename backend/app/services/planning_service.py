@@ -4,16 +4,18 @@ Handles fetching planning application data from UK planning portals and AI analy
 """
 
 import json
-import httpx
-import asyncio
 import re
+import uuid
 from typing import Dict, List, Optional, Any, Tuple
 from datetime import datetime, timezone, timedelta
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.orm import Session
 
-from app.models import Tenant, PlanningApplication, PlanningApplicationCampaign, PlanningApplicationKeyword, ApplicationType, PlanningApplicationStatus, PlanningCampaignStatus, Lead, LeadSource, LeadStatus
+from app.models import Tenant, PlanningApplication, PlanningApplicationCampaign, ApplicationType, PlanningApplicationStatus, PlanningCampaignStatus, Lead, LeadSource, LeadStatus
 from app.services.ai_analysis_service import AIAnalysisService
 from app.services.ai_provider_service import AIProviderService
+from app.services.planning_classifier import PlanningKeywordClassifier
+from app.services.planning_portal_fetcher import PlanningPortalFetcher
 from app.core.config import settings
 
 
@@ -47,204 +49,84 @@ class PlanningApplicationService:
         self.tenant_id = tenant_id
         self.ai_service = AIAnalysisService(tenant_id=tenant_id, db=db)
         self.provider_service = AIProviderService(db, tenant_id=tenant_id)
+        self._classifiers: Dict[str, PlanningKeywordClassifier] = {}
 
-    async def fetch_planning_data(self, campaign: PlanningApplicationCampaign, days_back: int = None) -> List[Dict[str, Any]]:
+    async def fetch_planning_data(self, campaign: PlanningApplicationCampaign, days_back: int = None, since: Optional[datetime] = None) -> List[Dict[str, Any]]:
         """Fetch planning application data from the specified portal"""
         days_back = days_back or campaign.days_to_monitor
+        records = await self._fetch_portal_records(campaign, since)
+        return self._filter_by_date(records, days_back)
+
+    async def _fetch_portal_records(self, campaign: PlanningApplicationCampaign, since: Optional[datetime] = None) -> List[Dict[str, Any]]:
+        """Processed records of the campaign's portal, before date filtering"""
+        portal_config = self._get_portal_config(campaign.county)
+        
+        async with PlanningPortalFetcher() as fetcher:
+            return await fetcher.fetch_portal(
+                portal_config,
+                lambda record: self._process_portal_record(record, campaign.county, portal_config["name"]),
+                max_records=campaign.max_results_per_run or 300,
+                since=since
+            )
+
+    @classmethod
+    def _get_portal_config(cls, county: str) -> Dict[str, Any]:
+        """Portal configuration for a county, if supported and enabled"""
+        if county.lower() not in cls.PLANNING_PORTALS:
+            raise ValueError(f"Unsupported county: {county}")
         
-        if campaign.county.lower() not in self.PLANNING_PORTALS:
-            raise ValueError(f"Unsupported county: {campaign.county}")
-        
-        portal_config = self.PLANNING_PORTALS[campaign.county.lower()]
+        portal_config = cls.PLANNING_PORTALS[county.lower()]
         
         if not portal_config["enabled"]:
-            raise ValueError(f"Portal for {campaign.county} is not enabled")
+            raise ValueError(f"Portal for {county} is not enabled")
         
-        return await self._fetch_from_portal(portal_config, campaign, days_back)
+        return portal_config
 
-    async def _fetch_from_portal(self, portal_config: Dict[str, str], campaign: PlanningApplicationCampaign, days_back: int) -> List[Dict[str, Any]]:
-        """Fetch data from specific planning portal"""
-        records = []
-        start = 0
-        max_records = campaign.max_results_per_run or 300  # Default to 300 like your working example
-        
-        async with httpx.AsyncClient(timeout=30.0, follow_redirects=True) as client:
-            while len(records) < max_records:
-                # Build parameters - first try without sort to see available fields
-                params = {
-                    "dataset": portal_config["dataset_id"],
-                    "rows": min(100, max_records - len(records)),
-                    "start": start
-                    # Removed sort parameter temporarily - "date_validated" field not recognized
-                }
-                
-                response = None
-                try:
-                    print(f"🔍 Making API request to: {portal_config['base_url']}")
-                    print(f"🔍 With params: {params}")
-                    
-                    # Make the request - try without User-Agent first, like your working example
-                    response = await client.get(portal_config["base_url"], params=params)
-                    print(f"🔍 Response status: {response.status_code}")
-                    
-                    # Check for 404 or other error status before trying to parse JSON
-                    data = None
-                    if response.status_code == 404:
-                        print(f"❌ Got 404 - API endpoint doesn't exist on {portal_config['base_url']}")
-                        # Try alternative URLs if this is the first batch
-                        if start == 0 and portal_config.get("alternative_urls"):
-                            alternative_urls = portal_config.get("alternative_urls", [])
-                            print(f"🔄 Trying alternative URLs for {portal_config['name']}...")
-                            for alt_url in alternative_urls:
-                                try:
-                                    print(f"🔄 Trying alternative URL: {alt_url}")
-                                    alt_response = await client.get(alt_url, params=params)
-                                    print(f"🔄 Alternative URL status: {alt_response.status_code}")
-                                    if alt_response.status_code == 200:
-                                        alt_response.raise_for_status()
-                                        alt_data = alt_response.json()
-                                        # Update the portal config to use the working URL
-                                        portal_config["base_url"] = alt_url
-                                        print(f"✅ Updated {portal_config['name']} to use: {alt_url}")
-                                        response = alt_response
-                                        data = alt_data
-                                        break
-                                    else:
-                                        print(f"❌ Alternative URL also failed with status: {alt_response.status_code}")
-                                except Exception as alt_error:
-                                    print(f"❌ Alternative URL failed: {alt_url} - {str(alt_error)}")
-                                    continue
-                        else:
-                            print(f"❌ 404 error and no alternative URLs or not first batch - stopping")
-                    else:
-                        response.raise_for_status()
-                        data = response.json()
-                    
-                    # Only proceed if we have valid data
-                    if data is None:
-                        print(f"❌ Could not get valid data from any API endpoint")
-                        break
-                    
-                    # Debug logging to see what we're getting
-                    print(f"🔍 API response keys: {list(data.keys())}")
-                    print(f"🔍 Total records in response: {data.get('nhits', 'unknown')}")
-                    
-                    batch = data.get("records", [])
-                    print(f"🔍 Batch size: {len(batch)}")
-                    if not batch:
-                        break
-                    
-                    # Process batch
-                    if batch and len(batch) > 0:
-                        # Debug: show structure of first record
-                        first_record = batch[0]
-                        print(f"🔍 First record keys: {list(first_record.keys())}")
-                        if "fields" in first_record:
-                            print(f"🔍 First record fields keys: {list(first_record['fields'].keys())}")
-                            # Check for date fields
-                            date_fields = [k for k in first_record['fields'].keys() if 'date' in k.lower()]
-                            print(f"🔍 Date-related fields: {date_fields}")
-                    
-                    processed_count = 0
-                    for record in batch:
-                        processed = self._process_portal_record(record, campaign.county, portal_config["name"])
-                        if processed:
-                            records.append(processed)
-                            processed_count += 1
-                    
-                    print(f"🔍 Processed {processed_count}/{len(batch)} records successfully")
-                    
-                    if len(batch) < 100:
-                        break
-                    start += 100
-                    
-                except Exception as e:
-                    error_msg = str(e)
-                    print(f"❌ Error fetching from portal: {error_msg}")
-                    
-                    # Check if this is a 404 error by examining response if available
-                    is_http_error = False
-                    if response is not None:
-                        print(f"❌ Response status from failed request: {response.status_code}")
-                        if response.status_code == 404:
-                            print(f"❌ Got 404 - endpoint doesn't exist")
-                            is_http_error = True
-                            try:
-                                response_text = response.text
-                                if "page doesn't exist" in response_text.lower():
-                                    print(f"❌ Confirmed: API endpoint doesn't exist (404 HTML page returned)")
-                                else:
-                                    print(f"❌ Response body sample: {response_text[:200]}...")
-                            except:
-                                pass
-                    
-                    # Try alternative URLs for Nottinghamshire if primary fails
-                    success_with_alt = False
-                    if (("Name or service not known" in error_msg or "[Errno -2]" in error_msg or is_http_error) and start == 0):
-                        alternative_urls = portal_config.get("alternative_urls", [])
-                        if alternative_urls:
-                            print(f"🔄 Trying alternative URLs for {portal_config['name']}...")
-                            for alt_url in alternative_urls:
-                                try:
-                                    print(f"🔄 Trying alternative URL: {alt_url}")
-                                    response = await client.get(alt_url, params=params)
-                                    print(f"✅ Alternative URL success: {response.status_code}")
-                                    response.raise_for_status()
-                                    data = response.json()
-                                    
-                                    # Update the portal config to use the working URL
-                                    portal_config["base_url"] = alt_url
-                                    print(f"✅ Updated {portal_config['name']} to use: {alt_url}")
-                                    
-                                    # Process the successful response (continue normal flow)
-                                    batch = data.get("records", [])
-                                    print(f"🔍 Batch size from alternative URL: {len(batch)}")
-                                    if not batch:
-                                        break
-                                    
-                                    # Process batch (same logic as main success path)
-                                    processed_count = 0
-                                    for record in batch:
-                                        processed = self._process_portal_record(record, campaign.county, portal_config["name"])
-                                        if processed:
-                                            records.append(processed)
-                                            processed_count += 1
-                                    
-                                    print(f"🔍 Processed {processed_count}/{len(batch)} records successfully from alternative URL")
-                                    
-                                    if len(batch) < 100:
-                                        break
-                                    start += 100
-                                    success_with_alt = True
-                                    break  # Exit the alternative URL loop
-                                    
-                                except Exception as alt_error:
-                                    print(f"❌ Alternative URL failed: {alt_url} - {str(alt_error)}")
-                                    continue
-                            
-                            if not success_with_alt:
-                                print(f"❌ All alternative URLs failed for {portal_config['name']}")
-                                break
-                        else:
-                            print(f"❌ DNS resolution failed for {portal_config['base_url']}")
-                            print(f"❌ This could be a temporary network issue or the API endpoint may have changed")
-                            break
-                    else:
-                        # Other types of errors
-                        if "timeout" in error_msg.lower():
-                            print(f"❌ Request timed out - the API may be slow or unavailable")
-                        
-                        try:
-                            if response is not None:
-                                error_text = await response.aread()
-                                print(f"❌ Error response body: {error_text.decode('utf-8', errors='ignore')}")
-                        except Exception as text_error:
-                            print(f"❌ Could not read error response: {text_error}")
-                        
-                        if not success_with_alt:
-                            break
-        
-        # Filter by date
+    @classmethod
+    async def prefetch_portals(cls, campaigns: List[PlanningApplicationCampaign]) -> Dict[str, Any]:
+        """
+        Fetch the portals of several campaigns concurrently, once per portal
+        
+        Campaigns watching the same county share one download. Records are
+        processed but not date filtered; pass them to run_campaign(prefetched=...).
+        
+        Returns:
+            Portal key (lowercase county) -> records, or the exception raised fetching it
+        """
+        by_portal: Dict[str, List[PlanningApplicationCampaign]] = {}
+        for campaign in campaigns:
+            by_portal.setdefault(campaign.county.lower(), []).append(campaign)
+        
+        results: Dict[str, Any] = {}
+        jobs = []
+        for key, portal_campaigns in by_portal.items():
+            try:
+                portal_config = cls._get_portal_config(key)
+            except ValueError as e:
+                results[key] = e
+                continue
+            
+            # Server-side filter from the oldest watermark; none if any campaign needs a full fetch
+            watermarks = [cls._get_watermark(campaign, key)[0] for campaign in portal_campaigns]
+            since = None if any(w is None for w in watermarks) else cls._fetch_since(min(watermarks))
+            
+            # Stored under the campaign's county, like fetch_planning_data
+            county = portal_campaigns[0].county
+            jobs.append((key, {
+                "portal_config": portal_config,
+                "process": lambda record, county=county, name=portal_config["name"]: cls._process_portal_record(record, county, name),
+                "max_records": max(campaign.max_results_per_run or 300 for campaign in portal_campaigns),
+                "since": since
+            }))
+        
+        if jobs:
+            async with PlanningPortalFetcher() as fetcher:
+                fetched = await fetcher.fetch_portals([job for _, job in jobs])
+            results.update(zip([key for key, _ in jobs], fetched))
+        return results
+
+    def _filter_by_date(self, records: List[Dict[str, Any]], days_back: int) -> List[Dict[str, Any]]:
+        """Keep records validated within the last days_back days"""
         cutoff_date = datetime.now(timezone.utc) - timedelta(days=days_back)
         filtered_records = []
         
@@ -269,7 +151,97 @@ class PlanningApplicationService:
         print(f"🔍 After date filtering: {len(filtered_records)} records remain")
         return filtered_records
 
-    def _process_portal_record(self, record: Dict[str, Any], county: str, portal_name: str) -> Optional[Dict[str, Any]]:
+    @classmethod
+    def _get_watermark(cls, campaign: PlanningApplicationCampaign, portal_key: str = None) -> Tuple[Optional[datetime], set]:
+        """
+        High-watermark of a campaign for its portal
+        
+        Returns:
+            (latest date_validated already processed, references processed at that date)
+        """
+        watermark = (campaign.portal_watermarks or {}).get(portal_key or campaign.county.lower())
+        if not watermark:
+            return None, set()
+        try:
+            since = datetime.fromisoformat(watermark["date"])
+        except (KeyError, TypeError, ValueError):
+            return None, set()
+        if since.tzinfo is None:
+            since = since.replace(tzinfo=timezone.utc)
+        return since, set(watermark.get("references") or [])
+
+    @staticmethod
+    def _fetch_since(watermark: Optional[datetime]) -> Optional[datetime]:
+        """
+        Date to fetch a portal from for a watermark
+        
+        Portals return records in no particular order and applications can be
+        published after later ones, so a window before the watermark is
+        re-fetched each run (PLANNING_WATERMARK_OVERLAP_DAYS).
+        """
+        if watermark is None:
+            return None
+        return watermark - timedelta(days=settings.PLANNING_WATERMARK_OVERLAP_DAYS)
+
+    def _apply_watermark(self, records: List[Dict[str, Any]], since: Optional[datetime], seen_references: set) -> List[Dict[str, Any]]:
+        """
+        Records that earlier runs have not processed yet
+        
+        Records newer than the watermark are new. Records at or below it are
+        only skipped once they are stored, so an application published late
+        with an earlier validation date is still classified and analysed.
+        """
+        if since is None:
+            return records
+        new_records = []
+        overlap = []
+        for record in records:
+            date_validated = self._record_date(record)
+            if date_validated is None or date_validated > since:
+                new_records.append(record)
+            elif date_validated == since and record["reference"] not in seen_references:
+                new_records.append(record)
+            else:
+                overlap.append(record)
+        
+        if overlap:
+            stored = {
+                reference for (reference,) in self.db.query(PlanningApplication.reference).filter(
+                    PlanningApplication.tenant_id == self.tenant_id,
+                    PlanningApplication.reference.in_({record["reference"] for record in overlap})
+                ).all()
+            }
+            new_records.extend(record for record in overlap if record["reference"] not in stored)
+        return new_records
+
+    def _record_date(self, record: Dict[str, Any]) -> Optional[datetime]:
+        """date_validated of a processed record as an aware datetime"""
+        date_validated = self._parse_date(record.get("date_validated"))
+        if date_validated is not None and date_validated.tzinfo is None:
+            date_validated = date_validated.replace(tzinfo=timezone.utc)
+        return date_validated
+
+    def _advance_watermark(self, campaign: PlanningApplicationCampaign, records: List[Dict[str, Any]]):
+        """Move the campaign's watermark for its portal up to the newest fetched record"""
+        portal_key = campaign.county.lower()
+        latest, references = self._get_watermark(campaign, portal_key)
+        for record in records:
+            date_validated = self._record_date(record)
+            if date_validated is None or (latest is not None and date_validated < latest):
+                continue
+            if latest is None or date_validated > latest:
+                latest, references = date_validated, set()
+            references.add(record["reference"])
+        
+        if latest is None:
+            return
+        # New dict so SQLAlchemy sees the JSON column change
+        watermarks = dict(campaign.portal_watermarks or {})
+        watermarks[portal_key] = {"date": latest.isoformat(), "references": sorted(references)}
+        campaign.portal_watermarks = watermarks
+
+    @classmethod
+    def _process_portal_record(cls, record: Dict[str, Any], county: str, portal_name: str) -> Optional[Dict[str, Any]]:
         """Process a single record from the planning portal"""
         try:
             fields = record.get("fields", {})
@@ -290,7 +262,7 @@ class PlanningApplicationService:
                 "status": fields.get("status", "validated"),
                 "latitude": lat,
                 "longitude": lon,
-                "postcode": self._extract_postcode(fields.get("location", "") or fields.get("address", "")),
+                "postcode": cls._extract_postcode(fields.get("location", "") or fields.get("address", "")),
                 "county": county,
                 "source_portal": f"{portal_name.lower()}_opendatasoft"
             }
@@ -315,7 +287,8 @@ class PlanningApplicationService:
         
         return None
 
-    def _extract_postcode(self, address: str) -> Optional[str]:
+    @staticmethod
+    def _extract_postcode(address: str) -> Optional[str]:
         """Extract UK postcode from address string"""
         if not address:
             return None
@@ -327,55 +300,16 @@ class PlanningApplicationService:
 
     def classify_application(self, proposal: str, tenant_id: str = None) -> Tuple[str, int]:
         """Classify application type and calculate relevance score for tenant"""
-        if not proposal:
-            return "other", 0
-        
-        proposal_lower = proposal.lower()
-        
-        # Get tenant-specific keywords
-        keywords = self._get_tenant_keywords(tenant_id or self.tenant_id)
-        
-        # Classification logic
-        if any(kw in proposal_lower for kw in ["residential", "dwelling", "flat", "apartment", "house"]):
-            base_type = "residential"
-        elif any(kw in proposal_lower for kw in ["industrial", "warehouse", "factory", "manufacturing"]):
-            base_type = "industrial"
-        elif any(kw in proposal_lower for kw in ["office", "retail", "commercial"]):
-            base_type = "commercial"
-        elif "change of use" in proposal_lower:
-            base_type = "change_of_use"
-        else:
-            base_type = "other"
-        
-        # Calculate relevance score based on tenant keywords
-        score = 0
-        for keyword in keywords.get("include", []):
-            if keyword["keyword"].lower() in proposal_lower:
-                score += keyword.get("weight", 10)
-        
-        # Deduct for excluded keywords
-        for keyword in keywords.get("exclude", []):
-            if keyword["keyword"].lower() in proposal_lower:
-                score -= keyword.get("weight", 10)
-        
-        return base_type, max(0, min(100, score))
+        return self.get_classifier(tenant_id or self.tenant_id).classify(proposal)
 
-    def _get_tenant_keywords(self, tenant_id: str) -> Dict[str, List[Dict]]:
-        """Get tenant-specific keywords for classification"""
-        keywords = self.db.query(PlanningApplicationKeyword).filter(
-            PlanningApplicationKeyword.tenant_id == tenant_id,
-            PlanningApplicationKeyword.is_active == True
-        ).all()
-        
-        result = {"include": [], "exclude": []}
-        for kw in keywords:
-            result[kw.keyword_type].append({
-                "keyword": kw.keyword,
-                "weight": kw.weight,
-                "category": kw.category
-            })
-        
-        return result
+    def get_classifier(self, tenant_id: str = None) -> PlanningKeywordClassifier:
+        """Compiled keyword classifier, loaded once per tenant for this service instance (campaign run)"""
+        tenant_id = tenant_id or self.tenant_id
+        classifier = self._classifiers.get(tenant_id)
+        if classifier is None:
+            classifier = PlanningKeywordClassifier.for_tenant(self.db, tenant_id)
+            self._classifiers[tenant_id] = classifier
+        return classifier
 
     async def analyze_applications_with_ai(self, applications: List[Dict[str, Any]], tenant_id: str, max_analysis: int = 20) -> List[Dict[str, Any]]:
         """Analyze planning applications using AI"""
@@ -448,6 +382,7 @@ class PlanningApplicationService:
 
     def _build_ai_analysis_prompt(self, applications: List[Dict[str, Any]], tenant_context: str) -> str:
         """Build AI analysis prompt for planning applications"""
+        # Proposals are truncated for token limits
         return f"""
 You are a UK business development analyst helping to identify sales opportunities from planning applications.
 
@@ -463,15 +398,28 @@ Applications to analyze:
 {json.dumps([{
     "reference": app.get("reference"),
     "address": app.get("address"),
-    "proposal": app.get("proposal", "")[:500],  # Truncate for token limits
+    "proposal": app.get("proposal", "")[:500],
     "relevance_score": app.get("relevance_score", 0)
 } for app in applications], indent=2)}
 
 Return only a valid JSON array with the analysis for each application.
 """
 
-    async def run_campaign(self, campaign_id: str) -> Dict[str, Any]:
-        """Run a planning application campaign"""
+    async def run_campaign(self, campaign_id: str, full_refresh: bool = False, prefetched: Optional[List[Dict[str, Any]]] = None) -> Dict[str, Any]:
+        """
+        Run a planning application campaign
+        
+        Records at or below the campaign's portal watermark that are already
+        stored are not classified or analysed again, so scheduled runs skip
+        applications seen before. The watermark only advances when the fetch
+        was not cut off by max_results_per_run.
+        
+        Args:
+            campaign_id: Campaign UUID
+            full_refresh: Ignore the watermark and process everything fetched
+            prefetched: Records already fetched for the campaign's portal (see prefetch_portals);
+                copied before use, the list itself is not modified
+        """
         campaign = self.db.query(PlanningApplicationCampaign).filter(
             PlanningApplicationCampaign.id == campaign_id,
             PlanningApplicationCampaign.tenant_id == self.tenant_id
@@ -486,18 +434,33 @@ Return only a valid JSON array with the analysis for each application.
             campaign.last_run_at = datetime.now(timezone.utc)
             self.db.commit()
             
+            since, seen_references = (None, set()) if full_refresh else self._get_watermark(campaign)
+            
             # Fetch planning data
-            print(f"🔍 Fetching planning data for {campaign.county}...")
-            raw_applications = await self.fetch_planning_data(campaign)
+            if prefetched is not None:
+                # Prefetched records are shared by every campaign (and tenant) on the portal;
+                # classification and AI analysis below write into the dicts, so work on copies
+                fetched = [dict(record) for record in prefetched]
+            else:
+                print(f"🔍 Fetching planning data for {campaign.county}...")
+                fetched = await self._fetch_portal_records(campaign, since=self._fetch_since(since))
+            # A fetch cut off at the record limit may have missed records older than the newest one
+            truncated = len(fetched) >= (campaign.max_results_per_run or 300)
+            raw_applications = self._filter_by_date(fetched, campaign.days_to_monitor)
             print(f"🔍 Raw applications fetched: {len(raw_applications)}")
             
+            # Skip applications processed by earlier runs
+            unseen_applications = self._apply_watermark(raw_applications, since, seen_references)
+            print(f"🔍 Applications not processed by earlier runs: {len(unseen_applications)}")
+            
             # Filter applications based on campaign settings
-            filtered_apps = self._filter_applications(raw_applications, campaign)
+            filtered_apps = self._filter_applications(unseen_applications, campaign)
             print(f"🔍 Applications after filtering: {len(filtered_apps)}")
             
-            # Classify and score applications
+            # Classify and score applications (keywords compiled once for the run)
+            classifier = self.get_classifier(self.tenant_id)
             for app in filtered_apps:
-                app_type, score = self.classify_application(app.get("proposal", ""), self.tenant_id)
+                app_type, score = classifier.classify(app.get("proposal", ""))
                 app["application_type"] = app_type
                 app["relevance_score"] = score
                 app["tenant_classification"] = app_type
@@ -524,6 +487,8 @@ Return only a valid JSON array with the analysis for each application.
             campaign.ai_analysis_completed = len([app for app in filtered_apps if app.get("ai_summary")])
             campaign.consecutive_failures = 0
             campaign.last_error = None
+            if not truncated:
+                self._advance_watermark(campaign, raw_applications)
             
             # Set next run time if scheduled
             if campaign.is_scheduled:
@@ -570,55 +535,68 @@ Return only a valid JSON array with the analysis for each application.
         
         return filtered
 
-    async def _store_applications(self, applications: List[Dict[str, Any]], campaign: PlanningApplicationCampaign) -> List[PlanningApplication]:
-        """Store applications in database, avoiding duplicates"""
-        new_applications = []
-        
+    async def _store_applications(self, applications: List[Dict[str, Any]], campaign: PlanningApplicationCampaign) -> List[str]:
+        """
+        Store applications in database, avoiding duplicates
+        
+        Inserts in batches with INSERT ... ON CONFLICT (tenant_id, reference)
+        DO NOTHING RETURNING id, so existing applications are skipped by the
+        database instead of being looked up one by one.
+        
+        Returns:
+            IDs of newly stored applications
+        """
+        rows = []
+        seen = set()
+        analysis_date = datetime.now(timezone.utc).isoformat()
         for app_data in applications:
-            # Check if application already exists
-            existing = self.db.query(PlanningApplication).filter(
-                PlanningApplication.reference == app_data["reference"],
-                PlanningApplication.tenant_id == self.tenant_id
-            ).first()
-            
-            if existing:
-                continue  # Skip duplicates
+            if app_data["reference"] in seen:
+                continue  # Skip duplicates within the run
+            seen.add(app_data["reference"])
             
-            # Create new planning application record
-            planning_app = PlanningApplication(
-                tenant_id=self.tenant_id,  # Explicitly set tenant_id
-                reference=app_data["reference"],
-                address=app_data["address"],
-                proposal=app_data["proposal"],
-                application_type=ApplicationType(app_data.get("application_type", "other")),
-                status=PlanningApplicationStatus.VALIDATED,  # Default status
-                date_validated=self._parse_date(app_data.get("date_validated")),
-                latitude=app_data.get("latitude"),
-                longitude=app_data.get("longitude"),
-                postcode=app_data.get("postcode"),
-                county=app_data["county"],
-                source_portal=app_data["source_portal"],
-                tenant_classification=app_data.get("tenant_classification"),
-                relevance_score=app_data.get("relevance_score"),
-                ai_summary=app_data.get("ai_summary"),
-                why_fit=app_data.get("why_fit"),
-                suggested_sales_approach=app_data.get("suggested_sales_approach")
-            )
+            row = {
+                "id": str(uuid.uuid4()),
+                "tenant_id": self.tenant_id,  # Explicitly set tenant_id
+                "reference": app_data["reference"],
+                "address": app_data["address"],
+                "proposal": app_data["proposal"],
+                "application_type": ApplicationType(app_data.get("application_type", "other")),
+                "status": PlanningApplicationStatus.VALIDATED,  # Default status
+                "date_validated": self._parse_date(app_data.get("date_validated")),
+                "latitude": app_data.get("latitude"),
+                "longitude": app_data.get("longitude"),
+                "postcode": app_data.get("postcode"),
+                "county": app_data["county"],
+                "source_portal": app_data["source_portal"],
+                "tenant_classification": app_data.get("tenant_classification"),
+                "relevance_score": app_data.get("relevance_score"),
+                "ai_summary": app_data.get("ai_summary"),
+                "why_fit": app_data.get("why_fit"),
+                "suggested_sales_approach": app_data.get("suggested_sales_approach"),
+                "ai_analysis": None,
+                "is_archived": False,
+                "is_deleted": False
+            }
             
             # Store AI analysis as JSON
             if any(app_data.get(key) for key in ["ai_summary", "why_fit", "suggested_sales_approach"]):
-                planning_app.ai_analysis = {
+                row["ai_analysis"] = {
                     "summary": app_data.get("ai_summary"),
                     "why_fit": app_data.get("why_fit"),
                     "suggested_sales_approach": app_data.get("suggested_sales_approach"),
-                    "analysis_date": datetime.now(timezone.utc).isoformat()
+                    "analysis_date": analysis_date
                 }
-            
-            self.db.add(planning_app)
-            new_applications.append(planning_app)
+            rows.append(row)
+        
+        new_ids: List[str] = []
+        batch_size = settings.PLANNING_INSERT_BATCH_SIZE
+        for start in range(0, len(rows), batch_size):
+            stmt = pg_insert(PlanningApplication).values(rows[start:start + batch_size])
+            stmt = stmt.on_conflict_do_nothing(index_elements=["tenant_id", "reference"]).returning(PlanningApplication.id)
+            new_ids.extend(self.db.execute(stmt).scalars().all())
         
         self.db.commit()
-        return new_applications
+        return new_ids
 
     def _parse_date(self, date_str: str) -> Optional[datetime]:
         """Parse date string to datetime object"""
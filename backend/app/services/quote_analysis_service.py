@@ -154,7 +154,7 @@ class QuoteAnalysisService:
             try:
                 provider_response = await self.provider_service.generate(
                     prompt=prompt_obj,
-                    variables=prompt_variables,
+                    rendered=rendered,
                     temperature=rendered.get('temperature', 0.7),
                     max_tokens=max_tokens
                 )
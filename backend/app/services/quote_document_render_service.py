@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+"""
+Quote Document Render Service
+
+Renders quote Word/PDF documents off the event loop and caches them in MinIO.
+
+PERFORMANCE: python-docx/ReportLab rendering is CPU-bound, so it runs in a
+process pool instead of inside the async request handler. Rendered output is
+stored via StorageService under a key built from the quote id, the quote's
+updated_at and DocumentGeneratorService.TEMPLATE_VERSION, so repeat downloads
+of an unchanged quote are streamed from storage (or handed out as presigned
+URLs) without re-rendering. Editing a quote changes updated_at and therefore
+the key, so stale renders are never served.
+"""
+
+import asyncio
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Dict, Optional
+
+from app.core.config import settings
+from app.services.document_generator_service import DocumentGeneratorService
+
+logger = logging.getLogger(__name__)
+
+DOCUMENT_FORMATS: Dict[str, Dict[str, str]] = {
+    "pdf": {"media_type": "application/pdf", "extension": "pdf"},
+    "docx": {
+        "media_type": "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+        "extension": "docx"
+    },
+}
+
+_render_pool: Optional[ProcessPoolExecutor] = None
+# object name -> in-progress render, so concurrent requests share one render
+_inflight: Dict[str, "asyncio.Future[Optional[bytes]]"] = {}
+
+
+@dataclass
+class RenderedDocument:
+    """A rendered quote document: stored in MinIO (object_name) and/or held in memory (content)"""
+    media_type: str
+    filename: str
+    object_name: Optional[str] = None
+    content: Optional[bytes] = None
+    cached: bool = False
+
+
+def rendered_document_object_name(tenant_id: str, quote_id: str, updated_at: Optional[datetime], fmt: str) -> str:
+    """Storage key for a render of a specific quote revision and template version"""
+    revision = updated_at.strftime("%Y%m%dT%H%M%S%f") if updated_at else "initial"
+    extension = DOCUMENT_FORMATS[fmt]["extension"]
+    return (
+        f"quote_documents/{tenant_id}/{quote_id}/rendered/"
+        f"{revision}-t{DocumentGeneratorService.TEMPLATE_VERSION}.{extension}"
+    )
+
+
+def _render_in_worker(tenant_id: str, quote_id: str, fmt: str) -> Optional[bytes]:
+    """Runs in a pool process: loads the quote with its own session and renders it"""
+    from app.core.database import SessionLocal, _apply_rls_tenant_sync
+    from app.models.quotes import Quote
+    
+    db = SessionLocal()
+    try:
+        _apply_rls_tenant_sync(db, tenant_id)
+        quote = db.query(Quote).filter(
+            Quote.id == quote_id,
+            Quote.tenant_id == tenant_id
+        ).first()
+        if quote is None:
+            return None
+        
+        generator = DocumentGeneratorService(db, tenant_id)
+        if fmt == "pdf":
+            document = generator.generate_pdf_document(quote)
+        else:
+            document = generator.generate_word_document(quote)
+        return document.getvalue() if document else None
+    finally:
+        db.close()
+
+
+def _get_render_pool() -> ProcessPoolExecutor:
+    global _render_pool
+    if _render_pool is None:
+        # spawn: workers must not inherit the parent's DB connections or event loop
+        _render_pool = ProcessPoolExecutor(
+            max_workers=settings.QUOTE_DOCUMENT_RENDER_WORKERS,
+            mp_context=multiprocessing.get_context("spawn")
+        )
+    return _render_pool
+
+
+def shutdown_render_pool():
+    """Stop render worker processes (application shutdown)"""
+    global _render_pool
+    if _render_pool is not None:
+        _render_pool.shutdown(wait=False, cancel_futures=True)
+        _render_pool = None
+
+
+async def _render(tenant_id: str, quote_id: str, fmt: str) -> Optional[bytes]:
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_get_render_pool(), _render_in_worker, tenant_id, quote_id, fmt)
+
+
+class QuoteDocumentRenderService:
+    """
+    Service for serving rendered quote documents
+    
+    Features:
+    - Rendering in a process pool (never on the event loop)
+    - MinIO cache keyed by quote revision and template version
+    - Single render per key for concurrent requests
+    - Falls back to uncached rendering if object storage is unavailable
+    """
+    
+    def __init__(self, tenant_id: str, storage_service=None):
+        self.tenant_id = tenant_id
+        self._storage = storage_service
+    
+    @property
+    def storage(self):
+        if self._storage is None:
+            from app.services.storage_service import get_storage_service
+            self._storage = get_storage_service()
+        return self._storage
+    
+    async def get_document(
+        self,
+        quote_id: str,
+        quote_number: Optional[str],
+        updated_at: Optional[datetime],
+        fmt: str
+    ) -> Optional[RenderedDocument]:
+        """
+        Get a rendered document, rendering and caching it on first request
+        
+        Returns:
+            RenderedDocument, or None if the quote could not be rendered
+        """
+        object_name = rendered_document_object_name(self.tenant_id, quote_id, updated_at, fmt)
+        document = RenderedDocument(
+            media_type=DOCUMENT_FORMATS[fmt]["media_type"],
+            filename=f"quote_{quote_number or quote_id}.{DOCUMENT_FORMATS[fmt]['extension']}"
+        )
+        
+        try:
+            storage = self.storage
+            if await storage.file_exists(object_name):
+                document.object_name = object_name
+                document.cached = True
+                return document
+        except Exception as e:
+            logger.warning(f"Quote document cache unavailable, rendering without it: {e}")
+            storage = None
+        
+        content = await self._render_once(object_name, quote_id, fmt)
+        if content is None:
+            return None
+        document.content = content
+        
+        if storage is not None:
+            try:
+                await storage.upload_file(
+                    file_data=content,
+                    object_name=object_name,
+                    content_type=document.media_type,
+                    metadata={
+                        'quote_id': quote_id,
+                        'tenant_id': self.tenant_id,
+                        'template_version': DocumentGeneratorService.TEMPLATE_VERSION
+                    }
+                )
+                document.object_name = object_name
+            except Exception as e:
+                logger.warning(f"Failed to cache rendered quote document {object_name}: {e}")
+        
+        return document
+    
+    async def _render_once(self, object_name: str, quote_id: str, fmt: str) -> Optional[bytes]:
+        existing = _inflight.get(object_name)
+        if existing is not None:
+            return await asyncio.shield(existing)
+        
+        future = asyncio.ensure_future(_render(self.tenant_id, quote_id, fmt))
+        _inflight[object_name] = future
+        try:
+            return await asyncio.shield(future)
+        finally:
+            if future.done():
+                _inflight.pop(object_name, None)
+            else:
+                future.add_done_callback(lambda _: _inflight.pop(object_name, None))
+    
+    def get_download_url(self, object_name: str) -> str:
+        """Presigned URL for a cached render"""
+        return self.storage.get_presigned_url(
+            object_name,
+            expires=timedelta(seconds=settings.QUOTE_DOCUMENT_URL_EXPIRY)
+        )
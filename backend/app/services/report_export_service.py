@@ -2,12 +2,30 @@
 """
 Report Export Service
 Generates CSV, PDF, and Excel exports for various reports
+
+PERFORMANCE: CSV and Excel output is produced incrementally. Rows can come
+from a list or from an async generator over a server-side cursor
+(stream_query_rows); CSV is emitted in ~64 KB chunks for StreamingResponse
+or a multipart upload, and Excel uses an openpyxl write-only workbook, so
+memory stays flat however many rows are exported. For async row sources the
+workbook is written in worker threads so the event loop stays free.
 """
 
-from io import BytesIO
-from typing import Dict, Any, List, Optional
-from datetime import datetime
+from io import BytesIO, StringIO
+from typing import Dict, Any, List, Optional, Iterable, Iterator, AsyncIterable, AsyncIterator, Callable, BinaryIO
+from datetime import date, datetime
+from decimal import Decimal
+import asyncio
 import csv
+import tempfile
+
+from app.core.config import settings
+
+CSV_CHUNK_SIZE = 64 * 1024
+SPOOL_MAX_SIZE = 16 * 1024 * 1024
+CSV_MEDIA_TYPE = "text/csv"
+EXCEL_MEDIA_TYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+PDF_MEDIA_TYPE = "application/pdf"
 
 try:
     from reportlab.lib.pagesizes import A4
@@ -20,12 +38,166 @@ except ImportError:
     REPORTLAB_AVAILABLE = False
 
 try:
-    import pandas as pd
     from openpyxl import Workbook
+    from openpyxl.cell import WriteOnlyCell
     from openpyxl.styles import Font, Alignment, PatternFill
-    PANDAS_AVAILABLE = True
+    from openpyxl.utils import get_column_letter
+    OPENPYXL_AVAILABLE = True
 except ImportError:
-    PANDAS_AVAILABLE = False
+    OPENPYXL_AVAILABLE = False
+
+
+async def stream_query_rows(
+    stmt,
+    row_mapper: Callable[[Any], Dict[str, Any]],
+    tenant_id: Optional[str] = None,
+    batch_size: Optional[int] = None
+) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Yield mapped rows of a SELECT from a server-side cursor
+    
+    Opens its own session (with row-level security for tenant_id), so it can
+    outlive the request's session when consumed by a StreamingResponse.
+    """
+    from app.core.database import get_async_db, current_tenant_id_context
+    
+    if tenant_id:
+        current_tenant_id_context.set(tenant_id)
+    batch_size = batch_size or settings.EXPORT_STREAM_BATCH_SIZE
+    async for db in get_async_db():
+        result = await db.stream(stmt.execution_options(yield_per=batch_size))
+        async for partition in result.partitions():
+            for row in partition:
+                yield row_mapper(row)
+
+
+class _CsvEncoder:
+    """Encodes dict rows as CSV bytes, handing back ~CSV_CHUNK_SIZE chunks"""
+    
+    def __init__(self, headers: Optional[List[str]] = None):
+        self.headers = headers
+        self._buffer = StringIO()
+        self._writer = None
+    
+    def add(self, row: Dict[str, Any]) -> Optional[bytes]:
+        if self._writer is None:
+            self.headers = self.headers or list(row.keys())
+            self._writer = csv.DictWriter(self._buffer, fieldnames=self.headers, extrasaction='ignore')
+            self._writer.writeheader()
+        self._writer.writerow(row)
+        if self._buffer.tell() >= CSV_CHUNK_SIZE:
+            return self.flush()
+        return None
+    
+    def flush(self) -> bytes:
+        if self._writer is None and self.headers:
+            self._writer = csv.DictWriter(self._buffer, fieldnames=self.headers, extrasaction='ignore')
+            self._writer.writeheader()
+        data = self._buffer.getvalue().encode('utf-8')
+        self._buffer.seek(0)
+        self._buffer.truncate()
+        return data
+
+
+def _excel_value(value: Any) -> Any:
+    if value is None:
+        return ''
+    if isinstance(value, (int, float, Decimal, date)) and not isinstance(value, bool):
+        return value.replace(tzinfo=None) if isinstance(value, datetime) else value
+    return str(value)
+
+
+class _ExcelWriter:
+    """
+    Appends dict rows to a write-only (constant memory) workbook
+    
+    Column widths must be fixed before the first row is written, so they
+    are sized from the header and the first EXPORT_XLSX_WIDTH_SAMPLE_ROWS
+    rows, which are held back until then.
+    """
+    
+    def __init__(self, summary: Optional[Dict[str, Any]] = None, headers: Optional[List[str]] = None):
+        self.summary = summary
+        self.headers = headers
+        self.rows_written = 0
+        self._workbook = Workbook(write_only=True)
+        self._sheet = self._workbook.create_sheet("Report")
+        self._sample: Optional[List[Dict[str, Any]]] = []
+    
+    def add(self, row: Dict[str, Any]):
+        if self._sample is not None:
+            self._sample.append(row)
+            if len(self._sample) >= settings.EXPORT_XLSX_WIDTH_SAMPLE_ROWS:
+                self._start()
+            return
+        self._append(row)
+    
+    def save(self, target):
+        if self._sample is not None:
+            self._start()
+        self._workbook.save(target)
+    
+    def _start(self):
+        sample, self._sample = self._sample, None
+        ws = self._sheet
+        headers = self.headers or (list(sample[0].keys()) if sample else [])
+        self.headers = headers
+        
+        for col_idx, header in enumerate(headers, start=1):
+            max_length = max([len(header)] + [len(str(row.get(header, ''))) for row in sample])
+            ws.column_dimensions[get_column_letter(col_idx)].width = min(max_length + 2, 50)
+        
+        if self.summary:
+            title = WriteOnlyCell(ws, value="Summary")
+            title.font = Font(bold=True, size=14)
+            ws.append([title])
+            for key, value in self.summary.items():
+                label = WriteOnlyCell(ws, value=str(key))
+                label.font = Font(bold=True)
+                ws.append([label, str(value)])
+            ws.append([])
+        
+        if headers:
+            header_fill = PatternFill(start_color="1976d2", end_color="1976d2", fill_type="solid")
+            header_font = Font(bold=True, color="FFFFFF")
+            header_cells = []
+            for header in headers:
+                cell = WriteOnlyCell(ws, value=header)
+                cell.fill = header_fill
+                cell.font = header_font
+                cell.alignment = Alignment(horizontal='center', vertical='center')
+                header_cells.append(cell)
+            ws.append(header_cells)
+        
+        for row in sample:
+            self._append(row)
+    
+    def _append(self, row: Dict[str, Any]):
+        self._sheet.append([_excel_value(row.get(header)) for header in self.headers])
+        self.rows_written += 1
+
+
+def _add_rows(writer: _ExcelWriter, rows: Iterable[Dict[str, Any]]):
+    for row in rows:
+        writer.add(row)
+
+
+def _require_openpyxl():
+    if not OPENPYXL_AVAILABLE:
+        raise ImportError("openpyxl is not installed. Install with: pip install openpyxl")
+
+
+def _file_chunks(file: BinaryIO, chunk_size: int = CSV_CHUNK_SIZE) -> Iterator[bytes]:
+    """Read a file from the start in chunks, closing it at the end"""
+    try:
+        file.seek(0)
+        while True:
+            chunk = file.read(chunk_size)
+            if not chunk:
+                break
+            yield chunk
+    finally:
+        file.close()
 
 
 class ReportExportService:
@@ -34,22 +206,31 @@ class ReportExportService:
     def __init__(self):
         pass
     
+    def iter_csv(self, rows: Iterable[Dict[str, Any]], headers: Optional[List[str]] = None) -> Iterator[bytes]:
+        """CSV as byte chunks (header from the first row unless given)"""
+        encoder = _CsvEncoder(headers)
+        for row in rows:
+            chunk = encoder.add(row)
+            if chunk:
+                yield chunk
+        tail = encoder.flush()
+        if tail:
+            yield tail
+    
+    async def aiter_csv(self, rows: AsyncIterable[Dict[str, Any]], headers: Optional[List[str]] = None) -> AsyncIterator[bytes]:
+        """CSV byte chunks from an async row source, e.g. stream_query_rows"""
+        encoder = _CsvEncoder(headers)
+        async for row in rows:
+            chunk = encoder.add(row)
+            if chunk:
+                yield chunk
+        tail = encoder.flush()
+        if tail:
+            yield tail
+    
     def export_to_csv(self, data: List[Dict[str, Any]], filename: str = "report") -> BytesIO:
         """Export data to CSV format"""
-        output = BytesIO()
-        
-        if not data:
-            return output
-        
-        # Get headers from first row
-        headers = list(data[0].keys())
-        
-        writer = csv.DictWriter(output, fieldnames=headers)
-        writer.writeheader()
-        writer.writerows(data)
-        
-        output.seek(0)
-        return output
+        return BytesIO(b"".join(self.iter_csv(data)))
     
     def export_to_pdf(self, title: str, data: List[Dict[str, Any]], 
                      summary: Optional[Dict[str, Any]] = None,
@@ -142,68 +323,56 @@ class ReportExportService:
                        summary: Optional[Dict[str, Any]] = None,
                        filename: str = "report") -> BytesIO:
         """Export data to Excel format using openpyxl"""
-        if not PANDAS_AVAILABLE:
-            raise ImportError("pandas and openpyxl are not installed. Install with: pip install pandas openpyxl")
-        
-        wb = Workbook()
-        ws = wb.active
-        ws.title = "Report"
-        
-        # Header style
-        header_fill = PatternFill(start_color="1976d2", end_color="1976d2", fill_type="solid")
-        header_font = Font(bold=True, color="FFFFFF")
-        
-        row = 1
-        
-        # Add summary if provided
-        if summary:
-            ws.merge_cells(f'A{row}:B{row}')
-            ws[f'A{row}'] = "Summary"
-            ws[f'A{row}'].font = Font(bold=True, size=14)
-            row += 1
-            
-            for key, value in summary.items():
-                ws[f'A{row}'] = str(key)
-                ws[f'B{row}'] = str(value)
-                ws[f'A{row}'].font = Font(bold=True)
-                row += 1
-            
-            row += 1
-        
-        # Add data table
-        if data:
-            headers = list(data[0].keys())
-            
-            # Write headers
-            for col_idx, header in enumerate(headers, start=1):
-                cell = ws.cell(row=row, column=col_idx, value=header)
-                cell.fill = header_fill
-                cell.font = header_font
-                cell.alignment = Alignment(horizontal='center', vertical='center')
-            
-            row += 1
-            
-            # Write data
-            for data_row in data:
-                for col_idx, header in enumerate(headers, start=1):
-                    ws.cell(row=row, column=col_idx, value=str(data_row.get(header, '')))
-                row += 1
-            
-            # Auto-adjust column widths
-            for col_idx, header in enumerate(headers, start=1):
-                max_length = len(header)
-                for data_row in data:
-                    value = str(data_row.get(header, ''))
-                    if len(value) > max_length:
-                        max_length = len(value)
-                ws.column_dimensions[chr(64 + col_idx)].width = min(max_length + 2, 50)
-        
-        # Save to BytesIO
+        _require_openpyxl()
+        writer = _ExcelWriter(summary)
+        for row in data:
+            writer.add(row)
         output = BytesIO()
-        wb.save(output)
+        writer.save(output)
         output.seek(0)
         return output
-
-
-
-
+    
+    def write_excel_file(self, rows: Iterable[Dict[str, Any]], summary: Optional[Dict[str, Any]] = None) -> BinaryIO:
+        """Excel workbook in a temporary file (spilled to disk when large), positioned at the start"""
+        _require_openpyxl()
+        writer = _ExcelWriter(summary)
+        for row in rows:
+            writer.add(row)
+        return self._save_to_tempfile(writer)
+    
+    async def awrite_excel_file(
+        self,
+        rows: AsyncIterable[Dict[str, Any]],
+        summary: Optional[Dict[str, Any]] = None,
+        batch_size: Optional[int] = None
+    ) -> BinaryIO:
+        """
+        write_excel_file for an async row source
+        
+        Rows are read on the event loop and handed to a worker thread in
+        batches; building cells and saving the workbook never run on the loop.
+        """
+        _require_openpyxl()
+        batch_size = batch_size or settings.EXPORT_STREAM_BATCH_SIZE
+        writer = await asyncio.to_thread(_ExcelWriter, summary)
+        batch: List[Dict[str, Any]] = []
+        async for row in rows:
+            batch.append(row)
+            if len(batch) >= batch_size:
+                await asyncio.to_thread(_add_rows, writer, batch)
+                batch = []
+        if batch:
+            await asyncio.to_thread(_add_rows, writer, batch)
+        return await asyncio.to_thread(self._save_to_tempfile, writer)
+    
+    @staticmethod
+    def _save_to_tempfile(writer: _ExcelWriter) -> BinaryIO:
+        output = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_SIZE)
+        writer.save(output)
+        output.seek(0)
+        return output
+    
+    @staticmethod
+    def file_chunks(file: BinaryIO) -> Iterator[bytes]:
+        """Chunks of a finished export file for StreamingResponse or upload_stream"""
+        return _file_chunks(file)
@@ -16,7 +16,8 @@ from app.models.crm import Customer, CustomerStatus
 from app.models.leads import Lead, LeadStatus
 from app.models.helpdesk import Ticket, TicketStatus
 from app.models.sales import SalesActivity
-from app.models.support_contract import SupportContract
+from app.models.customer_metrics import CustomerMetrics
+from app.services.customer_metrics_service import CUSTOMER_METRIC_SORT_COLUMNS, customer_metrics_select
 
 logger = logging.getLogger(__name__)
 
@@ -44,7 +45,7 @@ class ReportingService:
         if not end_date:
             end_date = datetime.now(timezone.utc)
         
-        # Lead counts
+        # One aggregate query per table (COUNT/SUM ... FILTER) instead of one per metric
         total_leads = self.db.query(func.count(Lead.id)).filter(
             and_(
                 Lead.tenant_id == self.tenant_id,
@@ -54,60 +55,38 @@ class ReportingService:
             )
         ).scalar() or 0
         
-        # Prospect counts
-        prospects = self.db.query(func.count(Customer.id)).filter(
+        customer_counts = self.db.query(
+            func.count(Customer.id).filter(Customer.status == CustomerStatus.PROSPECT).label('prospects'),
+            func.count(Customer.id).filter(Customer.status == CustomerStatus.CUSTOMER).label('customers')
+        ).filter(
             and_(
                 Customer.tenant_id == self.tenant_id,
-                Customer.status == CustomerStatus.PROSPECT,
+                Customer.status.in_([CustomerStatus.PROSPECT, CustomerStatus.CUSTOMER]),
                 Customer.created_at >= start_date,
                 Customer.created_at <= end_date,
                 Customer.is_deleted == False
             )
-        ).scalar() or 0
-        
-        # Customer counts
-        customers = self.db.query(func.count(Customer.id)).filter(
-            and_(
-                Customer.tenant_id == self.tenant_id,
-                Customer.status == CustomerStatus.CUSTOMER,
-                Customer.created_at >= start_date,
-                Customer.created_at <= end_date,
-                Customer.is_deleted == False
-            )
-        ).scalar() or 0
-        
-        # Quote metrics
-        quotes_sent = self.db.query(func.count(Quote.id)).filter(
+        ).one()
+        prospects = customer_counts.prospects or 0
+        customers = customer_counts.customers or 0
+        
+        accepted = Quote.status == QuoteStatus.ACCEPTED
+        quote_counts = self.db.query(
+            func.count(Quote.id).filter(Quote.status == QuoteStatus.SENT).label('sent'),
+            func.count(Quote.id).filter(accepted).label('accepted'),
+            func.sum(Quote.total_amount).filter(accepted).label('revenue')
+        ).filter(
             and_(
                 Quote.tenant_id == self.tenant_id,
-                Quote.status == QuoteStatus.SENT,
+                Quote.status.in_([QuoteStatus.SENT, QuoteStatus.ACCEPTED]),
                 Quote.created_at >= start_date,
                 Quote.created_at <= end_date,
                 Quote.is_deleted == False
             )
-        ).scalar() or 0
-        
-        quotes_accepted = self.db.query(func.count(Quote.id)).filter(
-            and_(
-                Quote.tenant_id == self.tenant_id,
-                Quote.status == QuoteStatus.ACCEPTED,
-                Quote.created_at >= start_date,
-                Quote.created_at <= end_date,
-                Quote.is_deleted == False
-            )
-        ).scalar() or 0
-        
-        # Revenue
-        revenue_result = self.db.query(func.sum(Quote.total_amount)).filter(
-            and_(
-                Quote.tenant_id == self.tenant_id,
-                Quote.status == QuoteStatus.ACCEPTED,
-                Quote.created_at >= start_date,
-                Quote.created_at <= end_date,
-                Quote.is_deleted == False
-            )
-        ).scalar()
-        total_revenue = float(revenue_result) if revenue_result else 0.0
+        ).one()
+        quotes_sent = quote_counts.sent or 0
+        quotes_accepted = quote_counts.accepted or 0
+        total_revenue = float(quote_counts.revenue) if quote_counts.revenue else 0.0
         
         # Conversion rates
         conversion_rate = (customers / total_leads * 100) if total_leads > 0 else 0.0
@@ -371,38 +350,15 @@ class ReportingService:
         Returns:
             Dictionary with CLV metrics
         """
-        # Get all accepted quotes for customer
-        quotes = self.db.query(Quote).filter(
-            and_(
-                Quote.tenant_id == self.tenant_id,
-                Quote.customer_id == customer_id,
-                Quote.status == QuoteStatus.ACCEPTED,
-                Quote.is_deleted == False
-            )
-        ).all()
+        # One statement with a grouped aggregate per source table (no ORM rows loaded)
+        metrics = self.db.execute(
+            customer_metrics_select(self.tenant_id, [customer_id])
+        ).first()
         
-        total_revenue = sum(float(q.total_amount or 0) for q in quotes)
-        quote_count = len(quotes)
-        
-        # Get support contracts
-        contracts = self.db.query(SupportContract).filter(
-            and_(
-                SupportContract.tenant_id == self.tenant_id,
-                SupportContract.customer_id == customer_id,
-                SupportContract.is_active == True
-            )
-        ).all()
-        
-        monthly_recurring = sum(float(c.monthly_value or 0) for c in contracts)
-        annual_recurring = monthly_recurring * 12
-        
-        # Get tickets
-        tickets = self.db.query(Ticket).filter(
-            and_(
-                Ticket.tenant_id == self.tenant_id,
-                Ticket.customer_id == customer_id
-            )
-        ).all()
+        total_revenue = float(metrics.lifetime_value) if metrics else 0.0
+        quote_count = metrics.accepted_quote_count if metrics else 0
+        monthly_recurring = float(metrics.monthly_recurring_revenue) if metrics else 0.0
+        first_accepted_at = metrics.first_accepted_at if metrics else None
         
         return {
             'customer_id': customer_id,
@@ -410,8 +366,63 @@ class ReportingService:
             'quote_count': quote_count,
             'average_deal_value': round(total_revenue / quote_count, 2) if quote_count > 0 else 0.0,
             'monthly_recurring_revenue': monthly_recurring,
-            'annual_recurring_revenue': annual_recurring,
-            'ticket_count': len(tickets),
-            'customer_since': quotes[0].created_at.isoformat() if quotes else None
+            'annual_recurring_revenue': monthly_recurring * 12,
+            'ticket_count': metrics.ticket_count if metrics else 0,
+            'customer_since': first_accepted_at.isoformat() if first_accepted_at else None
         }
-
+    
+    def get_top_customers_by_value(
+        self,
+        sort_by: str = "lifetime_value",
+        limit: int = 20,
+        min_lifetime_value: Optional[float] = None,
+        min_mrr: Optional[float] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Rank customers by lifetime value or MRR from the customer_metrics rollup
+        
+        Args:
+            sort_by: "lifetime_value" or "mrr"
+            limit: Maximum customers returned
+            min_lifetime_value: Only customers with at least this lifetime value
+            min_mrr: Only customers with at least this MRR
+        
+        Returns:
+            List of customers with their rollup metrics
+        """
+        sort_column = CUSTOMER_METRIC_SORT_COLUMNS.get(sort_by)
+        if sort_column is None:
+            raise ValueError(f"Unsupported sort_by: {sort_by}")
+        
+        query = self.db.query(Customer.company_name, Customer.status, CustomerMetrics).join(
+            CustomerMetrics, CustomerMetrics.customer_id == Customer.id
+        ).filter(
+            and_(
+                CustomerMetrics.tenant_id == self.tenant_id,
+                Customer.tenant_id == self.tenant_id,
+                Customer.is_deleted == False
+            )
+        )
+        if min_lifetime_value is not None:
+            query = query.filter(CustomerMetrics.lifetime_value >= min_lifetime_value)
+        if min_mrr is not None:
+            query = query.filter(CustomerMetrics.monthly_recurring_revenue >= min_mrr)
+        
+        rows = query.order_by(desc(sort_column), CustomerMetrics.customer_id).limit(limit).all()
+        
+        return [
+            {
+                'customer_id': metrics.customer_id,
+                'company_name': company_name,
+                'status': customer_status.value if hasattr(customer_status, 'value') else customer_status,
+                'lifetime_value': float(metrics.lifetime_value or 0),
+                'accepted_quote_count': metrics.accepted_quote_count,
+                'monthly_recurring_revenue': float(metrics.monthly_recurring_revenue or 0),
+                'annual_recurring_revenue': float(metrics.monthly_recurring_revenue or 0) * 12,
+                'active_contract_count': metrics.active_contract_count,
+                'ticket_count': metrics.ticket_count,
+                'customer_since': metrics.first_accepted_at.isoformat() if metrics.first_accepted_at else None,
+                'updated_at': metrics.updated_at.isoformat() if metrics.updated_at else None
+            }
+            for company_name, customer_status, metrics in rows
+        ]
@@ -186,12 +186,15 @@ class SARDocumentGenerator:
                 story.append(Spacer(1, 0.15*inch))
         
         # Communications
+        # record_counts is set for streamed exports, where data only holds the first records
         data = sar_data.get('data', {})
+        record_counts = sar_data.get('record_counts', {})
         communications = data.get('communications', [])
-        if communications:
+        communication_count = record_counts.get('communications', len(communications))
+        if communication_count:
             story.append(Paragraph('3.2 Communications', self.styles['SARSubheading']))
             story.append(Paragraph(
-                f'We hold {len(communications)} communication record(s) relating to you. '
+                f'We hold {communication_count} communication record(s) relating to you. '
                 'These include support tickets, emails, and activity notes. '
                 'Only AI-cleaned, customer-facing versions are included in this report. '
                 'Internal notes and references to other individuals have been redacted.',
@@ -214,9 +217,9 @@ class SARDocumentGenerator:
                             content = content[:500] + '... [Content truncated for brevity]'
                         story.append(Paragraph(f'<b>Content:</b> {content}', self.styles['SARBody']))
             
-            if len(communications) > 5:
+            if communication_count > 5:
                 story.append(Paragraph(
-                    f'<i>... and {len(communications) - 5} more communication record(s). '
+                    f'<i>... and {communication_count - 5} more communication record(s). '
                     'Full details are available in the digital export.</i>',
                     self.styles['SARBody']
                 ))
@@ -224,10 +227,11 @@ class SARDocumentGenerator:
         
         # Contracts and Accounts
         contracts = data.get('contracts_and_accounts', [])
-        if contracts:
+        contract_count = record_counts.get('contracts_and_accounts', len(contracts))
+        if contract_count:
             story.append(Paragraph('3.3 Contract and Account Data', self.styles['SARSubheading']))
             story.append(Paragraph(
-                f'We hold {len(contracts)} contract/account record(s) relating to you.',
+                f'We hold {contract_count} contract/account record(s) relating to you.',
                 self.styles['SARBody']
             ))
             story.append(Spacer(1, 0.1*inch))
@@ -5,8 +5,10 @@ Security Event Service
 SECURITY: Centralized service for logging and monitoring security events.
 """
 
+import asyncio
 import json
 import logging
+import uuid
 from datetime import datetime, timedelta, timezone
 from typing import Optional, Dict, Any, List
 from sqlalchemy.orm import Session
@@ -229,3 +231,133 @@ class SecurityEventService:
         
         return True
 
+
+class BufferedSecurityEventLogger:
+    """
+    Non-blocking security event writer for hot paths (e.g. rate limiting)
+    
+    PERFORMANCE: Events are buffered in memory and written in batches by a
+    background task on the async engine, so callers never wait on the
+    database. When the buffer is full, new events are dropped and counted.
+    """
+    
+    def __init__(self, max_size: Optional[int] = None, flush_interval: Optional[float] = None):
+        self.max_size = max_size or settings.SECURITY_EVENT_BUFFER_SIZE
+        self.flush_interval = flush_interval or settings.SECURITY_EVENT_FLUSH_INTERVAL
+        self.dropped = 0
+        self._pending: List[Dict[str, Any]] = []
+        self._task: Optional[asyncio.Task] = None
+    
+    def log_event(
+        self,
+        event_type: SecurityEventType,
+        description: str,
+        severity: SecurityEventSeverity = SecurityEventSeverity.MEDIUM,
+        tenant_id: Optional[str] = None,
+        user_id: Optional[str] = None,
+        ip_address: Optional[str] = None,
+        user_agent: Optional[str] = None,
+        metadata: Optional[Dict[str, Any]] = None
+    ):
+        """Queue a security event (same arguments as SecurityEventService.log_event)"""
+        if len(self._pending) >= self.max_size:
+            self.dropped += 1
+            return
+        
+        self._pending.append({
+            "event_type": event_type,
+            "description": description,
+            "severity": severity,
+            "tenant_id": tenant_id,
+            "user_id": user_id,
+            "ip_address": ip_address,
+            "user_agent": user_agent,
+            "metadata": metadata,
+            "occurred_at": datetime.now(timezone.utc)
+        })
+        self._ensure_flusher()
+    
+    def _ensure_flusher(self):
+        if self._task is not None and not self._task.done():
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            # No loop (sync caller): written by the next flush
+            return
+        self._task = loop.create_task(self._run())
+    
+    async def _run(self):
+        # Exits once the buffer is empty; restarted by the next log_event
+        while self._pending:
+            await asyncio.sleep(self.flush_interval)
+            await self.flush()
+    
+    async def flush(self) -> int:
+        """
+        Write all buffered events in one transaction
+        
+        Returns:
+            Number of events written
+        """
+        batch, self._pending = self._pending, []
+        if not batch:
+            return 0
+        
+        try:
+            from app.core.database import AsyncSessionLocal
+            from app.models.tenant import User
+            
+            async with AsyncSessionLocal() as session:
+                # Resolve tenants for user-scoped events in one query; unknown users are
+                # dropped from the event so one stale id can't fail the whole batch
+                user_ids = {event["user_id"] for event in batch if event["user_id"]}
+                tenants = {}
+                if user_ids:
+                    rows = await session.execute(select(User.id, User.tenant_id).where(User.id.in_(user_ids)))
+                    tenants = dict(rows.all())
+                
+                for event in batch:
+                    if event["user_id"] and event["user_id"] not in tenants:
+                        event["user_id"] = None
+                    if event["user_id"] and not event["tenant_id"]:
+                        event["tenant_id"] = tenants[event["user_id"]]
+                
+                session.add_all([
+                    SecurityEvent(
+                        id=str(uuid.uuid4()),
+                        tenant_id=event["tenant_id"],
+                        user_id=event["user_id"],
+                        event_type=event["event_type"],
+                        severity=event["severity"],
+                        description=event["description"],
+                        ip_address=event["ip_address"],
+                        user_agent=event["user_agent"],
+                        event_metadata=json.dumps(event["metadata"]) if event["metadata"] else None,
+                        occurred_at=event["occurred_at"]
+                    )
+                    for event in batch
+                ])
+                await session.commit()
+            return len(batch)
+        except Exception as e:
+            logger.error(f"Failed to write {len(batch)} buffered security events: {e}")
+            return 0
+    
+    async def close(self):
+        """Stop the background flusher and write anything still buffered"""
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+        await self.flush()
+
+
+_security_event_buffer: Optional[BufferedSecurityEventLogger] = None
+
+
+def get_security_event_buffer() -> BufferedSecurityEventLogger:
+    """Get process-wide buffered security event logger"""
+    global _security_event_buffer
+    if _security_event_buffer is None:
+        _security_event_buffer = BufferedSecurityEventLogger()
+    return _security_event_buffer
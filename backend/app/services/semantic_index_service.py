@@ -0,0 +1,347 @@
+#!/usr/bin/env python3
+"""
+Semantic Index Service
+
+Embedding-based retrieval over knowledge base articles and historical tickets.
+
+PERFORMANCE: Similar articles/tickets are found with a local encoder and a
+NumPy cosine top-k (app.core.embeddings) instead of an LLM call. Each process
+keeps one index per tenant and kind; before every lookup the index is brought
+up to date with a single query for rows whose updated_at moved past the
+index watermark, so changes made by any API or Celery worker are picked up
+incrementally without rebuilding. updated_at is the transaction start time,
+so a row committed late by a long transaction can carry a timestamp below
+the watermark; each sync re-reads SEMANTIC_INDEX_SYNC_LAG seconds before it
+and only re-encodes rows whose updated_at changed. The ticket index keeps
+the SEMANTIC_INDEX_MAX_TICKETS most recently updated tickets. Deleted tickets leave no row to sync, so
+ids missing from the database are pruned when a search returns them and by
+a periodic existence check (SEMANTIC_INDEX_PRUNE_INTERVAL).
+
+Syncing and encoding are CPU/DB bound: call the service from a worker thread
+(run_in_threadpool) or a Celery task, never directly on the event loop.
+"""
+
+import heapq
+import logging
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.embeddings import VectorIndex, get_encoder, similar_pairs
+from app.models.helpdesk import Ticket
+from app.models.knowledge_base import KnowledgeBaseArticle
+
+logger = logging.getLogger(__name__)
+
+KIND_ARTICLES = "articles"
+KIND_TICKETS = "tickets"
+
+
+def article_text(title: str, summary: Optional[str], content: Optional[str]) -> str:
+    # Title is repeated to weight it above the body
+    return f"{title}. {title}. {summary or ''} {(content or '')[:4000]}"
+
+
+def ticket_text(subject: Optional[str], description: Optional[str]) -> str:
+    return f"{subject or ''}. {subject or ''}. {(description or '')[:4000]}"
+
+
+class _IndexState:
+    """Vector index for one tenant/kind plus its sync watermark"""
+    
+    def __init__(self, dimension: int):
+        self.index = VectorIndex(dimension)
+        self.watermark: Optional[datetime] = None
+        self.versions: Dict[str, datetime] = {}  # id -> updated_at of the indexed row
+        self.pruned_at = time.monotonic()
+        self.lock = threading.Lock()
+
+
+class SemanticIndexService:
+    """
+    Service for semantic retrieval of KB articles and similar tickets
+    
+    Features:
+    - Incrementally synced per-tenant vector indexes (articles, tickets)
+    - Cosine top-k article suggestions for a ticket
+    - Similar historical tickets
+    - Pairwise similarity for ticket pattern detection
+    """
+    
+    # (tenant_id, kind) -> _IndexState, least recently used first
+    _indexes: "OrderedDict[Tuple[str, str], _IndexState]" = OrderedDict()
+    _registry_lock = threading.Lock()
+    
+    def __init__(self, db: Session, tenant_id: str):
+        self.db = db
+        self.tenant_id = tenant_id
+        self.encoder = get_encoder()
+    
+    def _state(self, kind: str) -> _IndexState:
+        key = (self.tenant_id, kind)
+        with self._registry_lock:
+            state = self._indexes.get(key)
+            if state is None or state.index.dimension != self.encoder.dimension:
+                state = _IndexState(self.encoder.dimension)
+                self._indexes[key] = state
+            self._indexes.move_to_end(key)
+            while len(self._indexes) > settings.SEMANTIC_INDEX_MAX_TENANTS * 2:
+                self._indexes.popitem(last=False)
+            return state
+    
+    @staticmethod
+    def _since(state: _IndexState) -> datetime:
+        return state.watermark - timedelta(seconds=settings.SEMANTIC_INDEX_SYNC_LAG)
+    
+    @staticmethod
+    def _changed(state: _IndexState, rows: Sequence) -> list:
+        """Rows not already indexed at their current updated_at (re-read by the sync lag window)"""
+        return [row for row in rows if row.id not in state.index or state.versions.get(row.id) != row.updated_at]
+    
+    @staticmethod
+    def _upsert(state: _IndexState, rows: Sequence, vectors):
+        state.index.upsert([row.id for row in rows], vectors)
+        state.versions.update((row.id, row.updated_at) for row in rows)
+    
+    @staticmethod
+    def _remove(state: _IndexState, ids: Sequence[str]):
+        state.index.remove(ids)
+        for item_id in ids:
+            state.versions.pop(item_id, None)
+    
+    @staticmethod
+    def _advance_watermark(state: _IndexState, rows: Sequence):
+        # Rows re-read from the lag window never move the watermark back
+        timestamps = [row.updated_at for row in rows]
+        if state.watermark is not None:
+            timestamps.append(state.watermark)
+        if timestamps:
+            state.watermark = max(timestamps)
+    
+    def _sync_articles(self) -> VectorIndex:
+        state = self._state(KIND_ARTICLES)
+        with state.lock:
+            stmt = select(
+                KnowledgeBaseArticle.id,
+                KnowledgeBaseArticle.title,
+                KnowledgeBaseArticle.summary,
+                KnowledgeBaseArticle.content,
+                KnowledgeBaseArticle.is_published,
+                KnowledgeBaseArticle.is_deleted,
+                KnowledgeBaseArticle.updated_at
+            ).where(KnowledgeBaseArticle.tenant_id == self.tenant_id)
+            if state.watermark is not None:
+                # Re-read the lag window so rows committed late are not missed (upsert is idempotent)
+                stmt = stmt.where(KnowledgeBaseArticle.updated_at >= self._since(state))
+            rows = self.db.execute(stmt).all()
+            
+            changed = self._changed(state, rows)
+            live = [row for row in changed if row.is_published and not row.is_deleted]
+            self._remove(state, [row.id for row in changed if not (row.is_published and not row.is_deleted)])
+            if live:
+                vectors = self.encoder.encode([article_text(row.title, row.summary, row.content) for row in live])
+                self._upsert(state, live, vectors)
+            self._advance_watermark(state, rows)
+            return state.index
+    
+    def _sync_tickets(self) -> VectorIndex:
+        state = self._state(KIND_TICKETS)
+        with state.lock:
+            stmt = select(
+                Ticket.id,
+                Ticket.subject,
+                Ticket.description,
+                Ticket.updated_at
+            ).where(Ticket.tenant_id == self.tenant_id)
+            if state.watermark is None:
+                # Initial build covers the most recent tickets only
+                stmt = stmt.order_by(Ticket.updated_at.desc()).limit(settings.SEMANTIC_INDEX_MAX_TICKETS)
+            else:
+                # Re-read the lag window so rows committed late are not missed (upsert is idempotent)
+                stmt = stmt.where(Ticket.updated_at >= self._since(state))
+            rows = self.db.execute(stmt).all()
+            
+            changed = self._changed(state, rows)
+            if changed:
+                vectors = self.encoder.encode([ticket_text(row.subject, row.description) for row in changed])
+                self._upsert(state, changed, vectors)
+                self._evict_oldest_tickets(state)
+            self._advance_watermark(state, rows)
+            if time.monotonic() - state.pruned_at >= settings.SEMANTIC_INDEX_PRUNE_INTERVAL:
+                self._prune_tickets(state)
+                state.pruned_at = time.monotonic()
+            return state.index
+    
+    def _evict_oldest_tickets(self, state: _IndexState):
+        """Keep only the SEMANTIC_INDEX_MAX_TICKETS most recently updated tickets"""
+        excess = len(state.index) - settings.SEMANTIC_INDEX_MAX_TICKETS
+        if excess > 0:
+            self._remove(state, heapq.nsmallest(excess, state.index.ids(), key=state.versions.__getitem__))
+    
+    def _prune_tickets(self, state: _IndexState, chunk_size: int = 5000):
+        """Remove indexed tickets that were deleted since they were indexed"""
+        indexed = state.index.ids()
+        indexed_set = set(indexed)
+        for item_id in [item_id for item_id in state.versions if item_id not in indexed_set]:
+            del state.versions[item_id]
+        missing = []
+        for start in range(0, len(indexed), chunk_size):
+            chunk = indexed[start:start + chunk_size]
+            existing = set(self.db.execute(
+                select(Ticket.id).where(Ticket.tenant_id == self.tenant_id, Ticket.id.in_(chunk))
+            ).scalars().all())
+            missing.extend(ticket_id for ticket_id in chunk if ticket_id not in existing)
+        if missing:
+            self._remove(state, missing)
+            logger.info(f"Pruned {len(missing)} deleted tickets from the semantic index of tenant {self.tenant_id}")
+    
+    def forget_tickets(self, ticket_ids: Sequence[str]):
+        """Drop tickets from this tenant's index (e.g. search hits that no longer exist)"""
+        self.forget_tenant_tickets(self.tenant_id, ticket_ids)
+    
+    @classmethod
+    def forget_tenant_tickets(cls, tenant_id: str, ticket_ids: Sequence[str]):
+        """Drop tickets from a tenant's index without building it (no encoder or database needed)"""
+        if not ticket_ids:
+            return
+        with cls._registry_lock:
+            state = cls._indexes.get((tenant_id, KIND_TICKETS))
+        if state is not None:
+            # Not under state.lock: called from the event loop; stale versions are dropped by the next prune
+            state.index.remove(ticket_ids)
+    
+    def similar_ticket_ids(
+        self,
+        ticket_id: str,
+        subject: Optional[str],
+        description: Optional[str],
+        limit: int = 5,
+        min_score: Optional[float] = None
+    ) -> List[Tuple[str, float]]:
+        """
+        Index-only similar ticket search (syncs the index, no ticket rows loaded)
+        
+        Returns:
+            List of (ticket id, cosine similarity) tuples, best first
+        """
+        index = self._sync_tickets()
+        return index.search(
+            self.encoder.encode([ticket_text(subject, description)]),
+            k=limit,
+            min_score=settings.SIMILAR_TICKET_THRESHOLD if min_score is None else min_score,
+            exclude={ticket_id}
+        )[0]
+    
+    def find_similar_articles(
+        self,
+        text: str,
+        limit: int = 5,
+        min_score: Optional[float] = None
+    ) -> List[Tuple[KnowledgeBaseArticle, float]]:
+        """
+        Published articles most similar to a piece of text
+        
+        Args:
+            text: Query text (e.g. ticket subject + description)
+            limit: Maximum number of articles
+            min_score: Minimum cosine similarity (default SEMANTIC_ARTICLE_MIN_SCORE)
+        
+        Returns:
+            List of (article, cosine similarity) tuples, best first
+        """
+        index = self._sync_articles()
+        hits = index.search(
+            self.encoder.encode([text]),
+            k=limit,
+            min_score=settings.SEMANTIC_ARTICLE_MIN_SCORE if min_score is None else min_score
+        )[0]
+        if not hits:
+            return []
+        
+        articles = self.db.query(KnowledgeBaseArticle).filter(
+            KnowledgeBaseArticle.tenant_id == self.tenant_id,
+            KnowledgeBaseArticle.id.in_([article_id for article_id, _ in hits]),
+            KnowledgeBaseArticle.is_published == True
+        ).all()
+        by_id = {article.id: article for article in articles}
+        return [(by_id[article_id], score) for article_id, score in hits if article_id in by_id]
+    
+    def find_similar_tickets(
+        self,
+        ticket: Ticket,
+        limit: int = 5,
+        min_score: Optional[float] = None,
+        customer_id: Optional[str] = None
+    ) -> List[Tuple[Ticket, float]]:
+        """
+        Historical tickets most similar to a ticket
+        
+        Args:
+            ticket: Ticket to compare against
+            limit: Maximum number of tickets
+            min_score: Minimum cosine similarity (default SIMILAR_TICKET_THRESHOLD)
+            customer_id: Optionally restrict to one customer's tickets
+        
+        Returns:
+            List of (ticket, cosine similarity) tuples, best first
+        """
+        # Over-fetch when filtering by customer after retrieval
+        fetch = limit * 5 if customer_id else limit
+        hits = self.similar_ticket_ids(ticket.id, ticket.subject, ticket.description, fetch, min_score)
+        if not hits:
+            return []
+        
+        tickets = self.db.query(Ticket).filter(
+            Ticket.tenant_id == self.tenant_id,
+            Ticket.id.in_([ticket_id for ticket_id, _ in hits])
+        ).all()
+        by_id = {t.id: t for t in tickets}
+        self.forget_tickets([ticket_id for ticket_id, _ in hits if ticket_id not in by_id])
+        return [
+            (by_id[ticket_id], score)
+            for ticket_id, score in hits
+            if ticket_id in by_id and (not customer_id or by_id[ticket_id].customer_id == customer_id)
+        ][:limit]
+    
+    def similar_ticket_pairs(
+        self,
+        tickets: Sequence[Ticket],
+        threshold: Optional[float] = None
+    ) -> List[Tuple[Ticket, Ticket, float]]:
+        """
+        Pairs of tickets (from the given set) whose similarity meets the threshold
+        
+        Returns:
+            List of (ticket, similar_ticket, cosine similarity), best first
+        """
+        if len(tickets) < 2:
+            return []
+        vectors = self.encoder.encode([ticket_text(t.subject, t.description) for t in tickets])
+        pairs = similar_pairs(vectors, settings.SIMILAR_TICKET_THRESHOLD if threshold is None else threshold)
+        return [(tickets[i], tickets[j], score) for i, j, score in pairs]
+    
+    @staticmethod
+    def group_pairs(pairs: Sequence[Tuple[Ticket, Ticket, float]]) -> List[List[str]]:
+        """Connected groups of ticket ids from similarity pairs (largest first)"""
+        parent: Dict[str, str] = {}
+        
+        def find(item: str) -> str:
+            parent.setdefault(item, item)
+            while parent[item] != item:
+                parent[item] = parent[parent[item]]
+                item = parent[item]
+            return item
+        
+        for first, second, _ in pairs:
+            parent[find(first.id)] = find(second.id)
+        
+        groups: Dict[str, List[str]] = {}
+        for item in parent:
+            groups.setdefault(find(item), []).append(item)
+        return sorted(groups.values(), key=len, reverse=True)
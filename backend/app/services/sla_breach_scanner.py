@@ -0,0 +1,336 @@
+#!/usr/bin/env python3
+"""
+Set-based SLA breach scanning for the beat tasks.
+
+PERFORMANCE: Instead of loading every tenant and evaluating tickets one by
+one in Python, a single SELECT computes elapsed hours against the first
+response and resolution targets for all open tickets (optionally one tenant
+partition per worker). Newly breached tickets are flagged with one
+UPDATE ... CASE per chunk, breach alerts are inserted with one executemany,
+escalations are applied with one UPDATE ... RETURNING per chunk, and breach
+events are pipelined per tenant after a single commit.
+"""
+
+import logging
+import uuid
+from collections import defaultdict
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import String, and_, any_, case, func, insert, literal, or_, select, update
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.models.helpdesk import SLAPolicy, Ticket, TicketComment, TicketHistory, TicketPriority, TicketStatus
+from app.models.sla_compliance import SLABreachAlert
+
+logger = logging.getLogger(__name__)
+
+OPEN_STATUSES = [TicketStatus.OPEN, TicketStatus.IN_PROGRESS, TicketStatus.WAITING_CUSTOMER]
+ESCALATED_PRIORITY = {
+    TicketPriority.LOW: TicketPriority.MEDIUM,
+    TicketPriority.MEDIUM: TicketPriority.HIGH,
+    TicketPriority.HIGH: TicketPriority.URGENT,
+}
+SYSTEM_AUTHOR = "SLA Automation System"
+
+
+def _ids(chunk: List[str]):
+    return any_(literal(chunk, ARRAY(String)))
+
+
+class SLABreachScanner:
+    """Finds, flags and escalates SLA violations across tenants in bulk."""
+    
+    def __init__(self, db: AsyncSession):
+        self.db = db
+    
+    def violations_query(
+        self,
+        now: datetime,
+        tenant_id: Optional[str] = None,
+        partition: int = 0,
+        partitions: int = 1
+    ):
+        """Open tickets past their first response or resolution target"""
+        elapsed_hours = func.extract('epoch', literal(now) - Ticket.created_at) / 3600.0
+        first_response_target = func.coalesce(Ticket.sla_first_response_hours, SLAPolicy.first_response_hours)
+        first_response_overdue = and_(
+            Ticket.first_response_at.is_(None),
+            first_response_target > 0,
+            elapsed_hours > first_response_target
+        )
+        resolution_overdue = and_(Ticket.sla_target_hours > 0, elapsed_hours > Ticket.sla_target_hours)
+        
+        stmt = (
+            select(
+                Ticket.id,
+                Ticket.tenant_id,
+                Ticket.ticket_number,
+                Ticket.priority,
+                Ticket.assigned_to_id,
+                Ticket.related_contract_id,
+                Ticket.sla_policy_id,
+                Ticket.sla_first_response_breached,
+                Ticket.sla_resolution_breached,
+                Ticket.sla_target_hours,
+                first_response_target.label('first_response_hours'),
+                elapsed_hours.label('elapsed_hours'),
+                first_response_overdue.label('first_response_overdue'),
+                resolution_overdue.label('resolution_overdue')
+            )
+            .outerjoin(SLAPolicy, SLAPolicy.id == Ticket.sla_policy_id)
+            .where(
+                Ticket.status.in_(OPEN_STATUSES),
+                Ticket.sla_target_hours.isnot(None),
+                or_(first_response_overdue, resolution_overdue)
+            )
+            .order_by(Ticket.tenant_id, Ticket.created_at)
+        )
+        if tenant_id:
+            stmt = stmt.where(Ticket.tenant_id == tenant_id)
+        if partitions > 1:
+            stmt = stmt.where(func.abs(func.mod(func.hashtext(Ticket.tenant_id), partitions)) == partition)
+        return stmt
+    
+    async def find_violations(self, now: datetime, **filters) -> List[Dict[str, Any]]:
+        """
+        One row per violating ticket (first response takes precedence)
+        
+        Each violation also lists the breaches not yet flagged on the ticket,
+        with the percentage of the target used.
+        """
+        result = await self.db.execute(self.violations_query(now, **filters))
+        violations = []
+        for row in result.all():
+            elapsed = float(row.elapsed_hours)
+            if row.first_response_overdue:
+                violation_type, target = 'first_response', row.first_response_hours
+            else:
+                violation_type, target = 'resolution', row.sla_target_hours
+            
+            new_breaches = {}
+            if row.first_response_overdue and not row.sla_first_response_breached:
+                new_breaches['first_response'] = int(elapsed / row.first_response_hours * 100)
+            if row.resolution_overdue and not row.sla_resolution_breached:
+                new_breaches['resolution'] = int(elapsed / row.sla_target_hours * 100)
+            
+            violations.append({
+                'ticket_id': row.id,
+                'tenant_id': row.tenant_id,
+                'ticket_number': row.ticket_number,
+                'violation_type': violation_type,
+                'target_hours': target,
+                'actual_hours': round(elapsed, 2),
+                'overdue_hours': round(elapsed - target, 2),
+                'priority': row.priority.value,
+                'assigned_to_id': row.assigned_to_id,
+                'contract_id': row.related_contract_id,
+                'sla_policy_id': row.sla_policy_id,
+                'new_breaches': new_breaches
+            })
+        return violations
+    
+    async def mark_breaches(self, violations: List[Dict[str, Any]], now: datetime) -> int:
+        """Flag newly breached tickets with one UPDATE per chunk"""
+        first_response_ids = [v['ticket_id'] for v in violations if 'first_response' in v['new_breaches']]
+        resolution_ids = [v['ticket_id'] for v in violations if 'resolution' in v['new_breaches']]
+        ids = list(dict.fromkeys(first_response_ids + resolution_ids))
+        
+        chunk_size = settings.HELPDESK_BULK_CHUNK_SIZE
+        for start in range(0, len(ids), chunk_size):
+            chunk = ids[start:start + chunk_size]
+            chunk_set = set(chunk)
+            first_response = _ids([i for i in first_response_ids if i in chunk_set])
+            resolution = _ids([i for i in resolution_ids if i in chunk_set])
+            await self.db.execute(
+                update(Ticket)
+                .where(Ticket.id == _ids(chunk))
+                .values(
+                    sla_first_response_breached=case((Ticket.id == first_response, True), else_=Ticket.sla_first_response_breached),
+                    sla_first_response_breached_at=case((Ticket.id == first_response, now), else_=Ticket.sla_first_response_breached_at),
+                    sla_resolution_breached=case((Ticket.id == resolution, True), else_=Ticket.sla_resolution_breached),
+                    sla_resolution_breached_at=case((Ticket.id == resolution, now), else_=Ticket.sla_resolution_breached_at)
+                )
+                .execution_options(synchronize_session=False)
+            )
+        return len(ids)
+    
+    async def create_alerts(self, violations: List[Dict[str, Any]], now: datetime) -> List[Dict[str, Any]]:
+        """Insert breach alerts for new breaches in one executemany"""
+        breached = [v for v in violations if v['new_breaches'] and v['sla_policy_id']]
+        if not breached:
+            return []
+        
+        policy_ids = list({v['sla_policy_id'] for v in breached})
+        result = await self.db.execute(
+            select(SLAPolicy.id, SLAPolicy.name, SLAPolicy.escalation_critical_percent)
+            .where(SLAPolicy.id == _ids(policy_ids))
+        )
+        policies = {row.id: row for row in result.all()}
+        
+        rows, alerts = [], []
+        for violation in breached:
+            policy = policies.get(violation['sla_policy_id'])
+            if not policy:
+                continue
+            for breach_type, breach_percent in violation['new_breaches'].items():
+                critical_percent = policy.escalation_critical_percent
+                alert_level = 'critical' if critical_percent is not None and breach_percent >= critical_percent else 'warning'
+                row = {
+                    'id': str(uuid.uuid4()),
+                    'tenant_id': violation['tenant_id'],
+                    'ticket_id': violation['ticket_id'],
+                    'contract_id': violation['contract_id'],
+                    'sla_policy_id': violation['sla_policy_id'],
+                    'breach_type': breach_type,
+                    'breach_percent': breach_percent,
+                    'alert_level': alert_level,
+                    'acknowledged': False,
+                    'created_at': now
+                }
+                rows.append(row)
+                alerts.append({
+                    **row,
+                    'alert_id': row['id'],
+                    'ticket_number': violation['ticket_number'],
+                    'sla_policy_name': policy.name
+                })
+        
+        if rows:
+            await self.db.execute(insert(SLABreachAlert), rows)
+        return alerts
+    
+    async def escalate(self, violations: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Raise the priority of violating tickets one level, with history and an internal note"""
+        by_id = {v['ticket_id']: v for v in violations if v['priority'] != TicketPriority.URGENT.value}
+        ids = list(by_id)
+        new_priority = case(
+            *[(Ticket.priority == old, literal(new, Ticket.priority.type)) for old, new in ESCALATED_PRIORITY.items()],
+            else_=Ticket.priority
+        )
+        
+        escalated = []
+        chunk_size = settings.HELPDESK_BULK_CHUNK_SIZE
+        for start in range(0, len(ids), chunk_size):
+            result = await self.db.execute(
+                update(Ticket)
+                .where(Ticket.id == _ids(ids[start:start + chunk_size]), Ticket.priority != TicketPriority.URGENT)
+                .values(priority=new_priority)
+                .returning(Ticket.id, Ticket.tenant_id, Ticket.priority)
+                .execution_options(synchronize_session=False)
+            )
+            for row in result.all():
+                violation = by_id[row.id]
+                escalated.append({
+                    'ticket_id': row.id,
+                    'tenant_id': row.tenant_id,
+                    'ticket_number': violation['ticket_number'],
+                    'old_priority': violation['priority'],
+                    'new_priority': row.priority.value,
+                    'reason': f"SLA violation: {violation['violation_type']} overdue by {violation['overdue_hours']} hours"
+                })
+        
+        if escalated:
+            await self.db.execute(insert(TicketHistory), [
+                {
+                    'id': str(uuid.uuid4()),
+                    'ticket_id': e['ticket_id'],
+                    'field_name': 'priority',
+                    'old_value': e['old_priority'],
+                    'new_value': e['new_priority'],
+                    'changed_by_id': None,
+                    'changed_by_name': SYSTEM_AUTHOR
+                }
+                for e in escalated
+            ])
+            await self.db.execute(insert(TicketComment), [
+                {
+                    'id': str(uuid.uuid4()),
+                    'ticket_id': e['ticket_id'],
+                    'comment': f"Ticket escalated: {e['reason']}",
+                    'is_internal': True,
+                    'is_system': True,
+                    'author_id': None,
+                    'author_name': SYSTEM_AUTHOR
+                }
+                for e in escalated
+            ])
+        return escalated
+    
+    async def run(
+        self,
+        tenant_id: Optional[str] = None,
+        partition: int = 0,
+        partitions: int = 1,
+        escalate: bool = False
+    ) -> Dict[str, Any]:
+        """
+        Scan, flag new breaches, create alerts and optionally escalate in one transaction
+        
+        Returns:
+            Dictionary with violations, created alerts and escalated tickets
+        """
+        now = datetime.now(timezone.utc)
+        violations = await self.find_violations(now, tenant_id=tenant_id, partition=partition, partitions=partitions)
+        try:
+            await self.mark_breaches(violations, now)
+            alerts = await self.create_alerts(violations, now)
+            escalated = await self.escalate(violations) if escalate else []
+            await self.db.commit()
+        except Exception:
+            await self.db.rollback()
+            raise
+        
+        await self._after_commit(alerts, escalated)
+        return {
+            'violations': violations,
+            'alerts': [{k: v for k, v in alert.items() if k != 'created_at'} for alert in alerts],
+            'escalated': escalated
+        }
+    
+    async def _after_commit(self, alerts: List[Dict[str, Any]], escalated: List[Dict[str, Any]]):
+        """Pipeline breach events per tenant, send breach emails and refresh dashboard KPIs"""
+        from app.core.events import get_event_publisher
+        from app.services.dashboard_kpi_service import schedule_dashboard_kpi_refresh
+        from app.services.sla_notification_service import SLANotificationService
+        from app.services.ticket_context_cache import invalidate_ticket_context
+        
+        alerts_by_tenant: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+        for alert in alerts:
+            alerts_by_tenant[alert['tenant_id']].append(alert)
+        escalated_by_tenant: Dict[str, List[str]] = defaultdict(list)
+        for e in escalated:
+            escalated_by_tenant[e['tenant_id']].append(e['ticket_id'])
+        
+        publisher = get_event_publisher()
+        for tenant_id, tenant_alerts in alerts_by_tenant.items():
+            try:
+                await publisher.publish_sla_breaches(tenant_id, tenant_alerts)
+            except Exception as e:
+                logger.warning(f"Failed to publish SLA breach events for tenant {tenant_id}: {e}")
+            
+            notification_service = SLANotificationService(self.db, tenant_id)
+            for alert in tenant_alerts:
+                try:
+                    alert_record = SLABreachAlert(**{
+                        k: alert[k] for k in (
+                            'id', 'tenant_id', 'ticket_id', 'contract_id', 'sla_policy_id',
+                            'breach_type', 'breach_percent', 'alert_level', 'acknowledged', 'created_at'
+                        )
+                    })
+                    await notification_service.send_breach_notification(alert_record)
+                except Exception as e:
+                    logger.warning(f"Failed to send SLA breach email notification: {e}")
+        
+        for tenant_id, ticket_ids in escalated_by_tenant.items():
+            try:
+                await publisher.publish_tickets_bulk_updated(tenant_id, ticket_ids, {'sla_escalated': True})
+            except Exception as e:
+                logger.warning(f"Failed to publish SLA escalation event for tenant {tenant_id}: {e}")
+        
+        if escalated:
+            # Priority and comments changed through bulk statements
+            invalidate_ticket_context(*(e['ticket_id'] for e in escalated))
+        schedule_dashboard_kpi_refresh(*(set(alerts_by_tenant) | set(escalated_by_tenant)))
@@ -4,7 +4,7 @@ Storage Service
 Handles file storage using MinIO (S3-compatible object storage)
 """
 
-from typing import Optional, BinaryIO, Dict, Any, List
+from typing import Optional, BinaryIO, Dict, Any, Iterable, Iterator, List
 from minio import Minio
 from minio.error import S3Error
 from minio.commonconfig import Tags
@@ -16,6 +16,31 @@ from app.core.config import settings
 
 logger = logging.getLogger(__name__)
 
+# S3 requires multipart parts (except the last) to be at least 5 MiB
+MIN_MULTIPART_PART_SIZE = 5 * 1024 * 1024
+
+
+class _ChunkReader:
+    """File-like read() over an iterable of byte chunks (buffers at most one read)"""
+    
+    def __init__(self, chunks: Iterable[bytes]):
+        self._chunks = iter(chunks)
+        self._buffer = bytearray()
+    
+    def read(self, size: int = -1) -> bytes:
+        while size < 0 or len(self._buffer) < size:
+            chunk = next(self._chunks, None)
+            if chunk is None:
+                break
+            self._buffer += chunk
+        if size < 0 or size >= len(self._buffer):
+            data = bytes(self._buffer)
+            self._buffer.clear()
+        else:
+            data = bytes(self._buffer[:size])
+            del self._buffer[:size]
+        return data
+
 
 class StorageService:
     """Service for managing file storage with MinIO"""
@@ -109,6 +134,51 @@ class StorageService:
             logger.error(f"Error uploading file: {e}")
             raise
     
+    def upload_stream(
+        self,
+        chunks: Iterable[bytes],
+        object_name: str,
+        bucket_name: Optional[str] = None,
+        content_type: Optional[str] = None,
+        metadata: Optional[Dict[str, str]] = None,
+        part_size: int = MIN_MULTIPART_PART_SIZE
+    ) -> str:
+        """
+        Upload data of unknown length from an iterable of chunks
+        
+        Synchronous; uses a multipart upload so only one part is held in
+        memory at a time, regardless of the total size.
+        
+        Args:
+            chunks: Iterable of byte chunks (e.g. a generator)
+            object_name: Object name (path) in bucket
+            bucket_name: Bucket name (defaults to configured bucket)
+            content_type: MIME type of the file
+            metadata: Optional metadata dictionary
+            part_size: Multipart part size in bytes (minimum 5 MiB)
+        
+        Returns:
+            Object name (path) of uploaded file
+        """
+        bucket = bucket_name or self.default_bucket
+        self._ensure_bucket_exists(bucket)
+        try:
+            self.client.put_object(
+                bucket_name=bucket,
+                object_name=object_name,
+                data=_ChunkReader(chunks),
+                length=-1,
+                part_size=max(part_size, MIN_MULTIPART_PART_SIZE),
+                content_type=content_type or 'application/octet-stream',
+                metadata=metadata or {}
+            )
+        except S3Error as e:
+            logger.error(f"Error uploading file stream: {e}")
+            raise
+        
+        logger.info(f"File stream uploaded successfully: {bucket}/{object_name}")
+        return object_name
+    
     async def download_file(
         self,
         object_name: str,
@@ -178,6 +248,34 @@ class StorageService:
             logger.error(f"Error deleting file: {e}")
             return False
     
+    def stream_file(
+        self,
+        object_name: str,
+        bucket_name: Optional[str] = None,
+        chunk_size: int = 64 * 1024
+    ) -> Iterator[bytes]:
+        """
+        Stream a file from MinIO in chunks without loading it into memory
+        
+        Synchronous generator; StreamingResponse iterates it in a threadpool.
+        
+        Args:
+            object_name: Object name (path) in bucket
+            bucket_name: Bucket name (defaults to configured bucket)
+            chunk_size: Bytes per chunk
+        
+        Yields:
+            File data chunks
+        """
+        bucket = bucket_name or self.default_bucket
+        response = self.client.get_object(bucket, object_name)
+        try:
+            for chunk in response.stream(chunk_size):
+                yield chunk
+        finally:
+            response.close()
+            response.release_conn()
+    
     def get_presigned_url(
         self,
         object_name: str,
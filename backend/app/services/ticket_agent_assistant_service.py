@@ -2,17 +2,98 @@
 """
 Ticket Agent Assistant Service
 Allows agents to have conversations with AI about tickets, with support for attachments and log files
+
+PERFORMANCE: per-turn cost stays flat as tickets and chats grow:
+- Ticket context is cached per ticket (see ticket_context_cache) and
+  assembled within AGENT_CHAT_CONTEXT_TOKEN_BUDGET, newest comments first.
+- Older chat turns are folded into a rolling summary, stored on the
+  assistant's TicketAgentChat row and reused by the next turn, so only the
+  summary and the most recent turns are sent.
 """
 
-from typing import List, Dict, Any, Optional
+import asyncio
+import logging
+from typing import List, Dict, Any, Optional, Tuple
 from sqlalchemy.orm import Session
-from sqlalchemy import select, and_
+from app.core.config import settings
 from app.core.database import SessionLocal
-from app.models.helpdesk import Ticket, TicketComment, TicketAttachment
 from app.models.crm import Customer
 from app.models.ai_prompt import PromptCategory
 from app.services.ai_provider_service import AIProviderService
 from app.services.ai_prompt_service import AIPromptService
+from app.services.log_triage_service import LOG_FILE_EXTENSIONS, compact_log_text, triage_chunks
+from app.services.ticket_context_cache import cache_ticket_context, get_cached_ticket_context
+
+logger = logging.getLogger(__name__)
+
+# Rough token estimate used for budgeting (no tokenizer dependency)
+CHARS_PER_TOKEN = 4
+
+# Pasted attachments up to this length are sent as is, longer ones as a log digest
+ATTACHMENT_INLINE_CHARS = 2000
+
+TEXT_ATTACHMENT_EXTENSIONS = ['.txt', '.log', '.json', '.xml', '.csv', '.md', '.py', '.js', '.html', '.css', '.conf', '.config']
+
+SUMMARY_SYSTEM_PROMPT = """You maintain a running summary of a support agent's conversation with an AI assistant about a helpdesk ticket. Merge the new messages into the existing summary. Keep facts established, diagnostics and log findings, solutions tried and their outcome, decisions and open questions. Drop pleasantries and repetition. Write concise plain text."""
+
+
+def estimate_tokens(text: str) -> int:
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def _clip(text: str, max_tokens: int) -> str:
+    max_chars = max(0, max_tokens) * CHARS_PER_TOKEN
+    if len(text) <= max_chars:
+        return text
+    return text[:max_chars] + f"\n... (truncated, total {len(text)} chars)"
+
+
+def build_context(sections: Dict[str, Any], budget: Optional[int] = None) -> str:
+    """
+    Ticket context from cached sections within an estimated token budget
+    
+    The ticket header is always included (clipped if it alone exceeds the
+    budget); the newest comments are added next, then attachments that fit.
+    Omitted comments and attachments are noted so the model knows they exist.
+    """
+    budget = budget or settings.AGENT_CHAT_CONTEXT_TOKEN_BUDGET
+    header = _clip(sections.get("header", ""), budget)
+    remaining = budget - estimate_tokens(header)
+    parts = [header]
+    
+    comments = sections.get("comments") or []
+    if comments:
+        kept = []
+        for comment in reversed(comments):
+            cost = estimate_tokens(comment)
+            if cost > remaining:
+                break
+            kept.append(comment)
+            remaining -= cost
+        parts.append("\n=== COMMENTS ===")
+        if len(kept) < len(comments):
+            parts.append(f"({len(comments) - len(kept)} earlier comments omitted)")
+        parts.extend(reversed(kept))
+    
+    attachments = sections.get("attachments") or []
+    if attachments:
+        parts.append("\n=== TICKET ATTACHMENTS ===")
+        omitted = 0
+        for attachment in attachments:
+            cost = estimate_tokens(attachment)
+            if cost > remaining:
+                omitted += 1
+                continue
+            parts.append(attachment)
+            remaining -= cost
+        if omitted:
+            parts.append(f"({omitted} attachments omitted)")
+    
+    return "\n".join(parts)
+
+
+def _format_turns(messages: List[Dict[str, str]]) -> List[str]:
+    return [f"{msg.get('role', 'user').upper()}: {msg.get('content', '')}" for msg in messages]
 
 
 class TicketAgentAssistantService:
@@ -23,8 +104,27 @@ class TicketAgentAssistantService:
         self.tenant_id = tenant_id
 
     async def _load_ticket_context(self, ticket_id: str) -> Dict[str, Any]:
-        """Load full ticket context for the AI"""
-        from app.models.helpdesk import Ticket, TicketComment, TicketHistory, NPAHistory, TicketAttachment
+        """Ticket context for the AI, from the per-ticket cache when possible"""
+        sections = await get_cached_ticket_context(ticket_id, self.tenant_id)
+        cached = sections is not None
+        if not cached:
+            sections = await self._load_ticket_sections(ticket_id)
+            await cache_ticket_context(ticket_id, self.tenant_id, sections)
+        
+        return {
+            "sections": sections,
+            "cached": cached,
+            "context": build_context(sections)
+        }
+
+    async def _load_ticket_sections(self, ticket_id: str) -> Dict[str, Any]:
+        """
+        Load full ticket context as cacheable text sections
+        
+        Returns:
+            {header: str, comments: [str], attachments: [str]}, oldest comment first
+        """
+        from app.models.helpdesk import Ticket, TicketComment, NPAHistory, TicketAttachment
         from app.services.storage_service import get_storage_service
         
         sync_db = SessionLocal()
@@ -107,15 +207,6 @@ class TicketAgentAssistantService:
                     if npa.answers_to_questions:
                         context_parts.append(f"Answers: {npa.answers_to_questions}")
             
-            # Add comments
-            if comments:
-                context_parts.append(f"\n=== COMMENTS ===")
-                for comment in comments:
-                    author = comment.author_name or comment.author_email or 'System'
-                    internal = " (Internal)" if comment.is_internal else ""
-                    context_parts.append(f"\n{author}{internal} - {comment.created_at.strftime('%Y-%m-%d %H:%M')}:")
-                    context_parts.append(comment.comment)
-            
             # Add AI suggestions if available
             if ticket.ai_suggestions:
                 context_parts.append(f"\n=== AI SUGGESTIONS ===")
@@ -127,22 +218,33 @@ class TicketAgentAssistantService:
                 if suggestions.get('solutions'):
                     context_parts.append(f"Potential Solutions: {', '.join(suggestions['solutions'])}")
             
+            # One entry per comment, so the context builder can keep the newest ones
+            comment_entries = []
+            for comment in comments:
+                author = comment.author_name or comment.author_email or 'System'
+                internal = " (Internal)" if comment.is_internal else ""
+                comment_entries.append(f"\n{author}{internal} - {comment.created_at.strftime('%Y-%m-%d %H:%M')}:\n{comment.comment}")
+            
             # Add ticket attachments
+            attachment_entries = []
             if ticket_attachments:
-                context_parts.append(f"\n=== TICKET ATTACHMENTS ===")
                 storage_service = get_storage_service()
                 
                 for att in ticket_attachments:
-                    context_parts.append(f"\nAttachment: {att.filename}")
-                    context_parts.append(f"Size: {att.file_size} bytes")
+                    entry = [f"\nAttachment: {att.filename}", f"Size: {att.file_size} bytes"]
                     if att.content_type:
-                        context_parts.append(f"Type: {att.content_type}")
+                        entry.append(f"Type: {att.content_type}")
                     
                     # Try to read text-based attachments for context
                     try:
-                        # Only read text-based files (limit to reasonable size: 100KB)
-                        text_extensions = ['.txt', '.log', '.json', '.xml', '.csv', '.md', '.py', '.js', '.html', '.css', '.conf', '.config']
-                        if att.file_size < 100 * 1024 and any(att.filename.lower().endswith(ext) for ext in text_extensions):
+                        if att.filename.lower().endswith(LOG_FILE_EXTENSIONS) and att.file_size > settings.LOG_TRIAGE_INLINE_CHARS:
+                            # Logs of any size are streamed through triage (cached with the context)
+                            triage = await asyncio.to_thread(
+                                triage_chunks, storage_service.stream_file(att.file_path), att.filename
+                            )
+                            entry.append(f"Content:\n{triage.digest()}")
+                        # Only read other text-based files of a reasonable size (100KB)
+                        elif att.file_size < 100 * 1024 and any(att.filename.lower().endswith(ext) for ext in TEXT_ATTACHMENT_EXTENSIONS):
                             file_data = await storage_service.download_file(att.file_path)
                             # Decode as text (try UTF-8, fallback to latin-1)
                             try:
@@ -155,27 +257,88 @@ class TicketAgentAssistantService:
                             if len(file_content) > max_content_length:
                                 file_content = file_content[:max_content_length] + f"\n... (truncated, total {len(file_content)} chars)"
                             
-                            context_parts.append(f"Content:\n{file_content}")
+                            entry.append(f"Content:\n{file_content}")
                         else:
-                            context_parts.append(f"(Binary file - {att.file_size} bytes)")
+                            entry.append(f"(Binary file - {att.file_size} bytes)")
                     except Exception as e:
                         # If we can't read the file, just note it exists
-                        context_parts.append(f"(File exists but could not be read: {str(e)})")
+                        entry.append(f"(File exists but could not be read: {str(e)})")
+                    attachment_entries.append("\n".join(entry))
             
             return {
-                "ticket": ticket,
-                "customer": customer,
-                "context": "\n".join(context_parts)
+                "header": "\n".join(context_parts),
+                "comments": comment_entries,
+                "attachments": attachment_entries
             }
         finally:
             sync_db.close()
 
+    @staticmethod
+    def plan_history(
+        messages: List[Dict[str, str]],
+        summary_count: int = 0
+    ) -> Tuple[int, int]:
+        """
+        Decide which messages are sent verbatim
+        
+        Messages before summary_count are already in the rolling summary.
+        Older turns are folded in batches: once AGENT_CHAT_RECENT_MESSAGES
+        further messages have accumulated (or the verbatim part exceeds
+        AGENT_CHAT_HISTORY_TOKEN_BUDGET), everything but the most recent
+        AGENT_CHAT_RECENT_MESSAGES is folded, so a summary call happens every
+        few turns rather than on each one. The last message is never folded.
+        
+        Returns:
+            (fold_from, verbatim_from): messages[fold_from:verbatim_from] must
+            be merged into the summary; messages[verbatim_from:] are sent as is
+        """
+        total = len(messages)
+        recent = max(1, settings.AGENT_CHAT_RECENT_MESSAGES)
+        if summary_count < 0 or summary_count > total - 1:
+            summary_count = 0
+        
+        verbatim_from = summary_count
+        if total - summary_count >= 2 * recent:
+            verbatim_from = total - recent
+        
+        budget = settings.AGENT_CHAT_HISTORY_TOKEN_BUDGET
+        verbatim_tokens = sum(estimate_tokens(turn) for turn in _format_turns(messages[verbatim_from:]))
+        while verbatim_tokens > budget and verbatim_from < total - 1:
+            verbatim_tokens -= estimate_tokens(_format_turns([messages[verbatim_from]])[0])
+            verbatim_from += 1
+        
+        return summary_count, verbatim_from
+
+    async def _summarize_turns(
+        self,
+        ai_service: AIProviderService,
+        prompt_obj,
+        previous_summary: Optional[str],
+        turns: List[Dict[str, str]]
+    ) -> str:
+        """Merge older turns into the rolling conversation summary"""
+        user_prompt = "\n\n".join(
+            [f"[EXISTING SUMMARY]\n{previous_summary or '(none)'}", "[NEW MESSAGES]"] + _format_turns(turns)
+        )
+        response = await ai_service.generate_with_rendered_prompts(
+            prompt=prompt_obj,
+            system_prompt=SUMMARY_SYSTEM_PROMPT,
+            user_prompt=user_prompt,
+            model=prompt_obj.model if prompt_obj else "gpt-5-mini",
+            temperature=0.2,
+            max_tokens=settings.AGENT_CHAT_SUMMARY_MAX_TOKENS,
+            use_responses_api=False
+        )
+        return (response.content or "").strip()
+
     async def chat(
         self,
         ticket_id: str,
         messages: List[Dict[str, str]],
         attachments: Optional[List[Dict[str, Any]]] = None,
-        log_files: Optional[List[str]] = None
+        log_files: Optional[List[str]] = None,
+        history_summary: Optional[str] = None,
+        history_summary_count: int = 0
     ) -> Dict[str, Any]:
         """
         Have a conversation with AI about a ticket
@@ -185,31 +348,33 @@ class TicketAgentAssistantService:
             messages: List of {role: 'user'|'assistant', content: '...'}
             attachments: Optional list of attachment info {filename, content, type}
             log_files: Optional list of log file contents (as strings)
+            history_summary: Rolling summary from the previous turn, if any
+            history_summary_count: Number of leading messages covered by history_summary
         
         Returns:
-            AI response with message and context
+            AI response with message and context, plus the (possibly updated)
+            history_summary and history_summary_count to store for the next turn
         """
         # Load ticket context
         ticket_data = await self._load_ticket_context(ticket_id)
         context_block = ticket_data["context"]
         
-        # Add attachments and log files to context if provided
+        # Add attachments and log files to context if provided; long ones
+        # are replaced by a digest of the whole file rather than cut off
         if attachments:
             context_block += "\n\n=== ATTACHMENTS ==="
             for att in attachments:
-                context_block += f"\n{att.get('filename', 'attachment')}: {att.get('content', '')[:2000]}"
+                filename = att.get('filename', 'attachment')
+                content = await asyncio.to_thread(
+                    compact_log_text, att.get('content') or '', filename, ATTACHMENT_INLINE_CHARS
+                )
+                context_block += f"\n{filename}: {content}"
         
         if log_files:
             context_block += "\n\n=== LOG FILES ==="
             for idx, log_content in enumerate(log_files, 1):
-                context_block += f"\n\nLog File {idx}:\n{log_content[:5000]}"  # Limit log size
-        
-        # Build conversation prompt
-        conversation_snippets = [f"[TICKET CONTEXT]\n{context_block}\n"]
-        for msg in messages:
-            role = msg.get("role", "user").upper()
-            conversation_snippets.append(f"{role}: {msg.get('content', '')}")
-        user_prompt = "\n\n".join(conversation_snippets)
+                log_content = await asyncio.to_thread(compact_log_text, log_content or '', f"Log File {idx}")
+                context_block += f"\n\nLog File {idx}:\n{log_content}"
         
         sync_db = SessionLocal()
         try:
@@ -226,6 +391,29 @@ class TicketAgentAssistantService:
                 system_prompt = prompt_obj.system_prompt
             
             ai_service = AIProviderService(sync_db, self.tenant_id)
+            
+            # Fold older turns into the rolling summary
+            summary_count, verbatim_from = self.plan_history(messages, history_summary_count if history_summary else 0)
+            summary = history_summary if summary_count else None
+            omitted = 0
+            if verbatim_from > summary_count:
+                try:
+                    summary = await self._summarize_turns(ai_service, prompt_obj, summary, messages[summary_count:verbatim_from])
+                    summary_count = verbatim_from
+                except Exception as e:
+                    # Send the old summary and drop the turns; the next turn retries the fold
+                    logger.warning(f"Agent chat summary failed for ticket {ticket_id}: {e}")
+                    omitted = verbatim_from - summary_count
+            
+            # Build conversation prompt
+            conversation_snippets = [f"[TICKET CONTEXT]\n{context_block}\n"]
+            if summary:
+                conversation_snippets.append(f"[EARLIER CONVERSATION SUMMARY]\n{summary}\n")
+            if omitted:
+                conversation_snippets.append(f"({omitted} earlier messages omitted)")
+            conversation_snippets.extend(_format_turns(messages[verbatim_from:]))
+            user_prompt = "\n\n".join(conversation_snippets)
+            
             ai_response = await ai_service.generate_with_rendered_prompts(
                 prompt=prompt_obj,
                 system_prompt=system_prompt,
@@ -240,8 +428,10 @@ class TicketAgentAssistantService:
                 "message": ai_response.content,
                 "model": ai_response.model,
                 "usage": ai_response.usage,
-                "context": context_block[:500]  # Return truncated context for reference
+                "context": context_block[:500],  # Return truncated context for reference
+                "history_summary": summary,
+                "history_summary_count": summary_count if summary else 0,
+                "prompt_tokens_estimate": estimate_tokens(system_prompt) + estimate_tokens(user_prompt)
             }
         finally:
             sync_db.close()
-
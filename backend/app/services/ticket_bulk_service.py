@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+Set-based bulk operations for helpdesk tickets.
+
+PERFORMANCE: Each chunk of ticket ids is changed with a single
+UPDATE ... WHERE id = ANY(:ids) AND tenant_id = :tenant_id RETURNING id on
+the async engine instead of loading ORM objects and mutating them in
+Python. Tag changes use JSONB operators inside the same statement, and one
+bulk event is published per chunk.
+"""
+
+import logging
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Sequence
+
+from sqlalchemy import JSON, String, Text, any_, case, cast, func, literal, update
+from sqlalchemy.dialects.postgresql import ARRAY, JSONB
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.models.helpdesk import Ticket, TicketStatus
+
+logger = logging.getLogger(__name__)
+
+
+class TicketBulkError(Exception):
+    """Base class for bulk ticket operation issues."""
+
+
+class TicketsNotFoundError(TicketBulkError):
+    """Raised when some requested tickets do not exist for the tenant (nothing is changed)."""
+    
+    def __init__(self, missing_ids: Sequence[str]):
+        super().__init__("Some tickets not found")
+        self.missing_ids = list(missing_ids)
+
+
+def _current_tags():
+    """tickets.tags as a JSONB array ('[]' for SQL NULL, JSON null or non-array values)"""
+    tags = cast(Ticket.tags, JSONB)
+    return case(
+        (func.jsonb_typeof(tags) == "array", tags),
+        else_=literal([], JSONB)
+    )
+
+
+def tags_expression(
+    replace_tags: Optional[List[str]] = None,
+    add_tags: Optional[List[str]] = None,
+    remove_tags: Optional[List[str]] = None
+):
+    """
+    SQL expression for the new tags value (replace, else add, else remove)
+    
+    Adding removes any existing occurrences first, so tags stay unique and the
+    existing order is kept.
+    """
+    if replace_tags is not None:
+        return cast(literal(list(dict.fromkeys(replace_tags)), JSONB), JSON)
+    if add_tags:
+        add_tags = list(dict.fromkeys(add_tags))
+        merged = _current_tags().op("-")(literal(add_tags, ARRAY(Text))).op("||")(literal(add_tags, JSONB))
+        return cast(merged, JSON)
+    if remove_tags:
+        return cast(_current_tags().op("-")(literal(list(remove_tags), ARRAY(Text))), JSON)
+    return None
+
+
+class TicketBulkService:
+    """Applies one set of column changes to many tickets of a tenant."""
+    
+    def __init__(self, db: AsyncSession, tenant_id: str):
+        self.db = db
+        self.tenant_id = tenant_id
+    
+    async def bulk_update(
+        self,
+        ticket_ids: Sequence[str],
+        values: Dict[str, Any],
+        event_changes: Optional[Dict[str, Any]] = None
+    ) -> List[str]:
+        """
+        Update tickets in chunks within one transaction
+        
+        Args:
+            ticket_ids: Tickets to update (duplicates ignored)
+            values: Column name -> value or SQL expression
+            event_changes: JSON-safe description of the change for the bulk event
+        
+        Returns:
+            Updated ticket ids
+        
+        Raises:
+            TicketsNotFoundError: If any id is missing for the tenant (rolled back)
+        """
+        ids = list(dict.fromkeys(ticket_ids))
+        if not ids:
+            return []
+        
+        chunk_size = settings.HELPDESK_BULK_CHUNK_SIZE
+        updated: List[str] = []
+        try:
+            for start in range(0, len(ids), chunk_size):
+                chunk = ids[start:start + chunk_size]
+                stmt = (
+                    update(Ticket)
+                    .where(
+                        Ticket.id == any_(literal(chunk, ARRAY(String))),
+                        Ticket.tenant_id == self.tenant_id
+                    )
+                    .values(**values)
+                    .returning(Ticket.id)
+                    .execution_options(synchronize_session=False)
+                )
+                result = await self.db.execute(stmt)
+                updated.extend(result.scalars().all())
+            
+            if len(updated) != len(ids):
+                found = set(updated)
+                raise TicketsNotFoundError([ticket_id for ticket_id in ids if ticket_id not in found])
+            
+            await self.db.commit()
+        except Exception:
+            await self.db.rollback()
+            raise
+        
+        await self._after_commit(updated, event_changes or {})
+        return updated
+    
+    async def assign(self, ticket_ids: Sequence[str], user_id: str) -> List[str]:
+        return await self.bulk_update(
+            ticket_ids,
+            {"assigned_to_id": user_id, "assigned_at": datetime.now(timezone.utc)},
+            {"assigned_to_id": user_id}
+        )
+    
+    async def close(self, ticket_ids: Sequence[str], status: TicketStatus) -> List[str]:
+        return await self.bulk_update(
+            ticket_ids,
+            {"status": status, "closed_at": datetime.now(timezone.utc)},
+            {"status": status.value}
+        )
+    
+    async def _after_commit(self, ticket_ids: List[str], changes: Dict[str, Any]):
+        """Publish one event per chunk, refresh dashboard KPIs and evict agent chat context (bulk UPDATEs bypass ORM hooks)"""
+        from app.core.events import get_event_publisher
+        from app.services.dashboard_kpi_service import schedule_dashboard_kpi_refresh
+        from app.services.ticket_context_cache import invalidate_ticket_context
+        
+        invalidate_ticket_context(*ticket_ids)
+        publisher = get_event_publisher()
+        chunk_size = settings.HELPDESK_BULK_CHUNK_SIZE
+        for start in range(0, len(ticket_ids), chunk_size):
+            try:
+                await publisher.publish_tickets_bulk_updated(
+                    self.tenant_id,
+                    ticket_ids[start:start + chunk_size],
+                    changes
+                )
+            except Exception as e:
+                logger.warning(f"Failed to publish bulk ticket update event: {e}")
+        
+        schedule_dashboard_kpi_refresh(self.tenant_id)
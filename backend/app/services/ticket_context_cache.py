@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Per-ticket context cache for the agent assistant chat
+
+PERFORMANCE: every chat turn needs the ticket, customer, comments, NPA
+history and text attachments (read from storage). They are loaded once and
+cached as sections in the two-tier cache (in-process L1 + Redis), so a turn
+on an unchanged ticket costs one cache read.
+
+Invalidation:
+- Any ORM flush that writes a Ticket, TicketComment, TicketAttachment or
+  NPAHistory evicts the ticket's entry once the transaction commits
+  (hooks registered at startup by app.core.database.register_session_hooks).
+- invalidate_ticket_context() for bulk SQL updates that bypass the ORM.
+- AGENT_CHAT_CONTEXT_CACHE_TTL bounds staleness if an invalidation is missed.
+"""
+
+import logging
+from itertools import chain
+from typing import Any, Dict, Optional
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.core.caching import delete_cache_nowait, get_cache, set_cache
+from app.core.config import settings
+from app.models.helpdesk import NPAHistory, Ticket, TicketAttachment, TicketComment
+
+logger = logging.getLogger(__name__)
+
+CACHE_PREFIX_TICKET_CONTEXT = "ticket_agent_context:"
+
+# Session.info key collecting tickets touched by a flush, applied on commit
+_PENDING_INVALIDATIONS = "ticket_context_invalidations"
+
+_CONTEXT_SOURCE_MODELS = (TicketComment, TicketAttachment, NPAHistory)
+
+
+def ticket_context_key(ticket_id: str) -> str:
+    return f"{CACHE_PREFIX_TICKET_CONTEXT}{ticket_id}"
+
+
+async def get_cached_ticket_context(ticket_id: str, tenant_id: str) -> Optional[Dict[str, Any]]:
+    """Cached context sections of a ticket, if present and owned by tenant_id"""
+    entry = await get_cache(ticket_context_key(ticket_id))
+    if not entry or entry.get("tenant_id") != tenant_id:
+        return None
+    return entry
+
+
+async def cache_ticket_context(ticket_id: str, tenant_id: str, sections: Dict[str, Any]) -> bool:
+    """Store context sections built by TicketAgentAssistantService"""
+    return await set_cache(
+        ticket_context_key(ticket_id),
+        {**sections, "tenant_id": tenant_id},
+        ttl=settings.AGENT_CHAT_CONTEXT_CACHE_TTL
+    )
+
+
+def invalidate_ticket_context(*ticket_ids: str):
+    """
+    Evict cached context in every process (use after bulk updates)
+    
+    L1 is evicted immediately; the Redis delete runs off the event loop when
+    called from async code or an AsyncSession commit.
+    """
+    delete_cache_nowait(*(ticket_context_key(ticket_id) for ticket_id in ticket_ids))
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_ticket_context_changes(session, flush_context):
+    """Remember which tickets had context rows written in this transaction"""
+    ticket_ids = None
+    for instance in chain(session.new, session.dirty, session.deleted):
+        if isinstance(instance, Ticket):
+            ticket_id = instance.id
+        elif isinstance(instance, _CONTEXT_SOURCE_MODELS):
+            ticket_id = instance.ticket_id
+        else:
+            continue
+        if ticket_id:
+            if ticket_ids is None:
+                ticket_ids = session.info.setdefault(_PENDING_INVALIDATIONS, set())
+            ticket_ids.add(ticket_id)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_committed_ticket_context(session):
+    ticket_ids = session.info.pop(_PENDING_INVALIDATIONS, None)
+    if ticket_ids:
+        invalidate_ticket_context(*ticket_ids)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_ticket_context_changes(session):
+    session.info.pop(_PENDING_INVALIDATIONS, None)
@@ -9,6 +9,7 @@ from sqlalchemy.orm import Session
 from app.models.helpdesk import Ticket
 from app.services.ai_provider_service import AIProviderService
 from app.services.ai_prompt_service import AIPromptService
+from app.services.semantic_index_service import SemanticIndexService
 from app.models.ai_prompt import PromptCategory, AIPrompt
 import json
 import logging
@@ -71,10 +72,43 @@ class TicketPatternDetectionService:
                     "message": "Not enough tickets to detect patterns"
                 }
             
-            # Prepare ticket data for AI analysis
+            # PERFORMANCE: Similar tickets are scored locally with embeddings;
+            # only tickets that fall into a similarity cluster go to the LLM,
+            # which just names and describes the clusters.
+            semantic_index = SemanticIndexService(self.db, self.tenant_id)
+            pairs = semantic_index.similar_ticket_pairs(tickets)
+            similar_tickets = [
+                {
+                    "ticket_id": ticket.id,
+                    "ticket_number": ticket.ticket_number,
+                    "subject": ticket.subject,
+                    "similar_ticket_id": similar_ticket.id,
+                    "similarity_score": round(score, 3),
+                    "reason": "Embedding similarity"
+                }
+                for ticket, similar_ticket, score in pairs
+            ]
+            
+            cluster_of = {}
+            for cluster_id, ticket_ids in enumerate(semantic_index.group_pairs(pairs), start=1):
+                for ticket_id in ticket_ids:
+                    cluster_of[ticket_id] = cluster_id
+            
+            if not cluster_of:
+                return {
+                    "patterns": [],
+                    "similar_tickets": [],
+                    "total_tickets_analyzed": len(tickets),
+                    "message": "No similar tickets found"
+                }
+            
+            # Prepare clustered ticket data for AI analysis
             ticket_data = []
             for ticket in tickets:
+                if ticket.id not in cluster_of:
+                    continue
                 ticket_data.append({
+                    "cluster": cluster_of[ticket.id],
                     "id": ticket.id,
                     "ticket_number": ticket.ticket_number,
                     "subject": ticket.subject,
@@ -97,10 +131,9 @@ class TicketPatternDetectionService:
             else:
                 # Fallback prompt if not in database
                 analysis_prompt = """Analyze the following tickets for a customer and identify:
-1. Recurring patterns or themes
-2. Similar tickets that might be duplicates or related issues
-3. Common problems or root causes
-4. Frequency of issues
+1. Recurring patterns or themes (tickets are pre-grouped by the "cluster" field)
+2. Common problems or root causes
+3. Frequency of issues
 
 For each pattern found, provide:
 - Pattern name
@@ -110,8 +143,6 @@ For each pattern found, provide:
 - Frequency count
 - Severity (low, medium, high, critical)
 
-For similar tickets, provide pairs with similarity scores.
-
 Return the analysis as JSON with this structure:
 {
     "patterns": [
@@ -123,14 +154,6 @@ Return the analysis as JSON with this structure:
             "frequency": 5,
             "severity": "medium"
         }
-    ],
-    "similar_tickets": [
-        {
-            "ticket_id": "id1",
-            "similar_ticket_id": "id2",
-            "similarity_score": 0.85,
-            "reason": "Both tickets about same issue"
-        }
     ]
 }"""
             
@@ -205,11 +228,8 @@ Tickets:
             # Validate and enrich results with actual ticket data
             validated_patterns = []
             for pattern in analysis_result.get("patterns", []):
-                # Verify ticket IDs exist
-                valid_ticket_ids = []
-                for ticket_id in pattern.get("ticket_ids", []):
-                    if any(t.id == ticket_id for t in tickets):
-                        valid_ticket_ids.append(ticket_id)
+                # Verify ticket IDs are among the clustered tickets
+                valid_ticket_ids = [ticket_id for ticket_id in pattern.get("ticket_ids", []) if ticket_id in cluster_of]
                 
                 if valid_ticket_ids:
                     validated_patterns.append({
@@ -221,23 +241,9 @@ Tickets:
                         "severity": pattern.get("severity", "medium")
                     })
             
-            validated_similar = []
-            for similar in analysis_result.get("similar_tickets", []):
-                ticket_id = similar.get("ticket_id")
-                similar_ticket_id = similar.get("similar_ticket_id")
-                
-                # Verify both tickets exist
-                if any(t.id == ticket_id for t in tickets) and any(t.id == similar_ticket_id for t in tickets):
-                    validated_similar.append({
-                        "ticket_id": ticket_id,
-                        "similar_ticket_id": similar_ticket_id,
-                        "similarity_score": float(similar.get("similarity_score", 0.0)),
-                        "reason": similar.get("reason", "")
-                    })
-            
             return {
                 "patterns": validated_patterns,
-                "similar_tickets": validated_similar,
+                "similar_tickets": similar_tickets,
                 "total_tickets_analyzed": len(tickets)
             }
             
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Celery tasks for the customer_metrics rollup
+
+Queued by app.services.customer_metrics_service when quotes, support
+contracts or tickets change, so customer lists and reports can sort by
+lifetime value / MRR from precomputed rows. A periodic rebuild repairs
+anything an incremental refresh missed.
+"""
+
+import logging
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import select
+
+from app.core.celery_app import celery_app
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.models.tenant import Tenant, TenantStatus
+from app.services.customer_metrics_service import (
+    pop_pending_customer_ids,
+    refresh_customer_metrics,
+    restore_pending_customer_ids
+)
+
+logger = logging.getLogger(__name__)
+
+
+@celery_app.task(name='refresh_customer_metrics', bind=True, max_retries=3)
+def refresh_customer_metrics_task(
+    self,
+    tenant_id: str,
+    customer_ids: Optional[List[str]] = None,
+    rebuild: bool = False
+) -> Dict[str, Any]:
+    """
+    Recompute customer_metrics rows for a tenant
+    
+    Failed refreshes are retried with the same customers; once retries are
+    exhausted the customers go back to the tenant's pending set.
+    
+    Args:
+        tenant_id: Tenant ID
+        customer_ids: Customers to recompute (default: those queued by ORM changes)
+        rebuild: Recompute every customer of the tenant
+    
+    Returns:
+        Dict with task results
+    """
+    db = SessionLocal()
+    
+    try:
+        if rebuild:
+            written = refresh_customer_metrics(db, tenant_id)
+        else:
+            if customer_ids is None:
+                customer_ids = pop_pending_customer_ids(tenant_id)
+            written = refresh_customer_metrics(db, tenant_id, customer_ids) if customer_ids else 0
+        return {'success': True, 'tenant_id': tenant_id, 'customers_refreshed': written}
+    except Exception as e:
+        db.rollback()
+        if self.request.retries < self.max_retries:
+            logger.warning(f"Customer metrics refresh failed for tenant {tenant_id}, retrying: {e}")
+            # Retry the popped customers explicitly; they are no longer in the pending set
+            raise self.retry(
+                exc=e,
+                args=[tenant_id],
+                kwargs={'customer_ids': customer_ids, 'rebuild': rebuild},
+                countdown=settings.CUSTOMER_METRICS_REFRESH_DELAY * (self.request.retries + 1)
+            )
+        logger.error(f"Customer metrics refresh failed for tenant {tenant_id}: {e}", exc_info=True)
+        if not rebuild:
+            restore_pending_customer_ids(tenant_id, customer_ids or [])
+        return {'success': False, 'tenant_id': tenant_id, 'error': str(e)}
+    finally:
+        db.close()
+
+
+@celery_app.task(name='rebuild_customer_metrics')
+def rebuild_customer_metrics_task() -> Dict[str, Any]:
+    """
+    Periodic full rebuild: queue one rebuild task per active or trial tenant
+    
+    Returns:
+        Dict with the number of tenants queued
+    """
+    db = SessionLocal()
+    
+    try:
+        tenant_ids = db.execute(
+            select(Tenant.id).where(Tenant.status.in_([TenantStatus.ACTIVE, TenantStatus.TRIAL]))
+        ).scalars().all()
+    finally:
+        db.close()
+    
+    for tenant_id in tenant_ids:
+        refresh_customer_metrics_task.delay(tenant_id, rebuild=True)
+    logger.info(f"Queued customer metrics rebuild for {len(tenant_ids)} tenants")
+    return {'success': True, 'tenants_queued': len(tenant_ids)}
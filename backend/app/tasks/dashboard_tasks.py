@@ -0,0 +1,45 @@
+#!/usr/bin/env python3
+"""
+Celery tasks for dashboard KPI snapshots
+
+Queued by app.services.dashboard_kpi_service when KPI source rows change,
+so dashboard requests are served from an up-to-date cached snapshot.
+"""
+
+import logging
+from typing import Dict, Any
+
+from app.core.async_bridge import run_async_safe
+from app.core.celery_app import celery_app
+from app.core.database import get_async_db, current_tenant_id_context
+from app.services.dashboard_kpi_service import DashboardKPIService
+
+logger = logging.getLogger(__name__)
+
+
+async def _refresh_snapshot(tenant_id: str) -> Dict[str, Any]:
+    # get_async_db applies row-level security for the tenant in context
+    current_tenant_id_context.set(tenant_id)
+    snapshot = None
+    async for db in get_async_db():
+        snapshot = await DashboardKPIService(db, tenant_id).refresh_snapshot()
+    return snapshot
+
+
+@celery_app.task(name='refresh_dashboard_kpis', bind=True)
+def refresh_dashboard_kpis_task(self, tenant_id: str) -> Dict[str, Any]:
+    """
+    Recompute and cache the dashboard KPI snapshot for a tenant
+    
+    Args:
+        tenant_id: Tenant ID
+    
+    Returns:
+        Dict with task results
+    """
+    try:
+        snapshot = run_async_safe(_refresh_snapshot(tenant_id))
+        return {'success': True, 'tenant_id': tenant_id, 'computed_at': snapshot['computed_at']}
+    except Exception as e:
+        logger.error(f"Dashboard KPI refresh failed for tenant {tenant_id}: {e}", exc_info=True)
+        return {'success': False, 'tenant_id': tenant_id, 'error': str(e)}
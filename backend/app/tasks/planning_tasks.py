@@ -4,12 +4,13 @@ Celery tasks for planning application campaigns
 
 import asyncio
 from typing import Dict, Any
-from datetime import datetime, timezone
+from datetime import datetime, timezone, timedelta
 
 from app.core.celery_app import celery_app
 from app.core.database import SessionLocal
 from app.services.planning_service import PlanningApplicationService
 from app.models.planning import PlanningApplicationCampaign, PlanningCampaignStatus
+from sqlalchemy import or_
 
 
 @celery_app.task(
@@ -166,3 +167,65 @@ def run_planning_campaign_task(self, campaign_id: str, tenant_id: str):
     
     finally:
         db.close()
+
+
+@celery_app.task(name="planning.run_due_campaigns")
+def run_due_planning_campaigns_task():
+    """
+    Run every scheduled planning campaign that is due
+    
+    All portals needed by the due campaigns are fetched concurrently, once
+    per portal, and each campaign then processes only records above its own
+    watermark (see PlanningApplicationService.run_campaign).
+    
+    Returns:
+        dict: Counts of campaigns run and failed
+    """
+    from app.core.async_bridge import run_async_safe
+    
+    db = SessionLocal()
+    
+    try:
+        now = datetime.now(timezone.utc)
+        campaigns = db.query(PlanningApplicationCampaign).filter(
+            PlanningApplicationCampaign.is_scheduled == True,
+            PlanningApplicationCampaign.is_deleted == False,
+            # Newly scheduled campaigns are still DRAFT; ACTIVE ones are already running
+            PlanningApplicationCampaign.status.notin_([PlanningCampaignStatus.ACTIVE, PlanningCampaignStatus.PAUSED]),
+            or_(PlanningApplicationCampaign.next_run_at == None, PlanningApplicationCampaign.next_run_at <= now)
+        ).all()
+        
+        if not campaigns:
+            return {'success': True, 'campaigns_run': 0, 'campaigns_failed': 0}
+        
+        print(f"🗓️ Running {len(campaigns)} due planning campaigns")
+        prefetched = run_async_safe(PlanningApplicationService.prefetch_portals(campaigns))
+        
+        campaigns_run = 0
+        campaigns_failed = 0
+        for campaign in campaigns:
+            records = prefetched.get(campaign.county.lower())
+            try:
+                if isinstance(records, Exception):
+                    raise records
+                service = PlanningApplicationService(db, campaign.tenant_id)
+                run_async_safe(service.run_campaign(campaign.id, prefetched=records))
+                campaign.status = PlanningCampaignStatus.COMPLETED
+                campaigns_run += 1
+            except Exception as e:
+                print(f"❌ Scheduled planning campaign {campaign.id} failed: {e}")
+                db.rollback()
+                if isinstance(records, Exception):
+                    # run_campaign records its own failures; portal errors are counted here
+                    campaign.consecutive_failures += 1
+                campaign.status = PlanningCampaignStatus.FAILED
+                campaign.last_error = str(e)
+                # Try again at the next scheduled interval rather than every check
+                campaign.next_run_at = now + timedelta(days=campaign.schedule_frequency_days)
+                campaigns_failed += 1
+            db.commit()
+        
+        return {'success': True, 'campaigns_run': campaigns_run, 'campaigns_failed': campaigns_failed}
+    
+    finally:
+        db.close()
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Celery tasks for large report exports
+Rows are read with a server-side cursor and the file is written to MinIO
+with a multipart upload, so neither the worker nor the API holds the report
+"""
+import logging
+import uuid
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Any, Dict, Iterator
+
+from app.core.celery_app import celery_app
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.services.helpdesk_export_service import export_query
+from app.services.report_export_service import CSV_MEDIA_TYPE, EXCEL_MEDIA_TYPE, ReportExportService
+from app.services.storage_service import get_storage_service
+
+logger = logging.getLogger(__name__)
+
+
+@celery_app.task(name='export_helpdesk_report', bind=True)
+def export_helpdesk_report_task(
+    self,
+    tenant_id: str,
+    report_type: str,
+    start_date: str,
+    end_date: str,
+    format: str = "csv"
+) -> Dict[str, Any]:
+    """
+    Generate a helpdesk analytics export in the background
+    
+    Args:
+        tenant_id: Tenant ID
+        report_type: Report with a streamable query (see helpdesk_export_service)
+        start_date: ISO start date
+        end_date: ISO end date
+        format: "csv" or "excel"
+    
+    Returns:
+        Dict with download_url (presigned), object_name, filename and row count
+    """
+    db = SessionLocal()
+    
+    try:
+        start_dt = datetime.combine(date.fromisoformat(start_date), time.min).replace(tzinfo=timezone.utc)
+        end_dt = datetime.combine(date.fromisoformat(end_date), time.max).replace(tzinfo=timezone.utc)
+        stmt, mapper = export_query(report_type, tenant_id, start_dt, end_dt)
+        export_service = ReportExportService()
+        row_count = 0
+        
+        def rows() -> Iterator[Dict[str, Any]]:
+            nonlocal row_count
+            result = db.execute(stmt.execution_options(yield_per=settings.EXPORT_STREAM_BATCH_SIZE))
+            for partition in result.partitions():
+                for row in partition:
+                    row_count += 1
+                    yield mapper(row)
+        
+        if format == "excel":
+            extension, content_type = "xlsx", EXCEL_MEDIA_TYPE
+            chunks = export_service.file_chunks(export_service.write_excel_file(
+                rows(), {"Period": f"{start_date} to {end_date}", "Report Type": report_type}
+            ))
+        else:
+            extension, content_type = "csv", CSV_MEDIA_TYPE
+            chunks = export_service.iter_csv(rows())
+        
+        filename = f"helpdesk_{report_type}_{start_date}_{end_date}.{extension}"
+        object_name = f"exports/{tenant_id}/helpdesk/{uuid.uuid4()}/{filename}"
+        storage_service = get_storage_service()
+        storage_service.upload_stream(
+            chunks,
+            object_name=object_name,
+            content_type=content_type,
+            metadata={
+                'tenant_id': tenant_id,
+                'report_type': report_type,
+                'task_id': self.request.id
+            }
+        )
+        
+        logger.info("Helpdesk export uploaded", extra={
+            'task_id': self.request.id,
+            'tenant_id': tenant_id,
+            'object_name': object_name,
+            'rows': row_count
+        })
+        
+        return {
+            'success': True,
+            'tenant_id': tenant_id,
+            'object_name': object_name,
+            'filename': filename,
+            'rows': row_count,
+            'download_url': storage_service.get_presigned_url(
+                object_name=object_name,
+                expires=timedelta(seconds=settings.EXPORT_DOWNLOAD_URL_TTL)
+            )
+        }
+    
+    except Exception as e:
+        logger.error(f"Helpdesk export failed: {e}", exc_info=True)
+        raise
+    finally:
+        db.close()
@@ -8,107 +8,110 @@ from celery import shared_task
 from sqlalchemy.orm import Session
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.core.database import SessionLocal, get_async_db
-from app.services.sla_service import SLAService
+from app.core.config import settings
+from app.services.sla_breach_scanner import SLABreachScanner
 from app.services.sla_tracking_service import SLATrackingService
 from app.services.sla_notification_service import SLANotificationService
 from app.models.tenant import Tenant, User
 from app.models.sla_compliance import SLAComplianceRecord, SLABreachAlert
 from app.models.helpdesk import Ticket, SLAPolicy
 from datetime import datetime, timedelta, date, timezone
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
 import logging
 import asyncio
 
 logger = logging.getLogger(__name__)
 
 
+def _scan_sla(tenant_id: Optional[str], partition: Optional[int], escalate: bool) -> Dict[str, Any]:
+    """Run the set-based breach scan for one tenant, one tenant partition or everything"""
+    from app.core.async_bridge import run_async_safe
+    from app.core.database import AsyncSessionLocal
+    
+    partitions = settings.SLA_SCAN_PARTITIONS if partition is not None else 1
+    
+    async def scan():
+        async with AsyncSessionLocal() as db:
+            return await SLABreachScanner(db).run(
+                tenant_id=tenant_id,
+                partition=partition or 0,
+                partitions=partitions,
+                escalate=escalate
+            )
+    
+    return run_async_safe(scan())
+
+
+def _fan_out(task, tenant_id: Optional[str], partition: Optional[int]) -> Optional[Dict[str, Any]]:
+    """Queue one task per tenant partition when a full scan is partitioned"""
+    if tenant_id or partition is not None or settings.SLA_SCAN_PARTITIONS <= 1:
+        return None
+    for index in range(settings.SLA_SCAN_PARTITIONS):
+        task.delay(None, index)
+    return {'partitions_queued': settings.SLA_SCAN_PARTITIONS}
+
+
 @shared_task(name="check_sla_violations")
-def check_sla_violations_task(tenant_id: str = None):
+def check_sla_violations_task(tenant_id: str = None, partition: int = None):
     """
-    Check for SLA violations and escalate if needed
+    Check for SLA violations, flag new breaches and create breach alerts
     
     Args:
         tenant_id: Tenant ID to check (if None, check all tenants)
+        partition: Tenant partition to check (set when a full scan is split across workers)
     
     Returns:
         Dictionary with violation check results
     """
-    db: Session = SessionLocal()
     try:
-        from app.models.tenant import Tenant
+        queued = _fan_out(check_sla_violations_task, tenant_id, partition)
+        if queued:
+            return queued
         
-        if tenant_id:
-            tenants = [db.query(Tenant).filter(Tenant.id == tenant_id).first()]
-        else:
-            tenants = db.query(Tenant).all()
+        result = _scan_sla(tenant_id, partition, escalate=False)
+        violations = result['violations']
         
-        all_violations = []
-        for tenant in tenants:
-            if not tenant:
-                continue
-            service = SLAService(db, tenant.id)
-            violations = service.check_sla_violations()
-            
-            logger.info(f"Found {len(violations)} SLA violations for tenant {tenant.id}")
-            
-            for violation in violations:
-                violation['tenant_id'] = tenant.id
-                all_violations.append(violation)
+        logger.info(f"Found {len(violations)} SLA violations, {len(result['alerts'])} new breach alerts")
         
         return {
-            'violations_count': len(all_violations),
-            'violations': all_violations
+            'violations_count': len(violations),
+            'alerts_created': len(result['alerts']),
+            'violations': violations
         }
     except Exception as e:
         logger.error(f"Error checking SLA violations: {e}")
         raise
-    finally:
-        db.close()
 
 
 @shared_task(name="auto_escalate_sla_violations")
-def auto_escalate_sla_violations_task(tenant_id: str = None):
+def auto_escalate_sla_violations_task(tenant_id: str = None, partition: int = None):
     """
     Automatically escalate tickets with SLA violations
     
     Args:
         tenant_id: Tenant ID (if None, process all tenants)
+        partition: Tenant partition to process (set when a full scan is split across workers)
     
     Returns:
         Dictionary with escalation results
     """
-    db: Session = SessionLocal()
     try:
-        from app.models.tenant import Tenant
+        queued = _fan_out(auto_escalate_sla_violations_task, tenant_id, partition)
+        if queued:
+            return queued
         
-        if tenant_id:
-            tenants = [db.query(Tenant).filter(Tenant.id == tenant_id).first()]
-        else:
-            tenants = db.query(Tenant).all()
+        result = _scan_sla(tenant_id, partition, escalate=True)
         
-        total_escalated = 0
-        total_violations = 0
-        
-        for tenant in tenants:
-            if not tenant:
-                continue
-            service = SLAService(db, tenant.id)
-            result = service.auto_escalate_violations()
-            
-            total_escalated += result.get('escalated', 0)
-            total_violations += result.get('violations_found', 0)
-            
-            logger.info(f"Auto-escalated {result['escalated']} tickets for tenant {tenant.id}")
+        logger.info(f"Auto-escalated {len(result['escalated'])} of {len(result['violations'])} tickets with SLA violations")
         
         return {
-            'total_violations_found': total_violations,
-            'total_escalated': total_escalated
+            'total_violations_found': len(result['violations']),
+            'total_escalated': len(result['escalated']),
+            'alerts_created': len(result['alerts'])
         }
     except Exception as e:
         logger.error(f"Error auto-escalating SLA violations: {e}")
         raise
-    finally:
-        db.close()
 
 
 @shared_task(name="generate_sla_compliance_report")
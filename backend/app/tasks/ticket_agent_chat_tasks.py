@@ -72,6 +72,16 @@ def agent_chat_task(
             user_message.ai_task_id = self.request.id
             db.commit()
         
+        # Rolling summary of earlier turns, kept on the latest assistant message that has one
+        summary_row = db.query(
+            TicketAgentChat.history_summary,
+            TicketAgentChat.history_summary_count
+        ).filter(
+            TicketAgentChat.ticket_id == ticket_id,
+            TicketAgentChat.tenant_id == tenant_id,
+            TicketAgentChat.history_summary.isnot(None)
+        ).order_by(TicketAgentChat.created_at.desc()).first()
+        
         # Run AI chat
         service = TicketAgentAssistantService(db, tenant_id)
         
@@ -81,7 +91,9 @@ def agent_chat_task(
             ticket_id,
             messages,
             attachments=attachments,
-            log_files=log_files
+            log_files=log_files,
+            history_summary=summary_row.history_summary if summary_row else None,
+            history_summary_count=(summary_row.history_summary_count or 0) if summary_row else 0
         ))
         
         # Save AI response to database
@@ -97,7 +109,9 @@ def agent_chat_task(
             ai_model=result.get("model"),
             ai_usage=result.get("usage"),
             attachments=attachments,
-            log_files=log_files
+            log_files=log_files,
+            history_summary=result.get("history_summary"),
+            history_summary_count=result.get("history_summary_count")
         )
         db.add(ai_message)
         
@@ -38,6 +38,10 @@ async def lifespan(app: FastAPI):
     await init_db()
     logger.info("Database initialized")
     
+    # ORM hooks that invalidate caches and refresh rollups on commit
+    from app.core.database import register_session_hooks
+    register_session_hooks()
+    
     # Set up row-level security for tenant isolation
     from app.core.database import setup_row_level_security
     try:
@@ -51,6 +55,10 @@ async def lifespan(app: FastAPI):
     await init_redis()
     logger.info("Redis initialized")
     
+    # Subscribe to cross-process L1 cache invalidations
+    from app.core.caching import start_cache_invalidation_listener
+    start_cache_invalidation_listener()
+    
     # Initialize Celery
     init_celery()
     logger.info("Celery initialized")
@@ -70,6 +78,14 @@ async def lifespan(app: FastAPI):
     # Shutdown - cleanup resources
     logger.info("Shutting down CCS Quote Tool v2...")
     
+    # Stop L1 cache invalidation listener
+    from app.core.caching import stop_cache_invalidation_listener
+    stop_cache_invalidation_listener()
+    
+    # Write buffered security events
+    from app.services.security_event_service import get_security_event_buffer
+    await get_security_event_buffer().close()
+    
     # Close Redis connections
     from app.core.redis import close_redis
     await close_redis()
@@ -85,6 +101,14 @@ async def lifespan(app: FastAPI):
     manager = get_websocket_manager()
     await manager.close()
     
+    # Close pooled AI provider clients
+    from app.core.ai_providers import AsyncClientPool
+    await AsyncClientPool.close_all()
+    
+    # Stop quote document render processes
+    from app.services.quote_document_render_service import shutdown_render_pool
+    shutdown_render_pool()
+    
     # Close database engine connections
     from app.core.database import engine, async_engine
     engine.dispose()
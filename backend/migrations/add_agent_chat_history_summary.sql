@@ -0,0 +1,11 @@
+-- Migration: Rolling conversation summary for the ticket agent chat
+-- Purpose: TicketAgentAssistantService folds older chat turns into a summary so
+--          each AI call sends a bounded history. The summary is kept on the
+--          assistant message it was produced with, together with the number of
+--          conversation messages it covers, and reused by the next turn.
+
+ALTER TABLE ticket_agent_chat
+ADD COLUMN IF NOT EXISTS history_summary TEXT;
+
+ALTER TABLE ticket_agent_chat
+ADD COLUMN IF NOT EXISTS history_summary_count INTEGER;
@@ -0,0 +1,19 @@
+-- Migration: Companies House document cache
+-- Purpose: Filed iXBRL accounts are immutable, so CompaniesHouseService keeps one copy per
+--          filing transaction for all tenants instead of downloading it on every profile
+--          refresh. Smaller API payloads are cached in Redis (see companies_house_cache.py).
+
+CREATE TABLE IF NOT EXISTS companies_house_documents (
+    transaction_id VARCHAR(100) PRIMARY KEY,
+    company_number VARCHAR(20) NOT NULL,
+    content_type VARCHAR(100),
+    content TEXT NOT NULL,
+    size_bytes INTEGER NOT NULL DEFAULT 0,
+    created_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT NOW(),
+    updated_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT NOW()
+);
+
+CREATE INDEX IF NOT EXISTS idx_companies_house_documents_company_number
+    ON companies_house_documents(company_number);
+
+COMMENT ON TABLE companies_house_documents IS 'Tenant-agnostic cache of downloaded Companies House filing documents';
@@ -0,0 +1,72 @@
+-- Migration: Per-customer metrics rollup
+-- Purpose: Lifetime value (accepted quotes), MRR (active support contracts) and ticket
+--          totals per customer, so customer lists and reports can sort and filter by
+--          value without aggregating quotes/contracts on every request. Rows are kept
+--          current by app.services.customer_metrics_service (ORM commit hooks queue the
+--          'refresh_customer_metrics' Celery task); this migration backfills existing data.
+
+CREATE TABLE IF NOT EXISTS customer_metrics (
+    customer_id VARCHAR(36) PRIMARY KEY REFERENCES customers(id) ON DELETE CASCADE,
+    tenant_id VARCHAR(36) NOT NULL REFERENCES tenants(id),
+    lifetime_value NUMERIC(14, 2) NOT NULL DEFAULT 0,
+    accepted_quote_count INTEGER NOT NULL DEFAULT 0,
+    first_accepted_at TIMESTAMP WITH TIME ZONE,
+    last_accepted_at TIMESTAMP WITH TIME ZONE,
+    monthly_recurring_revenue NUMERIC(14, 2) NOT NULL DEFAULT 0,
+    active_contract_count INTEGER NOT NULL DEFAULT 0,
+    ticket_count INTEGER NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT NOW()
+);
+
+CREATE INDEX IF NOT EXISTS idx_customer_metrics_tenant_id ON customer_metrics(tenant_id);
+CREATE INDEX IF NOT EXISTS idx_customer_metrics_tenant_ltv ON customer_metrics(tenant_id, lifetime_value);
+CREATE INDEX IF NOT EXISTS idx_customer_metrics_tenant_mrr ON customer_metrics(tenant_id, monthly_recurring_revenue);
+
+-- Backfill (safe to re-run: recomputes every row)
+INSERT INTO customer_metrics (
+    customer_id, tenant_id, lifetime_value, accepted_quote_count, first_accepted_at,
+    last_accepted_at, monthly_recurring_revenue, active_contract_count, ticket_count, updated_at
+)
+SELECT
+    c.id,
+    c.tenant_id,
+    COALESCE(q.lifetime_value, 0),
+    COALESCE(q.accepted_quote_count, 0),
+    q.first_accepted_at,
+    q.last_accepted_at,
+    COALESCE(sc.monthly_recurring_revenue, 0),
+    COALESCE(sc.active_contract_count, 0),
+    COALESCE(t.ticket_count, 0),
+    NOW()
+FROM customers c
+LEFT JOIN (
+    SELECT tenant_id, customer_id, SUM(total_amount) AS lifetime_value, COUNT(*) AS accepted_quote_count,
+           MIN(created_at) AS first_accepted_at, MAX(created_at) AS last_accepted_at
+    FROM quotes
+    WHERE LOWER(status::text) = 'accepted' AND is_deleted = FALSE
+    GROUP BY tenant_id, customer_id
+) q ON q.customer_id = c.id AND q.tenant_id = c.tenant_id
+LEFT JOIN (
+    SELECT tenant_id, customer_id, SUM(monthly_value) AS monthly_recurring_revenue, COUNT(*) AS active_contract_count
+    FROM support_contracts
+    WHERE LOWER(status::text) = 'active'
+    GROUP BY tenant_id, customer_id
+) sc ON sc.customer_id = c.id AND sc.tenant_id = c.tenant_id
+LEFT JOIN (
+    SELECT tenant_id, customer_id, COUNT(*) AS ticket_count
+    FROM tickets
+    WHERE customer_id IS NOT NULL
+    GROUP BY tenant_id, customer_id
+) t ON t.customer_id = c.id AND t.tenant_id = c.tenant_id
+ON CONFLICT (customer_id) DO UPDATE SET
+    tenant_id = EXCLUDED.tenant_id,
+    lifetime_value = EXCLUDED.lifetime_value,
+    accepted_quote_count = EXCLUDED.accepted_quote_count,
+    first_accepted_at = EXCLUDED.first_accepted_at,
+    last_accepted_at = EXCLUDED.last_accepted_at,
+    monthly_recurring_revenue = EXCLUDED.monthly_recurring_revenue,
+    active_contract_count = EXCLUDED.active_contract_count,
+    ticket_count = EXCLUDED.ticket_count,
+    updated_at = EXCLUDED.updated_at;
+
+COMMENT ON TABLE customer_metrics IS 'Derived per-customer value metrics (rollup of quotes, support_contracts, tickets); safe to rebuild';
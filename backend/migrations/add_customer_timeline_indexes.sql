@@ -0,0 +1,16 @@
+-- Migration: Keyset indexes for the unified customer timeline
+-- Purpose: ActivityTimelineService reads each source newest first by (timestamp, id)
+--          for one customer and applies the page cursor per branch of a UNION ALL.
+--          These indexes let every branch stop after one page of rows.
+
+CREATE INDEX IF NOT EXISTS idx_sales_activities_customer_timeline
+    ON sales_activities (tenant_id, customer_id, activity_date DESC, id DESC);
+
+CREATE INDEX IF NOT EXISTS idx_tickets_customer_timeline
+    ON tickets (tenant_id, customer_id, created_at DESC, id DESC);
+
+CREATE INDEX IF NOT EXISTS idx_ticket_comments_ticket_timeline
+    ON ticket_comments (ticket_id, created_at DESC, id DESC);
+
+CREATE INDEX IF NOT EXISTS idx_quotes_customer_timeline
+    ON quotes (tenant_id, customer_id, created_at DESC, id DESC);
@@ -0,0 +1,24 @@
+-- Migration: Full-text search index for knowledge base articles
+-- Purpose: Replace ILIKE scans in KnowledgeBaseService.search_articles with a ranked
+--          tsvector/GIN search. The vector is a generated column, so PostgreSQL keeps it
+--          up to date on every article insert/update (requires PostgreSQL 12+).
+
+DO $$
+BEGIN
+    IF NOT EXISTS (
+        SELECT 1 FROM information_schema.columns
+        WHERE table_name = 'knowledge_base_articles' AND column_name = 'search_vector'
+    ) THEN
+        ALTER TABLE knowledge_base_articles ADD COLUMN search_vector tsvector
+            GENERATED ALWAYS AS (
+                setweight(to_tsvector('english', coalesce(title, '')), 'A') ||
+                setweight(to_tsvector('english', coalesce(summary, '')), 'B') ||
+                setweight(to_tsvector('english', coalesce(content, '')), 'C')
+            ) STORED;
+    END IF;
+END $$;
+
+CREATE INDEX IF NOT EXISTS idx_kb_article_search_vector ON knowledge_base_articles USING gin(search_vector);
+
+COMMENT ON COLUMN knowledge_base_articles.search_vector IS 'Weighted full-text document (title A, summary B, content C), generated';
+COMMENT ON INDEX idx_kb_article_search_vector IS 'GIN index for ranked knowledge base search';
@@ -0,0 +1,30 @@
+-- Migration: Unique planning application reference per tenant
+-- Purpose: Lets PlanningApplicationService._store_applications insert campaign results in
+--          batches with INSERT ... ON CONFLICT (tenant_id, reference) DO NOTHING instead of
+--          looking up every reference first.
+
+-- Remove duplicates left by earlier runs, keeping converted applications, then the oldest
+DELETE FROM planning_applications
+WHERE id IN (
+    SELECT id FROM (
+        SELECT id,
+               ROW_NUMBER() OVER (
+                   PARTITION BY tenant_id, reference
+                   ORDER BY (converted_to_lead_id IS NULL AND converted_to_customer_id IS NULL), created_at, id
+               ) AS position
+        FROM planning_applications
+    ) ranked
+    WHERE ranked.position > 1
+);
+
+DO $$
+BEGIN
+    IF NOT EXISTS (
+        SELECT 1 FROM pg_constraint WHERE conname = 'uq_planning_application_tenant_reference'
+    ) THEN
+        ALTER TABLE planning_applications
+            ADD CONSTRAINT uq_planning_application_tenant_reference UNIQUE (tenant_id, reference);
+    END IF;
+END $$;
+
+COMMENT ON CONSTRAINT uq_planning_application_tenant_reference ON planning_applications IS 'Conflict target for bulk planning application ingestion';
@@ -0,0 +1,11 @@
+-- Migration: Incremental planning campaign runs
+-- Purpose: Stores a per-portal high-watermark (latest date_validated processed and the
+--          references seen at that date) so scheduled campaign runs skip applications
+--          already processed, and adds an index for the scheduled-campaign beat task.
+
+ALTER TABLE planning_application_campaigns
+ADD COLUMN IF NOT EXISTS portal_watermarks JSON;
+
+CREATE INDEX IF NOT EXISTS idx_planning_campaigns_scheduled_next_run
+    ON planning_application_campaigns(next_run_at)
+    WHERE is_scheduled = TRUE;
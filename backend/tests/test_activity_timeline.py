@@ -0,0 +1,107 @@
+"""
+Tests for the keyset-paginated customer timeline (app.services.activity_timeline_service)
+"""
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from app.services.activity_timeline_service import (
+    ActivityTimelineService,
+    InvalidCursorError,
+    decode_cursor,
+    encode_cursor,
+)
+
+T0 = datetime(2025, 3, 1, 9, 0, tzinfo=timezone.utc)
+
+
+def _sql(stmt):
+    return str(stmt.compile(dialect=postgresql.dialect()))
+
+
+def _row(entry_id, entry_type, minutes_ago, **fields):
+    values = {
+        "id": entry_id,
+        "entry_type": entry_type,
+        "timestamp": T0 - timedelta(minutes=minutes_ago),
+        "kind": None,
+        "title": None,
+        "description": None,
+        "user_id": None,
+        "contact_id": None,
+        "metadata": {},
+    }
+    values.update(fields)
+    return SimpleNamespace(**values)
+
+
+def _service(rows):
+    db = MagicMock()
+    result = MagicMock()
+    result.all.return_value = rows
+    db.execute = AsyncMock(return_value=result)
+    return ActivityTimelineService(db, "tenant-1")
+
+
+def test_one_union_query_with_per_branch_keyset():
+    before = (T0, "entry-9")
+    sql = _sql(ActivityTimelineService(None, "tenant-1").timeline_query("cust-1", 26, before=before))
+
+    assert sql.count("UNION ALL") == 3
+    assert sql.count("LIMIT") == 5  # four branches and the merged page
+    assert "(sales_activities.activity_date, sales_activities.id) <" in sql
+    assert "(tickets.created_at, tickets.id) <" in sql
+    assert "(ticket_comments.created_at, ticket_comments.id) <" in sql
+    assert "(quotes.created_at, quotes.id) <" in sql
+    assert "ORDER BY timeline.timestamp DESC, timeline.id DESC" in sql
+
+
+def test_type_filter_drops_branches():
+    service = ActivityTimelineService(None, "tenant-1")
+
+    sql = _sql(service.timeline_query("cust-1", 10, ["call", "quote"]))
+    assert "FROM quotes" in sql and "sales_activities.activity_type IN" in sql
+    assert "FROM tickets" not in sql and "ticket_comments" not in sql
+
+    assert service.timeline_query("cust-1", 10, ["unknown"]) is None
+
+
+@pytest.mark.asyncio
+async def test_pages_chain_through_opaque_cursor():
+    rows = [
+        _row("a1", "sales_activity", 0, kind="CALL", metadata={"duration_minutes": 5, "outcome": "NO_ANSWER"}),
+        _row("t1", "ticket", 1, title="TKT-1", description="Printer down",
+             metadata={"ticket_number": "TKT-1", "status": "IN_PROGRESS", "priority": "HIGH"}),
+        _row("q1", "quote", 2, title="Q-7", description="Cabling",
+             metadata={"quote_number": "Q-7", "status": "SENT", "total_amount": "1200.00"}),
+    ]
+    service = _service(rows)
+
+    page = await service.get_customer_timeline("cust-1", limit=2)
+
+    entries = page["entries"]
+    assert [e["id"] for e in entries] == ["a1", "t1"]
+    assert entries[0]["activity_type"] == "call" and entries[0]["title"] == "Call Activity"
+    assert entries[0]["metadata"] == {"duration_minutes": 5, "outcome": "no_answer"}
+    assert entries[1]["title"] == "Ticket: TKT-1"
+    assert entries[1]["metadata"]["status"] == "in_progress" and entries[1]["metadata"]["priority"] == "high"
+    # The extra row only signals another page; the cursor points after the last returned entry
+    assert decode_cursor(page["next_cursor"]) == (rows[1].timestamp, "t1")
+
+    service.db.execute.return_value.all.return_value = rows[2:]
+    last = await service.get_customer_timeline("cust-1", limit=2, cursor=page["next_cursor"])
+    assert [e["title"] for e in last["entries"]] == ["Quote: Q-7"]
+    assert last["entries"][0]["metadata"]["status"] == "sent"
+    assert last["next_cursor"] is None
+    assert "< (" in _sql(service.db.execute.await_args.args[0])
+
+
+def test_cursor_round_trip_and_rejects_garbage():
+    cursor = encode_cursor(T0, "id-1")
+    assert "=" not in cursor
+    assert decode_cursor(cursor) == (T0, "id-1")
+    with pytest.raises(InvalidCursorError):
+        decode_cursor("not-a-cursor")
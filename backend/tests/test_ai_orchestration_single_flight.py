@@ -0,0 +1,189 @@
+"""
+Tests for AIOrchestrationService single-flight request coalescing
+"""
+import pytest
+import asyncio
+from unittest.mock import Mock, AsyncMock, MagicMock
+
+from app.services.ai_orchestration_service import AIOrchestrationService
+
+
+class FakeRedis:
+    """Minimal in-memory stand-in for the redis.asyncio calls used by the service"""
+
+    def __init__(self):
+        self.store = {}
+
+    async def get(self, key):
+        return self.store.get(key)
+
+    async def setex(self, key, ttl, value):
+        self.store[key] = value
+
+    async def set(self, key, value, nx=False, px=None):
+        if nx and key in self.store:
+            return None
+        self.store[key] = value
+        return True
+
+    async def eval(self, script, numkeys, key, token, *args):
+        if self.store.get(key) != token:
+            return 0
+        if "del" in script:
+            del self.store[key]
+        return 1
+
+
+def _make_service(redis_client):
+    service = AIOrchestrationService(Mock(), tenant_id="tenant-1")
+    service._redis_client = redis_client
+
+    prompt = MagicMock()
+    prompt.id = "prompt-1"
+    prompt.version = 1
+    prompt.model = "gpt-4"
+    prompt.provider_model = None
+    service._resolve_prompt = AsyncMock(return_value=prompt)
+    service._resolve_provider = AsyncMock(return_value="openai")
+    service.prompt_service.render_prompt = Mock(return_value={})
+    return service
+
+
+@pytest.fixture(autouse=True)
+def reset_metrics():
+    for key in AIOrchestrationService._metrics:
+        AIOrchestrationService._metrics[key] = 0
+    AIOrchestrationService._provider_metrics.clear()
+    AIOrchestrationService._inflight.clear()
+    yield
+
+
+@pytest.mark.asyncio
+async def test_concurrent_identical_calls_share_one_completion():
+    """Concurrent identical requests in one process trigger a single provider call"""
+    service = _make_service(FakeRedis())
+
+    async def slow_generate(**kwargs):
+        await asyncio.sleep(0.05)
+        return MagicMock(content="shared answer")
+
+    service.provider_service.generate = AsyncMock(side_effect=slow_generate)
+
+    results = await asyncio.gather(*(
+        service.generate(category="customer_analysis", variables={"name": "Acme"}, max_retries=1)
+        for _ in range(5)
+    ))
+
+    assert service.provider_service.generate.await_count == 1
+    assert all(r["content"] == "shared answer" for r in results)
+    assert sum(1 for r in results if r.get("coalesced")) == 4
+
+    metrics = service.get_metrics()
+    assert metrics["misses"] == 1
+    assert metrics["coalesced_local"] == 4
+
+    # Subsequent call is served from the Redis cache
+    cached = await service.generate(category="customer_analysis", variables={"name": "Acme"})
+    assert cached["cached"] is True
+    assert service.get_metrics()["hits"] == 1
+
+
+@pytest.mark.asyncio
+async def test_follower_waits_for_remote_leader():
+    """A worker that loses the Redis lock waits for the leader's cached result"""
+    redis_client = FakeRedis()
+    service = _make_service(redis_client)
+    service.provider_service.generate = AsyncMock(side_effect=AssertionError("provider should not be called"))
+
+    variables = {"name": "Acme"}
+    cache_key = service._get_cache_key("customer_analysis", "prompt-1", service._hash_variables(variables))
+    redis_client.store[f"{cache_key}:lock"] = "other-worker"
+
+    async def leader_finishes():
+        await asyncio.sleep(0.1)
+        await service._cache_response(cache_key, {"content": "remote answer", "provider": "openai", "model": "gpt-4"}, 60)
+
+    # Cache is empty at the first check, so the call becomes a follower
+    result, _ = await asyncio.gather(
+        service.generate(category="customer_analysis", variables=variables),
+        leader_finishes()
+    )
+
+    assert result["content"] == "remote answer"
+    assert result["coalesced"] is True
+    assert service.get_metrics()["coalesced_remote"] == 1
+
+
+@pytest.mark.asyncio
+async def test_leader_failure_propagates_to_local_followers():
+    """Followers see the leader's error instead of hanging, and the lock is released"""
+    redis_client = FakeRedis()
+    service = _make_service(redis_client)
+
+    async def failing_generate(**kwargs):
+        await asyncio.sleep(0.02)
+        raise RuntimeError("provider down")
+
+    service.provider_service.generate = AsyncMock(side_effect=failing_generate)
+
+    results = await asyncio.gather(*(
+        service.generate(category="customer_analysis", variables={"x": 1}, max_retries=1)
+        for _ in range(3)
+    ), return_exceptions=True)
+
+    assert all(isinstance(r, RuntimeError) for r in results)
+    assert service.provider_service.generate.await_count == 1
+    assert not any(key.endswith(":lock") for key in redis_client.store)
+    metrics = service.get_metrics()
+    assert metrics["errors"] == 1
+    assert metrics["providers"]["openai"]["calls"] == 1
+    assert metrics["providers"]["openai"]["error_rate"] == 1.0
+
+
+@pytest.mark.asyncio
+async def test_follower_takes_over_when_leader_is_cancelled():
+    """Cancelling the leader (e.g. client disconnect) does not cancel live followers"""
+    redis_client = FakeRedis()
+    service = _make_service(redis_client)
+    calls = 0
+
+    async def generate(**kwargs):
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(10 if calls == 1 else 0.01)
+        return MagicMock(content="follower answer")
+
+    service.provider_service.generate = AsyncMock(side_effect=generate)
+
+    def request():
+        return service.generate(category="customer_analysis", variables={"name": "Acme"}, max_retries=1)
+
+    leader = asyncio.create_task(request())
+    await asyncio.sleep(0.01)
+    follower = asyncio.create_task(request())
+    await asyncio.sleep(0.01)
+    leader.cancel()
+
+    result = await asyncio.wait_for(follower, timeout=1)
+
+    assert leader.cancelled()
+    assert result["content"] == "follower answer"
+    assert service.provider_service.generate.await_count == 2
+    assert not any(key.endswith(":lock") for key in redis_client.store)
+
+
+@pytest.mark.asyncio
+async def test_provider_metrics_track_latency_errors_and_tokens():
+    """Each provider attempt is counted with its latency, failures and token usage"""
+    service = _make_service(FakeRedis())
+    service.provider_service.generate = AsyncMock(side_effect=[
+        RuntimeError("rate limited"),
+        Mock(content="ok", usage={"input_tokens": 12, "output_tokens": 30}),
+    ])
+
+    await service.generate(category="customer_analysis", variables={"x": 1}, max_retries=2, retry_delay=0)
+
+    stats = service.get_metrics()["providers"]["openai"]
+    assert stats["calls"] == 2 and stats["errors"] == 1 and stats["error_rate"] == 0.5
+    assert stats["prompt_tokens"] == 12 and stats["completion_tokens"] == 30
+    assert stats["avg_latency_ms"] >= 0
@@ -0,0 +1,102 @@
+"""
+Tests for precompiled prompt templates (app.services.ai_prompt_service)
+"""
+import json
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, Mock
+
+import pytest
+
+from app.services import ai_prompt_service
+from app.services.ai_orchestration_service import AIOrchestrationService
+from app.services.ai_prompt_service import CompiledTemplate, compile_template, render_prompt_templates
+
+
+def _prompt(**overrides):
+    fields = {
+        "id": "prompt-1",
+        "version": 1,
+        "system_prompt": "You help {company_name}.",
+        "user_prompt_template": 'Context: {context}\nReturn JSON like {"score": 1} for {company_name} {missing}',
+        "model": "gpt-5-mini",
+        "temperature": 0.7,
+        "max_tokens": 8000,
+        "provider_model": None,
+    }
+    fields.update(overrides)
+    return SimpleNamespace(**fields)
+
+
+def test_single_pass_substitution():
+    """Values are inserted once: placeholders inside values and unknown placeholders stay literal"""
+    template = CompiledTemplate("{a} and {b} and {a} {unknown} {not a placeholder}")
+
+    assert template.variable_names == {"a", "b", "unknown"}
+    assert template.render({"a": "{b}", "b": "B"}) == "{b} and B and {b} {unknown} {not a placeholder}"
+    assert CompiledTemplate("no placeholders").render({"a": "x"}) == "no placeholders"
+
+
+def test_render_formats_each_variable_once():
+    rendered = render_prompt_templates(_prompt(), {"company_name": "Acme", "context": {"sites": [1, 2]}, "unused": object()})
+
+    assert rendered.system_prompt == "You help Acme."
+    assert rendered.user_prompt == (
+        f'Context: {json.dumps({"sites": [1, 2]}, indent=2)}\nReturn JSON like {{"score": 1}} for Acme {{missing}}'
+    )
+    # Dict-style access used by existing callers
+    assert rendered["max_tokens"] == 8000 and rendered.get("temperature") == 0.7
+    assert rendered.get("nope", "default") == "default"
+    with pytest.raises(KeyError):
+        rendered["nope"]
+
+
+def test_templates_compiled_once_per_prompt_version():
+    ai_prompt_service._compiled_templates.clear()
+    prompt = _prompt()
+
+    first = compile_template(prompt.system_prompt, ("prompt-1", 1, "system"))
+    assert compile_template(prompt.system_prompt, ("prompt-1", 1, "system")) is first
+    # New version, or a template edited without a version bump, is recompiled
+    assert compile_template("Changed {x}", ("prompt-1", 2, "system")) is not first
+    edited = compile_template("Edited {x}", ("prompt-1", 1, "system"))
+    assert edited is not first and edited.render({"x": "!"}) == "Edited !"
+
+
+@pytest.mark.asyncio
+async def test_orchestration_renders_once_across_retries():
+    service = AIOrchestrationService(Mock(), tenant_id="tenant-1")
+    prompt = _prompt()
+    service._resolve_prompt = AsyncMock(return_value=prompt)
+    service._resolve_provider = AsyncMock(return_value="openai")
+    service.prompt_service.render_prompt = Mock(wraps=service.prompt_service.render_prompt)
+    service.provider_service.generate = AsyncMock(side_effect=[RuntimeError("timeout"), MagicMock(content="ok")])
+
+    result = await service.generate(
+        category="customer_analysis", variables={"company_name": "Acme"},
+        use_cache=False, max_retries=2, retry_delay=0
+    )
+
+    assert result["content"] == "ok"
+    assert service.prompt_service.render_prompt.call_count == 1
+    calls = service.provider_service.generate.await_args_list
+    assert len(calls) == 2
+    assert calls[0].kwargs["rendered"] is calls[1].kwargs["rendered"]
+    assert calls[0].kwargs["rendered"].system_prompt == "You help Acme."
+
+
+def test_compiled_template_cache_is_thread_safe(monkeypatch):
+    """Concurrent compiles from executor threads keep the LRU bounded and consistent"""
+    monkeypatch.setattr(ai_prompt_service, "MAX_COMPILED_TEMPLATES", 8)
+    ai_prompt_service._compiled_templates.clear()
+
+    def compile_many(worker):
+        for n in range(200):
+            key = ("prompt-thread", (worker * 200 + n) % 16, "user")
+            assert compile_template(f"Hello {{name}} {key[1]}", key).source == f"Hello {{name}} {key[1]}"
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        list(pool.map(compile_many, range(8)))
+
+    assert len(ai_prompt_service._compiled_templates) == 8
+    ai_prompt_service._compiled_templates.clear()
@@ -7,14 +7,14 @@ import asyncio
 from unittest.mock import Mock, patch, AsyncMock, MagicMock
 from openai import OpenAI
 
-from app.core.ai_providers import OpenAIProvider
+from app.core.ai_providers import OpenAIProvider, AnthropicProvider, AsyncClientPool, PooledClient
 
 
 @pytest.mark.asyncio
 async def test_openai_provider_uses_executor():
     """Test that OpenAI provider wraps synchronous calls in executor"""
     api_key = "test-api-key"
-    provider = OpenAIProvider(api_key)
+    provider = OpenAIProvider(api_key, use_async_client=False)
     
     # Mock the client
     mock_response = MagicMock()
@@ -45,7 +45,7 @@ async def test_openai_provider_uses_executor():
 async def test_openai_provider_responses_api_uses_executor():
     """Test that responses.create() API is wrapped in executor"""
     api_key = "test-api-key"
-    provider = OpenAIProvider(api_key)
+    provider = OpenAIProvider(api_key, use_async_client=False)
     
     # Mock the client
     mock_response = MagicMock()
@@ -67,7 +67,69 @@ async def test_openai_provider_responses_api_uses_executor():
     assert response.content == "Test response from responses API"
 
 
+@pytest.mark.asyncio
+async def test_openai_provider_uses_pooled_async_client():
+    """Test that async mode awaits the pooled AsyncOpenAI client instead of the executor"""
+    provider = OpenAIProvider("test-api-key", use_async_client=True)
+    
+    mock_response = MagicMock()
+    mock_response.choices = [MagicMock()]
+    mock_response.choices[0].message.content = "Async response"
+    mock_response.usage.prompt_tokens = 1
+    mock_response.usage.completion_tokens = 2
+    mock_response.usage.total_tokens = 3
+    
+    async_client = MagicMock()
+    async_client.chat.completions.create = AsyncMock(return_value=mock_response)
+    provider.client = MagicMock()
+    provider.client.chat.completions.create = Mock(side_effect=AssertionError("sync client used"))
+    
+    with patch.object(provider, "_create_async_client", return_value=PooledClient(async_client)):
+        response = await provider.generate_completion(
+            system_prompt="Test system",
+            user_prompt="Test user",
+            model="gpt-4"
+        )
+    
+    assert response.content == "Async response"
+    async_client.chat.completions.create.assert_awaited_once()
+    await AsyncClientPool.close_all()
 
 
+@pytest.mark.asyncio
+async def test_async_client_pool_shares_client_per_key():
+    """Test that providers with the same provider/base_url/key share one pooled client"""
+    first = OpenAIProvider("shared-key", use_async_client=True)
+    second = OpenAIProvider("shared-key", use_async_client=True)
+    other = OpenAIProvider("other-key", use_async_client=True)
+    
+    assert first._get_pooled_client() is second._get_pooled_client()
+    assert first._get_pooled_client() is not other._get_pooled_client()
+    assert AnthropicProvider("shared-key", use_async_client=True)._get_pooled_client() is not first._get_pooled_client()
+    
+    stats = AsyncClientPool.get_stats()
+    assert stats["clients"] == 3
+    assert all("shared-key" not in str(pool) for pool in stats["pools"])
+    
+    await AsyncClientPool.close_all()
+    assert AsyncClientPool.get_stats()["clients"] == 0
 
 
+@pytest.mark.asyncio
+async def test_pooled_client_caps_concurrency():
+    """Test that the pooled client semaphore bounds in-flight calls"""
+    pooled = PooledClient(MagicMock())
+    pooled.semaphore = asyncio.Semaphore(2)
+    peak = 0
+    
+    async def call():
+        nonlocal peak
+        async with pooled.slot():
+            peak = max(peak, pooled.in_flight)
+            await asyncio.sleep(0.01)
+    
+    await asyncio.gather(*(call() for _ in range(10)))
+    
+    assert peak == 2
+    assert pooled.in_flight == 0
+    assert pooled.total_calls == 10
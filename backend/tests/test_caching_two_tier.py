@@ -0,0 +1,179 @@
+"""
+Tests for the two-tier (in-process L1 + Redis) cache in app.core.caching
+"""
+import json
+import pytest
+from unittest.mock import AsyncMock, patch
+
+from app.core import caching
+from app.core.caching import LocalCache
+
+
+class FakeRedis:
+    """Minimal in-memory stand-in for the redis.asyncio calls used by caching"""
+
+    def __init__(self):
+        self.store = {}
+        self.ttls = {}
+        self.published = []
+        self.get_calls = 0
+
+    async def get(self, key):
+        self.get_calls += 1
+        return self.store.get(key)
+
+    async def ttl(self, key):
+        if key not in self.store:
+            return -2
+        return self.ttls.get(key, -1)
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+    async def setex(self, key, ttl, value):
+        self.store[key] = value
+        self.ttls[key] = ttl
+
+    async def delete(self, *keys):
+        for key in keys:
+            self.store.pop(key, None)
+
+    async def scan_iter(self, match=None):
+        from fnmatch import fnmatchcase
+        for key in list(self.store):
+            if fnmatchcase(key, match):
+                yield key
+
+    async def publish(self, channel, message):
+        self.published.append((channel, json.loads(message)))
+
+    async def info(self, section):
+        return {"keyspace_hits": 0, "keyspace_misses": 0}
+
+
+class FakePipeline:
+    """Buffers get/ttl calls and runs them on execute()"""
+
+    def __init__(self, redis_client):
+        self.redis_client = redis_client
+        self.calls = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        return False
+
+    def get(self, key):
+        self.calls.append(self.redis_client.get(key))
+        return self
+
+    def ttl(self, key):
+        self.calls.append(self.redis_client.ttl(key))
+        return self
+
+    async def execute(self):
+        return [await call for call in self.calls]
+
+
+@pytest.fixture
+def fake_redis():
+    redis_client = FakeRedis()
+    caching._local_cache.clear()
+    caching._prefix_stats.clear()
+    with patch.object(caching, "get_redis", AsyncMock(return_value=redis_client)):
+        yield redis_client
+    caching._local_cache.clear()
+
+
+def test_local_cache_lru_eviction_and_ttl():
+    """L1 is bounded (LRU) and entries expire"""
+    cache = LocalCache(max_entries=2, default_ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")  # "b" is now least recently used
+    cache.set("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.evictions == 1
+
+    cache.set("short", "x", ttl=-1)
+    assert cache.get("short") is None
+
+
+@pytest.mark.asyncio
+async def test_l1_serves_hot_keys_without_redis(fake_redis):
+    """Second read of a key is served from L1 with no Redis round trip"""
+    fake_redis.store["tenant:t1:config"] = json.dumps({"plan": "pro"})
+
+    assert await caching.get_cached_tenant_config("t1") == {"plan": "pro"}
+    assert await caching.get_cached_tenant_config("t1") == {"plan": "pro"}
+
+    assert fake_redis.get_calls == 1
+    stats = await caching.get_cache_stats()
+    assert stats["prefixes"]["tenant:"]["l1_hits"] == 1
+    assert stats["prefixes"]["tenant:"]["l2_hits"] == 1
+
+
+@pytest.mark.asyncio
+async def test_delete_and_pattern_invalidation_broadcast(fake_redis):
+    """Deletes evict locally and are broadcast to other processes"""
+    await caching.set_cache("customer:c1", {"name": "Acme"})
+    await caching.set_cache("customer:c1:contacts", [1, 2])
+
+    await caching.delete_cache("customer:c1")
+    assert caching._local_cache.get("customer:c1") is None
+
+    await caching.invalidate_cache_pattern("customer:c1*")
+    assert caching._local_cache.get("customer:c1:contacts") is None
+
+    messages = [message for channel, message in fake_redis.published if channel == caching.CACHE_INVALIDATION_CHANNEL]
+    assert {"key": "customer:c1"}.items() <= messages[-2].items()
+    assert messages[-1]["pattern"] == "customer:c1*"
+
+
+def test_remote_invalidation_evicts_l1_but_ignores_own_messages():
+    """Broadcasts from other processes evict L1 entries; our own are ignored"""
+    caching._local_cache.clear()
+    caching._local_cache.set("tenant:t1:config", {"plan": "pro"})
+    caching._local_cache.set("tenant:t2:config", {"plan": "free"})
+
+    caching._handle_invalidation_message({
+        "data": json.dumps({"key": "tenant:t1:config", "origin": caching._PROCESS_ID})
+    })
+    assert caching._local_cache.get("tenant:t1:config") is not None
+
+    caching._handle_invalidation_message({
+        "data": json.dumps({"pattern": "tenant:*", "origin": "another-worker"}).encode()
+    })
+    assert caching._local_cache.get("tenant:t1:config") is None
+    assert caching._local_cache.get("tenant:t2:config") is None
+
+
+@pytest.mark.asyncio
+async def test_cached_values_are_private_copies(fake_redis):
+    """Mutating a value passed to or returned from the cache does not change what L1 serves"""
+    config = {"plan": "pro", "features": ["crm"]}
+    await caching.set_cache("tenant:t1:config", config)
+    config["features"].append("helpdesk")
+
+    first = await caching.get_cache("tenant:t1:config")
+    first["plan"] = "free"
+
+    assert await caching.get_cache("tenant:t1:config") == {"plan": "pro", "features": ["crm"]}
+
+
+@pytest.mark.asyncio
+async def test_l1_refill_keeps_remaining_redis_ttl(fake_redis):
+    """An L2 hit is cached in L1 no longer than the Redis entry has left"""
+    fake_redis.store["tenant:t1:config"] = json.dumps({"plan": "pro"})
+    fake_redis.ttls["tenant:t1:config"] = 5
+
+    with patch.object(caching._local_cache, "set", wraps=caching._local_cache.set) as local_set:
+        assert await caching.get_cache("tenant:t1:config") == {"plan": "pro"}
+        fake_redis.store["customer:c1"] = json.dumps([1])
+        assert await caching.get_cache("customer:c1") == [1]
+
+    assert local_set.call_args_list[0].args[2] == 5
+    assert local_set.call_args_list[1].args[2] is None
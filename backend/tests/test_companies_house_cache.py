@@ -0,0 +1,115 @@
+"""
+Tests for the Companies House response cache and throttle (app.services.companies_house_cache)
+"""
+import time
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import httpx
+import pytest
+
+from app.services import companies_house_cache
+from app.services.companies_house_cache import CompaniesHouseCache, CompaniesHouseThrottle
+from app.services.companies_house_service import CompaniesHouseService
+
+URL = "https://api.company-information.service.gov.uk/company/01234567"
+
+
+@pytest.fixture
+def shared_cache():
+    store = {}
+
+    async def get_cache(key):
+        return store.get(key)
+
+    async def set_cache(key, value, ttl=3600):
+        store[key] = value
+        return True
+
+    with patch.object(companies_house_cache, "get_cache", get_cache), \
+            patch.object(companies_house_cache, "set_cache", set_cache):
+        yield store
+
+
+def _response(status, body=None, etag=None):
+    headers = {"etag": etag} if etag else {}
+    return httpx.Response(status, json=body, headers=headers, request=httpx.Request("GET", URL))
+
+
+def _cache():
+    throttle = MagicMock()
+    throttle.acquire = AsyncMock()
+    return CompaniesHouseCache(throttle=throttle)
+
+
+@pytest.mark.asyncio
+async def test_fresh_entries_served_without_a_request(shared_cache):
+    cache = _cache()
+    client = MagicMock()
+    client.get = AsyncMock(return_value=_response(200, {"company_name": "ACME LTD"}, etag='"v1"'))
+
+    first = await cache.fetch_json(client, URL, "profile", headers={"Authorization": "key"})
+    second = await cache.fetch_json(client, URL, "profile", headers={"Authorization": "key"})
+
+    assert first == second == {"company_name": "ACME LTD"}
+    client.get.assert_awaited_once()
+    cache.throttle.acquire.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_stale_entries_revalidated_with_etag(shared_cache):
+    cache = _cache()
+    key = cache.cache_key("profile", URL)
+    shared_cache[key] = {"etag": '"v1"', "body": {"company_name": "ACME LTD"}, "fetched_at": time.time() - 10 ** 7}
+    client = MagicMock()
+    client.get = AsyncMock(return_value=_response(304))
+
+    body = await cache.fetch_json(client, URL, "profile", headers={"Authorization": "key"})
+
+    assert body == {"company_name": "ACME LTD"}
+    assert client.get.await_args.kwargs["headers"] == {"Authorization": "key", "If-None-Match": '"v1"'}
+    assert time.time() - shared_cache[key]["fetched_at"] < 5
+
+    # Changed resource replaces the entry
+    shared_cache[key]["fetched_at"] = 0
+    client.get = AsyncMock(return_value=_response(200, {"company_name": "ACME GROUP LTD"}, etag='"v2"'))
+    assert await cache.fetch_json(client, URL, "profile") == {"company_name": "ACME GROUP LTD"}
+    assert shared_cache[key]["etag"] == '"v2"'
+
+
+@pytest.mark.asyncio
+async def test_errors_are_not_cached(shared_cache):
+    cache = _cache()
+    client = MagicMock()
+    client.get = AsyncMock(return_value=_response(404, {"errors": []}))
+
+    with pytest.raises(httpx.HTTPStatusError):
+        await cache.fetch_json(client, URL, "profile")
+    assert shared_cache == {}
+
+
+@pytest.mark.asyncio
+async def test_local_bucket_used_without_redis():
+    with patch.object(companies_house_cache.settings, "COMPANIES_HOUSE_RATE_BURST", 2), \
+            patch.object(companies_house_cache, "get_redis", AsyncMock(return_value=None)):
+        throttle = CompaniesHouseThrottle()
+        waits = [await throttle._take() for _ in range(3)]
+
+    assert waits[:2] == [0, 0]
+    # 598 tokens per 300s: about half a second until the next one
+    assert 400 <= waits[2] <= 510
+
+
+@pytest.mark.asyncio
+async def test_search_shared_between_service_instances(shared_cache):
+    client = MagicMock()
+    client.get = AsyncMock(return_value=_response(200, {"items": [{"company_number": "01234567", "title": "ACME LTD"}]}))
+
+    with patch.object(companies_house_cache.CompaniesHouseThrottle, "acquire", AsyncMock()):
+        results = []
+        for _ in range(2):
+            service = CompaniesHouseService(api_key="key")
+            service._get_client = AsyncMock(return_value=client)
+            results.append(await service.search_company("Acme"))
+
+    assert results[0] == results[1] and results[0]["company_number"] == "01234567"
+    client.get.assert_awaited_once()
@@ -0,0 +1,199 @@
+"""
+Tests for aggregate customer value metrics (app.services.customer_metrics_service, app.services.reporting_service)
+"""
+import asyncio
+from datetime import datetime, timezone
+from decimal import Decimal
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+import pytest
+from celery.exceptions import Retry
+
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.orm.attributes import set_committed_value
+
+from app.models.helpdesk import Ticket
+from app.models.quotes import Quote
+from app.models.support_contract import SupportContract
+from app.services import customer_metrics_service
+from app.services.customer_metrics_service import customer_metrics_select, customer_metrics_upsert
+from app.services.reporting_service import ReportingService
+from app.tasks import customer_metrics_tasks
+from app.tasks.customer_metrics_tasks import rebuild_customer_metrics_task, refresh_customer_metrics_task
+
+
+def _sql(stmt):
+    return str(stmt.compile(dialect=postgresql.dialect()))
+
+
+def _persistent(instance, **committed):
+    for field, value in committed.items():
+        set_committed_value(instance, field, value)
+    return instance
+
+
+def test_rollup_is_one_aggregate_statement():
+    sql = _sql(customer_metrics_upsert("tenant-1", ["c1", "c2"]))
+
+    assert sql.startswith("INSERT INTO customer_metrics")
+    assert sql.count("GROUP BY") == 3
+    assert "LEFT OUTER JOIN" in sql
+    assert "ON CONFLICT (customer_id) DO UPDATE SET" in sql
+    assert "monthly_recurring_revenue = excluded.monthly_recurring_revenue" in sql
+
+    # A tenant rebuild has no customer filter
+    assert "POSTCOMPILE" not in _sql(customer_metrics_select("tenant-1"))
+
+
+def test_pipeline_report_reads_each_table_once():
+    db = MagicMock()
+    query = db.query.return_value.filter.return_value
+    query.scalar.return_value = 10
+    query.one.side_effect = [
+        SimpleNamespace(prospects=3, customers=4),
+        SimpleNamespace(sent=8, accepted=2, revenue=Decimal("1500.50")),
+    ]
+
+    report = ReportingService(db, "tenant-1").get_sales_pipeline_report()
+
+    assert db.query.call_count == 3
+    assert report["pipeline"] == {"leads": 10, "prospects": 3, "customers": 4, "conversion_rate": 40.0}
+    assert report["quotes"] == {"sent": 8, "accepted": 2, "acceptance_rate": 25.0}
+    assert report["revenue"] == {"total": 1500.5, "average_deal_value": 750.25}
+
+
+def test_lifetime_value_from_one_aggregate_row():
+    db = MagicMock()
+    db.execute.return_value.first.return_value = SimpleNamespace(
+        lifetime_value=Decimal("3000.00"),
+        accepted_quote_count=4,
+        monthly_recurring_revenue=Decimal("250.00"),
+        first_accepted_at=datetime(2024, 5, 1, tzinfo=timezone.utc),
+        ticket_count=7
+    )
+
+    clv = ReportingService(db, "tenant-1").get_customer_lifetime_value("c1")
+
+    db.execute.assert_called_once()
+    db.query.assert_not_called()
+    assert clv == {
+        "customer_id": "c1",
+        "total_revenue": 3000.0,
+        "quote_count": 4,
+        "average_deal_value": 750.0,
+        "monthly_recurring_revenue": 250.0,
+        "annual_recurring_revenue": 3000.0,
+        "ticket_count": 7,
+        "customer_since": "2024-05-01T00:00:00+00:00"
+    }
+
+    db.execute.return_value.first.return_value = None
+    assert ReportingService(db, "tenant-1").get_customer_lifetime_value("gone")["total_revenue"] == 0.0
+
+
+def test_commits_queue_only_customers_with_metric_changes():
+    moved_quote = _persistent(Quote(tenant_id="t1"), customer_id="c1")
+    moved_quote.customer_id = "c2"
+    renamed_contract = _persistent(SupportContract(tenant_id="t1"), customer_id="c3", contract_name="Old")
+    renamed_contract.contract_name = "New"
+    session = SimpleNamespace(
+        new=[Ticket(tenant_id="t2", customer_id="c4"), Ticket(tenant_id="t2")],
+        dirty=[moved_quote, renamed_contract],
+        deleted=[],
+        info={}
+    )
+    with patch.object(customer_metrics_service, "schedule_customer_metrics_refresh") as schedule:
+        customer_metrics_service._collect_customer_metric_changes(session, None)
+        customer_metrics_service._refresh_committed_customer_metrics(session)
+
+    queued = {call.args[0]: set(call.args[1]) for call in schedule.call_args_list}
+    assert queued == {"t1": {"c1", "c2"}, "t2": {"c4"}}
+    assert session.info == {}
+
+
+def test_refreshes_are_debounced_per_tenant():
+    redis_client = MagicMock()
+    redis_client.set.side_effect = [True, None]
+    celery_app = MagicMock()
+    with patch.object(customer_metrics_service, "get_sync_redis", return_value=redis_client), \
+            patch("app.core.celery_app.celery_app", celery_app):
+        customer_metrics_service.schedule_customer_metrics_refresh("t1", ["c1", "c2"])
+        customer_metrics_service.schedule_customer_metrics_refresh("t1", ["c3"])
+
+    assert redis_client.sadd.call_count == 2
+    celery_app.send_task.assert_called_once()
+    assert celery_app.send_task.call_args.args == ("refresh_customer_metrics",)
+    assert celery_app.send_task.call_args.kwargs["args"] == ["t1"]
+
+    redis_client.spop.side_effect = [["c1", "c2"], ["c3"], []]
+    with patch.object(customer_metrics_service, "get_sync_redis", return_value=redis_client):
+        assert customer_metrics_service.pop_pending_customer_ids("t1") == ["c1", "c2", "c3"]
+    redis_client.delete.assert_called_once_with("customer_metrics:pending:t1:scheduled")
+
+
+@pytest.mark.asyncio
+async def test_refresh_from_event_loop_runs_in_executor():
+    loop = asyncio.get_running_loop()
+    with patch.object(customer_metrics_service, "get_sync_redis") as get_sync_redis, \
+            patch.object(loop, "run_in_executor") as run_in_executor:
+        customer_metrics_service.schedule_customer_metrics_refresh("t1", ["c1", None])
+
+    get_sync_redis.assert_not_called()
+    assert run_in_executor.call_args.args[1:] == (customer_metrics_service._enqueue_customer_metrics_refresh, "t1", ["c1"])
+
+
+def test_failed_refresh_retries_then_restores_pending_customers():
+    with patch.object(customer_metrics_tasks, "SessionLocal"), \
+            patch.object(customer_metrics_tasks, "pop_pending_customer_ids", return_value=["c1", "c2"]), \
+            patch.object(customer_metrics_tasks, "refresh_customer_metrics", side_effect=RuntimeError("db down")), \
+            patch.object(customer_metrics_tasks, "restore_pending_customer_ids") as restore, \
+            patch.object(refresh_customer_metrics_task, "retry", side_effect=Retry()) as retry:
+        with pytest.raises(Retry):
+            refresh_customer_metrics_task.run("t1")
+        assert retry.call_args.kwargs["kwargs"]["customer_ids"] == ["c1", "c2"]
+        restore.assert_not_called()
+
+        refresh_customer_metrics_task.push_request(retries=refresh_customer_metrics_task.max_retries)
+        try:
+            result = refresh_customer_metrics_task.run("t1", customer_ids=["c1", "c2"])
+        finally:
+            refresh_customer_metrics_task.pop_request()
+
+    assert result["success"] is False
+    restore.assert_called_once_with("t1", ["c1", "c2"])
+
+
+def test_retry_signature_replays_through_the_task():
+    """The retry built from a send_task(args=[tenant_id]) request calls the task with valid arguments"""
+    refresh_customer_metrics_task.push_request(
+        id="task-1", args=["t1"], kwargs={}, retries=0, called_directly=False, is_eager=True
+    )
+    try:
+        with patch.object(customer_metrics_tasks, "SessionLocal"), \
+                patch.object(customer_metrics_tasks, "pop_pending_customer_ids", return_value=["c1"]), \
+                patch.object(customer_metrics_tasks, "refresh_customer_metrics", side_effect=RuntimeError("db down")):
+            with pytest.raises(Retry) as retry:
+                refresh_customer_metrics_task.run("t1")
+    finally:
+        refresh_customer_metrics_task.pop_request()
+
+    retry_signature = retry.value.sig
+    with patch.object(customer_metrics_tasks, "SessionLocal"), \
+            patch.object(customer_metrics_tasks, "pop_pending_customer_ids") as pop, \
+            patch.object(customer_metrics_tasks, "refresh_customer_metrics", return_value=1) as refresh:
+        result = refresh_customer_metrics_task.run(*retry_signature.args, **retry_signature.kwargs)
+
+    assert result["success"] is True
+    pop.assert_not_called()
+    assert refresh.call_args.args[1:] == ("t1", ["c1"])
+
+
+def test_periodic_rebuild_queues_each_tenant():
+    with patch.object(customer_metrics_tasks, "SessionLocal") as session_local, \
+            patch.object(refresh_customer_metrics_task, "delay") as delay:
+        session_local.return_value.execute.return_value.scalars.return_value.all.return_value = ["t1", "t2"]
+        assert rebuild_customer_metrics_task.run()["tenants_queued"] == 2
+
+    assert [call.args for call in delay.call_args_list] == [("t1",), ("t2",)]
+    assert all(call.kwargs == {"rebuild": True} for call in delay.call_args_list)
@@ -0,0 +1,128 @@
+"""
+Tests for the dashboard KPI snapshot (app.services.dashboard_kpi_service)
+"""
+import asyncio
+
+import pytest
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from sqlalchemy.dialects import postgresql
+
+from app.services import dashboard_kpi_service
+from app.services.dashboard_kpi_service import DashboardKPIService, PIPELINE_STAGES
+from app.models.crm import Customer
+from app.models.quotes import Quote
+
+
+class RecordingSession:
+    """Captures executed statements and returns a canned single row"""
+
+    def __init__(self, row):
+        self.row = row
+        self.statements = []
+
+    async def execute(self, stmt):
+        self.statements.append(stmt)
+        result = MagicMock()
+        result.one.return_value = self.row
+        return result
+
+
+def _sql(stmt):
+    return str(stmt.compile(dialect=postgresql.dialect()))
+
+
+@pytest.mark.asyncio
+async def test_customer_metrics_use_one_filtered_aggregate():
+    """Status counts, high-score leads and monthly conversions come from one statement"""
+    windows = dashboard_kpi_service._month_windows(dashboard_kpi_service.datetime(2025, 6, 15))
+    row = [10, 5, 2, 7, 3, 1, 4, 6] + [0, 1, 0, 2, 0, 1]
+    session = RecordingSession(row)
+
+    metrics = await DashboardKPIService(session, "tenant-1")._customer_metrics(windows)
+
+    assert len(session.statements) == 1
+    sql = _sql(session.statements[0])
+    assert sql.count("FILTER (WHERE") == 14
+    assert "GROUP BY" not in sql
+    assert metrics["status_counts"] == {
+        "LEAD": 10, "PROSPECT": 5, "OPPORTUNITY": 2, "CUSTOMER": 7,
+        "COLD_LEAD": 3, "INACTIVE": 1, "LOST": 4
+    }
+    assert metrics["high_score_leads"] == 6
+    assert metrics["monthly_converted"] == [0, 1, 0, 2, 0, 1]
+
+
+@pytest.mark.asyncio
+async def test_opportunity_metrics_build_pipeline_from_one_row():
+    """Pipeline stage counts and values are unpacked from the single aggregate row"""
+    row = [4, 1, 1, 2, 900] + [value for idx in range(len(PIPELINE_STAGES)) for value in (idx, idx * 100)]
+    session = RecordingSession(row)
+
+    metrics = await DashboardKPIService(session, "tenant-1")._opportunity_metrics()
+
+    assert len(session.statements) == 1
+    assert metrics["active_opportunities"] == 4
+    assert metrics["opportunities_total_value"] == 900.0
+    assert [stage["stage"] for stage in metrics["pipeline_stages"]] == [label for _, label in PIPELINE_STAGES]
+    assert metrics["pipeline_stages"][2] == {"stage": "Proposal Sent", "count": 2, "total_value": 200.0}
+
+
+@pytest.mark.asyncio
+async def test_snapshot_served_from_cache():
+    """A cached snapshot is returned without touching the database"""
+    service = DashboardKPIService(RecordingSession(None), "tenant-1")
+    with patch.object(dashboard_kpi_service, "get_cache", AsyncMock(return_value={"total_quotes": 3})):
+        assert await service.get_snapshot() == {"total_quotes": 3}
+    assert service.db.statements == []
+
+
+def test_commit_schedules_refresh_for_touched_tenants():
+    """Writes to KPI source rows queue a refresh per tenant after commit only"""
+    session = SimpleNamespace(
+        info={},
+        new=[Customer(tenant_id="tenant-1")],
+        dirty=[Quote(tenant_id="tenant-2")],
+        deleted=[]
+    )
+
+    with patch.object(dashboard_kpi_service, "schedule_dashboard_kpi_refresh") as schedule:
+        dashboard_kpi_service._collect_kpi_changes(session, None)
+        dashboard_kpi_service._discard_kpi_changes(session)
+        dashboard_kpi_service._refresh_committed_kpis(session)
+        schedule.assert_not_called()
+
+        dashboard_kpi_service._collect_kpi_changes(session, None)
+        dashboard_kpi_service._refresh_committed_kpis(session)
+        assert set(schedule.call_args.args) == {"tenant-1", "tenant-2"}
+
+
+def test_refresh_is_debounced_per_tenant():
+    """Only the first write in a debounce window queues a Celery task"""
+    redis_client = MagicMock()
+    redis_client.set.side_effect = [True, None]
+    celery_app = MagicMock()
+
+    with patch.object(dashboard_kpi_service, "get_sync_redis", return_value=redis_client), \
+            patch("app.core.celery_app.celery_app", celery_app):
+        dashboard_kpi_service.schedule_dashboard_kpi_refresh("tenant-1")
+        dashboard_kpi_service.schedule_dashboard_kpi_refresh("tenant-1")
+
+    celery_app.send_task.assert_called_once()
+    assert celery_app.send_task.call_args.args == ("refresh_dashboard_kpis",)
+
+
+@pytest.mark.asyncio
+async def test_refresh_from_event_loop_runs_in_executor():
+    """Async callers and AsyncSession commits never hit Redis or Celery on the loop"""
+    loop = asyncio.get_running_loop()
+
+    with patch.object(dashboard_kpi_service, "get_sync_redis") as get_sync_redis, \
+            patch.object(loop, "run_in_executor") as run_in_executor:
+        dashboard_kpi_service.schedule_dashboard_kpi_refresh("tenant-1", "tenant-2")
+
+    get_sync_redis.assert_not_called()
+    func, tenant_ids = run_in_executor.call_args.args[1:]
+    assert func is dashboard_kpi_service._enqueue_dashboard_kpi_refresh
+    assert set(tenant_ids) == {"tenant-1", "tenant-2"}
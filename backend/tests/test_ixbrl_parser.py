@@ -0,0 +1,112 @@
+"""
+Tests for streaming iXBRL extraction (app.services.ixbrl_parser)
+"""
+from unittest.mock import patch
+
+import pytest
+
+from app.services import companies_house_cache, ixbrl_parser
+from app.services.companies_house_service import CompaniesHouseService
+from app.services.ixbrl_parser import IXBRLFacts, extract_financial_data, parse_ixbrl_facts
+
+ACCOUNTS = """<?xml version="1.0" encoding="UTF-8"?>
+<html xmlns="http://www.w3.org/1999/xhtml"
+      xmlns:ix="http://www.xbrl.org/2013/inlineXBRL"
+      xmlns:xbrli="http://www.xbrl.org/2003/instance">
+<head><title>Accounts</title></head>
+<body>
+  <ix:header><ix:resources>
+    <xbrli:context id="cy"><xbrli:period><xbrli:startDate>2023-01-01</xbrli:startDate><xbrli:endDate>2023-12-31</xbrli:endDate></xbrli:period></xbrli:context>
+    <xbrli:context id="py"><xbrli:period><xbrli:startDate>2022-01-01</xbrli:startDate><xbrli:endDate>2022-12-31</xbrli:endDate></xbrli:period></xbrli:context>
+    <xbrli:context id="bs"><xbrli:period><xbrli:instant>2023-12-31</xbrli:instant></xbrli:period></xbrli:context>
+  </ix:resources></ix:header>
+  <table>
+    <tr><td>Turnover <ix:nonFraction name="core:TurnoverRevenue" contextRef="cy">3</ix:nonFraction></td>
+        <td><ix:nonFraction name="core:TurnoverRevenue" contextRef="cy">1,250,000</ix:nonFraction></td>
+        <td><ix:nonFraction name="core:TurnoverRevenue" contextRef="py">980,000</ix:nonFraction></td></tr>
+    <tr><td>Operating profit</td>
+        <td><ix:nonFraction name="core:OperatingProfitLoss" contextRef="py">10,000</ix:nonFraction></td>
+        <td><ix:nonFraction name="core:OperatingProfitLoss" contextRef="cy">(<span>42,000</span>)</ix:nonFraction></td></tr>
+    <tr><td>Net assets <ix:nonFraction name="core:NetAssetsLiabilities" contextRef="bs">310,500</ix:nonFraction></td></tr>
+    <tr><td>Employees <ix:nonFraction name="core:AverageNumberEmployeesDuringPeriod" contextRef="cy">17</ix:nonFraction></td></tr>
+    <tr><td><ix:nonNumeric name="bus:EntityCurrentLegalOrRegisteredName" contextRef="cy">ACME LTD</ix:nonNumeric></td></tr>
+  </table>
+</body>
+</html>
+"""
+
+
+def test_single_pass_collects_contexts_and_facts():
+    facts = parse_ixbrl_facts(ACCOUNTS)
+
+    assert facts.contexts == {"cy": "2023", "py": "2022"}
+    assert len(facts.numeric) == 7
+    assert ("core:OperatingProfitLoss", "(42,000)", "cy") in facts.numeric
+    assert facts.other == [("bus:EntityCurrentLegalOrRegisteredName", "ACME LTD", "cy")]
+
+
+def test_fields_selected_for_target_year():
+    facts = parse_ixbrl_facts(ACCOUNTS)
+
+    current = extract_financial_data(facts, target_year="2023")
+    assert current["turnover"] == 1250000
+    assert current["operating_profit"] == -42000
+    assert current["net_assets"] == 310500
+    assert current["employees"] == 17
+
+    previous = extract_financial_data(facts, target_year="2022")
+    assert previous["turnover"] == 980000
+    assert previous["operating_profit"] == 10000
+
+    # Without a year the largest plausible turnover wins
+    assert extract_financial_data(facts)["turnover"] == 1250000
+
+
+def test_unprefixed_and_case_insensitive_turnover():
+    facts = IXBRLFacts(numeric=[("TurnoverRevenue", "50,000", "c1")])
+    assert extract_financial_data(facts)["turnover"] == 50000
+
+    facts = IXBRLFacts(numeric=[("uk-bus:SalesRevenueNet", "75,000", "c1"), ("uk-bus:Note", "4", "c1")])
+    assert extract_financial_data(facts)["turnover"] == 75000
+
+
+@pytest.mark.asyncio
+async def test_filing_parsed_once_per_transaction():
+    store = {}
+
+    async def get_cache(key):
+        return store.get(key)
+
+    async def set_cache(key, value, ttl=3600):
+        store[key] = value
+        return True
+
+    service = CompaniesHouseService(api_key="key")
+    with patch.object(companies_house_cache, "get_cache", get_cache), \
+            patch.object(companies_house_cache, "set_cache", set_cache), \
+            patch("app.services.companies_house_service.parse_ixbrl_facts", side_effect=ixbrl_parser.parse_ixbrl_facts) as parse:
+        first = await service._parse_ixbrl_document(ACCOUNTS, target_year="2023", transaction_id="MzAxNjQ")
+        second = await CompaniesHouseService(api_key="key")._parse_ixbrl_document(ACCOUNTS, target_year="2023", transaction_id="MzAxNjQ")
+
+    assert first == second and first["turnover"] == 1250000
+    assert parse.call_count == 1
+    assert list(store) == ["companies_house:ixbrl:MzAxNjQ:2023"]
+
+
+@pytest.mark.asyncio
+async def test_regex_fallback_runs_off_the_event_loop():
+    import threading
+
+    threads = []
+
+    def regex_fallback(content, target_year=None):
+        threads.append(threading.current_thread())
+        return {"turnover": 500000}
+
+    service = CompaniesHouseService(api_key="key")
+    untagged = ACCOUNTS.replace("core:TurnoverRevenue", "core:Other")
+    with patch.object(service, "_extract_financial_data_regex", side_effect=regex_fallback):
+        data = await service._parse_ixbrl_document(untagged, target_year="2023")
+
+    assert data["turnover"] == 500000
+    assert threads and threads[0] is not threading.main_thread()
@@ -0,0 +1,61 @@
+"""
+Tests for ranked full-text knowledge base search
+"""
+import pytest
+from unittest.mock import MagicMock
+
+from sqlalchemy.dialects import postgresql
+
+from app.models.knowledge_base import KnowledgeBaseArticle
+from app.services.knowledge_base_service import KnowledgeBaseService
+
+
+def _article(article_id, title, content, summary=None):
+    return KnowledgeBaseArticle(id=article_id, tenant_id="tenant-1", title=title, content=content, summary=summary)
+
+
+def _service(rows):
+    db = MagicMock()
+    db.execute.return_value.all.return_value = rows
+    return KnowledgeBaseService(db, "tenant-1"), db
+
+
+def test_search_uses_full_text_index():
+    """Search is a single ranked tsquery match, not ILIKE scans"""
+    article = _article("a1", "Reset VPN password", "Steps to reset")
+    service, db = _service([(article, 0.5)])
+
+    assert service.search_articles("vpn password") == [article]
+
+    sql = str(db.execute.call_args.args[0].compile(dialect=postgresql.dialect()))
+    assert "websearch_to_tsquery" in sql
+    assert "search_vector @@" in sql
+    assert "ts_rank_cd" in sql
+    assert "ILIKE" not in sql.upper()
+
+
+@pytest.mark.asyncio
+async def test_ticket_suggestions_use_one_ranked_query():
+    """All ticket keywords go into one query and scores come from the database rank"""
+    printer = _article("a1", "Printer offline", "Check the printer cable")
+    vpn = _article("a2", "VPN drops", "Reconnect the client", summary="VPN troubleshooting")
+    service, db = _service([(printer, 0.62), (vpn, 0.2)])
+
+    ticket = MagicMock(subject="Printer offline again", description="The office printer shows offline after the VPN update")
+    suggestions = await service.suggest_articles_for_ticket(ticket, limit=5)
+
+    assert db.execute.call_count == 1
+    query_text = db.execute.call_args.args[0].compile().params
+    assert any(" or " in str(value) for value in query_text.values())
+    assert [s["article"].id for s in suggestions] == ["a1", "a2"]
+    assert [s["relevance_score"] for s in suggestions] == [62, 20]
+    assert suggestions[0]["matched_keyword"] in {"printer", "offline"}
+
+
+@pytest.mark.asyncio
+async def test_ticket_without_keywords_skips_query():
+    service, db = _service([])
+    ticket = MagicMock(subject="Hi", description=None)
+
+    assert await service.suggest_articles_for_ticket(ticket) == []
+    db.execute.assert_not_called()
@@ -0,0 +1,98 @@
+"""
+Tests for concurrent lead verification (LeadGenerationService, GoogleMapsService)
+"""
+import asyncio
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from app.services import google_maps_service
+from app.services.google_maps_service import GoogleMapsService
+from app.services.lead_generation_service import LeadGenerationService
+
+
+def _lead_service(maps, companies_house):
+    service = LeadGenerationService.__new__(LeadGenerationService)
+    service.google_maps_service = maps
+    service.companies_house_service = companies_house
+    return service
+
+
+@pytest.mark.asyncio
+async def test_postcode_geocode_shared_through_cache():
+    """A postcode is geocoded once; later lookups (any campaign) come from the cache"""
+    cache = {}
+
+    async def get_cache(key):
+        return cache.get(key)
+
+    async def set_cache(key, value, ttl=3600):
+        cache[key] = value
+        return True
+
+    service = GoogleMapsService(api_key="key")
+    service.geocode_address = AsyncMock(return_value={"geometry": {"location": {"lat": 52.6, "lng": -1.1}}})
+
+    with patch.object(google_maps_service, "get_cache", get_cache), patch.object(google_maps_service, "set_cache", set_cache):
+        first = await service.geocode_postcode("le1 1aa")
+        second = await GoogleMapsService(api_key="key").geocode_postcode("LE1 1AA")
+
+    assert first == second == {"lat": 52.6, "lng": -1.1}
+    service.geocode_address.assert_awaited_once_with("le1 1aa, UK")
+    assert list(cache) == ["geocode:postcode:LE11AA"]
+
+
+@pytest.mark.asyncio
+async def test_leads_verified_concurrently_with_bounded_fan_out():
+    in_flight = {"now": 0, "max": 0}
+
+    async def lookup(result):
+        in_flight["now"] += 1
+        in_flight["max"] = max(in_flight["max"], in_flight["now"])
+        await asyncio.sleep(0.01)
+        in_flight["now"] -= 1
+        return result
+
+    async def verify_business(name, postcode):
+        return await lookup({"verified_address": f"{name} address"})
+
+    async def search_company(name):
+        return await lookup({"company_number": name.upper()})
+
+    maps = MagicMock()
+    maps.verify_business = AsyncMock(side_effect=verify_business)
+    maps.close = AsyncMock()
+    companies_house = MagicMock()
+    companies_house.search_company = AsyncMock(side_effect=search_company)
+    companies_house.close = AsyncMock()
+    service = _lead_service(maps, companies_house)
+
+    businesses = [{"company_name": f"co{n}", "postcode": "LE1 1AA"} for n in range(6)]
+    businesses.append({"company_name": "no postcode", "business_sector": "Retail"})
+
+    with patch("app.services.lead_generation_service.settings.LEAD_ENRICHMENT_CONCURRENCY", 2):
+        enhanced = await service._enhance_businesses(businesses, {}, "IT Services")
+
+    assert [b["company_name"] for b in enhanced] == [b["company_name"] for b in businesses]
+    assert enhanced[0]["verified_address"] == "co0 address"
+    assert enhanced[0]["companies_house_number"] == "CO0"
+    assert enhanced[0]["business_sector"] == "IT Services"
+    assert enhanced[-1]["business_sector"] == "Retail" and "verified_address" not in enhanced[-1]
+    # Two leads at a time, each with its Maps and Companies House lookups in parallel
+    assert in_flight["max"] == 4
+    maps.close.assert_awaited_once()
+    companies_house.close.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_one_failed_lookup_keeps_the_other():
+    maps = MagicMock()
+    maps.verify_business = AsyncMock(side_effect=RuntimeError("quota"))
+    companies_house = MagicMock()
+    companies_house.search_company = AsyncMock(return_value={"company_number": "123"})
+    service = _lead_service(maps, companies_house)
+
+    business = await service._enhance_business_data({"company_name": "Acme", "postcode": "LE1 1AA"}, {})
+
+    assert business["companies_house_number"] == "123"
+    assert "verified_address" not in business
@@ -0,0 +1,117 @@
+"""
+Tests for streaming log triage (app.services.log_triage_service)
+"""
+import pytest
+
+from app.services.log_triage_service import (
+    LogTriage,
+    atriage_chunks,
+    compact_log_text,
+    is_log_digest,
+    line_template,
+    triage_chunks,
+)
+
+
+def _log(requests=2000):
+    lines = []
+    for i in range(requests):
+        lines.append(f"2025-03-01 10:{i // 60 % 60:02d}:{i % 60:02d},123 INFO [worker-{i % 8}] Request {i} completed in {i % 300}ms for 10.0.0.{i % 255}")
+        if i == 10:
+            lines += [
+                "2025-03-01 10:00:10,500 ERROR [main] Failed to load config",
+                "java.lang.IllegalStateException: missing key 'db.url'",
+                "\tat com.acme.Config.load(Config.java:42)",
+            ]
+    lines += [
+        "Traceback (most recent call last):",
+        '  File "/app/run.py", line 10, in <module>',
+        "ConnectionError: database at 10.0.0.5:5432 refused connection",
+        "2025-03-01 11:00:00 CRITICAL shutting down",
+    ]
+    return "\n".join(lines) + "\n"
+
+
+def test_templates_mask_variable_values():
+    assert line_template("2025-03-01 10:00:01 INFO Request 42 from 10.1.2.3:8080 user='bob'") == \
+        "INFO Request <NUM> from <IP> user=<STR>"
+    assert line_template("job 6f1c2a7e-9d1b-4c55-8f1e-2b7c9d0a1e23 done") == "job <UUID> done"
+
+
+def test_chunked_bytes_give_the_same_result_as_one_pass():
+    text = _log()
+    data = text.encode()
+    # Chunk boundaries split lines (and could split multi-byte characters)
+    chunked = triage_chunks(data[i:i + 777] for i in range(0, len(data), 777))
+    whole = LogTriage()
+    whole.feed(text)
+    whole.close()
+
+    assert chunked.lines == whole.lines == 2007
+    assert chunked.summary()["levels"] == {"INFO": 2000, "ERROR": 1, "CRITICAL": 1}
+    assert chunked.templates == whole.templates
+    assert chunked.first_timestamp == "2025-03-01 10:00:00,123"
+    assert chunked.last_timestamp == "2025-03-01 11:00:00"
+
+
+def test_digest_shows_errors_at_the_end_of_a_large_log():
+    text = _log(20000)
+    digest = compact_log_text(text, "app.log")
+
+    assert is_log_digest(digest)
+    assert len(digest) <= 6000 < len(text)
+    assert "app.log: 20,007 lines" in digest
+    assert "Levels: INFO 20,000, ERROR 1, CRITICAL 1" in digest
+    assert "java.lang.IllegalStateException: missing key 'db.url'" in digest
+    # The traceback is kept whole and the last error is present
+    assert "Traceback (most recent call last):\n  File \"/app/run.py\", line 10, in <module>\nConnectionError" in digest
+    assert "CRITICAL shutting down" in digest
+    assert "x20,000 INFO [worker-<NUM>] Request <NUM> completed in <NUM>ms for <IP>" in digest
+
+    # Short logs and existing digests pass through
+    assert compact_log_text("just one line") == "just one line"
+    assert compact_log_text(digest) == digest
+
+
+def test_repeated_errors_are_counted_once_and_memory_is_bounded():
+    triage = LogTriage(max_templates=10)
+    for i in range(500):
+        triage.feed(f"2025-03-01 10:00:00 ERROR timeout after {i}ms on shard {i % 3}\n")
+        triage.feed(f"unique line {'x' * (i % 40)} {chr(65 + i % 26)}\n")
+    triage.close()
+
+    assert triage.error_counts == {"ERROR timeout after <NUM>ms on shard <NUM>": 500}
+    assert len(triage.first_windows) == 1 and not triage.last_windows
+    assert len(triage.templates) == 10
+    assert triage.untracked_lines > 0
+    assert "seen 500 times" in triage.digest()
+
+
+def test_errors_past_the_signature_cap_still_reach_the_digest():
+    def word(n):
+        return chr(97 + n % 26) + chr(97 + n // 26)
+
+    triage = LogTriage(max_templates=200)
+    for i in range(300):
+        triage.feed(f"2025-03-01 10:00:00 ERROR failure in module {word(i)}\n")
+    triage.feed("2025-03-01 10:05:00 FATAL out of memory\n")
+    triage.close()
+
+    assert len(triage.error_counts) == 200
+    assert triage.error_occurrences == 301
+    digest = triage.digest()
+    assert "FATAL out of memory" in digest
+    assert "Distinct errors/stack traces: 200+ (301 occurrences)" in digest
+
+
+@pytest.mark.asyncio
+async def test_async_source_stops_at_read_limit():
+    async def chunks():
+        for _ in range(100):
+            yield b"2025-03-01 10:00:00 INFO ok\n" * 100
+
+    triage = await atriage_chunks(chunks(), name="big.log", max_bytes=10000)
+
+    assert triage.truncated is True
+    assert triage.size < 20000
+    assert "(read limit reached)" in triage.digest()
@@ -0,0 +1,46 @@
+"""
+Tests for SAR name redaction (app.services.name_redaction_service)
+"""
+import re
+from unittest.mock import MagicMock, patch
+
+from app.services import name_redaction_service
+from app.core.keyword_matcher import build_trie_pattern
+from app.services.name_redaction_service import NameRedactor, get_name_redactor
+
+
+def test_trie_pattern_prefers_longest_word():
+    """Shared prefixes collapse into one branch and the longest word wins"""
+    regex = re.compile(build_trie_pattern(["ann", "anna", "annabel", "bob"]))
+
+    assert [m.group(0) for m in regex.finditer("annabel anna ann bobby")] == ["annabel", "anna", "ann", "bob"]
+    assert build_trie_pattern([]) is None
+
+
+def test_redacts_other_people_but_keeps_subject():
+    """Other people's names and name parts are redacted in one pass; the subject's name stays"""
+    redactor = NameRedactor(["John Smith", "Jane Doe", "John Carter", "Al Bo"])
+
+    text = "John Smith emailed JANE DOE and Carter; Smith and John agreed. Al said hi."
+    assert redactor.redact(text, "John Smith") == (
+        "John Smith emailed [REDACTED] and [REDACTED]; Smith and [REDACTED] agreed. Al said hi."
+    )
+    assert redactor.redact(text, None).startswith("[REDACTED] emailed")
+    assert redactor.redact("", "John Smith") == ""
+
+
+def test_redactor_cached_until_people_change():
+    """The compiled matcher is reused while the tenant fingerprint is unchanged"""
+    name_redaction_service._redactors.clear()
+    db = MagicMock()
+    fingerprints = iter([(1, "t1", 0, None), (1, "t1", 0, None), (2, "t2", 0, None)])
+
+    with patch.object(name_redaction_service, "_tenant_people_fingerprint", side_effect=lambda *_: next(fingerprints)), \
+            patch.object(name_redaction_service, "_load_tenant_people_names", return_value=["Jane Doe"]) as load:
+        first = get_name_redactor(db, "tenant-1")
+        second = get_name_redactor(db, "tenant-1")
+        third = get_name_redactor(db, "tenant-1")
+
+    assert first is second
+    assert third is not first
+    assert load.call_count == 2
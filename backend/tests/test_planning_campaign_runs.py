@@ -0,0 +1,186 @@
+"""
+Tests for planning campaign runs (app.services.planning_service)
+"""
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from sqlalchemy.dialects import postgresql
+
+from app.models.planning import PlanningCampaignStatus
+from app.services import planning_service
+from app.tasks import planning_tasks
+
+
+@pytest.mark.asyncio
+async def test_prefetched_records_are_not_shared_between_tenants():
+    """Two tenants watching one county each classify and analyse their own copy"""
+    prefetched = [
+        {"reference": f"APP/{i}", "proposal": "New office", "date_validated": datetime.now(timezone.utc)}
+        for i in range(3)
+    ]
+    stored = {}
+
+    async def run(tenant_id):
+        campaign = SimpleNamespace(
+            id=f"campaign-{tenant_id}", days_to_monitor=14, enable_ai_analysis=True,
+            max_ai_analysis_per_run=20, max_results_per_run=None, is_scheduled=False, consecutive_failures=0,
+            include_residential=True, include_commercial=True, include_industrial=True,
+            include_change_of_use=True, exclude_keywords=None
+        )
+        with patch.object(planning_service, "AIAnalysisService"), \
+                patch.object(planning_service, "AIProviderService"):
+            service = planning_service.PlanningApplicationService(MagicMock(), tenant_id)
+        service.db.query.return_value.filter.return_value.first.return_value = campaign
+        classifier = MagicMock()
+        classifier.classify.return_value = (f"type-{tenant_id}", 50)
+
+        async def analyze(apps, tenant, limit):
+            for app in apps:
+                app.update({"ai_summary": f"summary for {tenant}"})
+            return apps
+
+        async def store(apps, campaign):
+            stored[tenant_id] = apps
+            return []
+
+        with patch.object(service, "_get_watermark", return_value=(None, set())), \
+                patch.object(service, "get_classifier", return_value=classifier), \
+                patch.object(service, "analyze_applications_with_ai", analyze), \
+                patch.object(service, "_store_applications", store), \
+                patch.object(service, "_advance_watermark"):
+            await service.run_campaign(campaign.id, prefetched=prefetched)
+
+    await run("tenant-a")
+    await run("tenant-b")
+
+    assert [app["ai_summary"] for app in stored["tenant-a"]] == ["summary for tenant-a"] * 3
+    assert [app["ai_summary"] for app in stored["tenant-b"]] == ["summary for tenant-b"] * 3
+    assert {app["application_type"] for app in stored["tenant-a"]} == {"type-tenant-a"}
+    # The shared portal records are untouched
+    assert all(set(record) == {"reference", "proposal", "date_validated"} for record in prefetched)
+
+
+def test_scheduled_draft_campaign_is_run_by_beat_task():
+    """A campaign scheduled straight after creation (still DRAFT) is picked up when due"""
+    campaign = SimpleNamespace(
+        id="campaign-1", tenant_id="tenant-a", county="Leicestershire",
+        status=PlanningCampaignStatus.DRAFT, consecutive_failures=0
+    )
+    db = MagicMock()
+    db.query.return_value.filter.return_value.all.return_value = [campaign]
+
+    async def prefetch(campaigns):
+        return {"leicestershire": []}
+
+    async def run_campaign(campaign_id, prefetched=None):
+        return {}
+
+    with patch.object(planning_tasks, "SessionLocal", return_value=db), \
+            patch.object(planning_tasks.PlanningApplicationService, "prefetch_portals", prefetch), \
+            patch.object(planning_tasks.PlanningApplicationService, "run_campaign", side_effect=run_campaign) as run:
+        result = planning_tasks.run_due_planning_campaigns_task.run()
+
+    assert result["campaigns_run"] == 1
+    run.assert_called_once_with("campaign-1", prefetched=[])
+    assert campaign.status == PlanningCampaignStatus.COMPLETED
+
+    status_filter = str(db.query.return_value.filter.call_args_list[0].args[2].compile(
+        dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True}
+    ))
+    assert "NOT IN ('ACTIVE', 'PAUSED')" in status_filter
+
+
+@pytest.mark.asyncio
+async def test_prefetched_records_use_campaign_county():
+    """Beat-task records are stored with the same county value as manual runs"""
+    class FakeFetcher:
+        async def __aenter__(self):
+            return self
+
+        async def __aexit__(self, *exc_info):
+            return False
+
+        async def fetch_portals(self, jobs):
+            return [[job["process"]({"fields": {}})] for job in jobs]
+
+    campaign = SimpleNamespace(county="leicestershire", max_results_per_run=None)
+    service_cls = planning_service.PlanningApplicationService
+    with patch.object(planning_service, "PlanningPortalFetcher", FakeFetcher), \
+            patch.object(service_cls, "_get_watermark", return_value=(None, set())), \
+            patch.object(service_cls, "_process_portal_record", side_effect=lambda record, county, name: (county, name)):
+        results = await service_cls.prefetch_portals([campaign])
+
+    assert results == {"leicestershire": [("leicestershire", "Leicestershire")]}
+
+
+def _watermark_campaign(watermark, max_results_per_run=None):
+    return SimpleNamespace(
+        id="campaign-1", county="Leicestershire", days_to_monitor=30, enable_ai_analysis=False,
+        max_ai_analysis_per_run=20, max_results_per_run=max_results_per_run, is_scheduled=False,
+        consecutive_failures=0, include_residential=True, include_commercial=True,
+        include_industrial=True, include_change_of_use=True, exclude_keywords=None,
+        portal_watermarks={"leicestershire": {"date": watermark.isoformat(), "references": ["APP/AT"]}}
+    )
+
+
+async def _run_with_watermark(campaign, fetched_records, stored_references):
+    with patch.object(planning_service, "AIAnalysisService"), \
+            patch.object(planning_service, "AIProviderService"):
+        service = planning_service.PlanningApplicationService(MagicMock(), "tenant-a")
+    service.db.query.return_value.filter.return_value.first.return_value = campaign
+    service.db.query.return_value.filter.return_value.all.return_value = [(ref,) for ref in stored_references]
+    classifier = MagicMock()
+    classifier.classify.return_value = ("commercial", 50)
+    stored = []
+    fetch_since = []
+
+    async def fetch(campaign, since=None):
+        fetch_since.append(since)
+        return [dict(record) for record in fetched_records]
+
+    async def store(apps, campaign):
+        stored.extend(app["reference"] for app in apps)
+        return []
+
+    with patch.object(service, "_fetch_portal_records", fetch), \
+            patch.object(service, "get_classifier", return_value=classifier), \
+            patch.object(service, "_store_applications", store):
+        await service.run_campaign(campaign.id)
+    return stored, fetch_since
+
+
+@pytest.mark.asyncio
+async def test_late_published_applications_below_watermark_are_processed():
+    """Records older than the watermark are re-fetched and kept unless already stored"""
+    watermark = datetime.now(timezone.utc) - timedelta(days=2)
+    campaign = _watermark_campaign(watermark)
+    fetched = [
+        {"reference": "APP/OLD", "proposal": "Office", "date_validated": (watermark - timedelta(days=1)).isoformat()},
+        {"reference": "APP/LATE", "proposal": "Office", "date_validated": (watermark - timedelta(days=1)).isoformat()},
+        {"reference": "APP/AT", "proposal": "Office", "date_validated": watermark.isoformat()},
+        {"reference": "APP/NEW", "proposal": "Office", "date_validated": (watermark + timedelta(days=1)).isoformat()},
+    ]
+
+    stored, fetch_since = await _run_with_watermark(campaign, fetched, stored_references=["APP/OLD", "APP/AT"])
+
+    assert sorted(stored) == ["APP/LATE", "APP/NEW"]
+    assert fetch_since == [watermark - timedelta(days=planning_service.settings.PLANNING_WATERMARK_OVERLAP_DAYS)]
+    assert campaign.portal_watermarks["leicestershire"]["date"] == (watermark + timedelta(days=1)).isoformat()
+
+
+@pytest.mark.asyncio
+async def test_watermark_does_not_advance_when_fetch_hits_record_limit():
+    """A fetch cut off at max_results_per_run may have skipped older records"""
+    watermark = datetime.now(timezone.utc) - timedelta(days=2)
+    campaign = _watermark_campaign(watermark, max_results_per_run=1)
+    fetched = [
+        {"reference": "APP/NEW", "proposal": "Office", "date_validated": (watermark + timedelta(days=1)).isoformat()},
+    ]
+
+    stored, _ = await _run_with_watermark(campaign, fetched, stored_references=[])
+
+    assert stored == ["APP/NEW"]
+    assert campaign.portal_watermarks["leicestershire"]["date"] == watermark.isoformat()
@@ -0,0 +1,60 @@
+"""
+Tests for compiled planning keyword classification
+(app.core.keyword_matcher, app.services.planning_classifier)
+"""
+from unittest.mock import MagicMock
+
+from app.core.keyword_matcher import KeywordMatcher
+from app.services.planning_classifier import PlanningKeywordClassifier
+
+
+def test_matcher_agrees_with_substring_checks():
+    """Nested and overlapping keywords are all found, as with `keyword in text`"""
+    keywords = ["data", "data centre", "centre", "tre", "office fit", "fit out", "warehouse"]
+    matcher = KeywordMatcher(keywords)
+
+    for text in [
+        "New DATA CENTRE with office fit out",
+        "warehousing extension",
+        "change of use",
+        "",
+    ]:
+        assert matcher.find(text) == {kw for kw in keywords if kw in text.lower()}
+
+
+def test_classifier_sums_weights_in_one_pass():
+    """Include weights are added, exclude weights subtracted, and the score is clamped"""
+    classifier = PlanningKeywordClassifier({
+        "include": [{"keyword": "Data Centre", "weight": 60}, {"keyword": "office", "weight": 30}],
+        "exclude": [{"keyword": "demolition", "weight": 50}]
+    })
+
+    assert classifier.classify("Erection of a data centre and office building") == ("commercial", 90)
+    assert classifier.classify("Demolition of office") == ("commercial", 0)
+    assert classifier.classify("Two storey house extension") == ("residential", 0)
+    assert classifier.classify("Change of use to data centre and office, plus data centre plant") == ("commercial", 90)
+    assert classifier.classify("") == ("other", 0)
+
+
+def test_classifier_keeps_zero_weights_and_defaults_missing_ones():
+    classifier = PlanningKeywordClassifier({
+        "include": [{"keyword": "office", "weight": 0}, {"keyword": "warehouse", "weight": None}]
+    })
+
+    assert classifier.weights == {"office": 0, "warehouse": 10}
+
+
+def test_classifier_loads_keywords_with_one_query():
+    """Keywords are read once; rows with other keyword types are ignored"""
+    db = MagicMock()
+    db.query.return_value.filter.return_value.all.return_value = [
+        ("fibre", "include", 40),
+        ("hospital", "commercial", 20),
+        ("listed building", "exclude", 15),
+    ]
+
+    classifier = PlanningKeywordClassifier.for_tenant(db, "tenant-1")
+
+    db.query.assert_called_once()
+    assert classifier.weights == {"fibre": 40, "listed building": -15}
+    assert classifier.classify("Fibre cabinet at hospital") == ("other", 40)
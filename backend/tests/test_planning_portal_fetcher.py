@@ -0,0 +1,101 @@
+"""
+Tests for concurrent planning portal fetching (app.services.planning_portal_fetcher)
+"""
+import asyncio
+from datetime import datetime, timezone
+
+import pytest
+
+from app.services.planning_portal_fetcher import PAGE_SIZE, PlanningPortalFetcher
+
+
+def _portal(**extra):
+    return {"name": "Testshire", "base_url": "https://portal.test/search", "dataset_id": "apps", "enabled": True, **extra}
+
+
+class FakePortalFetcher(PlanningPortalFetcher):
+    """Serves `total` numbered records per URL instead of calling the portal"""
+
+    def __init__(self, total, missing_urls=(), failing_urls=()):
+        super().__init__()
+        self.total = total
+        self.missing_urls = set(missing_urls)
+        self.failing_urls = set(failing_urls)
+        self.log = []
+
+    async def _get_page(self, url, params):
+        self.log.append(("get", url, params["start"]))
+        await asyncio.sleep(0)
+        if url in self.failing_urls:
+            raise RuntimeError("portal down")
+        if url in self.missing_urls:
+            return None
+        start = params["start"]
+        records = [{"n": n} for n in range(start, min(start + params["rows"], self.total))]
+        return {"nhits": self.total, "records": records, "params": params}
+
+    def process(self, record):
+        self.log.append(("process", record["n"]))
+        return record
+
+
+@pytest.mark.asyncio
+async def test_next_page_requested_before_current_page_is_processed():
+    fetcher = FakePortalFetcher(total=250)
+
+    records = await fetcher.fetch_portal(_portal(), fetcher.process, max_records=1000)
+
+    assert [r["n"] for r in records] == list(range(250))
+    requests = [entry[2] for entry in fetcher.log if entry[0] == "get"]
+    assert requests == [0, PAGE_SIZE, 2 * PAGE_SIZE]
+    # Page 2 was already requested when the first record of page 1 was processed
+    assert fetcher.log.index(("get", "https://portal.test/search", PAGE_SIZE)) < fetcher.log.index(("process", 0))
+
+
+@pytest.mark.asyncio
+async def test_stops_at_max_records_without_fetching_further():
+    fetcher = FakePortalFetcher(total=1000)
+
+    records = await fetcher.fetch_portal(_portal(), fetcher.process, max_records=150)
+
+    assert len(records) == 150
+    assert [entry[2] for entry in fetcher.log if entry[0] == "get"] == [0, PAGE_SIZE]
+
+
+@pytest.mark.asyncio
+async def test_falls_back_to_alternative_url_and_filters_from_watermark():
+    portal = _portal(alternative_urls=["https://alt.test/search"], date_field="date_validated")
+    fetcher = FakePortalFetcher(total=5, missing_urls=["https://portal.test/search"])
+    since = datetime(2024, 3, 1, tzinfo=timezone.utc)
+
+    records = await fetcher.fetch_portal(portal, fetcher.process, max_records=100, since=since)
+
+    assert len(records) == 5
+    assert portal["base_url"] == "https://alt.test/search"
+    gets = [entry[1] for entry in fetcher.log if entry[0] == "get"]
+    assert gets == ["https://portal.test/search", "https://alt.test/search"]
+
+
+@pytest.mark.asyncio
+async def test_portals_fetched_concurrently_with_errors_isolated():
+    fetcher = FakePortalFetcher(total=3, failing_urls=["https://down.test/search"])
+
+    results = await fetcher.fetch_portals([
+        {"portal_config": _portal(), "process": fetcher.process, "max_records": 10},
+        {"portal_config": _portal(base_url="https://down.test/search"), "process": fetcher.process, "max_records": 10},
+    ])
+
+    assert len(results[0]) == 3
+    assert results[1] == []
+    # Both portals were requested before either finished processing
+    first_process = next(i for i, entry in enumerate(fetcher.log) if entry[0] == "process")
+    assert {entry[1] for entry in fetcher.log[:first_process]} == {"https://portal.test/search", "https://down.test/search"}
+
+
+@pytest.mark.asyncio
+async def test_one_pooled_client_per_host():
+    async with PlanningPortalFetcher(max_connections_per_host=2) as fetcher:
+        client, limit = fetcher._host("https://portal.test/search?x=1")
+        assert fetcher._host("https://portal.test/other") == (client, limit)
+        assert fetcher._host("https://alt.test/search")[0] is not client
+    assert fetcher._hosts == {}
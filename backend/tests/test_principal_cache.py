@@ -0,0 +1,155 @@
+"""
+Tests for cached principal resolution (app.core.principal_cache)
+"""
+import asyncio
+import json
+import pytest
+from datetime import datetime, timezone
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from app.core import caching, principal_cache
+from app.models.tenant import User, Tenant, UserRole, TenantStatus
+
+
+class FakeRedis:
+    """Minimal in-memory stand-in for the redis.asyncio calls used by caching"""
+
+    def __init__(self):
+        self.store = {}
+
+    async def get(self, key):
+        return self.store.get(key)
+
+    async def setex(self, key, ttl, value):
+        self.store[key] = value
+
+    async def publish(self, channel, message):
+        pass
+
+
+def _make_user(**overrides):
+    values = dict(
+        id="user-1", tenant_id="tenant-1", email="jane@example.com", username="jane",
+        first_name="Jane", last_name="Doe", hashed_password="x", is_active=True,
+        is_verified=True, role=UserRole.TENANT_ADMIN, permissions=["quotes:read"],
+        preferences={"theme": "dark"}, last_login_at=datetime(2025, 1, 2, 3, 4, tzinfo=timezone.utc)
+    )
+    values.update(overrides)
+    return User(**values)
+
+
+def _fake_session_factory(instance, calls):
+    session = MagicMock()
+
+    async def execute(stmt):
+        calls.append(stmt)
+        result = MagicMock()
+        result.scalar_one_or_none.return_value = instance
+        return result
+
+    session.execute = execute
+    factory = MagicMock()
+    factory.return_value.__aenter__ = AsyncMock(return_value=session)
+    factory.return_value.__aexit__ = AsyncMock(return_value=False)
+    return factory
+
+
+@pytest.fixture
+def fake_redis():
+    redis_client = FakeRedis()
+    caching._local_cache.clear()
+    with patch.object(caching, "get_redis", AsyncMock(return_value=redis_client)):
+        yield redis_client
+    caching._local_cache.clear()
+
+
+def test_serialize_round_trip():
+    """Enums, datetimes and JSON columns survive the cache round trip"""
+    user = _make_user()
+    data = principal_cache._serialize(user)
+    json.dumps(data)
+
+    restored = principal_cache._deserialize(User, data)
+    assert restored.role is UserRole.TENANT_ADMIN
+    assert restored.last_login_at == user.last_login_at
+    assert restored.permissions == ["quotes:read"]
+
+    tenant = Tenant(id="tenant-1", name="Acme", slug="acme", status=TenantStatus.SUSPENDED)
+    restored_tenant = principal_cache._deserialize(Tenant, principal_cache._serialize(tenant))
+    assert restored_tenant.status is TenantStatus.SUSPENDED
+
+
+@pytest.mark.asyncio
+async def test_user_loaded_once_then_served_from_cache(fake_redis):
+    """Only the first lookup hits the database; callers get independent copies"""
+    calls = []
+    factory = _fake_session_factory(_make_user(), calls)
+
+    with patch("app.core.database.AsyncSessionLocal", factory):
+        first = await principal_cache.get_user_principal("user-1")
+        first.permissions.append("mutated")
+        second = await principal_cache.get_user_principal("user-1")
+
+    assert len(calls) == 1
+    assert second.email == "jane@example.com"
+    assert second.permissions == ["quotes:read"]
+    assert first is not second
+
+
+def test_commit_invalidates_updated_principals():
+    """Users/tenants flushed in a transaction are evicted after commit, not after rollback"""
+    session = SimpleNamespace(
+        info={},
+        dirty=[_make_user(is_active=False)],
+        deleted=[Tenant(id="tenant-9", name="Gone", slug="gone")]
+    )
+
+    with patch.object(principal_cache, "delete_cache_nowait") as delete_cache_nowait:
+        principal_cache._collect_principal_changes(session, None)
+        principal_cache._invalidate_committed_principals(session)
+
+        delete_cache_nowait.assert_called_once()
+        assert set(delete_cache_nowait.call_args.args) == {
+            "user:user-1:principal", "tenant:tenant-9:principal"
+        }
+
+        delete_cache_nowait.reset_mock()
+        principal_cache._collect_principal_changes(session, None)
+        principal_cache._discard_principal_changes(session)
+        principal_cache._invalidate_committed_principals(session)
+        delete_cache_nowait.assert_not_called()
+
+
+def test_secrets_are_not_cached():
+    """Password hashes and tenant API keys are left out of the cached entry"""
+    data = principal_cache._serialize(_make_user(hashed_password="$2b$secret"))
+    assert "hashed_password" not in data
+    assert principal_cache._deserialize(User, {**data, "hashed_password": "stale"}).hashed_password is None
+
+    tenant = Tenant(
+        id="tenant-1", name="Acme", slug="acme", company_description="We sell things",
+        openai_api_key="sk-1", companies_house_api_key="ch-1", google_maps_api_key="gm-1"
+    )
+    data = principal_cache._serialize(tenant)
+    assert data["company_description"] == "We sell things"
+    assert not {"openai_api_key", "companies_house_api_key", "google_maps_api_key"} & set(data)
+
+
+@pytest.mark.asyncio
+async def test_commit_on_event_loop_does_not_call_redis_inline():
+    """Invalidation from an AsyncSession commit evicts L1 now and deletes from Redis in a worker thread"""
+    caching._local_cache.set("user:user-1:principal", {"id": "user-1"})
+    session = SimpleNamespace(info={"principal_cache_invalidations": {"user:user-1:principal"}})
+    loop = asyncio.get_running_loop()
+
+    with patch.object(caching, "delete_cache_sync") as delete_cache_sync, \
+            patch.object(loop, "run_in_executor") as run_in_executor:
+        principal_cache._invalidate_committed_principals(session)
+
+    delete_cache_sync.assert_not_called()
+    assert caching._local_cache.get("user:user-1:principal") is None
+    func, keys = run_in_executor.call_args.args[1:]
+    with patch.object(caching, "delete_cache_sync") as delete_cache_sync:
+        func(keys)
+    delete_cache_sync.assert_called_once_with("user:user-1:principal")
@@ -0,0 +1,78 @@
+"""
+Tests for cached, offloaded quote document rendering (app.services.quote_document_render_service)
+"""
+import asyncio
+import pytest
+from datetime import datetime
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from app.services import quote_document_render_service as render_module
+from app.services.quote_document_render_service import (
+    QuoteDocumentRenderService,
+    rendered_document_object_name,
+)
+from app.services.document_generator_service import DocumentGeneratorService
+
+
+UPDATED_AT = datetime(2025, 3, 1, 12, 30, 0, 123456)
+
+
+def test_object_name_tracks_revision_and_template_version():
+    """Editing the quote or bumping the template version yields a new cache key"""
+    name = rendered_document_object_name("tenant-1", "quote-1", UPDATED_AT, "pdf")
+    assert name.startswith("quote_documents/tenant-1/quote-1/rendered/")
+    assert name.endswith(".pdf")
+    assert rendered_document_object_name("tenant-1", "quote-1", datetime(2025, 3, 2), "pdf") != name
+    with patch.object(DocumentGeneratorService, "TEMPLATE_VERSION", "99"):
+        assert rendered_document_object_name("tenant-1", "quote-1", UPDATED_AT, "pdf") != name
+
+
+@pytest.mark.asyncio
+async def test_cached_render_is_not_rerendered():
+    """An existing object is served from storage without touching the render pool"""
+    storage = MagicMock()
+    storage.file_exists = AsyncMock(return_value=True)
+    with patch.object(render_module, "_render", AsyncMock()) as render:
+        document = await QuoteDocumentRenderService("tenant-1", storage).get_document(
+            "quote-1", "Q-1", UPDATED_AT, "docx"
+        )
+    render.assert_not_called()
+    assert document.cached and document.content is None
+    assert document.filename == "quote_Q-1.docx"
+
+
+@pytest.mark.asyncio
+async def test_concurrent_misses_render_once_and_upload():
+    """Concurrent requests for the same revision share one render, which is cached"""
+    storage = MagicMock()
+    storage.file_exists = AsyncMock(return_value=False)
+    storage.upload_file = AsyncMock()
+
+    async def slow_render(tenant_id, quote_id, fmt):
+        await asyncio.sleep(0.01)
+        return b"%PDF-1.4"
+
+    with patch.object(render_module, "_render", side_effect=slow_render) as render:
+        service = QuoteDocumentRenderService("tenant-1", storage)
+        documents = await asyncio.gather(*(
+            service.get_document("quote-1", "Q-1", UPDATED_AT, "pdf") for _ in range(3)
+        ))
+
+    assert render.call_count == 1
+    assert all(document.content == b"%PDF-1.4" for document in documents)
+    assert documents[0].object_name == rendered_document_object_name("tenant-1", "quote-1", UPDATED_AT, "pdf")
+    assert render_module._inflight == {}
+
+
+@pytest.mark.asyncio
+async def test_storage_outage_falls_back_to_uncached_render():
+    """If object storage is down the document is still rendered and returned"""
+    storage = MagicMock()
+    storage.file_exists = AsyncMock(side_effect=ConnectionError("minio down"))
+    with patch.object(render_module, "_render", AsyncMock(return_value=b"docx-bytes")):
+        document = await QuoteDocumentRenderService("tenant-1", storage).get_document(
+            "quote-1", None, None, "docx"
+        )
+    assert document.content == b"docx-bytes"
+    assert document.object_name is None
+    storage.upload_file.assert_not_called()
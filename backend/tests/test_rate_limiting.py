@@ -0,0 +1,134 @@
+"""
+Tests for the sliding-window rate limiter (app.core.rate_limiting)
+and buffered security event logging
+"""
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from app.core import rate_limiting
+from app.core.rate_limiting import RateLimitMiddleware
+from app.models.security_event import SecurityEventType
+from app.services.security_event_service import BufferedSecurityEventLogger
+
+
+class FakeScript:
+    """Stands in for a registered Lua script: a plain counter per current-window key"""
+
+    def __init__(self):
+        self.calls = []
+        self.counts = {}
+
+    async def __call__(self, keys, args):
+        self.calls.append((keys, args))
+        limit, window_ms, elapsed_ms, cost = args
+        current = self.counts.get(keys[0], 0)
+        if current + cost > limit:
+            return [0, limit - current, window_ms - elapsed_ms]
+        self.counts[keys[0]] = current + cost
+        return [1, limit - current - cost, window_ms - elapsed_ms]
+
+
+def _redis_with_script():
+    script = FakeScript()
+    redis_client = MagicMock()
+    redis_client.register_script.return_value = script
+    return redis_client, script
+
+
+@pytest.mark.asyncio
+async def test_check_is_one_script_call():
+    """Each non-leased check is a single atomic script call with window keys"""
+    redis_client, script = _redis_with_script()
+    middleware = RateLimitMiddleware(None)
+
+    with patch.object(rate_limiting, "get_redis", AsyncMock(return_value=redis_client)):
+        allowed, remaining, reset = await middleware._check_rate_limit("ip:1.2.3.4", "login", 5, 60)
+
+    assert allowed is True
+    assert remaining == 4
+    assert 1 <= reset <= 60
+    assert len(script.calls) == 1
+    keys, args = script.calls[0]
+    assert keys[0].startswith("rate_limit:login:ip:1.2.3.4:")
+    assert int(keys[0].rsplit(":", 1)[1]) - int(keys[1].rsplit(":", 1)[1]) == 1
+    assert args[3] == 1
+    redis_client.register_script.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_authenticated_class_spends_local_lease():
+    """Authenticated requests reserve a batch once and spend it without Redis"""
+    redis_client, script = _redis_with_script()
+    middleware = RateLimitMiddleware(None)
+
+    with patch.object(rate_limiting, "get_redis", AsyncMock(return_value=redis_client)), \
+            patch.object(rate_limiting.settings, "RATE_LIMIT_LOCAL_BUCKET_ENABLED", True), \
+            patch.object(rate_limiting.settings, "RATE_LIMIT_LOCAL_BATCH", 10):
+        results = [await middleware._check_rate_limit("user:u1", "authenticated", 1000, 60) for _ in range(25)]
+
+    assert all(allowed for allowed, _, _ in results)
+    assert [args[3] for _, args in script.calls] == [10, 10, 10]
+    # Remaining counts down across leased and Redis-backed requests alike
+    assert [remaining for _, remaining, _ in results[:3]] == [999, 998, 997]
+
+
+@pytest.mark.asyncio
+async def test_lease_falls_back_to_single_token_then_rejects():
+    """Near the limit a full batch is refused, single tokens are used, then requests are rejected"""
+    redis_client, script = _redis_with_script()
+    middleware = RateLimitMiddleware(None)
+
+    with patch.object(rate_limiting, "get_redis", AsyncMock(return_value=redis_client)), \
+            patch.object(rate_limiting.settings, "RATE_LIMIT_LOCAL_BUCKET_ENABLED", True), \
+            patch.object(rate_limiting.settings, "RATE_LIMIT_LOCAL_BATCH", 10):
+        results = [await middleware._check_rate_limit("user:u1", "authenticated", 3, 60) for _ in range(4)]
+
+    assert [allowed for allowed, _, _ in results] == [True, True, True, False]
+    assert results[3][1] == 0
+
+
+@pytest.mark.asyncio
+async def test_rejection_logs_buffered_event():
+    """A 429 queues a security event instead of writing to the database inline"""
+    middleware = RateLimitMiddleware(None)
+    middleware._check_rate_limit = AsyncMock(return_value=(False, 0, 30))
+    middleware._get_client_id = MagicMock(return_value="user:u1")
+    request = MagicMock()
+    request.url.path = "/api/v1/customers"
+    request.client.host = "10.0.0.1"
+    buffer = MagicMock()
+
+    with patch("app.services.security_event_service.get_security_event_buffer", return_value=buffer):
+        response = await middleware.dispatch(request, AsyncMock())
+
+    assert response.status_code == 429
+    assert response.headers["Retry-After"] == "30"
+    kwargs = buffer.log_event.call_args.kwargs
+    assert kwargs["event_type"] == SecurityEventType.RATE_LIMIT_EXCEEDED
+    assert kwargs["user_id"] == "u1"
+
+
+@pytest.mark.asyncio
+async def test_buffered_events_written_in_one_transaction():
+    """Buffered events are flushed with one tenant lookup and one commit"""
+    session = MagicMock()
+    rows = MagicMock()
+    rows.all.return_value = [("u1", "tenant-1")]
+    session.execute = AsyncMock(return_value=rows)
+    session.commit = AsyncMock()
+    session_factory = MagicMock()
+    session_factory.return_value.__aenter__ = AsyncMock(return_value=session)
+    session_factory.return_value.__aexit__ = AsyncMock(return_value=False)
+
+    buffer = BufferedSecurityEventLogger(max_size=3, flush_interval=60)
+    for user_id in ("u1", "u1", "gone", "u1"):
+        buffer.log_event(SecurityEventType.RATE_LIMIT_EXCEEDED, "limited", user_id=user_id)
+
+    with patch("app.core.database.AsyncSessionLocal", session_factory):
+        await buffer.close()
+
+    assert buffer.dropped == 1
+    session.execute.assert_awaited_once()
+    session.commit.assert_awaited_once()
+    events = session.add_all.call_args.args[0]
+    assert [(e.user_id, e.tenant_id) for e in events] == [("u1", "tenant-1"), ("u1", "tenant-1"), (None, None)]
@@ -0,0 +1,144 @@
+"""
+Tests for streaming report exports (app.services.report_export_service, app.services.helpdesk_export_service)
+"""
+import csv
+import threading
+from datetime import datetime, timezone
+from io import BytesIO, StringIO
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import pytest
+from openpyxl import load_workbook
+from sqlalchemy.dialects import postgresql
+
+from app.services import report_export_service
+from app.services.helpdesk_export_service import export_query
+from app.services.report_export_service import ReportExportService
+
+ROWS = [{"Ticket": f"TKT-{i}", "Subject": "Printer, \"jammed\"", "Hours": i * 1.5} for i in range(50)]
+
+
+def _sql(stmt):
+    return str(stmt.compile(dialect=postgresql.dialect()))
+
+
+def test_csv_is_emitted_in_byte_chunks():
+    with patch.object(report_export_service, "CSV_CHUNK_SIZE", 256):
+        chunks = list(ReportExportService().iter_csv(iter(ROWS)))
+
+    assert len(chunks) > 1 and all(isinstance(chunk, bytes) for chunk in chunks)
+    parsed = list(csv.DictReader(StringIO(b"".join(chunks).decode("utf-8"))))
+    assert len(parsed) == 50
+    assert parsed[3] == {"Ticket": "TKT-3", "Subject": "Printer, \"jammed\"", "Hours": "4.5"}
+
+    # The in-memory helper returns the same bytes
+    assert ReportExportService().export_to_csv(ROWS).read() == b"".join(chunks)
+
+
+@pytest.mark.asyncio
+async def test_async_csv_with_no_rows_keeps_the_header():
+    async def rows():
+        return
+        yield
+
+    chunks = [chunk async for chunk in ReportExportService().aiter_csv(rows(), headers=["Ticket", "Subject"])]
+    assert b"".join(chunks) == b"Ticket,Subject\r\n"
+
+
+def test_write_only_workbook_round_trip():
+    service = ReportExportService()
+    with patch.object(report_export_service.settings, "EXPORT_XLSX_WIDTH_SAMPLE_ROWS", 10):
+        output = service.write_excel_file(iter(ROWS), {"Period": "2025-01-01 to 2025-01-31"})
+    content = b"".join(service.file_chunks(output))
+
+    sheet = load_workbook(BytesIO(content)).active
+    values = list(sheet.iter_rows(values_only=True))
+    assert values[0][0] == "Summary"
+    assert values[1][:2] == ("Period", "2025-01-01 to 2025-01-31")
+    assert values[3] == ("Ticket", "Subject", "Hours")
+    assert values[4] == ("TKT-0", "Printer, \"jammed\"", 0)
+    assert values[-1] == ("TKT-49", "Printer, \"jammed\"", 73.5)
+    assert len(values) == 4 + 50
+    # Widths come from the sampled rows, capped at 50
+    assert sheet.column_dimensions["B"].width == len("Printer, \"jammed\"") + 2
+    assert sheet.cell(row=4, column=1).font.bold
+
+
+@pytest.mark.asyncio
+async def test_async_workbook_is_written_off_the_event_loop():
+    loop_thread = threading.get_ident()
+    writer_threads = set()
+    add_rows = report_export_service._add_rows
+
+    def recording_add_rows(writer, rows):
+        writer_threads.add(threading.get_ident())
+        add_rows(writer, rows)
+
+    async def rows():
+        for row in ROWS:
+            yield row
+
+    service = ReportExportService()
+    with patch.object(report_export_service, "_add_rows", side_effect=recording_add_rows) as add:
+        output = await service.awrite_excel_file(rows(), batch_size=20)
+
+    assert add.call_count == 3
+    assert loop_thread not in writer_threads
+    values = list(load_workbook(BytesIO(b"".join(service.file_chunks(output)))).active.iter_rows(values_only=True))
+    assert values[0] == ("Ticket", "Subject", "Hours")
+    assert values[-1] == ("TKT-49", "Printer, \"jammed\"", 73.5)
+
+
+def test_ticket_report_is_one_ordered_query():
+    start = datetime(2025, 1, 1, tzinfo=timezone.utc)
+    end = datetime(2025, 1, 31, 23, 59, tzinfo=timezone.utc)
+    stmt, mapper = export_query("tickets", "tenant-1", start, end)
+
+    sql = _sql(stmt)
+    assert sql.count("SELECT") == 1
+    assert "LEFT OUTER JOIN customers" in sql and "LEFT OUTER JOIN users" in sql
+    assert sql.rstrip().endswith("ORDER BY tickets.created_at, tickets.id")
+    assert "LIMIT" not in sql
+
+    with pytest.raises(ValueError):
+        export_query("agents", "tenant-1", start, end)
+
+
+@pytest.mark.asyncio
+async def test_export_status_hidden_from_other_tenants():
+    from fastapi import HTTPException
+    from app.api.v1.endpoints import helpdesk
+
+    failed = SimpleNamespace(ready=lambda: True, successful=lambda: False, result=RuntimeError("customer 42 of tenant-2"))
+    owners = {helpdesk.export_task_owner_key("task-1"): "tenant-2"}
+
+    async def get_cache(key):
+        return owners.get(key)
+
+    with patch("app.core.caching.get_cache", get_cache), \
+            patch("celery.result.AsyncResult", return_value=failed):
+        with pytest.raises(HTTPException) as denied:
+            await helpdesk.get_helpdesk_export_status("task-1", None, SimpleNamespace(id="tenant-1"))
+        status = await helpdesk.get_helpdesk_export_status("task-1", None, SimpleNamespace(id="tenant-2"))
+
+    assert denied.value.status_code == 404
+    assert status == {"status": "failed", "error": "Export generation failed"}
+
+
+@pytest.mark.asyncio
+async def test_pdf_ticket_export_is_rejected_before_querying():
+    from unittest.mock import AsyncMock
+    from fastapi import HTTPException
+    from app.api.v1.endpoints import helpdesk
+
+    db = AsyncMock()
+    with pytest.raises(HTTPException) as rejected:
+        await helpdesk.export_helpdesk_analytics(
+            start_date=datetime(2020, 1, 1).date(), end_date=datetime(2025, 1, 1).date(),
+            format="pdf", report_type="tickets", background=False,
+            current_user=SimpleNamespace(id="user-1"), current_tenant=SimpleNamespace(id="tenant-1"), db=db
+        )
+
+    assert rejected.value.status_code == 400
+    db.execute.assert_not_awaited()
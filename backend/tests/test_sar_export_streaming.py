@@ -0,0 +1,93 @@
+"""
+Tests for streamed SAR exports (app.services.gdpr_service)
+"""
+import json
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+from app.services import gdpr_service
+from app.services.gdpr_service import GDPRService, SAR_DATA_SECTIONS, iter_sar_json
+from app.services.name_redaction_service import NameRedactor
+from app.services.storage_service import _ChunkReader
+
+
+def _report():
+    return {
+        "reference": "SAR-1",
+        "data": {section: [] for section in SAR_DATA_SECTIONS},
+        "tenant_id": "tenant-1"
+    }
+
+
+def test_json_stream_matches_whole_document():
+    """Streamed JSON is the same document as serializing the filled report, empty sections included"""
+    records = [("communications", {"n": 1}), ("communications", {"n": 2}), ("technical_data", {"n": 3})]
+
+    streamed = json.loads(b"".join(iter_sar_json(_report(), iter(records))))
+
+    assert streamed == {
+        "reference": "SAR-1",
+        "data": {"communications": [{"n": 1}, {"n": 2}], "contracts_and_accounts": [], "technical_data": [{"n": 3}]},
+        "tenant_id": "tenant-1"
+    }
+    assert json.loads(b"".join(iter_sar_json(_report(), iter([]))))["data"] == {s: [] for s in SAR_DATA_SECTIONS}
+
+
+def test_chunk_reader_reads_across_chunk_boundaries():
+    reader = _ChunkReader(iter([b"abc", b"de", b"fghij"]))
+
+    assert reader.read(4) == b"abcd"
+    assert reader.read(4) == b"efgh"
+    assert reader.read(4) == b"ij"
+    assert reader.read(4) == b""
+
+
+def test_store_export_keeps_only_a_sample_in_memory():
+    """All records are uploaded; the returned summary holds the first few plus counts"""
+    records = (("communications", {"n": n}) for n in range(40))
+    storage = MagicMock()
+    uploaded = {}
+    storage.upload_stream.side_effect = lambda chunks, object_name, **_: uploaded.setdefault(object_name, b"".join(chunks))
+    storage.get_presigned_url.return_value = "https://minio/export"
+    service = GDPRService(MagicMock())
+
+    with patch.object(service, "_build_sar_report", return_value=(_report(), records)), \
+            patch.object(gdpr_service, "get_storage_service", return_value=storage), \
+            patch.object(service, "generate_and_store_sar_document", return_value={"sar_id": "s1"}) as store_pdf:
+        summary = service.generate_and_store_sar_export("tenant-1", user_id="u1")
+
+    (path, body), = uploaded.items()
+    assert path.startswith("sar/tenant-1/") and path.endswith("/SAR-1.json")
+    assert len(json.loads(body)["data"]["communications"]) == 40
+    assert summary["record_counts"] == {"communications": 40, "contracts_and_accounts": 0, "technical_data": 0}
+    assert len(summary["data"]["communications"]) == gdpr_service.SAR_SUMMARY_SAMPLE_SIZE
+    assert store_pdf.call_args.kwargs["sar_data"]["record_counts"]["communications"] == 40
+    assert summary["document_info"]["export_download_url"] == "https://minio/export"
+
+
+def test_ticket_comments_loaded_once_per_batch():
+    """Comments are fetched with one query per ticket batch and follow their ticket"""
+    tickets = [
+        SimpleNamespace(id=f"t{n}", ticket_number=f"T-{n}", subject="s", cleaned_description="Ann Lee called",
+                        status=None, created_at=None)
+        for n in range(3)
+    ]
+    ticket_result = MagicMock()
+    ticket_result.partitions.return_value = iter([tickets[:2], tickets[2:]])
+    comment_batches = [
+        [SimpleNamespace(ticket_id="t1", comment="reply", created_at=None)],
+        [],
+    ]
+    db = MagicMock()
+    db.execute.side_effect = [ticket_result, *comment_batches, [], []]
+
+    records = list(GDPRService(db)._iter_sar_records(
+        "tenant-1", "Bob Ray", NameRedactor(["Ann Lee", "Bob Ray"]), customer_id="c1", contact_id="p1"
+    ))
+
+    assert [record.get("type") for _, record in records] == [
+        "Support Ticket", "Support Ticket", "Ticket Comment", "Support Ticket"
+    ]
+    assert records[0][1]["description"] == "[REDACTED] called"
+    # tickets + one comment query per batch + activities + quotes
+    assert db.execute.call_count == 5
@@ -0,0 +1,145 @@
+"""
+Tests for local embeddings and semantic retrieval (app.core.embeddings, app.services.semantic_index_service)
+"""
+import numpy as np
+import pytest
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+from app.core.embeddings import HashingEncoder, VectorIndex, similar_pairs
+from app.services.semantic_index_service import SemanticIndexService
+
+
+ENCODER = HashingEncoder(384)
+
+
+def test_hashing_encoder_ranks_related_text_higher():
+    """Texts sharing vocabulary score above unrelated text and vectors are normalized"""
+    query, related, unrelated = ENCODER.encode([
+        "Printer on second floor is not printing",
+        "Second floor printer stopped printing documents",
+        "Reset my email password for Outlook"
+    ])
+    assert np.isclose(np.linalg.norm(query), 1.0)
+    assert float(query @ related) > float(query @ unrelated)
+
+
+def test_vector_index_upsert_remove_and_search():
+    """Index grows past its capacity, replaces, removes and honours exclude/min_score"""
+    index = VectorIndex(3, initial_capacity=1)
+    index.upsert(["a", "b", "c"], np.eye(3, dtype=np.float32))
+    assert len(index) == 3
+
+    query = np.array([0.9, 0.1, 0.0], dtype=np.float32)
+    assert [item for item, _ in index.search(query, k=2)[0]] == ["a", "b"]
+    assert [item for item, _ in index.search(query, k=1, exclude={"a"})[0]] == ["b"]
+    assert index.search(query, k=3, min_score=0.5)[0] == [("a", pytest.approx(0.9))]
+
+    index.remove(["a"])
+    index.upsert(["c"], np.array([[1.0, 0.0, 0.0]], dtype=np.float32))
+    assert "a" not in index and len(index) == 2
+    assert index.search(query, k=1)[0][0][0] == "c"
+
+
+def test_similar_pairs_and_grouping():
+    """Pairs above the threshold are connected into groups"""
+    vectors = np.array([[1, 0], [0.99, 0.14], [0, 1], [0.1, 0.99]], dtype=np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    pairs = similar_pairs(vectors, 0.9)
+    assert {(i, j) for i, j, _ in pairs} == {(0, 1), (2, 3)}
+
+    tickets = [SimpleNamespace(id=f"t{n}") for n in range(4)]
+    groups = SemanticIndexService.group_pairs([(tickets[i], tickets[j], s) for i, j, s in pairs])
+    assert sorted(sorted(group) for group in groups) == [["t0", "t1"], ["t2", "t3"]]
+
+
+def test_find_similar_articles_syncs_incrementally():
+    """Only rows changed since the watermark are re-read; unpublished articles drop out"""
+    now = datetime(2025, 1, 1)
+
+    def row(article_id, title, published=True, updated=now):
+        return SimpleNamespace(
+            id=article_id, title=title, summary="", content="",
+            is_published=published, is_deleted=False, updated_at=updated
+        )
+
+    articles = {
+        "kb-1": SimpleNamespace(id="kb-1", title="Fix printer paper jam"),
+        "kb-2": SimpleNamespace(id="kb-2", title="Configure VPN client"),
+    }
+    db = MagicMock()
+    db.execute.return_value.all.side_effect = [
+        [row("kb-1", "Fix printer paper jam"), row("kb-2", "Configure VPN client")],
+        [row("kb-1", "Fix printer paper jam", published=False, updated=now + timedelta(minutes=1))],
+    ]
+    db.query.return_value.filter.return_value.all.side_effect = lambda: list(articles.values())
+
+    service = SemanticIndexService(db, "tenant-semantic-test")
+    first = service.find_similar_articles("printer paper jam in tray 2", limit=2, min_score=0.1)
+    assert first[0][0].id == "kb-1"
+
+    second = service.find_similar_articles("printer paper jam in tray 2", limit=2, min_score=0.1)
+    assert all(article.id != "kb-1" for article, _ in second)
+    assert "updated_at >=" in str(db.execute.call_args.args[0])
+
+
+def test_ticket_index_prunes_deleted_tickets(monkeypatch):
+    """Tickets deleted after indexing are pruned on the interval and dropped when hit"""
+    from app.services import semantic_index_service
+
+    now = datetime(2025, 1, 1)
+
+    def row(ticket_id, subject):
+        return SimpleNamespace(id=ticket_id, subject=subject, description="", updated_at=now)
+
+    db = MagicMock()
+    db.execute.return_value.all.side_effect = [
+        [row("t-1", "Printer not printing"), row("t-2", "Printer paper jam"), row("t-3", "VPN keeps dropping")],
+        [],
+    ]
+    db.execute.return_value.scalars.return_value.all.return_value = ["t-1", "t-2"]
+    service = SemanticIndexService(db, "tenant-prune-test")
+
+    assert len(service._sync_tickets()) == 3
+    monkeypatch.setattr(semantic_index_service.settings, "SEMANTIC_INDEX_PRUNE_INTERVAL", 0)
+    index = service._sync_tickets()
+    assert "t-3" not in index and len(index) == 2
+
+    # A hit deleted between prunes is forgotten once the ticket rows are loaded
+    db.query.return_value.filter.return_value.all.return_value = []
+    ticket = SimpleNamespace(id="t-new", subject="Printer not printing paper", description="")
+    monkeypatch.setattr(semantic_index_service.settings, "SEMANTIC_INDEX_PRUNE_INTERVAL", 3600)
+    db.execute.return_value.all.side_effect = [[]]
+    assert service.find_similar_tickets(ticket, min_score=0.1) == []
+    assert len(index) == 0
+
+
+def test_ticket_sync_rereads_lag_window_and_caps_index(monkeypatch):
+    """Rows committed late below the watermark are indexed; the oldest tickets are evicted past the cap"""
+    from app.services import semantic_index_service
+
+    now = datetime(2025, 1, 1)
+
+    def row(ticket_id, updated):
+        return SimpleNamespace(id=ticket_id, subject=f"Subject {ticket_id}", description="", updated_at=updated)
+
+    monkeypatch.setattr(semantic_index_service.settings, "SEMANTIC_INDEX_MAX_TICKETS", 3)
+    monkeypatch.setattr(semantic_index_service.settings, "SEMANTIC_INDEX_SYNC_LAG", 60)
+    db = MagicMock()
+    db.execute.return_value.all.side_effect = [
+        [row("t-1", now - timedelta(minutes=5)), row("t-2", now)],
+        # t-2 re-read unchanged from the lag window, t-3 committed late with an older timestamp
+        [row("t-2", now), row("t-3", now - timedelta(seconds=30)), row("t-4", now + timedelta(minutes=1))],
+    ]
+    service = SemanticIndexService(db, "tenant-lag-test")
+    encode = MagicMock(side_effect=ENCODER.encode)
+    monkeypatch.setattr(service.encoder, "encode", encode)
+
+    service._sync_tickets()
+    index = service._sync_tickets()
+
+    assert "updated_at >=" in str(db.execute.call_args.args[0])
+    assert sorted(index.ids()) == ["t-2", "t-3", "t-4"]
+    # Only the new rows were encoded on the second sync
+    assert len(encode.call_args.args[0]) == 2
@@ -0,0 +1,161 @@
+"""
+Tests for set-based SLA breach scanning (app.services.sla_breach_scanner)
+"""
+from datetime import datetime, timezone
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.sql import Insert, Select, Update
+
+from app.models.helpdesk import TicketPriority
+from app.services import sla_breach_scanner
+from app.services.sla_breach_scanner import SLABreachScanner
+
+NOW = datetime(2025, 6, 2, 12, 0, tzinfo=timezone.utc)
+
+
+def _sql(stmt):
+    return str(stmt.compile(dialect=postgresql.dialect()))
+
+
+def _row(ticket_id, tenant_id, priority, elapsed, first_response_overdue, resolution_overdue, **overrides):
+    fields = {
+        "id": ticket_id,
+        "tenant_id": tenant_id,
+        "ticket_number": f"TKT-{ticket_id}",
+        "priority": priority,
+        "assigned_to_id": None,
+        "related_contract_id": None,
+        "sla_policy_id": "policy-1",
+        "sla_first_response_breached": False,
+        "sla_resolution_breached": False,
+        "sla_target_hours": 24,
+        "first_response_hours": 4,
+        "elapsed_hours": elapsed,
+        "first_response_overdue": first_response_overdue,
+        "resolution_overdue": resolution_overdue,
+    }
+    fields.update(overrides)
+    return SimpleNamespace(**fields)
+
+
+class ScanSession:
+    """Answers the scanner's statements and records them"""
+
+    def __init__(self, violations):
+        self.violations = violations
+        self.statements = []
+        self.commit = AsyncMock()
+        self.rollback = AsyncMock()
+
+    async def execute(self, stmt, params=None):
+        self.statements.append((stmt, params))
+        result = MagicMock()
+        if isinstance(stmt, Select) and "sla_policies.escalation_critical_percent" in _sql(stmt) and "tickets" not in _sql(stmt):
+            result.all.return_value = [SimpleNamespace(id="policy-1", name="Gold", escalation_critical_percent=150)]
+        elif isinstance(stmt, Select):
+            result.all.return_value = self.violations
+        elif isinstance(stmt, Update) and "RETURNING" in _sql(stmt):
+            escalated = {TicketPriority.LOW: TicketPriority.MEDIUM, TicketPriority.HIGH: TicketPriority.URGENT}
+            result.all.return_value = [
+                SimpleNamespace(id=row.id, tenant_id=row.tenant_id, priority=escalated[row.priority])
+                for row in self.violations if row.priority != TicketPriority.URGENT
+            ]
+        return result
+
+    def of(self, kind, table):
+        return [(stmt, params) for stmt, params in self.statements if isinstance(stmt, kind) and stmt.table.name == table]
+
+
+@pytest.fixture
+def publisher():
+    publisher = MagicMock()
+    publisher.publish_sla_breaches = AsyncMock()
+    publisher.publish_tickets_bulk_updated = AsyncMock()
+    notifications = MagicMock()
+    notifications.return_value.send_breach_notification = AsyncMock()
+    with patch("app.core.events.get_event_publisher", return_value=publisher), \
+            patch("app.services.dashboard_kpi_service.schedule_dashboard_kpi_refresh") as schedule, \
+            patch("app.services.sla_notification_service.SLANotificationService", notifications):
+        publisher.schedule = schedule
+        publisher.notifications = notifications
+        yield publisher
+
+
+def test_one_query_for_all_open_tickets():
+    sql = _sql(SLABreachScanner(None).violations_query(NOW))
+
+    assert sql.count("SELECT") == 1
+    assert "LEFT OUTER JOIN sla_policies" in sql
+    assert "coalesce(tickets.sla_first_response_hours, sla_policies.first_response_hours)" in sql
+    assert "EXTRACT(epoch FROM" in sql
+    assert "tickets.tenant_id =" not in sql and "hashtext" not in sql
+
+    partitioned = _sql(SLABreachScanner(None).violations_query(NOW, partition=1, partitions=4))
+    assert "abs(mod(hashtext(tickets.tenant_id)" in partitioned
+
+
+@pytest.mark.asyncio
+async def test_new_breaches_flagged_and_alerted_in_bulk(publisher):
+    session = ScanSession([
+        _row("t1", "tenant-a", TicketPriority.LOW, 5.0, True, False),
+        _row("t2", "tenant-a", TicketPriority.HIGH, 48.0, True, True),
+        # Already flagged: still a violation, but no new alert
+        _row("t3", "tenant-b", TicketPriority.URGENT, 30.0, False, True, sla_resolution_breached=True),
+    ])
+
+    with patch.object(sla_breach_scanner.settings, "HELPDESK_BULK_CHUNK_SIZE", 1000):
+        result = await SLABreachScanner(session).run()
+
+    assert [v["violation_type"] for v in result["violations"]] == ["first_response", "first_response", "resolution"]
+    assert result["violations"][2]["overdue_hours"] == 6.0
+
+    updates = session.of(Update, "tickets")
+    assert len(updates) == 1
+    assert "CASE WHEN" in _sql(updates[0][0])
+
+    inserts = session.of(Insert, "sla_breach_alerts")
+    assert len(inserts) == 1
+    rows = inserts[0][1]
+    assert [(r["ticket_id"], r["breach_type"], r["breach_percent"], r["alert_level"]) for r in rows] == [
+        ("t1", "first_response", 125, "warning"),
+        ("t2", "first_response", 1200, "critical"),
+        ("t2", "resolution", 200, "critical"),
+    ]
+    assert result["escalated"] == []
+    session.commit.assert_awaited_once()
+
+    publisher.publish_sla_breaches.assert_awaited_once()
+    tenant_id, alerts = publisher.publish_sla_breaches.await_args.args
+    assert tenant_id == "tenant-a" and len(alerts) == 3 and alerts[0]["sla_policy_name"] == "Gold"
+    assert publisher.notifications.return_value.send_breach_notification.await_count == 3
+    publisher.schedule.assert_called_once_with("tenant-a")
+
+
+@pytest.mark.asyncio
+async def test_escalation_raises_priority_with_history(publisher):
+    session = ScanSession([
+        _row("t1", "tenant-a", TicketPriority.LOW, 30.0, False, True, sla_resolution_breached=True),
+        _row("t2", "tenant-b", TicketPriority.URGENT, 30.0, False, True, sla_resolution_breached=True),
+    ])
+
+    result = await SLABreachScanner(session).run(escalate=True)
+
+    assert result["escalated"] == [{
+        "ticket_id": "t1",
+        "tenant_id": "tenant-a",
+        "ticket_number": "TKT-t1",
+        "old_priority": "low",
+        "new_priority": "medium",
+        "reason": "SLA violation: resolution overdue by 6.0 hours",
+    }]
+    escalation = _sql(session.of(Update, "tickets")[0][0])
+    assert "CASE WHEN (tickets.priority =" in escalation and "RETURNING" in escalation
+    history = session.of(Insert, "ticket_history")[0][1]
+    assert history[0]["field_name"] == "priority" and history[0]["new_value"] == "medium"
+    assert session.of(Insert, "ticket_comments")[0][1][0]["is_internal"] is True
+    assert session.of(Insert, "sla_breach_alerts") == []
+    session.commit.assert_awaited_once()
+    publisher.publish_tickets_bulk_updated.assert_awaited_once_with("tenant-a", ["t1"], {"sla_escalated": True})
@@ -0,0 +1,135 @@
+"""
+Tests for cached, token-budgeted agent chat context (app.services.ticket_agent_assistant_service)
+"""
+import asyncio
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from app.core import caching
+from app.models.helpdesk import Ticket, TicketAgentChat, TicketComment
+from app.services import ticket_agent_assistant_service as assistant
+from app.services import ticket_context_cache
+from app.services.ticket_agent_assistant_service import TicketAgentAssistantService, build_context
+
+SECTIONS = {
+    "header": "=== TICKET INFORMATION ===\nTicket Number: TKT-1",
+    "comments": [f"\nAgent - 2025-01-0{i}:\n" + "x" * 40 for i in range(1, 6)],
+    "attachments": ["\nAttachment: big.log\n" + "y" * 400, "\nAttachment: small.txt\nok"],
+}
+
+
+def _messages(count):
+    return [{"role": "user" if i % 2 == 0 else "assistant", "content": f"message {i}"} for i in range(count)]
+
+
+def test_context_keeps_header_and_newest_comments_within_budget():
+    context = build_context(SECTIONS, budget=52)
+
+    assert context.startswith(SECTIONS["header"])
+    assert "2025-01-05" in context and "2025-01-04" in context
+    assert "2025-01-01" not in context
+    assert "(3 earlier comments omitted)" in context
+    assert "small.txt" in context and "big.log" not in context
+    assert "(1 attachments omitted)" in context
+
+
+def test_history_folds_in_batches():
+    with patch.object(assistant.settings, "AGENT_CHAT_RECENT_MESSAGES", 4), \
+            patch.object(assistant.settings, "AGENT_CHAT_HISTORY_TOKEN_BUDGET", 1000):
+        plan = TicketAgentAssistantService.plan_history
+        assert plan(_messages(7)) == (0, 0)
+        assert plan(_messages(8)) == (0, 4)
+        # Already summarised through message 4: wait for another batch
+        assert plan(_messages(11), 4) == (4, 4)
+        assert plan(_messages(12), 4) == (4, 8)
+        # A summary from a different conversation is ignored
+        assert plan(_messages(3), 9) == (0, 0)
+
+    with patch.object(assistant.settings, "AGENT_CHAT_HISTORY_TOKEN_BUDGET", 8):
+        # Over budget: fold everything but the last message
+        assert TicketAgentAssistantService.plan_history(_messages(3)) == (0, 2)
+
+
+@pytest.mark.asyncio
+async def test_context_loaded_from_cache():
+    service = TicketAgentAssistantService(None, "tenant-1")
+    with patch.object(assistant, "get_cached_ticket_context", AsyncMock(return_value=SECTIONS)), \
+            patch.object(service, "_load_ticket_sections", AsyncMock()) as load:
+        data = await service._load_ticket_context("ticket-1")
+
+    load.assert_not_awaited()
+    assert data["cached"] is True
+    assert data["context"].startswith(SECTIONS["header"])
+
+
+def test_commits_evict_touched_tickets():
+    session = SimpleNamespace(
+        new=[TicketComment(ticket_id="t1"), TicketAgentChat(ticket_id="t3")],
+        dirty=[Ticket(id="t2")],
+        deleted=[],
+        info={}
+    )
+    with patch.object(ticket_context_cache, "delete_cache_nowait") as delete:
+        ticket_context_cache._collect_ticket_context_changes(session, None)
+        ticket_context_cache._invalidate_committed_ticket_context(session)
+
+    assert sorted(delete.call_args.args) == ["ticket_agent_context:t1", "ticket_agent_context:t2"]
+    assert session.info == {}
+
+
+@pytest.mark.asyncio
+async def test_commit_on_event_loop_deletes_from_redis_off_the_loop():
+    session = SimpleNamespace(new=[TicketComment(ticket_id="t1")], dirty=[], deleted=[], info={})
+    loop = asyncio.get_running_loop()
+
+    with patch.object(caching, "delete_cache_sync") as delete_cache_sync, \
+            patch.object(loop, "run_in_executor") as run_in_executor:
+        ticket_context_cache._collect_ticket_context_changes(session, None)
+        ticket_context_cache._invalidate_committed_ticket_context(session)
+
+    delete_cache_sync.assert_not_called()
+    assert run_in_executor.call_args.args[2] == ("ticket_agent_context:t1",)
+
+
+def test_session_hooks_registered_centrally():
+    from sqlalchemy import event
+    from sqlalchemy.orm import Session
+    from app.core.database import register_session_hooks
+
+    register_session_hooks()
+    assert event.contains(Session, "after_commit", ticket_context_cache._invalidate_committed_ticket_context)
+
+
+@pytest.mark.asyncio
+async def test_chat_sends_summary_and_recent_turns():
+    service = TicketAgentAssistantService(None, "tenant-1")
+    calls = []
+
+    async def generate(**kwargs):
+        calls.append(kwargs)
+        content = "summary of 0-3" if kwargs["system_prompt"] == assistant.SUMMARY_SYSTEM_PROMPT else "answer"
+        return SimpleNamespace(content=content, model="m", usage={})
+
+    ai_service = MagicMock()
+    ai_service.generate_with_rendered_prompts = generate
+    prompt_service = MagicMock()
+    prompt_service.return_value.get_prompt = AsyncMock(return_value=None)
+
+    with patch.object(assistant.settings, "AGENT_CHAT_RECENT_MESSAGES", 4), \
+            patch.object(assistant.settings, "AGENT_CHAT_HISTORY_TOKEN_BUDGET", 1000), \
+            patch.object(assistant, "SessionLocal"), \
+            patch.object(assistant, "AIPromptService", prompt_service), \
+            patch.object(assistant, "AIProviderService", return_value=ai_service), \
+            patch.object(service, "_load_ticket_context", AsyncMock(return_value={"context": "CTX"})):
+        result = await service.chat("ticket-1", _messages(9), history_summary="old", history_summary_count=1)
+
+    assert len(calls) == 2
+    assert "[EXISTING SUMMARY]\nold" in calls[0]["user_prompt"]
+    assert "message 0" not in calls[0]["user_prompt"] and "message 4" in calls[0]["user_prompt"]
+    prompt = calls[1]["user_prompt"]
+    assert "summary of 0-3" in prompt
+    assert "message 4" not in prompt and "USER: message 8" in prompt
+    assert result["history_summary"] == "summary of 0-3"
+    assert result["history_summary_count"] == 5
@@ -0,0 +1,90 @@
+"""
+Tests for set-based bulk ticket operations (app.services.ticket_bulk_service)
+"""
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from sqlalchemy import update
+from sqlalchemy.dialects import postgresql
+
+from app.models.helpdesk import Ticket, TicketStatus
+from app.services import ticket_bulk_service
+from app.services.ticket_bulk_service import TicketBulkService, TicketsNotFoundError, tags_expression
+
+
+def _sql(stmt):
+    return str(stmt.compile(dialect=postgresql.dialect()))
+
+
+class RecordingSession:
+    """Returns the requested ids (minus `missing`) from each UPDATE ... RETURNING"""
+
+    def __init__(self, missing=()):
+        self.missing = set(missing)
+        self.statements = []
+        self.commit = AsyncMock()
+        self.rollback = AsyncMock()
+
+    async def execute(self, stmt):
+        self.statements.append(stmt)
+        ids = stmt.compile(dialect=postgresql.dialect()).params["param_1"]
+        result = MagicMock()
+        result.scalars.return_value.all.return_value = [i for i in ids if i not in self.missing]
+        return result
+
+
+@pytest.fixture
+def publisher():
+    publisher = MagicMock()
+    publisher.publish_tickets_bulk_updated = AsyncMock()
+    with patch("app.core.events.get_event_publisher", return_value=publisher), \
+            patch("app.services.dashboard_kpi_service.schedule_dashboard_kpi_refresh") as schedule:
+        publisher.schedule = schedule
+        yield publisher
+
+
+@pytest.mark.asyncio
+async def test_bulk_close_chunks_set_based_updates(publisher):
+    """Ids are deduplicated, updated per chunk with ANY + RETURNING and one event per chunk"""
+    session = RecordingSession()
+    ids = ["t1", "t2", "t3", "t2", "t4", "t5"]
+
+    with patch.object(ticket_bulk_service.settings, "HELPDESK_BULK_CHUNK_SIZE", 2):
+        updated = await TicketBulkService(session, "tenant-1").close(ids, TicketStatus.CLOSED)
+
+    assert updated == ["t1", "t2", "t3", "t4", "t5"]
+    assert len(session.statements) == 3
+    sql = _sql(session.statements[0])
+    assert "= ANY (" in sql and "tickets.tenant_id =" in sql and "RETURNING tickets.id" in sql
+    assert "closed_at" in sql
+    session.commit.assert_awaited_once()
+    assert publisher.publish_tickets_bulk_updated.await_count == 3
+    assert publisher.publish_tickets_bulk_updated.await_args_list[0].args[2] == {"status": "closed"}
+    publisher.schedule.assert_called_once_with("tenant-1")
+
+
+@pytest.mark.asyncio
+async def test_missing_ticket_rolls_back_everything(publisher):
+    """A selection with an unknown id changes nothing"""
+    session = RecordingSession(missing={"t3"})
+
+    with pytest.raises(TicketsNotFoundError) as exc:
+        await TicketBulkService(session, "tenant-1").assign(["t1", "t2", "t3"], "user-1")
+
+    assert exc.value.missing_ids == ["t3"]
+    session.rollback.assert_awaited_once()
+    session.commit.assert_not_called()
+    publisher.publish_tickets_bulk_updated.assert_not_called()
+
+
+def test_tag_expressions_use_jsonb_operators():
+    """Add removes then appends (unique tags); remove uses jsonb - text[]"""
+    add_sql = _sql(update(Ticket).values(tags=tags_expression(add_tags=["vip", "vip", "urgent"])))
+    assert "jsonb_typeof" in add_sql
+    assert "END - %(param_2)s::TEXT[]) || %(param_3)s::JSONB" in add_sql
+    assert "updated_at=now()" in add_sql
+
+    remove_sql = _sql(update(Ticket).values(tags=tags_expression(remove_tags=["old"])))
+    assert " - " in remove_sql and " || " not in remove_sql
+
+    assert tags_expression() is None
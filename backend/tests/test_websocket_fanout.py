@@ -0,0 +1,107 @@
+"""
+Tests for backpressured WebSocket fan-out (app.core.websocket)
+"""
+import asyncio
+import json
+import pytest
+from unittest.mock import patch
+
+from app.core import websocket as websocket_module
+from app.core.websocket import ClientConnection, WebSocketManager
+
+
+class FakeWebSocket:
+    """Records sent text; optionally blocks until released"""
+
+    def __init__(self, blocked: bool = False):
+        self.sent = []
+        self.closed = False
+        self.release = asyncio.Event()
+        if not blocked:
+            self.release.set()
+
+    async def send_text(self, text):
+        await self.release.wait()
+        self.sent.append(text)
+
+    async def close(self):
+        self.closed = True
+
+
+async def _connect(manager, websocket, tenant_id="tenant-1", user_id="user-1"):
+    with patch.object(manager, "_subscribe_to_tenant"):
+        manager.subscribed_tenants.add(tenant_id)
+        await manager.connect(websocket, tenant_id, user_id)
+
+
+async def _settle():
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+@pytest.mark.asyncio
+async def test_slow_client_does_not_delay_others():
+    """A blocked socket backs up only its own queue; the event is serialized once"""
+    manager = WebSocketManager()
+    slow, fast = FakeWebSocket(blocked=True), FakeWebSocket()
+    await _connect(manager, slow, user_id="slow")
+    await _connect(manager, fast, user_id="fast")
+
+    events = [
+        {"type": "quote.created", "tenant_id": "tenant-1", "data": {"quote_id": quote_id}}
+        for quote_id in ("q1", "q2")
+    ]
+    with patch.object(websocket_module.json, "dumps", wraps=json.dumps) as dumps:
+        for event in events:
+            await manager._broadcast_to_tenant("tenant-1", event)
+    await _settle()
+
+    assert dumps.call_count == 2
+    assert fast.sent == [json.dumps(event) for event in events]
+    assert slow.sent == []
+    # First message is in flight on the blocked socket, second waits in its queue
+    assert manager.get_stats()["queue_depth_max"] == 1
+
+    slow.release.set()
+    await _settle()
+    assert slow.sent == fast.sent
+    await manager.close()
+
+
+def test_progress_events_coalesce_and_full_queue_drops_progress_first():
+    """Queued progress updates are replaced in place; overflow evicts coalescible entries first"""
+    connection = ClientConnection(FakeWebSocket(), "tenant-1", "user-1", max_queue=3)
+    progress_key = websocket_module._coalesce_key(
+        {"type": "campaign.progress", "data": {"campaign_id": "c1"}}
+    )
+
+    connection.enqueue("p1", progress_key)
+    connection.enqueue("a")
+    connection.enqueue("p2", progress_key)
+    assert [text for _, text in connection._queue] == ["p2", "a"]
+    assert connection.coalesced == 1
+
+    connection.enqueue("b")
+    connection.enqueue("c")
+    assert [text for _, text in connection._queue] == ["a", "b", "c"]
+    assert connection.dropped == 1
+
+    connection.enqueue("d")
+    assert [text for _, text in connection._queue] == ["b", "c", "d"]
+    assert connection.dropped == 2
+
+
+@pytest.mark.asyncio
+async def test_stalled_client_is_disconnected():
+    """A send exceeding the timeout removes and closes the connection"""
+    manager = WebSocketManager()
+    stalled = FakeWebSocket(blocked=True)
+    with patch.object(websocket_module.settings, "WEBSOCKET_SEND_TIMEOUT", 0.01):
+        await _connect(manager, stalled)
+        assert manager.send_to_connection(stalled, "tenant-1", "user-1", {"type": "ping"})
+        await asyncio.sleep(0.05)
+
+    assert stalled.closed
+    assert manager.active_connections == {}
+    assert manager.get_stats()["failed_connections"] == 1
+    await manager.close()
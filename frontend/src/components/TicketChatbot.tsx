@@ -225,6 +225,13 @@ const TicketChatbot: React.FC<TicketChatbotProps> = ({ ticketId }) => {
     if (!files) return;
 
     Array.from(files).forEach((file) => {
+      if (/\.(log|out|err)$/i.test(file.name)) {
+        // Logs are digested server-side so the whole file is considered, not just its head
+        helpdeskAPI.triageAgentChatLog(ticketId, file)
+          .then((response) => setLogFiles((prev) => [...prev, response.data.digest]))
+          .catch((err: any) => setError(err.response?.data?.detail || `Failed to process ${file.name}`));
+        return;
+      }
       const reader = new FileReader();
       reader.onload = (e) => {
         const content = e.target?.result as string;
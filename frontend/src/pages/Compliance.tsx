@@ -758,7 +758,16 @@ const Compliance: React.FC = () => {
         <DialogActions>
           {sarExport && (sarExport as any).document_info && (
             <Button
-              onClick={() => sarExport && downloadJSON(sarExport, `sar-export-${Date.now()}.json`)}
+              onClick={() => {
+                if (!sarExport) return;
+                // Full export is streamed to storage; the response only holds a summary
+                const exportUrl = (sarExport as any).document_info.export_download_url;
+                if (exportUrl) {
+                  window.open(exportUrl, '_blank');
+                } else {
+                  downloadJSON(sarExport, `sar-export-${Date.now()}.json`);
+                }
+              }}
             >
               Download JSON
             </Button>
@@ -511,6 +511,13 @@ export const helpdeskAPI = {
     attachments?: Array<{ filename: string; content: string; type?: string }>;
     log_files?: string[];
   }) => apiClient.post(`/helpdesk/tickets/${ticketId}/agent-chat`, data),
+  triageAgentChatLog: (ticketId: string, file: File) => {
+    const formData = new FormData();
+    formData.append('file', file);
+    return apiClient.post(`/helpdesk/tickets/${ticketId}/agent-chat/log-triage`, formData, {
+      headers: { 'Content-Type': 'multipart/form-data' }
+    });
+  },
   getAgentChatHistory: (ticketId: string) => apiClient.get(`/helpdesk/tickets/${ticketId}/agent-chat`),
   getAgentChatTaskStatus: (ticketId: string, taskId: string) => apiClient.get(`/helpdesk/tickets/${ticketId}/agent-chat/task/${taskId}`),
   saveChatToNPA: (ticketId: string, messageId: string, npaId?: string, createNew?: boolean) => 
@@ -590,6 +597,8 @@ export const helpdeskAPI = {
       params: { start_date: startDate, end_date: endDate, format, report_type: reportType },
       responseType: 'blob'
     }),
+  getAnalyticsExportStatus: (taskId: string) =>
+    apiClient.get(`/helpdesk/analytics/export/status/${taskId}`),
   // Pattern Detection endpoints
   detectCustomerPatterns: (customerId: string, limitPerCustomer: number = 20, minTicketsPerPattern: number = 3) =>
     apiClient.post(`/helpdesk/tickets/patterns/customer/${customerId}`, {
@@ -607,8 +616,8 @@ export const helpdeskAPI = {
 export const customerHealthAPI = {
   getHealth: (customerId: string, daysBack: number = 90) => 
     apiClient.get(`/customers/${customerId}/health`, { params: { days_back: daysBack } }),
-  getTimeline: (customerId: string, limit: number = 50, activityTypes?: string[]) => 
-    apiClient.get(`/customers/${customerId}/timeline`, { params: { limit, activity_types: activityTypes } }),
+  getTimeline: (customerId: string, limit: number = 50, activityTypes?: string[], cursor?: string) => 
+    apiClient.get(`/customers/${customerId}/timeline`, { params: { limit, activity_types: activityTypes, cursor } }),
   getDailySummary: (customerId: string, date?: string) => 
     apiClient.get(`/customers/${customerId}/timeline/daily-summary`, { params: { date } }),
 };